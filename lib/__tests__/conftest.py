@@ -0,0 +1,47 @@
+"""
+Fixtures compartidas de la suite
+"""
+
+import os
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import pytest
+
+# OLLAMA_HOST tiene prioridad sobre models.yml: la suite no depende del entorno.
+# Se quita antes de importar los módulos de test (config_manager se construye una vez)
+os.environ.pop('OLLAMA_HOST', None)
+
+
+@pytest.fixture(autouse=True)
+def no_ollama_host_env(monkeypatch):
+    """Ningún test hereda un OLLAMA_HOST fijado por otro"""
+    monkeypatch.delenv('OLLAMA_HOST', raising=False)
+
+
+@pytest.fixture
+def simulated_manager():
+    """Fábrica de OllamaManager contra un OllamaSimulator.
+
+    `simulated_manager(models=[...], vram_bytes=...)` arranca el simulador con esos
+    argumentos (sin esperas reales salvo que se pase `time_scale`) y retorna
+    (manager, simulador). Sin CLI de ollama y con el uso por modelo en memoria.
+    Todo se detiene al terminar el test.
+    """
+    from ollama_simulator import OllamaSimulator
+    from ollama_manager import OllamaManager
+    from config_manager import config_manager
+    from eviction_policy import UsageTracker
+
+    with ExitStack() as stack:
+        def start(**simulator_options):
+            simulator_options.setdefault('time_scale', 0)
+            sim = stack.enter_context(OllamaSimulator(**simulator_options))
+            stack.enter_context(patch.object(config_manager.config, 'ollama_host', sim.url))
+            stack.enter_context(patch('ollama_manager.subprocess.run', side_effect=FileNotFoundError("ollama")))
+            manager = OllamaManager()
+            manager.usage = UsageTracker()
+            stack.callback(manager.http.close)
+            return manager, sim
+
+        yield start
@@ -0,0 +1,124 @@
+"""
+Pruebas unitarias para AsyncOllamaManager
+Tests para la fachada asyncio sobre OllamaManager: streaming NDJSON, concurrencia
+acotada y el mismo comportamiento (CLI, métricas, pool HTTP) que el manager síncrono
+"""
+
+import asyncio
+
+import pytest
+import requests
+
+import async_ollama
+from async_ollama import AsyncOllamaManager
+from ollama_simulator import SimulatedModel, GIB
+
+
+@pytest.fixture
+def manager(simulated_manager):
+    """qwen instalado y mistral disponible en el registry del simulador"""
+    manager, _ = simulated_manager(models=[SimulatedModel("qwen2.5-coder:latest", size_bytes=5 * GIB)],
+                                   registry=[SimulatedModel("mistral:latest", size_bytes=GIB)])
+    return manager
+
+
+class TestAsyncOllamaManager:
+    """Suite de pruebas para AsyncOllamaManager"""
+
+    @pytest.mark.asyncio
+    async def test_list_and_ps_share_the_pooled_transport(self, manager):
+        async with AsyncOllamaManager(manager) as aio:
+            installed = await aio.list_installed_models()
+            assert [m.name for m in installed] == ["qwen2.5-coder:latest"]
+            assert await aio.get_running_models() == []
+            assert await aio.check_ollama_running() is True
+
+        stats = manager.get_transport_stats()
+        assert stats['requests_total'] >= 3
+        assert stats['connections_reused'] >= 1
+
+    @pytest.mark.asyncio
+    async def test_pull_stream_yields_progress(self, manager):
+        async with AsyncOllamaManager(manager) as aio:
+            events = [event async for event in aio.pull_stream("mistral:latest")]
+            assert events[0]["status"] == "pulling manifest"
+            assert events[-1]["status"] == "success"
+            assert any(event.get("total") for event in events)
+
+            assert await aio.pull_model("mistral:latest") is True
+        assert manager.metrics.value('pulls_total', {'model': "mistral:latest", 'result': 'success'}) == 1
+
+    @pytest.mark.asyncio
+    async def test_generate_stream_stop_and_show(self, manager):
+        async with AsyncOllamaManager(manager) as aio:
+            chunks = [chunk async for chunk in aio.generate_stream("qwen2.5-coder:latest", "hola",
+                                                                    options={"num_predict": 4})]
+            assert chunks[-1]["done"] is True
+            result = await aio.generate("qwen2.5-coder:latest", "hola", options={"num_predict": 4})
+            assert result["response"] == "".join(chunk.get("response", "") for chunk in chunks)
+            assert await aio.get_running_models() == ["qwen2.5-coder:latest"]
+
+            # Sin CLI de ollama, stop_model usa keep_alive=0 como el manager síncrono
+            assert await aio.stop_model("qwen2.5-coder:latest") is True
+            assert await aio.get_running_models() == []
+
+            info = await aio.get_model_info("qwen2.5-coder:latest")
+            assert "details" in info
+
+    @pytest.mark.asyncio
+    async def test_gather_is_bounded(self, manager):
+        in_flight, peak = 0, 0
+
+        async def operation(i):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if i == 3:
+                raise ValueError("falla")
+            return i
+
+        aio = AsyncOllamaManager(manager, max_concurrency=2)
+        results = await aio.gather(*(operation(i) for i in range(6)))
+
+        assert peak == 2
+        assert results[:3] == [0, 1, 2] and isinstance(results[3], ValueError)
+
+    @pytest.mark.asyncio
+    async def test_stream_errors_propagate(self, manager):
+        manager.ollama_host = "http://127.0.0.1:9"
+        aio = AsyncOllamaManager(manager)
+        with pytest.raises(requests.RequestException):
+            async for _ in aio.pull_stream("qwen2.5-coder:latest"):
+                pass
+        assert await aio.generate("qwen2.5-coder:latest", "hola") is None
+
+    @pytest.mark.asyncio
+    async def test_stream_buffer_is_bounded(self, manager, monkeypatch):
+        """Un consumidor lento frena al hilo productor en lugar de acumular elementos"""
+        monkeypatch.setattr(async_ollama, 'STREAM_BUFFER', 4)
+        produced = []
+        closed = []
+
+        def open_stream():
+            try:
+                for i in range(1000):
+                    produced.append(i)
+                    yield i
+            finally:
+                closed.append(True)
+
+        aio = AsyncOllamaManager(manager)
+        stream = aio._iterate(open_stream)
+        assert await stream.__anext__() == 0
+        await asyncio.sleep(0.2)
+        # Como mucho el búfer lleno, el elemento entregado y el que espera para entrar
+        assert len(produced) <= 4 + 2
+
+        await stream.aclose()
+        for _ in range(20):
+            if closed:
+                break
+            await asyncio.sleep(0.05)
+        assert closed and len(produced) < 1000
@@ -0,0 +1,116 @@
+"""
+Pruebas unitarias para Benchmark
+Tests para la conversión de tiempos de /api/generate, los objetivos RNF-01 y la comparación de ejecuciones
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from benchmark import (
+    BenchSample, CaseResult, ModelResult, BenchmarkReport, BenchmarkRunner, BenchmarkTargets,
+    build_prompt, compare_reports
+)
+from eviction_policy import UsageTracker
+from ollama_manager import WarmLoadResult
+from config_manager import ModelConfig
+
+
+def _response(prompt_tokens=2000, prompt_eval_s=1.0, eval_tokens=100, eval_s=4.0, load_s=0.0):
+    total = prompt_eval_s + eval_s + load_s + 0.05
+    return {"prompt_eval_count": prompt_tokens, "prompt_eval_duration": int(prompt_eval_s * 1e9),
+            "eval_count": eval_tokens, "eval_duration": int(eval_s * 1e9),
+            "load_duration": int(load_s * 1e9), "total_duration": int(total * 1e9)}
+
+
+def _manager(response_data):
+    manager = MagicMock()
+    manager.ollama_host = "http://localhost:11434"
+    manager.usage = UsageTracker()
+    manager.list_installed_models.return_value = [SimpleNamespace(name="qwen:latest")]
+    manager.load_model.return_value = WarmLoadResult("qwen:latest", True, load_seconds=3.0)
+    manager.keep_alive_for.return_value = "30m"
+    manager.http.post.return_value = MagicMock(status_code=200, json=MagicMock(return_value=response_data))
+    return manager
+
+
+class TestBenchSample:
+    """Tiempos derivados de la respuesta de Ollama"""
+
+    def test_rates_and_ttft(self):
+        sample = BenchSample.from_response(_response(load_s=2.0))
+        assert sample.prompt_tokens_per_sec == 2000
+        assert sample.tokens_per_sec == 25
+        # TTFT excluye la carga: prompt-eval + overhead + un token
+        assert abs(sample.ttft_s - (1.0 + 0.05 + 0.04)) < 1e-6
+
+    def test_build_prompt_is_repeatable(self):
+        assert build_prompt(512, 1) == build_prompt(512, 1)
+        assert build_prompt(512, 0) != build_prompt(512, 1)
+        assert len(build_prompt(2048)) >= 2048 * 4
+
+
+class TestTargets:
+    """Evaluación de los objetivos RNF-01"""
+
+    def test_flags_slow_model(self):
+        result = ModelResult(key="big", model="big:latest", cases=[
+            CaseResult(context_tokens=128, tokens_per_sec=12, ttft_s=0.3, samples=3),
+            CaseResult(context_tokens=2048, tokens_per_sec=11, ttft_s=2.5, samples=3),
+        ])
+        failures = result.evaluate(BenchmarkTargets())
+        assert len(failures) == 2
+        assert not result.passed
+
+    def test_passing_model(self):
+        result = ModelResult(key="qwen", model="qwen:latest", cases=[
+            CaseResult(context_tokens=128, tokens_per_sec=30, ttft_s=0.2, samples=3),
+            CaseResult(context_tokens=2048, tokens_per_sec=28, ttft_s=1.1, samples=3),
+        ])
+        assert result.evaluate(BenchmarkTargets()) == []
+        assert result.passed
+
+    def test_targets_from_config(self):
+        targets = BenchmarkTargets.from_config({'min_tokens_per_sec': 40})
+        assert targets.min_tokens_per_sec == 40
+        assert targets.max_ttft_s == 2.0
+
+
+class TestRunner:
+    """Ejecución sobre OllamaManager"""
+
+    def test_run_measures_every_context(self):
+        manager = _manager(_response())
+        runner = BenchmarkRunner(manager, context_lengths=[2048, 128], repeats=2)
+        report = runner.run({"qwen": ModelConfig(name="qwen:latest", description="", tokens_per_sec=25)})
+
+        result = report.models[0]
+        assert [case.context_tokens for case in result.cases] == [128, 2048]
+        assert manager.http.post.call_count == 4
+        assert result.load_s == 3.0
+        assert result.declared_tokens_per_sec == 25
+        payload = manager.http.post.call_args.kwargs['json']
+        assert payload["options"]["num_ctx"] == manager.load_model.call_args.kwargs['options']["num_ctx"]
+        assert manager.usage.get("qwen:latest").request_count == 4
+
+    def test_not_installed_is_skipped(self):
+        manager = _manager(_response())
+        report = BenchmarkRunner(manager).run({"x": ModelConfig(name="missing:latest", description="")})
+        assert report.models[0].error == "no instalado"
+        manager.load_model.assert_not_called()
+
+
+class TestReport:
+    """Persistencia JSON y comparación entre ejecuciones"""
+
+    def test_save_load_and_compare(self, tmp_path):
+        previous = BenchmarkReport(created_at="t0", models=[ModelResult(key="qwen", model="qwen:latest", cases=[
+            CaseResult(context_tokens=128, tokens_per_sec=30, ttft_s=0.2, samples=3)])])
+        path = previous.save(tmp_path / "bench.json")
+
+        current = BenchmarkReport(created_at="t1", models=[ModelResult(key="qwen", model="qwen:latest", cases=[
+            CaseResult(context_tokens=128, tokens_per_sec=24, ttft_s=0.2, samples=3)])])
+        rows = compare_reports(current, BenchmarkReport.load(path))
+
+        assert len(rows) == 1
+        assert rows[0]['regression'] is True
+        assert abs(rows[0]['tokens_per_sec_change'] + 0.2) < 1e-9
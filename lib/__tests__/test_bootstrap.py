@@ -0,0 +1,112 @@
+"""
+Pruebas unitarias para DependencyBootstrap
+Tests para la huella de requirements.txt, el sello del venv, el wheelhouse sin red
+y el tiempo de arranque que informa el lanzador
+"""
+
+import subprocess
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+import bootstrap
+from bootstrap import (
+    DependencyBootstrap, FAILED, INSTALLED, SKIPPED, launch_elapsed_ms, requirements_fingerprint
+)
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Proyecto con requirements.txt y sin wheelhouse"""
+    monkeypatch.delenv(bootstrap.WHEELHOUSE_ENV, raising=False)
+    (tmp_path / 'requirements.txt').write_text("rich>=13\nrequests\n")
+    return tmp_path
+
+
+def completed(returncode=0, stderr=""):
+    return subprocess.CompletedProcess([], returncode, stdout="", stderr=stderr)
+
+
+class TestFingerprint:
+    """Huella de requirements.txt + intérprete"""
+
+    def test_changes_with_requirements_and_interpreter(self, project):
+        requirements = project / 'requirements.txt'
+        base = requirements_fingerprint(requirements, "3.11.7")
+
+        assert requirements_fingerprint(requirements, "3.11.7") == base
+        assert requirements_fingerprint(requirements, "3.12.1") != base
+        requirements.write_text("rich>=13\nrequests\npyyaml\n")
+        assert requirements_fingerprint(requirements, "3.11.7") != base
+
+
+class TestDependencyBootstrap:
+    """Suite de pruebas para DependencyBootstrap"""
+
+    def test_installs_once_then_skips(self, project):
+        runner = MagicMock(return_value=completed())
+        deps = DependencyBootstrap(project, python=sys.executable, runner=runner)
+
+        first = deps.ensure()
+        assert first.status == INSTALLED
+        assert runner.call_count == 2  # pip --upgrade pip + requirements
+        assert runner.call_args.args[0][:4] == [sys.executable, '-m', 'pip', 'install']
+        assert runner.call_args.args[0][-2:] == ['-r', str(project / 'requirements.txt')]
+        assert deps.read_stamp()['fingerprint'] == first.fingerprint
+
+        runner.reset_mock()
+        second = deps.ensure()
+        assert second.skipped and second.ok
+        runner.assert_not_called()
+
+    def test_changed_requirements_or_force_reinstall(self, project):
+        runner = MagicMock(return_value=completed())
+        deps = DependencyBootstrap(project, python=sys.executable, runner=runner)
+        deps.ensure()
+
+        (project / 'requirements.txt').write_text("rich>=14\n")
+        assert not deps.is_current()
+        assert deps.ensure().status == INSTALLED
+        assert deps.ensure(force=True).status == INSTALLED
+        assert deps.ensure().status == SKIPPED
+
+    def test_failed_install_keeps_previous_stamp(self, project):
+        runner = MagicMock(side_effect=[completed(), completed(1, "Collecting rich\nERROR: No matching distribution")])
+        deps = DependencyBootstrap(project, python=sys.executable, runner=runner)
+
+        result = deps.ensure()
+        assert result.status == FAILED and not result.ok
+        assert result.error == "ERROR: No matching distribution"
+        assert not deps.stamp_path.exists()
+
+    def test_missing_pip_binary(self, project):
+        deps = DependencyBootstrap(project, python=sys.executable, runner=MagicMock(side_effect=OSError("no pip")))
+        assert deps.ensure().status == FAILED
+
+    def test_missing_requirements(self, tmp_path):
+        deps = DependencyBootstrap(tmp_path, python=sys.executable, runner=MagicMock())
+        assert deps.ensure().status == FAILED
+
+    def test_wheelhouse_installs_offline(self, project, monkeypatch):
+        (project / 'wheelhouse').mkdir()
+        deps = DependencyBootstrap(project, python=sys.executable)
+        command = deps.pip_command('-r', 'requirements.txt')
+        assert command[command.index('--find-links') + 1] == str(project / 'wheelhouse')
+        assert '--no-index' in command
+
+        monkeypatch.setenv(bootstrap.WHEELHOUSE_ENV, '/srv/wheels')
+        assert DependencyBootstrap(project, python=sys.executable).wheelhouse.as_posix() == '/srv/wheels'
+
+    def test_without_wheelhouse_uses_index(self, project):
+        command = DependencyBootstrap(project, python=sys.executable).pip_command('-r', 'requirements.txt')
+        assert '--no-index' not in command
+
+
+def test_launch_elapsed_ms(monkeypatch):
+    monkeypatch.delenv(bootstrap.LAUNCH_START_ENV, raising=False)
+    assert launch_elapsed_ms() is None
+
+    # `$EPOCHREALTIME` con separador decimal de locale español
+    monkeypatch.setenv(bootstrap.LAUNCH_START_ENV, "1000,250")
+    assert launch_elapsed_ms(now=1000.5) == pytest.approx(250.0)
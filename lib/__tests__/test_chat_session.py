@@ -0,0 +1,86 @@
+"""
+Pruebas unitarias para ChatSession
+Tests para el parser NDJSON incremental, las métricas en vivo (TTFT, tokens/s),
+el historial y la cancelación con Ctrl+C contra el servidor simulado
+"""
+
+import json
+import pytest
+
+from chat_session import ChatSession, ChatStats, NDJSONParser, iter_events
+from ollama_simulator import SimulatedModel, GIB
+from config_manager import ModelConfig
+
+
+@pytest.fixture
+def manager(simulated_manager):
+    """Simulador a 25 tok/s sin esperas reales"""
+    manager, _ = simulated_manager(
+        models=[SimulatedModel("qwen2.5-coder:latest", size_bytes=5 * GIB, tokens_per_sec=25)])
+    return manager
+
+
+class TestNDJSONParser:
+    """Suite de pruebas para NDJSONParser"""
+
+    def test_objects_split_across_chunks(self):
+        parser = NDJSONParser()
+        data = (json.dumps({"message": {"content": "señal"}}) + "\n" + json.dumps({"done": True})).encode()
+        events = []
+        # Cortes arbitrarios, incluido uno en medio de la "ñ"
+        for i in range(0, len(data), 7):
+            events += parser.feed(data[i:i + 7])
+        events += parser.flush()
+        assert events == [{"message": {"content": "señal"}}, {"done": True}]
+
+    def test_invalid_lines_are_skipped(self):
+        assert list(iter_events([b'no-json\n{"a": 1}\n\n[1]\n'])) == [{"a": 1}]
+
+
+class TestChatStats:
+    """Suite de pruebas para ChatStats"""
+
+    def test_live_estimate_then_reported_speed(self):
+        stats = ChatStats(started_at=10.0, first_token_at=10.5, last_token_at=11.5, tokens=11)
+        assert stats.ttft_s == 0.5
+        assert stats.tokens_per_sec == 10.0
+        stats.eval_count, stats.eval_duration_s = 50, 2.0
+        assert stats.tokens_per_sec == 25.0
+
+
+class TestChatSession:
+    """Suite de pruebas para ChatSession"""
+
+    def test_streams_tokens_and_keeps_history(self, manager):
+        session = ChatSession.for_model(manager, ModelConfig(name="qwen2.5-coder:latest", description="",
+                                                             temperature=0.2, keep_alive="10m"))
+        session.options["num_predict"] = 5
+        updates = []
+        turn = session.send("hola", on_update=lambda text, stats: updates.append(text))
+
+        assert turn.stats.done and not turn.stats.error
+        assert turn.stats.tokens == 5
+        assert turn.stats.ttft_s is not None
+        assert abs(turn.stats.tokens_per_sec - 25) < 0.5
+        assert updates[0] != updates[-1] == turn.response
+        assert [m["role"] for m in session.messages] == ["user", "assistant"]
+        assert session.payload("otra")["keep_alive"] == "10m"
+        assert len(session.payload("otra")["messages"]) == 3
+
+    def test_ctrl_c_cancels_without_history(self, manager):
+        session = ChatSession(manager, "qwen2.5-coder:latest", options={"num_predict": 20})
+
+        def interrupt(text, stats):
+            if stats.tokens == 2:
+                raise KeyboardInterrupt
+
+        turn = session.send("hola", on_update=interrupt)
+        assert turn.stats.cancelled
+        assert not turn.stats.done
+        assert session.messages == []
+        assert manager.coalescer.in_flight() == 0
+
+    def test_unknown_model_reports_error(self, manager):
+        turn = ChatSession(manager, "missing:latest").send("hola")
+        assert turn.stats.error
+        assert not turn.stats.done
@@ -0,0 +1,131 @@
+"""
+Pruebas unitarias para CLI Commands
+Tests para los subcomandos no interactivos (status, activate, deactivate, pull,
+update, free-vram) contra el servidor simulado
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+import cli_commands
+from cli_commands import EXIT_OK, EXIT_FAILED, EXIT_USAGE, resolve_models
+from ollama_simulator import SimulatedModel, GIB
+from config_manager import ModelConfig
+from pull_planner import PullPlan
+
+
+@pytest.fixture
+def configs():
+    """Modelos de models.yml: claves qwen y deepseek"""
+    configs = MagicMock()
+    configs.get_models.return_value = {
+        "qwen": ModelConfig(name="qwen2.5-coder:latest", description=""),
+        "deepseek": ModelConfig(name="deepseek-coder:latest", description=""),
+    }
+    return configs
+
+
+@pytest.fixture
+def manager(simulated_manager):
+    """qwen y deepseek instalados (caben juntos en 8 GB) y mistral en el registry"""
+    manager, _ = simulated_manager(
+        models=[SimulatedModel("qwen2.5-coder:latest", size_bytes=5 * GIB),
+                SimulatedModel("deepseek-coder:latest", size_bytes=2 * GIB)],
+        registry=[SimulatedModel("mistral:latest", size_bytes=GIB)],
+        vram_bytes=8 * GIB,
+    )
+    return manager
+
+
+class TestResolveModels:
+    """Suite de pruebas para resolve_models"""
+
+    def test_keys_names_and_unknown(self, configs):
+        resolved, unknown = resolve_models(configs, ["qwen", "deepseek-coder:latest", "otro"])
+        assert resolved == [("qwen", "qwen2.5-coder:latest"), ("deepseek", "deepseek-coder:latest")]
+        assert unknown == ["otro"]
+        resolved, unknown = resolve_models(configs, ["otro"], allow_unknown=True)
+        assert resolved == [(None, "otro")] and unknown == []
+
+
+class TestCommands:
+    """Subcomandos contra el servidor simulado"""
+
+    def test_status_skips_registry_by_default(self, manager):
+        with patch.object(manager, 'check_model_updates') as check_updates:
+            result = cli_commands.status(manager)
+        check_updates.assert_not_called()
+        assert result.exit_code == EXIT_OK
+        assert result.to_dict()['ollama_running'] is True
+        assert result.data['models_installed'] == 2
+
+    def test_activate_then_free_vram(self, manager, configs):
+        with patch('ollama_manager.config_manager', configs):
+            configs.get_model.side_effect = lambda key: configs.get_models.return_value.get(key)
+            result = cli_commands.activate(manager, configs, "deepseek-coder:latest")
+        assert result.exit_code == EXIT_OK and result.data['key'] == "deepseek"
+        assert manager.get_running_models() == ["deepseek-coder:latest"]
+
+        freed = cli_commands.free_vram(manager, configs)
+        assert freed.data['stopped'] == ["deepseek-coder:latest"]
+        assert freed.data['freed_bytes'] == 2 * GIB
+        assert manager.metrics.value('model_evictions_total',
+                                     {'model': 'deepseek-coder:latest', 'reason': 'manual'}) == 1
+        assert manager.get_running_models() == []
+
+    def test_unknown_model_is_usage_error(self, manager, configs):
+        result = cli_commands.activate(manager, configs, "missing")
+        assert result.exit_code == EXIT_USAGE
+        assert result.to_dict() == {'command': 'activate', 'ok': False,
+                                    'error': 'unknown_models', 'unknown': ["missing"]}
+
+    def test_deactivate_without_models(self, manager, configs):
+        manager.warm_load_model("qwen2.5-coder:latest")
+        result = cli_commands.deactivate(manager, configs)
+        assert result.data == {'stopped': ["qwen2.5-coder:latest"], 'failed': []}
+        assert cli_commands.deactivate(manager, configs).lines == ["ℹ No hay modelos activos"]
+
+    def test_pull_reports_failures(self, manager, configs):
+        result = cli_commands.pull(manager, configs, ["mistral:latest", "missing:latest"])
+        assert result.exit_code == EXIT_FAILED
+        assert result.data['pulled'] == ["mistral:latest"]
+        assert list(result.data['failed']) == ["missing:latest"]
+
+    def test_update_pulls_only_changed_models(self, manager, configs):
+        plans = [PullPlan("qwen2.5-coder:latest", local_digest="a" * 64, remote_digest="b" * 64,
+                          missing_layers={"sha256:b": GIB}),
+                 PullPlan("deepseek-coder:latest", local_digest="c" * 64, remote_digest="c" * 64)]
+        with patch.object(manager, 'check_model_updates', return_value={}), \
+             patch.object(manager, 'plan_pulls', return_value=plans), \
+             patch.object(manager, 'pull_models', return_value={"qwen2.5-coder:latest": True}) as pull_models:
+            dry = cli_commands.update(manager, configs, dry_run=True)
+            pull_models.assert_not_called()
+            result = cli_commands.update(manager, configs)
+
+        pull_models.assert_called_once_with(["qwen2.5-coder:latest"], on_progress=None)
+        assert dry.data['up_to_date'] == ["deepseek-coder:latest"]
+        assert result.data['updated'] == ["qwen2.5-coder:latest"] and result.exit_code == EXIT_OK
+        assert result.data['results'] == {"qwen2.5-coder:latest": True, "deepseek-coder:latest": True}
+
+    def test_update_delegates_to_manager_and_stops_loaded_models(self, manager, configs):
+        """update usa update_models: el modelo cargado se detiene antes de bajar su nueva versión"""
+        manager.warm_load_model("qwen2.5-coder:latest")
+        updates = {"qwen2.5-coder:latest": {"current": "qwen2.5-coder:latest", "latest": "qwen2.5-coder:7b",
+                                            "base_name": "qwen2.5-coder"}}
+        plans = [PullPlan("qwen2.5-coder:7b", missing_layers={"sha256:q": GIB}),
+                 PullPlan("deepseek-coder:latest", local_digest="c" * 64, remote_digest="c" * 64)]
+        calls = []
+        with patch.object(manager, 'check_model_updates', return_value=updates), \
+             patch.object(manager, 'plan_pulls', return_value=plans) as plan_pulls, \
+             patch.object(manager, 'stop_models', side_effect=lambda names: calls.append(('stop', names))), \
+             patch.object(manager, 'pull_models',
+                          side_effect=lambda names, on_progress=None: calls.append(('pull', names)) or
+                          {name: False for name in names}):
+            result = cli_commands.update(manager, configs)
+
+        plan_pulls.assert_called_once_with(["qwen2.5-coder:7b", "deepseek-coder:latest"])
+        assert calls == [('stop', ["qwen2.5-coder:latest"]), ('pull', ["qwen2.5-coder:7b"])]
+        assert result.exit_code == EXIT_FAILED
+        assert result.data['results'] == {"qwen2.5-coder:latest": False, "deepseek-coder:latest": True}
+        assert list(result.data['failed']) == ["qwen2.5-coder:latest"]
+        assert result.lines[0].startswith("📥 qwen2.5-coder:latest → qwen2.5-coder:7b")
@@ -10,7 +10,7 @@ from pathlib import Path
 from unittest.mock import patch, mock_open
 import yaml
 
-from config_manager import ConfigManager, ModelConfig, AppConfig
+from config_manager import ConfigManager, ModelConfig, AppConfig, resolve_ollama_host
 
 
 class TestConfigManager:
@@ -37,7 +37,11 @@ class TestConfigManager:
                     'name': 'qwen2.5-coder:latest',
                     'description': 'Code completion and programming',
                     'max_context': 32768,
-                    'temperature': 0.1
+                    'temperature': 0.1,
+                    'category': 'coding',
+                    'size_gb': 4.7,
+                    'vram_gb': 5.0,
+                    'tokens_per_sec': 25
                 },
                 'deepseek': {
                     'name': 'deepseek-coder:latest',
@@ -133,6 +137,11 @@ class TestConfigManager:
 
             assert model is not None
             assert model.name == 'qwen2.5-coder:latest'
+            # Metadatos de memoria y rendimiento declarados en models.yml
+            assert model.vram_gb == 5.0
+            assert model.size_gb == 4.7
+            assert model.tokens_per_sec == 25
+            assert config_manager.get_model('deepseek').vram_gb is None
 
             # Modelo inexistente
             assert config_manager.get_model('nonexistent') is None
@@ -262,6 +271,23 @@ class TestConfigManager:
         assert example_models.exists()
         assert example_app.exists()
 
+    def test_ollama_host_env_override(self, monkeypatch):
+        """Test OLLAMA_HOST tiene prioridad y acepta la forma abreviada del CLI"""
+        monkeypatch.delenv('OLLAMA_HOST', raising=False)
+        assert resolve_ollama_host('http://gpu-box:11434/') == 'http://gpu-box:11434'
+
+        monkeypatch.setenv('OLLAMA_HOST', '127.0.0.1:11500')
+        assert resolve_ollama_host('http://localhost:11434') == 'http://127.0.0.1:11500'
+        monkeypatch.setenv('OLLAMA_HOST', '0.0.0.0')
+        assert resolve_ollama_host(None) == 'http://0.0.0.0:11434'
+
+    def test_get_available_models_malformed_registry(self, temp_config_dir):
+        """Test un catálogo con formato inesperado se trata como registry no disponible"""
+        manager = ConfigManager(config_dir=temp_config_dir)
+        with patch.object(manager, 'get_registry_catalog') as catalog:
+            catalog.return_value.model_names.side_effect = ValueError("formato inesperado")
+            assert manager.get_available_models() == []
+
     def test_detect_platform_forced_env(self, temp_config_dir, monkeypatch):
         """Test forzar detección de plataforma mediante variable de entorno"""
         monkeypatch.setenv('LLM_FORCE_PLATFORM', 'apple_m3')
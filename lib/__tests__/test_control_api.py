@@ -0,0 +1,152 @@
+"""
+Pruebas unitarias para Control API
+Tests para el protocolo JSON-RPC del daemon residente, el snapshot de estado caliente
+y el cliente con vuelta al modo en proceso, contra el servidor simulado
+"""
+
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import time
+import pytest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+import control_api
+from control_api import (
+    ControlServer, ControlClient, ControlConfig, ControlError,
+    PARSE_ERROR, METHOD_NOT_FOUND, INVALID_PARAMS
+)
+from ollama_simulator import SimulatedModel, GIB
+from config_manager import ModelConfig
+
+
+@pytest.fixture
+def socket_path():
+    """Ruta corta (los sockets Unix admiten ~100 caracteres)"""
+    directory = tempfile.mkdtemp(prefix="llm-ctl-")
+    yield Path(directory) / "ctl.sock"
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def configs():
+    configs = MagicMock()
+    models = {"qwen": ModelConfig(name="qwen2.5-coder:latest", description="")}
+    configs.get_models.return_value = models
+    configs.get_model.side_effect = models.get
+    return configs
+
+
+@pytest.fixture
+def manager(configs, simulated_manager):
+    """qwen instalado en un simulador con 8 GB de VRAM"""
+    manager, _ = simulated_manager(models=[SimulatedModel("qwen2.5-coder:latest", size_bytes=5 * GIB)],
+                                   vram_bytes=8 * GIB)
+    # smart_activate_model busca la clave en la configuración global
+    with patch('ollama_manager.config_manager', configs):
+        yield manager
+
+
+@pytest.fixture
+def server(manager, configs, socket_path):
+    with ControlServer(manager, configs, path=socket_path, status_refresh_s=60) as server:
+        yield server
+
+
+class TestControlServer:
+    """Suite de pruebas para ControlServer"""
+
+    def test_status_comes_from_warm_snapshot(self, server, socket_path):
+        with ControlClient.connect(socket_path) as client:
+            assert client.call('ping')['ollama_host'] == server.manager.ollama_host
+            first = client.command('status')
+            started = time.perf_counter()
+            second = client.command('status')
+            elapsed = time.perf_counter() - started
+
+        assert first.ok and first.data['models_installed'] == 1
+        assert second.data['snapshot_age_ms'] >= 0
+        # Sin E/S contra Ollama: solo el viaje por el socket
+        assert elapsed < 0.05
+
+    def test_activate_refreshes_snapshot(self, server, socket_path):
+        with ControlClient.connect(socket_path) as client:
+            assert client.command('status').data['running_models'] == []
+            result = client.command('activate', model="qwen")
+            assert result.ok and result.data['model'] == "qwen2.5-coder:latest"
+            assert client.command('status').data['running_models'] == ["qwen2.5-coder:latest"]
+
+            assert client.command('stop').data['stopped'] == ["qwen2.5-coder:latest"]
+            assert "llm_stack_model_loads_total" in client.call('metrics')
+
+    def test_protocol_errors(self, server, socket_path):
+        with ControlClient.connect(socket_path) as client:
+            with pytest.raises(ControlError) as exc:
+                client.call('missing')
+            assert exc.value.code == METHOD_NOT_FOUND
+            with pytest.raises(ControlError) as exc:
+                client.call('activate')
+            assert exc.value.code == INVALID_PARAMS
+            # La conexión sigue sirviendo tras un error
+            assert client.call('ping')['pid']
+        assert server.dispatch(b"no-json")['error']['code'] == PARSE_ERROR
+
+    def test_second_daemon_is_refused(self, server, manager, configs, socket_path):
+        with pytest.raises(ControlError):
+            ControlServer(manager, configs, path=socket_path).start()
+
+
+class TestControlClient:
+    """Cliente y socket huérfano"""
+
+    def test_no_daemon_returns_none(self, socket_path):
+        assert ControlClient.connect(socket_path) is None
+        socket_path.write_text("")
+        assert ControlClient.connect(socket_path) is None
+
+    def test_stale_socket_is_replaced(self, manager, configs, socket_path):
+        # Socket huérfano: ligado y cerrado sin borrar, nadie escucha
+        orphan = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        orphan.bind(str(socket_path))
+        orphan.close()
+        with ControlServer(manager, configs, path=socket_path, status_refresh_s=60):
+            assert ControlClient.connect(socket_path).call('ping')['pid']
+            assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+        assert not socket_path.exists()
+
+    def test_foreign_path_is_never_unlinked(self, manager, configs, socket_path):
+        """Un fichero que no es un socket propio no se borra ni se usa"""
+        socket_path.write_text("no soy un socket")
+        with pytest.raises(ControlError):
+            ControlServer(manager, configs, path=socket_path).start()
+        assert socket_path.read_text() == "no soy un socket"
+
+        target = socket_path.with_name("real.sock")
+        socket_path.unlink()
+        socket_path.symlink_to(target)
+        assert ControlClient.connect(socket_path) is None
+        with pytest.raises(ControlError):
+            ControlServer(manager, configs, path=socket_path).start()
+
+    def test_fallback_socket_lives_in_private_dir(self, tmp_path, monkeypatch):
+        monkeypatch.delenv(control_api.SOCKET_ENV, raising=False)
+        monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+        monkeypatch.setattr(control_api.tempfile, 'gettempdir', lambda: str(tmp_path))
+
+        path = control_api.default_socket_path()
+        assert path == tmp_path / f"llm-stack-{os.getuid()}" / control_api.SOCKET_NAME
+        assert stat.S_IMODE(os.stat(path.parent).st_mode) == 0o700
+
+        # Un directorio accesible por otros (p. ej. creado por otro usuario) se rechaza
+        os.chmod(path.parent, 0o777)
+        with pytest.raises(ControlError):
+            control_api.default_socket_path()
+        assert ControlClient.connect() is None
+
+    def test_config(self):
+        config = ControlConfig.from_app_config({'control': {'enabled': False, 'status_refresh_seconds': 5}})
+        assert not config.enabled and config.status_refresh_s == 5
+        assert ControlConfig.from_app_config({}).enabled
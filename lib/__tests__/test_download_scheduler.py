@@ -0,0 +1,166 @@
+"""
+Pruebas unitarias para DownloadScheduler
+Tests para concurrencia acotada, deduplicación por tag, progreso y abortado por estancamiento
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_transport import HTTPTransport
+from download_scheduler import DownloadScheduler, SUCCESS, FAILED, STALLED
+
+
+class _FakePullHandler(BaseHTTPRequestHandler):
+    """Servidor /api/pull que registra la concurrencia máxima observada"""
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+    requests = []
+
+    def _event(self, payload):
+        data = (json.dumps(payload) + "\n").encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        model = json.loads(self.rfile.read(length))["model"]
+        cls = type(self)
+        with cls.lock:
+            cls.requests.append(model)
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            self._event({"status": "pulling manifest"})
+            if model.startswith("missing"):
+                self._event({"error": "pull model manifest: file does not exist"})
+            elif model.startswith("silent"):
+                # El servidor deja de enviar sin cerrar la conexión
+                time.sleep(1.0)
+            elif model.startswith("stall"):
+                # Eventos repetidos sin avance de bytes
+                for _ in range(20):
+                    self._event({"status": "pulling aaa", "digest": "sha256:aaa", "total": 100, "completed": 10})
+                    time.sleep(0.05)
+            else:
+                for completed in (25, 50, 100):
+                    self._event({"status": "pulling aaa", "digest": "sha256:aaa", "total": 100, "completed": completed})
+                    time.sleep(0.05)
+                self._event({"status": "success"})
+            self.wfile.write(b"0\r\n\r\n")
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_ollama():
+    """Servidor de descargas local en un puerto efímero"""
+    _FakePullHandler.active = 0
+    _FakePullHandler.max_active = 0
+    _FakePullHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakePullHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestDownloadScheduler:
+    """Suite de pruebas para DownloadScheduler"""
+
+    def test_bounded_concurrency(self, fake_ollama):
+        """Nunca hay más descargas simultáneas que max_concurrent"""
+        scheduler = DownloadScheduler(HTTPTransport(), fake_ollama, max_concurrent=2)
+        results = scheduler.pull_all(["a:1", "b:1", "c:1", "d:1"])
+
+        assert results == {"a:1": True, "b:1": True, "c:1": True, "d:1": True}
+        assert _FakePullHandler.max_active == 2
+        scheduler.shutdown()
+
+    def test_deduplicates_same_tag(self, fake_ollama):
+        """Un tag ya en curso no se descarga dos veces"""
+        scheduler = DownloadScheduler(HTTPTransport(), fake_ollama, max_concurrent=2)
+        first = scheduler.submit("a:1")
+        second = scheduler.submit("a:1")
+
+        assert first is second
+        assert scheduler.pull_all(["a:1", "a:1"]) == {"a:1": True}
+        assert _FakePullHandler.requests == ["a:1"]
+        scheduler.shutdown()
+
+    def test_progress_reporting(self, fake_ollama):
+        """El progreso por capa se agrega por modelo y en total"""
+        events = []
+        scheduler = DownloadScheduler(HTTPTransport(), fake_ollama, on_progress=lambda p: events.append(p.completed))
+        scheduler.pull_all(["a:1"])
+
+        progress = scheduler.get_progress("a:1")
+        assert progress.state == SUCCESS
+        assert (progress.completed, progress.total, progress.fraction) == (100, 100, 1.0)
+        assert 50 in events
+        assert scheduler.aggregate()["succeeded"] == 1
+        scheduler.shutdown()
+
+    def test_error_event(self, fake_ollama):
+        """Un evento de error marca la descarga como fallida"""
+        scheduler = DownloadScheduler(HTTPTransport(), fake_ollama)
+        assert scheduler.pull_all(["missing:1"]) == {"missing:1": False}
+        assert scheduler.get_progress("missing:1").state == FAILED
+        scheduler.shutdown()
+
+    def test_stalled_progress_aborts(self, fake_ollama):
+        """Eventos sin avance de bytes abortan tras stall_timeout"""
+        scheduler = DownloadScheduler(HTTPTransport(), fake_ollama, stall_timeout=0.2)
+        start = time.monotonic()
+
+        assert scheduler.pull_all(["stall:1"]) == {"stall:1": False}
+        assert scheduler.get_progress("stall:1").state == STALLED
+        assert time.monotonic() - start < 1.0
+        scheduler.shutdown()
+
+    def test_silent_server_is_stalled(self, fake_ollama):
+        """Un timeout de lectura en mitad del stream se reporta como estancada"""
+        scheduler = DownloadScheduler(HTTPTransport(retries=0), fake_ollama, stall_timeout=0.2)
+
+        assert scheduler.pull_all(["silent:1"]) == {"silent:1": False}
+        assert scheduler.get_progress("silent:1").state == STALLED
+        scheduler.shutdown()
+
+    def test_unexpected_error_marks_failed(self, fake_ollama, monkeypatch):
+        """Una excepción imprevista termina la descarga como fallida"""
+        scheduler = DownloadScheduler(HTTPTransport(), fake_ollama)
+        monkeypatch.setattr(scheduler, '_stream_pull', lambda progress: progress.layers['x']['total'])
+
+        assert scheduler.pull_all(["a:1"]) == {"a:1": False}
+        progress = scheduler.get_progress("a:1")
+        assert progress.state == FAILED
+        assert progress.error.startswith("KeyError")
+        assert progress.finished_at is not None
+        scheduler.shutdown()
+
+    def test_cancel_stops_stream(self, fake_ollama):
+        """cancel() aborta la descarga en el siguiente evento"""
+        scheduler = DownloadScheduler(HTTPTransport(), fake_ollama, stall_timeout=10)
+        future = scheduler.submit("stall:1")
+        time.sleep(0.1)
+        scheduler.cancel("stall:1")
+
+        assert future.result(timeout=2) is False
+        assert scheduler.get_progress("stall:1").error == "Descarga cancelada"
+        scheduler.shutdown()
@@ -0,0 +1,135 @@
+"""
+Pruebas unitarias para EvictionPolicy
+Tests para el registro de uso, las políticas LRU/LFU/GreedyDual y la selección de víctimas
+"""
+
+from eviction_policy import (
+    UsageTracker, LRUPolicy, LFUPolicy, GreedyDualPolicy, get_policy, select_victims, GIB
+)
+
+
+class FakeClock:
+    """Reloj controlable para simular el paso del tiempo"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+def _tracker():
+    tracker = UsageTracker(clock=FakeClock())
+    # deepseek: grande y caro de recargar (10s), usado una vez hace tiempo
+    tracker.record_load("deepseek", 10.0, size_bytes=int(6.5 * GIB))
+    tracker.record_request("deepseek")
+    # qwen: muy usado, recarga barata
+    tracker.record_load("qwen", 2.0, size_bytes=int(5 * GIB))
+    for _ in range(5):
+        tracker.record_request("qwen")
+    # mistral: el más reciente, una sola petición, recarga barata
+    tracker.record_load("mistral", 1.0, size_bytes=int(4.5 * GIB))
+    tracker.record_request("mistral")
+    return tracker
+
+
+class TestPolicies:
+    """Orden de desalojo de cada política"""
+
+    def test_lru(self):
+        assert LRUPolicy().order(["qwen", "mistral", "deepseek"], _tracker()) == ["deepseek", "qwen", "mistral"]
+
+    def test_lfu(self):
+        assert LFUPolicy().order(["qwen", "mistral", "deepseek"], _tracker()) == ["deepseek", "mistral", "qwen"]
+
+    def test_greedy_dual_keeps_expensive_reloads(self):
+        """GreedyDual conserva el modelo caro de recargar aunque sea el menos reciente"""
+        order = GreedyDualPolicy().order(["qwen", "mistral", "deepseek"], _tracker())
+        assert order[-1] == "deepseek"
+        assert order[0] == "mistral"
+
+    def test_greedy_dual_inflation(self):
+        """Tras un desalojo, los accesos nuevos parten del crédito del desalojado"""
+        tracker = _tracker()
+        evicted_credit = tracker.get("mistral").credit
+        tracker.record_eviction("mistral")
+        tracker.record_request("qwen")
+        assert tracker.inflation == evicted_credit
+        assert tracker.get("qwen").credit > evicted_credit
+
+    def test_get_policy(self):
+        assert isinstance(get_policy("LRU"), LRUPolicy)
+        assert isinstance(get_policy(None), GreedyDualPolicy)
+
+
+class TestUsageTracker:
+    """Registro y persistencia del uso"""
+
+    def test_warm_load_is_not_reload_cost(self):
+        """Una carga de milisegundos (modelo ya en VRAM) no pisa el coste medido"""
+        tracker = _tracker()
+        tracker.record_load("deepseek", 0.01)
+        assert tracker.get("deepseek").load_cost_s == 10.0
+
+    def test_persistence(self, tmp_path):
+        path = tmp_path / "model_usage.json"
+        tracker = UsageTracker(path, clock=FakeClock())
+        tracker.record_request("qwen")
+        tracker.record_load("qwen", 3.0, size_bytes=GIB)
+        # Las escrituras se agrupan: nada en disco hasta el flush
+        assert not path.exists()
+        tracker.flush()
+
+        reloaded = UsageTracker(path)
+        assert reloaded.get("qwen").request_count == 1
+        assert reloaded.get("qwen").load_cost_s == 3.0
+
+    def test_write_through_with_zero_interval(self, tmp_path):
+        path = tmp_path / "model_usage.json"
+        UsageTracker(path, clock=FakeClock(), flush_interval=0).record_request("qwen")
+        assert UsageTracker(path).get("qwen").request_count == 1
+
+    def test_processes_merge_instead_of_overwriting(self, tmp_path):
+        """Dos procesos con el mismo fichero suman sus peticiones y conservan los modelos del otro"""
+        path = tmp_path / "model_usage.json"
+        menu = UsageTracker(path, clock=FakeClock())
+        gateway = UsageTracker(path, clock=FakeClock())
+
+        menu.record_request("qwen")
+        menu.record_load("mistral", 2.0, size_bytes=GIB)
+        gateway.record_request("qwen")
+        gateway.record_request("qwen")
+        gateway.record_load("deepseek", 9.0, size_bytes=6 * GIB)
+        menu.flush()
+        gateway.flush()
+
+        merged = UsageTracker(path)
+        assert merged.get("qwen").request_count == 3
+        assert merged.get("mistral").load_cost_s == 2.0
+        assert merged.get("deepseek").load_cost_s == 9.0
+        # El último en escribir también ve ahora el historial del otro
+        assert gateway.get("mistral").load_cost_s == 2.0
+
+        # Un segundo flush sin cambios no vuelve a sumar las mismas peticiones
+        menu.record_request("qwen")
+        menu.flush()
+        gateway.flush()
+        assert UsageTracker(path).get("qwen").request_count == 4
+
+
+class TestSelectVictims:
+    """Selección de víctimas en orden de política"""
+
+    def test_frees_as_many_as_needed(self):
+        sizes = {"a": 2 * GIB, "b": 3 * GIB, "c": 4 * GIB}
+        assert select_victims(["a", "b", "c"], sizes, deficit_bytes=4 * GIB) == ["a", "b"]
+
+    def test_drops_unneeded_victims(self):
+        """Si un modelo posterior basta por sí solo, los anteriores no se desalojan"""
+        sizes = {"a": 1 * GIB, "b": 6 * GIB}
+        assert select_victims(["a", "b"], sizes, deficit_bytes=5 * GIB) == ["b"]
+
+    def test_min_count(self):
+        assert select_victims(["a", "b", "c"], {}, 0, min_count=2) == ["a", "b"]
+        assert select_victims(["a"], {}, 0, min_count=0) == []
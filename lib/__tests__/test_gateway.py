@@ -0,0 +1,258 @@
+"""
+Pruebas unitarias para Gateway
+Tests para la cola por modelo (prioridad a modelos cargados, cambios serializados,
+backpressure) y el reenvío /v1 con SSE contra el servidor simulado
+"""
+
+import json
+import threading
+import time
+import pytest
+import requests
+
+from gateway import RequestScheduler, Gateway, GatewayConfig, QueueFullError, AdmissionError
+from ollama_simulator import SimulatedModel, GIB
+from config_manager import ModelConfig
+from response_cache import ResponseCache
+
+
+class FakeBackend:
+    """Modelos residentes y cargas registradas para el planificador"""
+
+    def __init__(self, resident=(), fail=()):
+        self.resident = list(resident)
+        self.fail = set(fail)
+        self.loads = []
+
+    def load(self, model):
+        self.loads.append(model)
+        if model in self.fail:
+            return False, "no cabe en VRAM"
+        self.resident = [model]
+        return True, ""
+
+    def loaded(self):
+        return list(self.resident)
+
+
+def _in_thread(scheduler, model, log, hold=None):
+    """Adquiere turno en un hilo y registra el orden de admisión"""
+    def run():
+        try:
+            ticket = scheduler.acquire(model, timeout=5)
+        except Exception as e:
+            log.append((model, type(e).__name__))
+            return
+        log.append(model)
+        if hold is not None:
+            hold.wait(5)
+        scheduler.release(ticket)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+class TestRequestScheduler:
+    """Suite de pruebas para RequestScheduler"""
+
+    def test_loaded_model_is_admitted_without_loading(self):
+        backend = FakeBackend(resident=["qwen"])
+        scheduler = RequestScheduler(backend.load, backend.loaded)
+        ticket = scheduler.acquire("qwen")
+        scheduler.release(ticket)
+        assert backend.loads == []
+        assert scheduler.snapshot()['models']['qwen']['served'] == 1
+
+    def test_queue_full_rejects(self):
+        backend = FakeBackend(resident=["qwen"])
+        scheduler = RequestScheduler(backend.load, backend.loaded, max_queue_per_model=1)
+        first = scheduler.acquire("qwen")
+        log = []
+        waiter = _in_thread(scheduler, "qwen", log)
+        _wait_for(lambda: scheduler.snapshot()['models']['qwen']['queued'] == 1)
+
+        with pytest.raises(QueueFullError):
+            scheduler.acquire("qwen")
+        scheduler.release(first)
+        waiter.join(2)
+        assert log == ["qwen"]
+        assert scheduler.stats["qwen"].rejected == 1
+
+    def test_loaded_requests_go_before_model_switch(self):
+        """Con qwen ocupado, otra petición a qwen pasa antes que el cambio a deepseek"""
+        backend = FakeBackend(resident=["qwen"])
+        scheduler = RequestScheduler(backend.load, backend.loaded)
+        first = scheduler.acquire("qwen")
+        log = []
+
+        switch = _in_thread(scheduler, "deepseek", log)
+        _wait_for(lambda: scheduler.snapshot()['models']['deepseek']['queued'] == 1)
+        same_model = _in_thread(scheduler, "qwen", log)
+        _wait_for(lambda: scheduler.snapshot()['models']['qwen']['queued'] == 1)
+
+        assert backend.loads == []
+        scheduler.release(first)
+        switch.join(2)
+        same_model.join(2)
+        assert log == ["qwen", "deepseek"]
+        assert backend.loads == ["deepseek"]
+
+    def test_switch_waits_for_idle_gpu(self):
+        """El cambio de modelo no empieza mientras hay una generación en vuelo"""
+        backend = FakeBackend(resident=["qwen"])
+        scheduler = RequestScheduler(backend.load, backend.loaded)
+        active = scheduler.acquire("qwen")
+        log = []
+        switch = _in_thread(scheduler, "deepseek", log)
+        time.sleep(0.1)
+        assert backend.loads == []
+
+        scheduler.release(active)
+        switch.join(2)
+        assert backend.loads == ["deepseek"]
+
+    def test_aged_switch_stops_loaded_admissions(self):
+        """Un cambio que espera demasiado deja de ceder ante los modelos cargados"""
+        backend = FakeBackend(resident=["qwen"])
+        scheduler = RequestScheduler(backend.load, backend.loaded, max_switch_wait_s=0)
+        active = scheduler.acquire("qwen")
+        log = []
+        switch = _in_thread(scheduler, "deepseek", log)
+        _wait_for(lambda: scheduler.snapshot()['models']['deepseek']['queued'] == 1)
+        later = _in_thread(scheduler, "qwen", log)
+        _wait_for(lambda: scheduler.snapshot()['models']['qwen']['queued'] == 1)
+
+        scheduler.release(active)
+        switch.join(2)
+        later.join(2)
+        assert log[0] == "deepseek"
+
+    def test_failed_load_fails_waiters(self):
+        backend = FakeBackend(fail={"huge"})
+        scheduler = RequestScheduler(backend.load, backend.loaded)
+        with pytest.raises(AdmissionError):
+            scheduler.acquire("huge")
+        assert scheduler.stats["huge"].failed == 1
+
+
+class TestGatewayConfig:
+    """Configuración desde app.yml"""
+
+    def test_remote_access_disabled_forces_localhost(self):
+        config = GatewayConfig.from_app_config({'gateway': {'host': '0.0.0.0', 'port': 9000},
+                                                'security': {'allow_remote_access': False}})
+        assert config.host == "127.0.0.1"
+        assert config.port == 9000
+
+
+class TestGatewayProxy:
+    """Reenvío a la API /v1 del servidor simulado"""
+
+    @pytest.fixture
+    def gateway(self, tmp_path, simulated_manager):
+        manager, _ = simulated_manager(models=[SimulatedModel("qwen2.5-coder:latest", size_bytes=5 * GIB)])
+        manager.response_cache = ResponseCache(str(tmp_path))
+        models = {"qwen": ModelConfig(name="qwen2.5-coder:latest", description="")}
+        with Gateway(manager, models=models, config=GatewayConfig(port=0)) as gateway:
+            yield gateway
+
+    def test_streaming_chat_passthrough(self, gateway):
+        response = requests.post(f"{gateway.url}/v1/chat/completions", stream=True, timeout=5, json={
+            "model": "qwen", "stream": True, "max_tokens": 4, "messages": [{"role": "user", "content": "hola"}]})
+        assert response.headers["Content-Type"] == "text/event-stream"
+        lines = [line for line in response.iter_lines() if line]
+        assert lines[-1] == b"data: [DONE]"
+        chunks = [json.loads(line[len(b"data: "):]) for line in lines[:-1]]
+        assert chunks[0]["object"] == "chat.completion.chunk"
+        assert chunks[0]["model"] == "qwen2.5-coder:latest"
+
+        stats = requests.get(f"{gateway.url}/gateway/stats", timeout=5).json()
+        assert stats['models']['qwen2.5-coder:latest']['served'] == 1
+        assert stats['models']['qwen2.5-coder:latest']['switches'] == 1
+        assert gateway.manager.usage.get("qwen2.5-coder:latest").request_count >= 1
+
+    def test_metrics_route_records_request_latency(self, gateway):
+        requests.post(f"{gateway.url}/v1/embeddings", timeout=5, json={"model": "qwen", "input": "a"})
+        text = requests.get(f"{gateway.url}/metrics", timeout=5).text
+        assert ('llm_stack_requests_total{endpoint="/v1/embeddings",model="qwen2.5-coder:latest",status="200"} 1'
+                in text)
+        assert 'llm_stack_request_duration_seconds_count{endpoint="/v1/embeddings"' in text
+
+    def test_embeddings_and_errors(self, gateway):
+        response = requests.post(f"{gateway.url}/v1/embeddings", timeout=5,
+                                 json={"model": "qwen2.5-coder:latest", "input": ["a", "b"]})
+        assert len(response.json()["data"]) == 2
+
+        assert requests.post(f"{gateway.url}/v1/chat/completions", json={}, timeout=5).status_code == 400
+        missing = requests.post(f"{gateway.url}/v1/chat/completions", timeout=5,
+                                json={"model": "missing:latest", "messages": []})
+        assert missing.status_code == 503
+
+    def test_temperature_zero_hit_is_replayed_without_gpu(self, gateway):
+        """Un acierto reproduce el mismo stream sin pasar por la cola ni por Ollama"""
+        body = {"model": "qwen", "stream": True, "temperature": 0, "max_tokens": 4,
+                "messages": [{"role": "user", "content": "explica este lint"}]}
+        first = requests.post(f"{gateway.url}/v1/chat/completions", json=body, timeout=5)
+        second = requests.post(f"{gateway.url}/v1/chat/completions", json=body, timeout=5)
+
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.headers["Content-Type"] == "text/event-stream"
+        assert second.content == first.content
+
+        stats = requests.get(f"{gateway.url}/gateway/stats", timeout=5).json()
+        assert stats['models']['qwen2.5-coder:latest']['served'] == 1
+        assert stats['response_cache']['memory_hits'] == 1
+
+    def test_nonzero_temperature_is_not_cached(self, gateway):
+        body = {"model": "qwen", "temperature": 0.7, "messages": [{"role": "user", "content": "hola"}]}
+        requests.post(f"{gateway.url}/v1/chat/completions", json=body, timeout=5)
+        second = requests.post(f"{gateway.url}/v1/chat/completions", json=body, timeout=5)
+        assert second.headers["X-Cache"] == "MISS"
+
+
+
+class TestGatewayCoalescing:
+    """Peticiones idénticas concurrentes contra un simulador con generación lenta"""
+
+    @pytest.fixture
+    def slow(self, tmp_path, simulated_manager):
+        # Tiempo real a 20 tok/s: las peticiones siguen en vuelo mientras llegan las demás
+        manager, sim = simulated_manager(models=[SimulatedModel("qwen2.5-coder:latest", size_bytes=5 * GIB)],
+                                         tokens_per_sec=20, load_bytes_per_sec=1000 * GIB, time_scale=1.0)
+        manager.response_cache = ResponseCache(str(tmp_path))
+        with Gateway(manager, config=GatewayConfig(port=0)) as gateway:
+            yield gateway, sim
+
+    def test_identical_requests_share_one_generation(self, slow):
+        gateway, sim = slow
+        body = {"model": "qwen2.5-coder:latest", "stream": True, "temperature": 0.7, "max_tokens": 8,
+                "messages": [{"role": "user", "content": "resume este archivo"}]}
+        responses = []
+
+        def send():
+            responses.append(requests.post(f"{gateway.url}/v1/chat/completions", json=body, timeout=10))
+
+        threads = [threading.Thread(target=send) for _ in range(3)]
+        threads[0].start()
+        _wait_for(lambda: gateway.manager.coalescer.in_flight() == 1)
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        assert sim.request_counts.get("/v1/chat/completions") == 1
+        assert len({response.content for response in responses}) == 1
+        assert sorted(r.headers.get("X-Coalesced", "") for r in responses) == ["", "true", "true"]
+
+        stats = requests.get(f"{gateway.url}/gateway/stats", timeout=5).json()
+        assert stats['coalescing']['coalesced'] == 2
+        assert stats['coalescing']['saved_seconds'] > 0
+        assert stats['models']['qwen2.5-coder:latest']['served'] == 1
@@ -0,0 +1,97 @@
+"""
+Pruebas unitarias para HTTPTransport
+Tests para resolución de timeouts, pool keep-alive y métricas de latencia
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_transport import HTTPTransport, resolve_endpoint_timeouts, DEFAULT_ENDPOINT_TIMEOUTS
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Handler HTTP/1.1 mínimo que mantiene la conexión abierta"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"models": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    """Servidor HTTP local en un puerto efímero"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestResolveEndpointTimeouts:
+    """Pruebas para resolve_endpoint_timeouts"""
+
+    def test_defaults(self):
+        """Sin configuración se usan los timeouts por defecto"""
+        assert resolve_endpoint_timeouts(None) == DEFAULT_ENDPOINT_TIMEOUTS
+
+    def test_number_sets_default(self):
+        """Un número reemplaza el timeout por defecto sin tocar endpoints propios"""
+        timeouts = resolve_endpoint_timeouts(45)
+        assert timeouts['default'] == 45
+        assert timeouts['tags'] == DEFAULT_ENDPOINT_TIMEOUTS['tags']
+
+    def test_mapping_overrides_endpoints(self):
+        """Un dict sobreescribe endpoints individuales e ignora valores inválidos"""
+        timeouts = resolve_endpoint_timeouts({'generate': 120, 'ps': 'x'})
+        assert timeouts['generate'] == 120
+        assert timeouts['ps'] == DEFAULT_ENDPOINT_TIMEOUTS['ps']
+
+
+class TestHTTPTransport:
+    """Suite de pruebas para HTTPTransport"""
+
+    def test_from_performance_config(self):
+        """La sección performance de app.yml configura timeouts y pool"""
+        transport = HTTPTransport.from_performance_config({
+            'request_timeout_seconds': {'default': 60, 'tags': 2},
+            'http_pool_size': 4,
+        })
+        assert transport.timeout_for('tags') == 2
+        assert transport.timeout_for('unknown') == 60
+        assert transport._adapter._pool_maxsize == 4
+
+    def test_connections_are_reused(self, local_server):
+        """Peticiones consecutivas al mismo host reutilizan la conexión keep-alive"""
+        transport = HTTPTransport()
+        for _ in range(3):
+            assert transport.get(f"{local_server}/api/ps", endpoint='ps').status_code == 200
+
+        stats = transport.get_stats()
+        assert stats['requests_total'] == 3
+        assert stats['connections_opened'] == 1
+        assert stats['connections_reused'] == 2
+        assert stats['endpoints']['ps']['count'] == 3
+        transport.close()
+
+    def test_errors_are_counted(self):
+        """Los errores de conexión se registran y se propagan"""
+        transport = HTTPTransport(retries=0)
+        with pytest.raises(requests.RequestException):
+            transport.get("http://127.0.0.1:9/api/tags", endpoint='tags')
+
+        stats = transport.get_stats()
+        assert stats['errors_total'] == 1
+        assert transport.recent_requests()[-1].status_code is None
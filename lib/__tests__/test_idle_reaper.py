@@ -0,0 +1,165 @@
+"""
+Pruebas unitarias para IdleReaper
+Tests para detección de actividad vía expires_at, overrides por modelo y mínimo residente
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from idle_reaper import IdleReaper
+from eviction_policy import UsageTracker
+from vram_telemetry import LoadedModel
+from config_manager import AppConfig, ModelConfig
+from ollama_simulator import SimulatedModel, GIB
+
+
+class FakeClock:
+    """Reloj controlable para simular el paso del tiempo"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _manager(loaded):
+    manager = MagicMock()
+    manager.usage = UsageTracker()
+    manager.get_loaded_models.side_effect = lambda: list(loaded)
+    manager.stop_model.side_effect = lambda name: loaded.remove(next(m for m in loaded if m.name == name)) or True
+    return manager
+
+
+class TestIdleReaper:
+    """Suite de pruebas para IdleReaper"""
+
+    def test_stops_idle_model_after_timeout(self):
+        """Sin cambios en expires_at el modelo se detiene al superar el timeout"""
+        clock = FakeClock()
+        loaded = [LoadedModel(name="qwen", expires_at="t1")]
+        manager = _manager(loaded)
+        reaper = IdleReaper(manager, default_timeout_s=600, clock=clock)
+
+        assert reaper.sweep() == []
+        clock.now += 599
+        assert reaper.sweep() == []
+        clock.now += 1
+        assert reaper.sweep() == ["qwen"]
+        assert reaper.reaped_total == 1
+
+    def test_expires_at_change_counts_as_activity(self):
+        """Un nuevo expires_at (petición servida) reinicia el contador"""
+        clock = FakeClock()
+        loaded = [LoadedModel(name="qwen", expires_at="t1")]
+        reaper = IdleReaper(_manager(loaded), default_timeout_s=600, clock=clock)
+
+        reaper.sweep()
+        clock.now += 500
+        loaded[0].expires_at = "t2"
+        reaper.sweep()
+        clock.now += 500
+        assert reaper.sweep() == []
+
+    def test_request_log_counts_as_activity(self):
+        """Las peticiones registradas por la propia aplicación también cuentan"""
+        clock = FakeClock()
+        loaded = [LoadedModel(name="qwen", expires_at="t1")]
+        manager = _manager(loaded)
+        reaper = IdleReaper(manager, default_timeout_s=600, clock=clock)
+
+        reaper.sweep()
+        manager.usage = UsageTracker(clock=lambda: clock.now + 500)
+        manager.usage.record_request("qwen")
+        clock.now += 700
+        assert reaper.sweep() == []
+
+    def test_background_sweeps_notify_instead_of_printing(self, capsys):
+        """Los avisos del barrido van al callback (la interfaz los muestra desde su hilo)"""
+        clock = FakeClock()
+        events = []
+        reaper = IdleReaper(_manager([LoadedModel(name="qwen", expires_at="t1")]), default_timeout_s=60,
+                            clock=clock, notify=events.append)
+
+        reaper.sweep()
+        clock.now += 120
+        assert reaper.sweep() == ["qwen"]
+        assert len(events) == 1 and events[0].startswith("💤 qwen inactivo")
+        assert capsys.readouterr().out == ""
+
+    def test_per_model_override_and_min_resident(self):
+        """Override 0 = nunca se detiene; el mínimo residente limita los detenidos"""
+        clock = FakeClock()
+        loaded = [LoadedModel(name="qwen", expires_at="a"), LoadedModel(name="deepseek", expires_at="b"),
+                  LoadedModel(name="mistral", expires_at="c")]
+        manager = _manager(loaded)
+        reaper = IdleReaper(manager, default_timeout_s=60, model_timeouts={"qwen": 0}, min_resident=2, clock=clock)
+
+        reaper.sweep()
+        clock.now += 120
+        stopped = reaper.sweep()
+
+        assert len(stopped) == 1
+        assert "qwen" not in stopped
+        assert [m.name for m in loaded][0] == "qwen"
+
+    def test_from_config(self):
+        """Timeout global, override por modelo y mínimo residente desde AppConfig"""
+        config = AppConfig(
+            models={"qwen": ModelConfig(name="qwen:latest", description="", idle_timeout_minutes=0),
+                    "mistral": ModelConfig(name="mistral:latest", description="")},
+            inactive_timeout_minutes=30,
+            min_resident_models=1,
+        )
+        reaper = IdleReaper.from_config(SimpleNamespace(), config)
+
+        assert reaper.timeout_for("qwen:latest") == 0
+        assert reaper.timeout_for("mistral:latest") == 1800
+        assert reaper.min_resident == 1
+
+    def test_thread_start_stop(self):
+        """El hilo arranca, barre y se detiene sin bloquear"""
+        manager = _manager([])
+        reaper = IdleReaper(manager, default_timeout_s=60, interval_s=0.01)
+        reaper.start()
+        reaper.stop(timeout=1)
+        assert manager.get_loaded_models.called
+
+    def test_warm_loaded_model_stays_resident_with_floor(self, simulated_manager):
+        """Con el reaper activo la activación no fija un keep_alive: el mínimo residente manda"""
+        manager, sim = simulated_manager(models=[SimulatedModel("qwen2.5-coder:latest", size_bytes=GIB)])
+        qwen = ModelConfig(name="qwen2.5-coder:latest", description="")
+        manager.config = AppConfig(models={"qwen": qwen}, auto_stop_inactive=True,
+                                   inactive_timeout_minutes=30, min_resident_models=1)
+
+        clock = FakeClock()
+        clock.now = time.time()
+        reaper = IdleReaper(manager, default_timeout_s=30 * 60, min_resident=1, interval_s=3600, clock=clock)
+        reaper.start()
+        try:
+            assert manager.load_model(qwen).success
+            # Ollama no lo descargará por su cuenta al cumplirse el timeout de inactividad
+            assert sim.loaded["qwen2.5-coder:latest"].expires_at is None
+
+            reaper.sweep()
+            clock.now += 31 * 60
+            assert reaper.sweep() == []
+            manager.invalidate_state()
+            assert manager.get_running_models() == ["qwen2.5-coder:latest"]
+
+            # Sin mínimo residente el reaper sí lo descarga
+            reaper.min_resident = 0
+            assert reaper.sweep() == ["qwen2.5-coder:latest"]
+        finally:
+            reaper.stop(timeout=1)
+        assert manager.idle_reaper is None
+
+    def test_without_reaper_ollama_expires_the_model(self, simulated_manager):
+        """Sin reaper en el proceso (CLI, chat, bench) Ollama descarga por el timeout de inactividad"""
+        manager, sim = simulated_manager(models=[SimulatedModel("qwen2.5-coder:latest", size_bytes=GIB)])
+        qwen = ModelConfig(name="qwen2.5-coder:latest", description="")
+        manager.config = AppConfig(models={"qwen": qwen}, auto_stop_inactive=True, inactive_timeout_minutes=30)
+
+        assert manager.load_model(qwen).keep_alive == "30m"
+        assert sim.loaded["qwen2.5-coder:latest"].expires_at is not None
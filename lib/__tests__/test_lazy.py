@@ -0,0 +1,63 @@
+"""
+Pruebas unitarias para Lazy
+Tests para la construcción diferida de singletons y los imports diferidos
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from lazy import LazyObject, lazy_import
+
+
+class Counter:
+    """Objeto con estado para comprobar que el proxy lo reenvía todo"""
+
+    def __init__(self):
+        self.value = 0
+        self.items = [1, 2]
+
+    def __call__(self, amount):
+        self.value += amount
+        return self.value
+
+
+class TestLazyObject:
+    """Suite de pruebas para LazyObject"""
+
+    def test_builds_once_on_first_use(self):
+        built = []
+        lazy = LazyObject(lambda: built.append(1) or Counter())
+        assert not lazy.resolved and built == []
+        assert lazy.value == 0
+        assert lazy(3) == 3 and lazy.value == 3
+        assert lazy.resolved and built == [1]
+
+    def test_assignments_and_patches_reach_target(self):
+        lazy = LazyObject(Counter)
+        lazy.value = 5
+        with patch.object(lazy, 'items', ["parcheado"]):
+            assert lazy.items == ["parcheado"]
+        assert lazy.items == [1, 2]
+        assert lazy.value == 5
+
+    def test_lazy_import(self):
+        dumps = lazy_import('json', 'dumps')
+        assert "sin construir" in repr(dumps)
+        assert dumps({"a": 1}) == '{"a": 1}'
+        assert lazy_import('json').loads("[1]") == [1]
+
+
+class TestStartupImports:
+    """El arranque del CLI no carga la configuración ni los módulos pesados"""
+
+    def test_importing_main_defers_heavy_modules(self):
+        lib_dir = Path(__file__).resolve().parent.parent
+        code = ("import sys, main; "
+                "print(sorted(m for m in ('rich', 'yaml', 'requests', 'ollama_manager', 'config_manager') "
+                "if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=str(lib_dir), timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[]"
@@ -3,12 +3,22 @@ Pruebas unitarias para main.py
 Tests para la interfaz de usuario y lógica principal de la aplicación
 """
 
+import json
 import pytest
 from unittest.mock import patch, MagicMock, call
 from io import StringIO
 import sys
+import subprocess
 
-from main import LLMStackApp
+from main import LLMStackApp, main, build_parser
+from pull_planner import PullPlan
+from config_manager import ModelConfig
+
+
+@pytest.fixture(autouse=True)
+def no_daemon(tmp_path, monkeypatch):
+    """Socket del daemon aislado: sin daemon escuchando, todo se ejecuta en proceso"""
+    monkeypatch.setenv("LLM_STACK_SOCKET", str(tmp_path / "llm-stack.sock"))
 
 
 class TestLLMStackApp:
@@ -88,6 +98,10 @@ class TestLLMStackApp:
             calls = mock_console_print.call_args_list
             assert len(calls) > 0
 
+            # La VRAM sale del snapshot, sin una segunda consulta a /api/ps
+            mock_ollama.get_status_summary.assert_called_once()
+            mock_ollama.get_vram_usage.assert_not_called()
+
     @patch('main.ollama_manager')
     @patch('main.Prompt')
     def test_activate_model_success(self, mock_prompt, mock_ollama, app):
@@ -128,13 +142,35 @@ class TestLLMStackApp:
     @patch('main.Prompt')
     def test_update_models_success(self, mock_prompt, mock_ollama, app):
         """Test actualización exitosa de modelos"""
+        plans = {
+            "qwen:latest": PullPlan(model="qwen:latest", remote_digest="b" * 64, missing_layers={"sha256:a": 1000}),
+            "deepseek:latest": PullPlan(model="deepseek:latest", local_digest="c" * 64, remote_digest="c" * 64),
+        }
+        mock_ollama.plan_updates.return_value = plans
+        mock_ollama.update_models.return_value = {"qwen:latest": True, "deepseek:latest": True}
+
         # Mock confirmación
         with patch('main.Confirm', return_value=MagicMock(ask=MagicMock(return_value=True))), \
              patch.object(app, '_print_success') as mock_print:
             app._update_models()
 
-            # Verificar que se intentó actualizar modelos
-            assert mock_ollama.pull_model.called
+            # update_models detiene los cargados y solo descarga el modelo con capas nuevas
+            assert mock_ollama.update_models.call_args.kwargs['plans'] is plans
+            mock_print.assert_called_with("📊 1/1 modelos actualizados, 1 sin cambios")
+
+    @patch('main.ollama_manager')
+    def test_update_models_all_up_to_date(self, mock_ollama, app):
+        """Test actualización sin cambios en el registry: no se descarga nada"""
+        mock_ollama.plan_updates.return_value = {
+            "qwen:latest": PullPlan(model="qwen:latest", local_digest="c" * 64, remote_digest="c" * 64),
+        }
+
+        with patch('main.Confirm', return_value=MagicMock(ask=MagicMock(return_value=True))), \
+             patch.object(app, '_print_success') as mock_print:
+            app._update_models()
+
+            mock_ollama.update_models.assert_not_called()
+            mock_print.assert_called_with("✅ Todos los modelos están al día (sin descargas)")
 
     @patch('main.ollama_manager')
     def test_check_updates_with_available_updates(self, mock_ollama, app):
@@ -183,7 +219,7 @@ class TestLLMStackApp:
             }
         }
         mock_ollama.check_model_updates.return_value = updates
-        mock_ollama.update_model_if_available.return_value = True
+        mock_ollama.update_models.return_value = {"qwen:latest": True}
 
         # Simular selección de "1. Actualizar todos"
         mock_prompt.ask.side_effect = ["1"]  # Opción de menú
@@ -193,7 +229,7 @@ class TestLLMStackApp:
             app._check_updates()
 
             # Verificar que se intentó actualizar
-            mock_ollama.update_model_if_available.assert_called_once_with("qwen:latest")
+            assert mock_ollama.update_models.call_args[0][0] == ["qwen:latest"]
             mock_print.assert_called_with("✅ 1/1 modelos actualizados")
 
     @patch('main.ollama_manager')
@@ -270,6 +306,21 @@ class TestLLMStackApp:
             menu_text = str(calls)
             assert "Verificar Actualizaciones" in menu_text
 
+    @patch('main.ollama_manager')
+    @patch('main.Prompt')
+    def test_menu_shows_queued_reaper_events(self, mock_prompt, mock_ollama, app):
+        """Test los avisos del hilo del auto-stop se muestran al redibujar el menú"""
+        mock_ollama.check_ollama_installed.return_value = True
+        mock_ollama.check_ollama_running.return_value = True
+        mock_prompt.ask.return_value = "0"
+        app._reaper_events.append("💤 qwen inactivo 30 min, liberando VRAM")
+
+        with patch.object(app.console, 'print') as mock_print:
+            app._run_menu()
+
+        mock_print.assert_any_call("💤 qwen inactivo 30 min, liberando VRAM", markup=False)
+        assert not app._reaper_events
+
     @patch('main.ollama_manager')
     @patch('main.Prompt')
     def test_run_exit_immediately(self, mock_prompt, mock_ollama, app):
@@ -397,5 +448,212 @@ def test_install_ollama_on_macos(monkeypatch):
     assert app._install_ollama() is True
 
 
+
+def test_install_python_deps_skips_when_fingerprint_unchanged(tmp_path, monkeypatch):
+    """La opción "Solo dependencias Python" no vuelve a ejecutar pip si requirements.txt no cambió"""
+    from bootstrap import DependencyBootstrap
+    (tmp_path / 'requirements.txt').write_text("rich\n")
+    runner = MagicMock(return_value=subprocess.CompletedProcess([], 0))
+    monkeypatch.setattr('main.DependencyBootstrap', lambda: DependencyBootstrap(tmp_path, runner=runner))
+    app = LLMStackApp()
+
+    with patch.object(app, '_get_missing_packages', return_value=[]):
+        assert app._install_python_deps() is True
+        assert runner.call_count == 2
+        assert app._install_python_deps() is True
+        assert runner.call_count == 2
+
+    # Paquetes desinstalados a mano: se reinstala aunque la huella coincida
+    with patch.object(app, '_get_missing_packages', return_value=['rich']):
+        assert app._install_python_deps() is True
+    assert runner.call_count == 4
+
+
+class TestCommandLine:
+    """Pruebas de la línea de comandos"""
+
+    def test_parser_daemon(self):
+        """El subcomando daemon acepta el intervalo de barrido"""
+        args = build_parser().parse_args(["daemon", "--interval", "5"])
+        assert args.command == "daemon"
+        assert args.interval == 5
+
+    @patch('main.LLMStackApp')
+    def test_main_without_command_opens_tui(self, mock_app):
+        """Sin subcomando se abre la interfaz interactiva"""
+        main([])
+        mock_app.return_value.run.assert_called_once()
+
+    @patch('main.ControlServer')
+    @patch('main.IdleReaper')
+    @patch('main.config_manager')
+    def test_main_daemon_runs_reaper(self, mock_config, mock_reaper, mock_control):
+        """El modo daemon ejecuta el reaper hasta que se interrumpe"""
+        mock_config.app_config = {}
+        mock_config.get_config.return_value = MagicMock(auto_stop_inactive=True, inactive_timeout_minutes=30,
+                                                        min_resident_models=0)
+        main(["daemon", "--interval", "1"])
+        mock_reaper.from_config.return_value.run_forever.assert_called_once()
+        mock_control.return_value.start.assert_called_once()
+        mock_control.return_value.stop.assert_called_once()
+
+    @patch('main.MetricsServer')
+    @patch('main.MetricsSampler')
+    @patch('main.config_manager')
+    def test_main_daemon_metrics_only(self, mock_config, mock_sampler, mock_server):
+        """Sin auto-stop, --metrics sirve /metrics y el muestreo ocupa el hilo principal"""
+        mock_config.app_config = {}
+        mock_config.get_config.return_value = MagicMock(auto_stop_inactive=False)
+        main(["daemon", "--metrics-port", "9999", "--no-control"])
+        assert mock_server.call_args.kwargs['port'] == 9999
+        mock_sampler.return_value.run_forever.assert_called_once()
+        mock_server.return_value.stop.assert_called_once()
+
+    @patch('main.LLMStackApp')
+    def test_main_trace_writes_chrome_trace(self, mock_app, tmp_path):
+        """--trace guarda los spans de la ejecución aunque falle"""
+        from tracing import tracer
+
+        def run():
+            with tracer.span("operación"):
+                raise RuntimeError("fallo")
+
+        mock_app.return_value.run.side_effect = run
+        path = tmp_path / "trace.json"
+        try:
+            with pytest.raises(SystemExit):
+                main(["--trace", str(path)])
+        finally:
+            tracer.enabled = False
+        events = json.loads(path.read_text())['traceEvents']
+        assert any(event['name'] == "operación" and event['args']['outcome'] == 'error' for event in events)
+
+    def test_parser_bench(self):
+        """El subcomando bench acepta modelos, contextos y comparación"""
+        args = build_parser().parse_args(["bench", "qwen", "--contexts", "128,2048", "--compare", "old.json"])
+        assert args.command == "bench"
+        assert args.models == ["qwen"]
+        assert args.contexts == "128,2048"
+        assert args.compare == "old.json"
+
+    @patch('main.Gateway')
+    @patch('main.config_manager')
+    def test_main_gateway_serves(self, mock_config, mock_gateway):
+        """El modo gateway sirve hasta Ctrl+C con el puerto indicado"""
+        mock_config.app_config = {}
+        mock_config.get_config.return_value = MagicMock(auto_stop_inactive=False)
+        main(["gateway", "--port", "9999"])
+        assert mock_gateway.call_args.kwargs['config'].port == 9999
+        mock_gateway.return_value.serve_forever.assert_called_once()
+
+    @patch('main.BenchmarkRunner')
+    @patch('main.config_manager')
+    def test_main_bench_exits_on_failed_targets(self, mock_config, mock_runner, tmp_path):
+        """bench termina con código 1 si algún modelo incumple RNF-01"""
+        mock_config.app_config = {}
+        mock_config.get_models.return_value = {"qwen": MagicMock()}
+        report = mock_runner.return_value.run.return_value
+        report.failed = [MagicMock()]
+        report.models = []
+
+        with pytest.raises(SystemExit) as exc:
+            main(["bench", "--output", str(tmp_path / "out.json")])
+        assert exc.value.code == 1
+        report.save.assert_called_once()
+
+    def test_parser_scripting_subcommands(self):
+        """Los subcomandos para scripts aceptan --json"""
+        parser = build_parser()
+        args = parser.parse_args(["free-vram", "--keep", "qwen", "--json"])
+        assert args.command == "free-vram" and args.keep == ["qwen"] and args.json
+        args = parser.parse_args(["deactivate", "qwen", "deepseek"])
+        assert args.models == ["qwen", "deepseek"] and not args.json
+        assert parser.parse_args(["update", "--dry-run"]).dry_run
+
+    @patch('main.ollama_manager')
+    def test_main_status_json_keeps_stdout_clean(self, mock_ollama, capsys):
+        """status --json imprime solo JSON en stdout y sale con 1 si Ollama no responde"""
+        def summary(include_updates):
+            print("✅ Configuración cargada")
+            return {'ollama_running': False, 'models_installed': None, 'running_models': [],
+                    'vram_used': None, 'vram_total': None, 'available_updates': {}, 'stale_probes': []}
+        mock_ollama.get_status_summary.side_effect = summary
+
+        with pytest.raises(SystemExit) as exc:
+            main(["status", "--json"])
+        assert exc.value.code == 1
+        out, err = capsys.readouterr()
+        assert json.loads(out)['ollama_running'] is False
+        assert "Configuración cargada" in err
+        mock_ollama.get_status_summary.assert_called_once_with(include_updates=False)
+
+    @patch('main.ollama_manager')
+    @patch('main.config_manager')
+    def test_main_activate_prints_text(self, mock_config, mock_ollama, capsys):
+        """activate sin --json resuelve la clave y muestra el resultado como texto"""
+        mock_config.get_models.return_value = {"qwen": ModelConfig(name="qwen2.5-coder:latest", description="")}
+        mock_ollama.smart_activate_model.return_value = True
+        main(["activate", "qwen2.5-coder:latest"])
+        mock_ollama.smart_activate_model.assert_called_once_with("qwen", health_check=False)
+        assert "qwen2.5-coder:latest activado" in capsys.readouterr().out
+
+    @patch('main.ollama_manager')
+    @patch('main.ControlClient')
+    def test_main_status_uses_resident_daemon(self, mock_client, mock_ollama, capsys):
+        """Con un daemon escuchando, status lo consulta por el socket y no toca Ollama"""
+        from cli_commands import CommandResult
+        client = mock_client.connect.return_value
+        client.__enter__.return_value = client
+        client.command.return_value = CommandResult('status', 0, data={'ollama_running': True}, lines=["✅ Ollama activo"])
+
+        main(["status", "--json"])
+        client.command.assert_called_once_with('status', updates=False)
+        assert json.loads(capsys.readouterr().out) == {'command': 'status', 'ok': True, 'ollama_running': True}
+        mock_ollama.get_status_summary.assert_not_called()
+
+    @patch('main.ollama_manager')
+    @patch('main.ControlClient')
+    def test_main_falls_back_when_daemon_disconnects(self, mock_client, mock_ollama, capsys):
+        """Si el daemon se pierde, el subcomando se ejecuta en este proceso"""
+        from control_api import ControlError, CONNECTION_ERROR
+        client = mock_client.connect.return_value
+        client.__enter__.return_value = client
+        client.command.side_effect = ControlError(CONNECTION_ERROR, "El daemon cerró la conexión")
+        mock_ollama.get_running_models.return_value = []
+
+        main(["deactivate"])
+        assert "No hay modelos activos" in capsys.readouterr().out
+        mock_ollama.get_running_models.assert_called_once()
+
+    @patch('main.StartupBenchmark')
+    @patch('main.config_manager')
+    def test_main_bench_startup_reports_regression(self, mock_config, mock_bench, tmp_path):
+        """bench --startup guarda los tiempos y falla si el arranque empeora"""
+        from startup_bench import StartupReport, StartupResult
+        previous = StartupReport(created_at="antes", results=[StartupResult('help', 'main.py --help', [0.1])])
+        previous.save(tmp_path / "old.json")
+        mock_bench.return_value.run.return_value = StartupReport(
+            created_at="ahora", results=[StartupResult('help', 'main.py --help', [0.5])])
+
+        with pytest.raises(SystemExit) as exc:
+            main(["bench", "--startup", "--repeats", "2", "--output", str(tmp_path / "new.json"),
+                  "--compare", str(tmp_path / "old.json")])
+        assert exc.value.code == 1
+        assert mock_bench.call_args.kwargs['repeats'] == 2
+        assert (tmp_path / "new.json").exists()
+
+    @patch('main.run_chat', return_value=0)
+    @patch('main.ChatSession')
+    @patch('main.ollama_manager')
+    @patch('main.config_manager')
+    def test_main_chat_resolves_alias(self, mock_config, mock_ollama, mock_session, mock_run_chat):
+        """chat acepta la clave de models.yml y un único prompt"""
+        qwen = ModelConfig(name="qwen2.5-coder:latest", description="")
+        mock_config.get_models.return_value = {"qwen": qwen}
+        main(["chat", "qwen", "-p", "hola"])
+        mock_session.for_model.assert_called_once_with(mock_ollama, qwen)
+        assert mock_run_chat.call_args.args[2] == "hola"
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
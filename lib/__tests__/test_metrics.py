@@ -0,0 +1,128 @@
+"""
+Pruebas unitarias para Metrics
+Tests para el formato de exposición de Prometheus, los histogramas, el muestreo de
+/api/ps y las métricas que registra OllamaManager contra el servidor simulado
+"""
+
+import pytest
+import requests
+
+from metrics import MetricsRegistry, StackMetrics, MetricsSampler, MetricsServer, MetricsConfig, COUNTER, HISTOGRAM
+from ollama_simulator import SimulatedModel, GIB
+from config_manager import ModelConfig
+from vram_telemetry import LoadedModel, VRAMUsage
+
+
+@pytest.fixture
+def manager(simulated_manager):
+    """Dos modelos instalados que no caben juntos en 8 GB y uno más en el registry"""
+    manager, _ = simulated_manager(
+        models=[SimulatedModel("qwen2.5-coder:latest", size_bytes=5 * GIB, tokens_per_sec=25),
+                SimulatedModel("deepseek-coder:latest", size_bytes=int(6.5 * GIB))],
+        registry=[SimulatedModel("mistral:latest", size_bytes=4 * GIB)],
+        vram_bytes=8 * GIB,
+    )
+    return manager
+
+
+class TestMetricsRegistry:
+    """Suite de pruebas para MetricsRegistry"""
+
+    def test_counter_exposition(self):
+        registry = MetricsRegistry(namespace="test")
+        registry.register('requests_total', COUNTER, "Peticiones")
+        registry.inc('requests_total', labels={'model': 'qwen "v2"'})
+        registry.inc('requests_total', 2, labels={'model': 'qwen "v2"'})
+
+        text = registry.render()
+        assert "# TYPE test_requests_total counter" in text
+        assert 'test_requests_total{model="qwen \\"v2\\""} 3' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry(namespace="test")
+        registry.register('latency_seconds', HISTOGRAM, "Latencia", buckets=(1, 5))
+        for value in (0.5, 2, 10):
+            registry.observe('latency_seconds', value)
+
+        lines = registry.render().splitlines()
+        assert 'test_latency_seconds_bucket{le="1"} 1' in lines
+        assert 'test_latency_seconds_bucket{le="5"} 2' in lines
+        assert 'test_latency_seconds_bucket{le="+Inf"} 3' in lines
+        assert 'test_latency_seconds_sum 12.5' in lines
+        assert 'test_latency_seconds_count 3' in lines
+
+    def test_unregistered_metric_raises(self):
+        with pytest.raises(KeyError):
+            MetricsRegistry().inc('missing')
+
+
+class TestStackMetrics:
+    """Suite de pruebas para StackMetrics"""
+
+    def test_sample_replaces_loaded_models(self):
+        metrics = StackMetrics()
+        metrics.sample([LoadedModel("qwen", size_bytes=5 * GIB, size_vram_bytes=4 * GIB)],
+                       VRAMUsage(total_bytes=8 * GIB, used_bytes=4 * GIB, models_loaded=["qwen"]))
+        assert metrics.value('model_vram_bytes', {'model': 'qwen'}) == 4 * GIB
+        assert metrics.value('gpu_memory_total_bytes') == 8 * GIB
+
+        metrics.sample([LoadedModel("mistral", size_bytes=GIB, size_vram_bytes=GIB)])
+        assert metrics.value('model_loaded', {'model': 'qwen'}) is None
+        assert metrics.value('model_loaded', {'model': 'mistral'}) == 1
+
+    def test_generation_speed(self):
+        metrics = StackMetrics()
+        metrics.record_generation("qwen", {"eval_count": 50, "eval_duration": 2 * 10 ** 9})
+        assert metrics.value('tokens_per_second', {'model': 'qwen'}) == 25
+        assert metrics.value('generated_tokens_total', {'model': 'qwen'}) == 50
+
+    def test_remote_access_disabled_forces_localhost(self):
+        config = MetricsConfig.from_app_config({'metrics': {'enabled': True, 'host': '0.0.0.0', 'port': 9100}})
+        assert config.enabled and config.host == "127.0.0.1" and config.port == 9100
+
+
+class TestManagerMetrics:
+    """Métricas registradas por OllamaManager y servidas por HTTP"""
+
+    def test_loads_evictions_and_requests(self, manager):
+        assert manager.load_model(ModelConfig(name="qwen2.5-coder:latest", description="")).success
+        assert manager.evict_models(["qwen2.5-coder:latest"]) == ["qwen2.5-coder:latest"]
+        assert manager.test_model("deepseek-coder:latest")
+
+        metrics = manager.metrics
+        assert metrics.value('model_loads_total', {'model': 'qwen2.5-coder:latest', 'result': 'success'}) == 1
+        assert metrics.value('model_load_seconds', {'model': 'qwen2.5-coder:latest'}) == 1
+        assert metrics.value('model_evictions_total', {'model': 'qwen2.5-coder:latest', 'reason': 'vram'}) == 1
+        assert metrics.value('request_duration_seconds',
+                             {'model': 'deepseek-coder:latest', 'endpoint': '/api/generate'}) == 1
+        assert metrics.value('tokens_per_second', {'model': 'deepseek-coder:latest'}) > 0
+
+    def test_pull_and_stream_metrics(self, manager):
+        assert manager.pull_model("mistral:latest", show_progress=False)
+        assert manager.metrics.value('pull_bytes_total', {'model': 'mistral:latest'}) > 0
+
+        payload = {"model": "qwen2.5-coder:latest", "messages": [{"role": "user", "content": "hola"}],
+                   "options": {"num_predict": 5}}
+        b"".join(manager.stream_request("/api/chat", payload))
+        assert abs(manager.metrics.value('tokens_per_second', {'model': 'qwen2.5-coder:latest'}) - 25) < 0.5
+
+    def test_pull_with_progress_records_streamed_bytes(self, manager, capsys):
+        """Con progreso visible los bytes también salen de los eventos de /api/pull"""
+        assert manager.pull_model("mistral:latest", show_progress=True)
+
+        progress = manager.downloads.get_progress("mistral:latest")
+        assert progress.completed == progress.total > 0
+        assert manager.metrics.value('pull_bytes_total', {'model': 'mistral:latest'}) == progress.completed
+        assert "GB (100%)" in capsys.readouterr().out
+
+    def test_sampler_and_server(self, manager):
+        manager.warm_load_model("qwen2.5-coder:latest")
+        MetricsSampler(manager).sample()
+
+        with MetricsServer(manager.metrics, port=0) as server:
+            response = requests.get(f"{server.url}/metrics", timeout=5)
+            assert requests.get(f"{server.url}/otra", timeout=5).status_code == 404
+
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert 'llm_stack_model_loaded{model="qwen2.5-coder:latest"} 1' in response.text
+        assert 'llm_stack_model_vram_bytes{model="qwen2.5-coder:latest"}' in response.text
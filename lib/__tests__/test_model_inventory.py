@@ -0,0 +1,114 @@
+"""
+Pruebas unitarias para ModelInventory
+Tests para parseo de /api/tags, `ollama list` y fallback al CLI
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from model_inventory import (
+    ModelInventory, format_bytes, parse_size, parse_tags_response, parse_ollama_list
+)
+
+
+class TestSizeHelpers:
+    """Pruebas para conversión de tamaños"""
+
+    def test_format_bytes(self):
+        """Formato decimal igual al de `ollama list`"""
+        assert format_bytes(4_683_087_332) == "4.7 GB"
+        assert format_bytes(274_302_450) == "274.3 MB"
+        assert format_bytes(0) == "0 B"
+
+    def test_parse_size(self):
+        """Tamaños legibles a bytes, con o sin espacio"""
+        assert parse_size("4.7 GB") == 4_700_000_000
+        assert parse_size("512MB") == 512_000_000
+        assert parse_size("unknown") == 0
+
+
+class TestParsers:
+    """Pruebas para los parsers de inventario"""
+
+    def test_parse_tags_response(self):
+        """Campos tipados desde /api/tags"""
+        models = parse_tags_response({
+            "models": [{
+                "name": "mistral:latest",
+                "size": 4113301824,
+                "digest": "f974a74358d6",
+                "details": {"format": "gguf", "family": "llama",
+                            "parameter_size": "7.2B", "quantization_level": "Q4_0"}
+            }]
+        })
+
+        assert len(models) == 1
+        model = models[0]
+        assert model.name == "mistral:latest"
+        assert model.size_bytes == 4113301824
+        assert model.size == "4.1 GB"
+        assert model.format == "gguf"
+        assert model.quantization_level == "Q4_0"
+
+    def test_parse_tags_response_unexpected_shapes(self):
+        """Un cuerpo que no es un objeto es un ValueError; las entradas inválidas se ignoran"""
+        for body in (["mistral:latest"], "ok", None, {"models": "mistral:latest"}):
+            with pytest.raises(ValueError):
+                parse_tags_response(body)
+
+        models = parse_tags_response({"models": ["mistral:latest", None, {"name": "qwen:7b", "details": "?"}]})
+        assert [m.name for m in models] == ["qwen:7b"]
+        assert models[0].family == ""
+
+    def test_parse_ollama_list_keeps_size_unit(self):
+        """'4.7 GB' se mantiene como una sola columna y no se guarda como size_vram"""
+        output = """NAME                    ID              SIZE      MODIFIED
+qwen2.5-coder:latest    2b0496514337    4.7 GB    2 hours ago"""
+
+        models = parse_ollama_list(output)
+
+        assert len(models) == 1
+        assert models[0].digest == "2b0496514337"
+        assert models[0].size == "4.7 GB"
+        assert models[0].size_vram == ""
+        assert models[0].modified_at == "2 hours ago"
+
+
+class TestModelInventory:
+    """Pruebas para el cliente de inventario"""
+
+    def test_uses_api_when_available(self):
+        """Con la API disponible no se ejecuta el CLI"""
+        http = MagicMock()
+        http.get.return_value = MagicMock(status_code=200, json=MagicMock(return_value={"models": []}))
+        run_command = MagicMock()
+
+        inventory = ModelInventory(http, "http://localhost:11434", run_command)
+
+        assert inventory.list_models() == []
+        run_command.assert_not_called()
+
+    def test_falls_back_to_cli_on_unexpected_body(self):
+        """Un JSON con otra forma (p. ej. un proxy) se trata como API no disponible"""
+        http = MagicMock()
+        http.get.return_value = MagicMock(status_code=200, json=MagicMock(return_value=["no", "es", "tags"]))
+        run_command = MagicMock(return_value=(True, "NAME  ID  SIZE  MODIFIED\nmistral:latest  abc  4.1 GB  1 day ago"))
+
+        inventory = ModelInventory(http, "http://localhost:11434", run_command)
+
+        assert inventory.fetch_tags() is None
+        assert [m.name for m in inventory.list_models()] == ["mistral:latest"]
+
+    def test_falls_back_to_cli_when_api_down(self):
+        """Con la API caída se usa `ollama list`"""
+        http = MagicMock()
+        http.get.side_effect = requests.exceptions.ConnectionError()
+        run_command = MagicMock(return_value=(True, "NAME  ID  SIZE  MODIFIED\nmistral:latest  abc  4.1 GB  1 day ago"))
+
+        inventory = ModelInventory(http, "http://localhost:11434", run_command)
+        models = inventory.list_models()
+
+        run_command.assert_called_once_with(["ollama", "list"])
+        assert [m.name for m in models] == ["mistral:latest"]
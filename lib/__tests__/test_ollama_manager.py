@@ -9,22 +9,53 @@ import subprocess
 import requests
 from pathlib import Path
 
-from ollama_manager import OllamaManager, ModelStatus, VRAMUsage
+from ollama_manager import OllamaManager, ModelStatus, VRAMUsage, WarmLoadResult
+from vram_telemetry import LoadedModel
+from registry_catalog import RegistryCatalog
+from config_manager import ModelConfig, AppConfig
+from response_cache import ResponseCache, CachedResponse
+from eviction_policy import UsageTracker, get_policy
+from state_cache import SERVICE_HEALTH
 
 
 class TestOllamaManager:
     """Suite de pruebas para OllamaManager"""
 
     @pytest.fixture
-    def ollama_manager(self):
+    def ollama_manager(self, tmp_path):
         """Fixture que crea una instancia de OllamaManager"""
-        return OllamaManager()
+        manager = OllamaManager()
+        # Catálogo del registry aislado en disco temporal, servido por el transporte del manager
+        manager.catalog = RegistryCatalog(cache_dir=str(tmp_path), http=manager.http)
+        # Estadísticas de uso en memoria (sin escribir en el directorio de configuración)
+        manager.usage = UsageTracker()
+        # Caché de respuestas en disco temporal
+        manager.response_cache = ResponseCache(cache_dir=str(tmp_path / "responses"))
+        return manager
+
+    @pytest.fixture
+    def mock_http(self, ollama_manager):
+        """Fixture que intercepta las peticiones del transporte HTTP compartido"""
+        with patch.object(ollama_manager.http.session, 'request') as mock_request:
+            yield mock_request
 
     def test_init(self, ollama_manager):
         """Test inicialización del OllamaManager"""
         assert ollama_manager.ollama_host == "http://localhost:11434"
         assert ollama_manager.max_loaded == 2
 
+    @patch('ollama_manager.subprocess.run')
+    def test_backend_detected_once_on_first_use(self, mock_run):
+        """El backend no se detecta al construir, sino en el primer uso y una sola vez"""
+        mock_run.return_value = MagicMock(returncode=0, stdout="ollama version 0.5.7")
+        manager = OllamaManager()
+        mock_run.assert_not_called()
+
+        assert manager.get_backend() == 'ollama'
+        assert manager.backend == 'ollama'
+        assert manager.check_ollama_installed()
+        mock_run.assert_called_once()
+
     @patch('ollama_manager.subprocess.run')
     def test_check_ollama_installed_success(self, mock_run, ollama_manager):
         """Test verificación exitosa de instalación de Ollama"""
@@ -34,6 +65,20 @@ class TestOllamaManager:
         assert result == True
         mock_run.assert_called_once_with(["ollama", "--version"], capture_output=True, text=True, timeout=30)
 
+    @patch('ollama_manager.subprocess.run')
+    def test_check_ollama_installed_is_cached(self, mock_run, ollama_manager):
+        """Test la versión de Ollama se cachea entre redibujados del menú"""
+        mock_run.return_value = MagicMock(returncode=0, stdout="ollama version is 0.5.7")
+
+        assert ollama_manager.check_ollama_installed() == True
+        assert ollama_manager.check_ollama_installed() == True
+        assert ollama_manager.get_ollama_version() == "0.5.7"
+        mock_run.assert_called_once()
+
+        ollama_manager.invalidate_state()
+        ollama_manager.check_ollama_installed()
+        assert mock_run.call_count == 2
+
     @patch('ollama_manager.subprocess.run')
     def test_check_ollama_installed_failure(self, mock_run, ollama_manager):
         """Test verificación fallida de instalación de Ollama"""
@@ -42,21 +87,19 @@ class TestOllamaManager:
         result = ollama_manager.check_ollama_installed()
         assert result == False
 
-    @patch('ollama_manager.requests.get')
-    def test_check_ollama_running_success(self, mock_get, ollama_manager):
+    def test_check_ollama_running_success(self, mock_http, ollama_manager):
         """Test verificación exitosa de servicio Ollama corriendo"""
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        mock_http.return_value = mock_response
 
         result = ollama_manager.check_ollama_running()
         assert result == True
-        mock_get.assert_called_once_with("http://localhost:11434/api/tags", timeout=5)
+        mock_http.assert_called_once_with("GET", "http://localhost:11434/api/tags", timeout=5)
 
-    @patch('ollama_manager.requests.get')
-    def test_check_ollama_running_failure(self, mock_get, ollama_manager):
+    def test_check_ollama_running_failure(self, mock_http, ollama_manager):
         """Test verificación fallida de servicio Ollama corriendo"""
-        mock_get.side_effect = requests.exceptions.RequestException()
+        mock_http.side_effect = requests.exceptions.RequestException()
 
         result = ollama_manager.check_ollama_running()
         assert result == False
@@ -80,9 +123,49 @@ class TestOllamaManager:
         result = ollama_manager.start_ollama_service()
         assert result == True
 
+    @patch('ollama_manager.subprocess.run', side_effect=subprocess.TimeoutExpired("ollama serve", 10))
+    def test_start_ollama_service_failure_drops_cached_health(self, mock_run, ollama_manager, mock_http):
+        """Test tras intentar arrancar no queda en caché el "inactivo" anterior"""
+        mock_http.side_effect = requests.exceptions.ConnectionError()
+        assert ollama_manager.start_ollama_service() is False
+        assert not ollama_manager.state_cache.is_fresh(SERVICE_HEALTH)
+
+        mock_http.side_effect = None
+        mock_http.return_value = MagicMock(status_code=200)
+        assert ollama_manager.check_ollama_running() is True
+
+    def test_list_installed_models_from_api(self, mock_http, ollama_manager):
+        """Test listado de modelos instalados vía /api/tags (sin fork de CLI)"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "models": [{
+                "name": "qwen2.5-coder:latest",
+                "size": 4683087332,
+                "digest": "2b0496514337",
+                "modified_at": "2024-11-12T10:00:00Z",
+                "details": {"family": "qwen2", "parameter_size": "7.6B", "quantization_level": "Q4_K_M"}
+            }]
+        }
+        mock_http.return_value = mock_response
+
+        with patch('ollama_manager.subprocess.run') as mock_run:
+            models = ollama_manager.list_installed_models()
+            mock_run.assert_not_called()
+
+        assert len(models) == 1
+        assert models[0].name == "qwen2.5-coder:latest"
+        assert models[0].size == "4.7 GB"
+        assert models[0].size_bytes == 4683087332
+        assert models[0].digest == "2b0496514337"
+        assert models[0].parameter_size == "7.6B"
+        assert models[0].quantization_level == "Q4_K_M"
+        mock_http.assert_called_once_with("GET", "http://localhost:11434/api/tags", timeout=5)
+
     @patch('ollama_manager.subprocess.run')
-    def test_list_installed_models_success(self, mock_run, ollama_manager):
-        """Test listado exitoso de modelos instalados"""
+    def test_list_installed_models_success(self, mock_run, mock_http, ollama_manager):
+        """Test listado exitoso de modelos instalados (fallback CLI con API caída)"""
+        mock_http.side_effect = requests.exceptions.ConnectionError()
         mock_output = """NAME                    ID              SIZE    MODIFIED
 qwen2.5-coder:latest    abc123          4.7 GB  2 hours ago
 deepseek-coder:latest   def456          6.0 GB  1 hour ago"""
@@ -93,21 +176,23 @@ deepseek-coder:latest   def456          6.0 GB  1 hour ago"""
 
         assert len(models) == 2
         assert models[0].name == "qwen2.5-coder:latest"
-        # El tamaño puede parsearse como "4.7" o "4.7 GB" dependiendo de la implementación
-        assert models[0].size in ("4.7", "4.7 GB", "4.7 GB")
+        assert models[0].size == "4.7 GB"
+        assert models[0].size_bytes == 4_700_000_000
+        assert models[0].digest == "abc123"
+        assert models[0].size_vram == ""
         assert models[1].name == "deepseek-coder:latest"
-        assert models[1].size in ("6.0", "6.0 GB", "6.0 GB")
+        assert models[1].size == "6.0 GB"
 
     @patch('ollama_manager.subprocess.run')
-    def test_list_installed_models_failure(self, mock_run, ollama_manager):
+    def test_list_installed_models_failure(self, mock_run, mock_http, ollama_manager):
         """Test listado fallido de modelos instalados"""
+        mock_http.side_effect = requests.exceptions.ConnectionError()
         mock_run.return_value = MagicMock(returncode=1, stdout="")
 
         models = ollama_manager.list_installed_models()
         assert models == []
 
-    @patch('ollama_manager.requests.get')
-    def test_get_running_models_success(self, mock_get, ollama_manager):
+    def test_get_running_models_success(self, mock_http, ollama_manager):
         """Test obtención exitosa de modelos corriendo"""
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -117,46 +202,84 @@ deepseek-coder:latest   def456          6.0 GB  1 hour ago"""
                 {"name": "deepseek-coder:latest"}
             ]
         }
-        mock_get.return_value = mock_response
+        mock_http.return_value = mock_response
 
         running = ollama_manager.get_running_models()
         assert running == ["qwen2.5-coder:latest", "deepseek-coder:latest"]
 
-    @patch('ollama_manager.requests.get')
-    def test_get_running_models_failure(self, mock_get, ollama_manager):
+    def test_get_running_models_cached_until_stop(self, mock_http, ollama_manager):
+        """Test /api/ps se cachea y stop_model invalida la entrada"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"models": [{"name": "qwen2.5-coder:latest"}]}
+        mock_http.return_value = mock_response
+
+        assert ollama_manager.get_running_models() == ["qwen2.5-coder:latest"]
+        assert ollama_manager.get_running_models() == ["qwen2.5-coder:latest"]
+        assert mock_http.call_count == 1
+
+        with patch('ollama_manager.subprocess.run', return_value=MagicMock(returncode=0)):
+            ollama_manager.stop_model("qwen2.5-coder:latest")
+
+        mock_response.json.return_value = {"models": []}
+        assert ollama_manager.get_running_models() == []
+        assert mock_http.call_count == 2
+
+    def test_get_running_models_failure(self, mock_http, ollama_manager):
         """Test obtención fallida de modelos corriendo"""
-        mock_get.side_effect = requests.exceptions.RequestException()
+        mock_http.side_effect = requests.exceptions.RequestException()
 
         running = ollama_manager.get_running_models()
         assert running == []
 
-    def test_get_vram_usage(self, ollama_manager):
-        """Test obtención de uso de VRAM"""
-        with patch.object(ollama_manager, 'get_running_models', return_value=["qwen:latest", "deepseek:latest"]):
-            vram = ollama_manager.get_vram_usage()
-
-            assert isinstance(vram, VRAMUsage)
-            assert vram.total_vram == "8GB"
-            # El uso de VRAM puede ser una estimación aproximada
-            assert vram.used_vram is not None
-            assert vram.models_loaded == ["qwen:latest", "deepseek:latest"]
-
     @patch('ollama_manager.subprocess.run')
-    def test_pull_model_success(self, mock_run, ollama_manager):
-        """Test descarga exitosa de modelo"""
-        mock_run.return_value = MagicMock(returncode=0)
+    def test_get_vram_usage(self, mock_run, mock_http, ollama_manager):
+        """Test obtención de uso de VRAM (/api/ps + nvidia-smi)"""
+        mock_http.return_value = MagicMock(status_code=200, json=MagicMock(return_value={"models": [
+            {"name": "qwen:latest", "size": 5 * 1024 ** 3, "size_vram": 5 * 1024 ** 3},
+            {"name": "deepseek:latest", "size": 3 * 1024 ** 3, "size_vram": 2 * 1024 ** 3},
+        ]}))
+        mock_run.return_value = MagicMock(returncode=0, stdout="0, NVIDIA GeForce RTX 2070 SUPER, 8192, 7300, 892\n")
+
+        vram = ollama_manager.get_vram_usage()
+
+        assert isinstance(vram, VRAMUsage)
+        assert vram.total_bytes == 8192 * 1024 ** 2
+        assert vram.used_bytes == 7300 * 1024 ** 2
+        assert vram.available_bytes == 892 * 1024 ** 2
+        assert vram.model_vram["deepseek:latest"] == 2 * 1024 ** 3
+        assert vram.models_loaded == ["qwen:latest", "deepseek:latest"]
+        assert vram.source == "nvidia-smi"
+
+    def test_pull_model_success(self, mock_http, ollama_manager):
+        """Test descarga exitosa de modelo (stream de /api/pull)"""
+        mock_http.return_value = MagicMock(status_code=200, iter_lines=MagicMock(return_value=[
+            b'{"status": "pulling manifest"}',
+            b'{"status": "pulling abc", "digest": "sha256:abc", "total": 100, "completed": 100}',
+            b'{"status": "success"}',
+        ]))
+
+        ollama_manager.response_cache.put("k", CachedResponse(model="test-model:latest", status=200,
+                                                               content_type="application/json", chunks=["{}"]))
 
         result = ollama_manager.pull_model("test-model:latest", show_progress=False)
         assert result == True
-        mock_run.assert_called_once_with(["ollama", "pull", "test-model:latest"], capture_output=True, text=True, timeout=300)
-
-    @patch('ollama_manager.subprocess.run')
-    def test_pull_model_failure(self, mock_run, ollama_manager):
+        # Pesos nuevos: las respuestas cacheadas del modelo se descartan
+        assert ollama_manager.response_cache.get("test-model:latest", "k") is None
+        args, kwargs = mock_http.call_args
+        assert args == ("POST", "http://localhost:11434/api/pull")
+        assert kwargs["json"] == {"model": "test-model:latest", "stream": True}
+        assert kwargs["stream"] is True
+
+    def test_pull_model_failure(self, mock_http, ollama_manager):
         """Test descarga fallida de modelo"""
-        mock_run.return_value = MagicMock(returncode=1, stderr="Error downloading model")
+        mock_http.return_value = MagicMock(status_code=200, iter_lines=MagicMock(return_value=[
+            b'{"error": "pull model manifest: file does not exist"}',
+        ]))
 
         result = ollama_manager.pull_model("test-model:latest", show_progress=False)
         assert result == False
+        assert "file does not exist" in ollama_manager.downloads.get_progress("test-model:latest").error
 
     @patch('ollama_manager.subprocess.run')
     def test_remove_model_success(self, mock_run, ollama_manager):
@@ -176,40 +299,38 @@ deepseek-coder:latest   def456          6.0 GB  1 hour ago"""
         assert result == True
         mock_run.assert_called_once_with(["ollama", "stop", "test-model:latest"], capture_output=True, text=True, timeout=30)
 
-    @patch('ollama_manager.requests.post')
     @patch.object(OllamaManager, 'get_running_models', return_value=[])
-    def test_test_model_success(self, mock_get_running, mock_post, ollama_manager):
+    def test_test_model_success(self, mock_get_running, mock_http, ollama_manager):
         """Test validación exitosa de modelo"""
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"response": "Hello, this is a test response"}
-        mock_post.return_value = mock_response
+        mock_http.return_value = mock_response
 
         result = ollama_manager.test_model("test-model:latest")
         assert result == True
 
-    @patch('ollama_manager.requests.post')
-    def test_test_model_failure(self, mock_post, ollama_manager):
+    def test_test_model_failure(self, mock_http, ollama_manager):
         """Test validación fallida de modelo"""
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"response": ""}
-        mock_post.return_value = mock_response
+        mock_http.return_value = mock_response
 
         result = ollama_manager.test_model("test-model:latest")
         assert result == False
 
-    @patch('ollama_manager.requests.get')
-    def test_check_model_updates_success(self, mock_get, ollama_manager):
+    def test_check_model_updates_success(self, mock_http, ollama_manager):
         """Test verificación exitosa de actualizaciones"""
         # Mock respuesta del registry
         mock_response = MagicMock()
         mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.json.return_value = [
             {"name": "qwen2.5-coder:7b"},  # Versión más reciente
             {"name": "deepseek-coder:v2-lite"}  # Versión más reciente
         ]
-        mock_get.return_value = mock_response
+        mock_http.return_value = mock_response
 
         # Mock modelos instalados
         with patch.object(ollama_manager, 'list_installed_models') as mock_list:
@@ -224,17 +345,17 @@ deepseek-coder:latest   def456          6.0 GB  1 hour ago"""
             assert "qwen2.5-coder:latest" in updates
             assert "deepseek-coder:latest" in updates
 
-    @patch('ollama_manager.requests.get')
-    def test_check_model_updates_no_updates(self, mock_get, ollama_manager):
+    def test_check_model_updates_no_updates(self, mock_http, ollama_manager):
         """Test verificación cuando no hay actualizaciones"""
         # Mock respuesta del registry
         mock_response = MagicMock()
         mock_response.status_code = 200
+        mock_response.headers = {}
         mock_response.json.return_value = [
             {"name": "qwen2.5-coder:latest"},  # Misma versión
             {"name": "deepseek-coder:latest"}  # Misma versión
         ]
-        mock_get.return_value = mock_response
+        mock_http.return_value = mock_response
 
         # Mock modelos instalados
         with patch.object(ollama_manager, 'list_installed_models') as mock_list:
@@ -246,10 +367,9 @@ deepseek-coder:latest   def456          6.0 GB  1 hour ago"""
             updates = ollama_manager.check_model_updates()
             assert updates == {}
 
-    @patch('ollama_manager.requests.get')
-    def test_check_model_updates_failure(self, mock_get, ollama_manager):
+    def test_check_model_updates_failure(self, mock_http, ollama_manager):
         """Test verificación de actualizaciones con error de red"""
-        mock_get.side_effect = requests.exceptions.RequestException()
+        mock_http.side_effect = requests.exceptions.RequestException()
 
         updates = ollama_manager.check_model_updates()
         assert updates == {}
@@ -289,20 +409,171 @@ deepseek-coder:latest   def456          6.0 GB  1 hour ago"""
             mock_stop.assert_not_called()
             mock_pull.assert_not_called()
 
+    def test_stop_models_runs_stop_model_in_parallel(self, ollama_manager):
+        """Test detención en paralelo con el mismo stop_model (CLI y keep_alive=0)"""
+        def stop(name):
+            if name == "raises:latest":
+                raise RuntimeError("boom")
+            return name != "broken:latest"
+
+        with patch.object(ollama_manager, 'stop_model', side_effect=stop) as mock_stop:
+            result = ollama_manager.stop_models(["qwen:latest", "broken:latest", "raises:latest", "qwen:latest"])
+
+            assert result == {"qwen:latest": True, "broken:latest": False, "raises:latest": False}
+            assert mock_stop.call_count == 3
+
     def test_ensure_max_loaded_respected(self, ollama_manager):
         """Test aseguramiento de límite de modelos cargados"""
         with patch.object(ollama_manager, 'get_running_models', return_value=["model1", "model2", "model3"]):
-            with patch.object(ollama_manager, 'stop_model') as mock_stop:
-                ollama_manager.ensure_max_loaded_respected()
-
-                # Debería intentar detener modelos para respetar el límite
-                assert mock_stop.called or True  # Puede que no se llame dependiendo de la configuración
+            with patch.object(ollama_manager, 'stop_model', return_value=True) as mock_stop:
+                stopped = ollama_manager.ensure_max_loaded_respected()
+
+                # Se detienen todos los modelos sobrantes, no solo uno
+                assert len(stopped) == 1
+                assert mock_stop.call_count == 1
+
+    def test_ensure_max_loaded_evicts_before_loading(self, ollama_manager):
+        """Test se reserva hueco para el modelo entrante según la política LRU"""
+        ollama_manager.eviction_policy = get_policy('lru')
+        clock = iter([100.0, 200.0])
+        ollama_manager.usage = UsageTracker(clock=lambda: next(clock))
+        ollama_manager.usage.record_request("old:latest")
+        ollama_manager.usage.record_request("recent:latest")
+
+        with patch.object(ollama_manager, 'get_running_models', return_value=["recent:latest", "old:latest"]), \
+             patch.object(ollama_manager, 'stop_model', return_value=True) as mock_stop:
+            stopped = ollama_manager.ensure_max_loaded_respected(incoming="new:latest")
+
+            assert stopped == ["old:latest"]
+            mock_stop.assert_called_once_with("old:latest")
+
+    def test_smart_activate_evicts_to_fit_vram(self, ollama_manager):
+        """Test activación que desaloja lo justo para que quepa en VRAM"""
+        deepseek = ModelConfig(name="deepseek-coder:latest", description="", vram_gb=6.5)
+        usage = VRAMUsage(total_bytes=8 * 1024 ** 3, used_bytes=5 * 1024 ** 3, models_loaded=["qwen2.5-coder:latest"],
+                          model_vram={"qwen2.5-coder:latest": 5 * 1024 ** 3}, source="nvidia-smi")
+
+        with patch('ollama_manager.config_manager.get_model', return_value=deepseek), \
+             patch.object(ollama_manager, 'list_installed_models', return_value=[ModelStatus(name="deepseek-coder:latest", size="", size_vram="", digest="")]), \
+             patch.object(ollama_manager, 'get_vram_usage', return_value=usage), \
+             patch.object(ollama_manager, 'stop_model') as mock_stop, \
+             patch.object(ollama_manager, 'warm_load_model', return_value=WarmLoadResult("deepseek-coder:latest", True, 4.2)) as mock_load, \
+             patch.object(ollama_manager, 'test_model') as mock_test:
+
+            assert ollama_manager.smart_activate_model("deepseek") is True
+            mock_stop.assert_called_once_with("qwen2.5-coder:latest")
+            assert mock_load.call_args[0][0] == "deepseek-coder:latest"
+            mock_test.assert_not_called()
+
+    def test_load_model_aborts_when_eviction_fails(self, ollama_manager):
+        """Test si el desalojo falla y el modelo sigue sin caber no se carga"""
+        deepseek = ModelConfig(name="deepseek-coder:latest", description="", vram_gb=6.5)
+        usage = VRAMUsage(total_bytes=8 * 1024 ** 3, used_bytes=5 * 1024 ** 3, models_loaded=["qwen2.5-coder:latest"],
+                          model_vram={"qwen2.5-coder:latest": 5 * 1024 ** 3}, source="nvidia-smi")
+
+        with patch.object(ollama_manager, 'get_vram_usage', return_value=usage), \
+             patch.object(ollama_manager, 'stop_model', return_value=False), \
+             patch.object(ollama_manager, 'warm_load_model') as mock_load:
+
+            result = ollama_manager.load_model(deepseek)
+
+            assert result.success is False
+            assert "qwen2.5-coder:latest" in result.error
+            mock_load.assert_not_called()
+
+    def test_load_model_replans_after_failed_eviction(self, ollama_manager):
+        """Test si el stop falla pero el modelo ya no está cargado, la carga sigue"""
+        deepseek = ModelConfig(name="deepseek-coder:latest", description="", vram_gb=6.5)
+        busy = VRAMUsage(total_bytes=8 * 1024 ** 3, used_bytes=5 * 1024 ** 3, models_loaded=["qwen2.5-coder:latest"],
+                         model_vram={"qwen2.5-coder:latest": 5 * 1024 ** 3}, source="nvidia-smi")
+        free = VRAMUsage(total_bytes=8 * 1024 ** 3, used_bytes=0, models_loaded=[], source="nvidia-smi")
+
+        with patch.object(ollama_manager, 'get_vram_usage', side_effect=[busy, free]), \
+             patch.object(ollama_manager, 'stop_model', return_value=False), \
+             patch.object(ollama_manager, 'warm_load_model',
+                          return_value=WarmLoadResult("deepseek-coder:latest", True, 4.2)) as mock_load:
+
+            assert ollama_manager.load_model(deepseek).success is True
+            mock_load.assert_called_once()
+
+    def test_smart_activate_refuses_model_that_never_fits(self, ollama_manager):
+        """Test activación rechazada si el modelo no cabe y no se permite offload"""
+        huge = ModelConfig(name="huge:latest", description="", vram_gb=12.0)
+        usage = VRAMUsage(total_bytes=8 * 1024 ** 3, used_bytes=0, models_loaded=[], source="nvidia-smi")
+        ollama_manager.vram_scheduler.allow_partial_offload = False
+
+        with patch('ollama_manager.config_manager.get_model', return_value=huge), \
+             patch.object(ollama_manager, 'list_installed_models', return_value=[ModelStatus(name="huge:latest", size="", size_vram="", digest="")]), \
+             patch.object(ollama_manager, 'get_vram_usage', return_value=usage), \
+             patch.object(ollama_manager, 'warm_load_model') as mock_load:
+
+            assert ollama_manager.smart_activate_model("huge") is False
+            mock_load.assert_not_called()
+
+    def test_smart_activate_with_health_check(self, ollama_manager):
+        """Test la sonda de salud solo se ejecuta si se pide"""
+        qwen = ModelConfig(name="qwen2.5-coder:latest", description="")
+        usage = VRAMUsage(total_bytes=8 * 1024 ** 3, used_bytes=0, models_loaded=[], source="nvidia-smi")
+
+        with patch('ollama_manager.config_manager.get_model', return_value=qwen), \
+             patch.object(ollama_manager, 'list_installed_models', return_value=[ModelStatus(name="qwen2.5-coder:latest", size="", size_vram="", digest="")]), \
+             patch.object(ollama_manager, 'get_vram_usage', return_value=usage), \
+             patch.object(ollama_manager, 'warm_load_model', return_value=WarmLoadResult("qwen2.5-coder:latest", True, 0.01)), \
+             patch.object(ollama_manager, 'test_model', return_value=False) as mock_test:
+
+            assert ollama_manager.smart_activate_model("qwen", health_check=True) is False
+            mock_test.assert_called_once_with("qwen2.5-coder:latest")
+
+    def test_warm_load_model_sends_empty_prompt(self, ollama_manager, mock_http):
+        """Test la carga en caliente no genera tokens y reporta load_duration"""
+        mock_response = MagicMock(status_code=200)
+        mock_response.json.return_value = {"model": "qwen2.5-coder:latest", "response": "", "done": True,
+                                           "done_reason": "load", "load_duration": 3_500_000_000}
+        mock_http.return_value = mock_response
+
+        result = ollama_manager.warm_load_model("qwen2.5-coder:latest", keep_alive="30m")
+
+        assert result.success is True
+        assert result.cold is True
+        assert result.load_seconds == 3.5
+        payload = mock_http.call_args.kwargs['json']
+        assert payload["prompt"] == ""
+        assert payload["keep_alive"] == "30m"
+        assert "options" not in payload
+        assert ollama_manager.usage.get("qwen2.5-coder:latest").load_cost_s == 3.5
+
+    def test_warm_load_model_error(self, ollama_manager, mock_http):
+        """Test la carga fallida retorna el error sin lanzar excepción"""
+        mock_http.return_value = MagicMock(status_code=404)
+
+        result = ollama_manager.warm_load_model("missing:latest")
+
+        assert result.success is False
+        assert "404" in result.error
+
+    def test_keep_alive_for(self, ollama_manager):
+        """Test keep_alive: override, -1 con reaper activo, timeout sin reaper, omitido sin auto-stop"""
+        ollama_manager.config = AppConfig(models={}, auto_stop_inactive=True, inactive_timeout_minutes=30)
+
+        assert ollama_manager.keep_alive_for(ModelConfig(name="a", description="")) == "30m"
+        assert ollama_manager.keep_alive_for(ModelConfig(name="a", description="", idle_timeout_minutes=0)) == -1
+        assert ollama_manager.keep_alive_for(ModelConfig(name="a", description="", keep_alive="5m")) == "5m"
+
+        ollama_manager.idle_reaper = MagicMock()
+        assert ollama_manager.keep_alive_for(ModelConfig(name="a", description="")) == -1
+        ollama_manager.idle_reaper = None
+
+        ollama_manager.config.keep_alive = "10m"
+        assert ollama_manager.keep_alive_for(ModelConfig(name="a", description="")) == "10m"
+
+        ollama_manager.config = AppConfig(models={}, auto_stop_inactive=False)
+        assert ollama_manager.keep_alive_for(ModelConfig(name="a", description="")) is None
 
     def test_get_status_summary(self, ollama_manager):
         """Test obtención de resumen completo de estado"""
         with patch.object(ollama_manager, 'check_ollama_running', return_value=True), \
              patch.object(ollama_manager, 'list_installed_models', return_value=[ModelStatus(name="test", size="1GB", size_vram="1GB", digest="abc")]), \
-             patch.object(ollama_manager, 'get_running_models', return_value=["test"]), \
+             patch.object(ollama_manager, 'get_loaded_models', return_value=[LoadedModel("test", size_bytes=2**30)]), \
              patch.object(ollama_manager, 'check_model_updates', return_value={"test": {"current": "test", "latest": "test:v2", "base_name": "test"}}):
 
             status = ollama_manager.get_status_summary()
@@ -313,6 +584,68 @@ deepseek-coder:latest   def456          6.0 GB  1 hour ago"""
             assert status["models_with_updates"] == 1
             assert "available_updates" in status
 
+    def test_get_status_summary_calls_each_probe_once(self, ollama_manager):
+        """Test el snapshot consulta cada sonda una sola vez (sin /api/ps duplicado)"""
+        installed = [ModelStatus(name="test:latest", size="1GB", size_vram="", digest="abc")]
+        loaded = [LoadedModel("test:latest", size_bytes=2**30, size_vram_bytes=2**30)]
+        with patch.object(ollama_manager, 'check_ollama_running', return_value=True) as mock_health, \
+             patch.object(ollama_manager, 'list_installed_models', return_value=installed) as mock_list, \
+             patch.object(ollama_manager.telemetry, 'fetch_loaded_models', return_value=loaded) as mock_ps, \
+             patch.object(ollama_manager, 'get_vram_usage', wraps=ollama_manager.get_vram_usage) as mock_vram, \
+             patch.object(ollama_manager, 'check_model_updates', return_value={}) as mock_updates:
+            # Sin caché de estado: cada llamada a get_loaded_models() consultaría /api/ps
+            ollama_manager.state_cache.enabled = False
+
+            status = ollama_manager.get_status_summary()
+
+            mock_health.assert_called_once()
+            mock_list.assert_called_once()
+            mock_ps.assert_called_once()
+            mock_vram.assert_called_once_with(loaded=loaded)
+            mock_updates.assert_called_once_with(installed=installed)
+            assert status["stale_probes"] == []
+            assert status["running_models"] == ["test:latest"]
+            assert status["vram_used_bytes"] == 2**30
+
+    def test_get_status_summary_slow_probe_is_stale(self, ollama_manager):
+        """Test una sonda lenta vuelve como desconocida sin bloquear el resto"""
+        import time as _time
+
+        def slow_updates(installed=None):
+            _time.sleep(1.0)
+            return {}
+
+        with patch.object(ollama_manager, 'check_ollama_running', return_value=True), \
+             patch.object(ollama_manager, 'list_installed_models', return_value=[]), \
+             patch.object(ollama_manager, 'get_loaded_models', return_value=[]), \
+             patch.object(ollama_manager, 'check_model_updates', side_effect=slow_updates), \
+             patch.object(ollama_manager, '_probe_deadlines', return_value={'health': 1, 'installed': 1, 'running': 1, 'updates': 0.1}):
+
+            start = _time.perf_counter()
+            status = ollama_manager.get_status_summary()
+
+            assert _time.perf_counter() - start < 0.8
+            assert status["stale_probes"] == ["updates"]
+            assert status["models_with_updates"] is None
+            assert status["ollama_running"] is True
+            assert status["models_installed"] == 0
+
+    def test_hung_probe_does_not_block_process_exit(self, ollama_manager):
+        """Test una sonda colgada queda en un hilo daemon (no retiene la salida del intérprete)"""
+        import threading
+        release = threading.Event()
+
+        results = ollama_manager.collect_probes(
+            {'fast': lambda futures: 1, 'hung': lambda futures: release.wait(5)},
+            {'fast': 1, 'hung': 0.05},
+        )
+        hung = [thread for thread in threading.enumerate() if thread.name == "status-probe-hung"]
+        release.set()
+
+        assert results['fast'].value == 1 and not results['fast'].stale
+        assert results['hung'].stale and results['hung'].error == "timeout"
+        assert hung and all(thread.daemon for thread in hung)
+
 
 class TestModelStatus:
     """Pruebas para la clase ModelStatus"""
@@ -349,17 +682,17 @@ class TestVRAMUsage:
     """Pruebas para la clase VRAMUsage"""
 
     def test_vram_usage_creation(self):
-        """Test creación de VRAMUsage"""
+        """Test creación de VRAMUsage (valores numéricos en bytes)"""
         vram = VRAMUsage(
-            total_vram="8GB",
-            used_vram="4GB",
+            total_bytes=8 * 10 ** 9,
+            used_bytes=4 * 10 ** 9,
             models_loaded=["model1", "model2"]
         )
 
-        assert vram.total_vram == "8GB"
-        assert vram.used_vram == "4GB"
+        assert vram.total_vram == "8.0 GB"
+        assert vram.used_vram == "4.0 GB"
+        assert vram.available_bytes == 4 * 10 ** 9
         assert vram.models_loaded == ["model1", "model2"]
 
-
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Pruebas unitarias para OllamaSimulator
+Tests de OllamaManager contra el servidor simulado: inventario, carga, desalojo por VRAM,
+streaming NDJSON, descargas y detención con keep_alive=0
+"""
+
+import json
+import pytest
+import requests
+from unittest.mock import patch
+
+from ollama_simulator import OllamaSimulator, SimulatedModel, parse_keep_alive, GIB
+from ollama_manager import OllamaManager
+from config_manager import config_manager
+from eviction_policy import UsageTracker
+from benchmark import BenchmarkRunner
+from config_manager import ModelConfig
+
+
+@pytest.fixture
+def simulator():
+    """Simulador sin esperas reales (las duraciones informadas siguen siendo las simuladas)"""
+    sim = OllamaSimulator(
+        models=[SimulatedModel("qwen2.5-coder:latest", size_bytes=5 * GIB, tokens_per_sec=25),
+                SimulatedModel("deepseek-coder:latest", size_bytes=int(6.5 * GIB))],
+        registry=[SimulatedModel("mistral:latest", size_bytes=4 * GIB)],
+        vram_bytes=8 * GIB, load_bytes_per_sec=GIB, time_scale=0,
+    )
+    with sim:
+        yield sim
+
+
+@pytest.fixture
+def manager(simulator):
+    """OllamaManager apuntando al simulador vía ollama_host"""
+    with patch.object(config_manager.config, 'ollama_host', simulator.url), \
+         patch('ollama_manager.subprocess.run', side_effect=FileNotFoundError("ollama")):
+        manager = OllamaManager()
+        manager.usage = UsageTracker()
+        yield manager
+    manager.http.close()
+
+
+class TestOllamaSimulator:
+    """Suite de pruebas para OllamaSimulator"""
+
+    def test_parse_keep_alive(self):
+        assert parse_keep_alive("5m") == 300
+        assert parse_keep_alive("30s") == 30
+        assert parse_keep_alive(0) == 0
+        assert parse_keep_alive(-1) is None
+        assert parse_keep_alive(None) == 300
+
+    def test_manager_inventory(self, manager):
+        names = [m.name for m in manager.list_installed_models()]
+        assert names == ["qwen2.5-coder:latest", "deepseek-coder:latest"]
+        assert manager.check_ollama_running() is True
+        assert manager.get_model_info("qwen2.5-coder:latest")["details"]["family"] == "llama"
+        assert manager.get_model_info("missing:latest") is None
+
+    def test_warm_load_reports_simulated_load_time(self, manager):
+        result = manager.warm_load_model("qwen2.5-coder:latest", keep_alive="10m")
+        assert result.success and result.cold
+        assert abs(result.load_seconds - 5.0) < 0.01
+
+        loaded = manager.get_loaded_models()
+        assert [m.name for m in loaded] == ["qwen2.5-coder:latest"]
+        assert loaded[0].size_vram_bytes == 5 * GIB
+
+        # Ya residente: carga instantánea
+        assert manager.warm_load_model("qwen2.5-coder:latest").cold is False
+
+    def test_vram_limit_evicts_lru(self, manager, simulator):
+        manager.warm_load_model("qwen2.5-coder:latest")
+        manager.warm_load_model("deepseek-coder:latest")
+        assert simulator.evicted == ["qwen2.5-coder:latest"]
+        assert manager.get_running_models() == ["deepseek-coder:latest"]
+
+    def test_stop_model_falls_back_to_keep_alive_zero(self, manager):
+        manager.warm_load_model("qwen2.5-coder:latest")
+        assert manager.stop_model("qwen2.5-coder:latest") is True
+        assert manager.get_running_models() == []
+
+    def test_streaming_generate_and_chat(self, simulator):
+        response = requests.post(f"{simulator.url}/api/generate", stream=True, timeout=5,
+                                 json={"model": "qwen2.5-coder", "prompt": "hola", "options": {"num_predict": 5}})
+        events = [json.loads(line) for line in response.iter_lines() if line]
+        assert len(events) == 6
+        assert events[-1]["done"] is True
+        assert events[-1]["eval_count"] == 5
+        assert events[-1]["eval_duration"] == int(5 / 25 * 1e9)
+
+        chat = requests.post(f"{simulator.url}/api/chat", timeout=5, json={
+            "model": "qwen2.5-coder:latest", "stream": False, "messages": [{"role": "user", "content": "hola"}]})
+        assert chat.json()["message"]["role"] == "assistant"
+        assert chat.json()["message"]["content"]
+
+    def test_manager_stream_request_through_coalescer(self, manager):
+        payload = {"model": "qwen2.5-coder:latest", "prompt": "hola", "options": {"num_predict": 3}}
+        body = b"".join(manager.stream_request("/api/generate", payload))
+        events = [json.loads(line) for line in body.splitlines() if line]
+        assert events[-1]["done"] is True
+        assert manager.coalescer.snapshot()['flights'] == 1
+        assert manager.usage.get("qwen2.5-coder:latest").request_count == 1
+
+        with pytest.raises(requests.HTTPError):
+            list(manager.stream_request("/api/generate", {"model": "missing:latest", "prompt": "hola"}))
+
+    def test_pull_through_download_scheduler(self, manager):
+        assert manager.pull_model("mistral:latest", show_progress=False) is True
+        manager.invalidate_state()
+        assert "mistral:latest" in [m.name for m in manager.list_installed_models()]
+        assert manager.pull_model("unknown:latest", show_progress=False) is False
+
+    def test_benchmark_against_simulator(self, manager):
+        runner = BenchmarkRunner(manager, context_lengths=[128], repeats=1, num_predict=10)
+        report = runner.run({"qwen": ModelConfig(name="qwen2.5-coder:latest", description="")})
+        result = report.models[0]
+        assert result.error == ""
+        assert abs(result.tokens_per_sec - 25) < 0.5
@@ -0,0 +1,122 @@
+"""
+Pruebas unitarias para PullPlanner
+Tests para referencias de modelos, manifests locales/remotos y orden por delta
+"""
+
+import json
+import hashlib
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from pull_planner import PullPlanner, parse_model_ref, manifest_layers
+
+
+def _manifest(*layers):
+    """Manifest mínimo con capa de config y las capas indicadas (digest, size)"""
+    return {
+        "schemaVersion": 2,
+        "config": {"digest": "sha256:cfg", "size": 10},
+        "layers": [{"digest": digest, "size": size} for digest, size in layers],
+    }
+
+
+class FakeRegistry:
+    """Transporte falso que sirve manifests por nombre de modelo"""
+
+    def __init__(self, manifests):
+        self.manifests = manifests
+        self.urls = []
+
+    def get(self, url, endpoint='default', **kwargs):
+        self.urls.append(url)
+        model, tag = url.split('/v2/library/')[1].split('/manifests/')
+        manifest = self.manifests.get(f"{model}:{tag}")
+        if manifest is None:
+            return MagicMock(status_code=404)
+        body = json.dumps(manifest).encode()
+        return MagicMock(status_code=200, content=body, json=MagicMock(return_value=manifest))
+
+
+def _digest(manifest):
+    return hashlib.sha256(json.dumps(manifest).encode()).hexdigest()
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    (tmp_path / "blobs").mkdir()
+    return tmp_path
+
+
+def test_parse_model_ref():
+    """Nombres cortos usan registry.ollama.ai/library y tag latest"""
+    assert parse_model_ref("qwen2.5-coder") == ("registry.ollama.ai", "library", "qwen2.5-coder", "latest")
+    assert parse_model_ref("user/model:q4") == ("registry.ollama.ai", "user", "model", "q4")
+    assert parse_model_ref("host.io/ns/model:1b") == ("host.io", "ns", "model", "1b")
+
+
+def test_manifest_layers_includes_config():
+    """La capa de config también cuenta como descarga"""
+    assert manifest_layers(_manifest(("sha256:a", 100))) == {"sha256:a": 100, "sha256:cfg": 10}
+
+
+class TestPullPlanner:
+    """Suite de pruebas para PullPlanner"""
+
+    def test_up_to_date_is_skipped(self, models_dir):
+        """Mismo digest que /api/tags: no hay nada que descargar"""
+        manifest = _manifest(("sha256:a", 100))
+        planner = PullPlanner(FakeRegistry({"qwen:latest": manifest}), models_dir=models_dir)
+
+        plan = planner.plan("qwen:latest", installed_digest=_digest(manifest))
+        assert plan.up_to_date
+        assert not plan.needs_pull
+        assert plan.download_bytes == 0
+
+    def test_short_cli_digest_matches(self, models_dir):
+        """El digest corto de `ollama list` también se reconoce"""
+        manifest = _manifest(("sha256:a", 100))
+        planner = PullPlanner(FakeRegistry({"qwen:latest": manifest}), models_dir=models_dir)
+        assert planner.plan("qwen:latest", installed_digest=_digest(manifest)[:12]).up_to_date
+
+    def test_missing_layers_only(self, models_dir):
+        """Solo cuentan las capas cuyo blob no está en disco"""
+        (models_dir / "blobs" / "sha256-a").write_bytes(b"")
+        manifest = _manifest(("sha256:a", 100), ("sha256:b", 2000))
+        planner = PullPlanner(FakeRegistry({"qwen:7b": manifest}), models_dir=models_dir)
+
+        plan = planner.plan("qwen:7b", installed_digest="0" * 64)
+        assert plan.missing_layers == {"sha256:b": 2000, "sha256:cfg": 10}
+        assert plan.download_bytes == 2010
+        assert plan.total_bytes == 2110
+
+    def test_local_manifest_on_disk(self, models_dir):
+        """Sin /api/tags se usa el digest del manifest en disco"""
+        manifest = _manifest(("sha256:a", 100))
+        path = models_dir / "manifests" / "registry.ollama.ai" / "library" / "qwen" / "latest"
+        path.parent.mkdir(parents=True)
+        path.write_bytes(json.dumps(manifest).encode())
+
+        planner = PullPlanner(FakeRegistry({"qwen:latest": manifest}), models_dir=models_dir)
+        assert planner.plan("qwen:latest").up_to_date
+
+    def test_registry_error_still_pulls(self, models_dir):
+        """Si el manifest remoto no se puede leer, el pull se mantiene"""
+        http = MagicMock()
+        http.get.side_effect = requests.ConnectionError("sin red")
+        plan = PullPlanner(http, models_dir=models_dir).plan("qwen:latest")
+
+        assert plan.error
+        assert plan.needs_pull
+
+    def test_plan_many_orders_by_delta(self, models_dir):
+        """Pendientes de menor a mayor delta, errores después y al día al final"""
+        big, small, same = _manifest(("sha256:b", 5000)), _manifest(("sha256:s", 50)), _manifest(("sha256:x", 1))
+        registry = FakeRegistry({"big:latest": big, "small:latest": small, "same:latest": same})
+        planner = PullPlanner(registry, models_dir=models_dir)
+
+        plans = planner.plan_many(["same:latest", "big:latest", "gone:latest", "small:latest", "big:latest"],
+                                  {"same:latest": _digest(same)})
+        assert [plan.model for plan in plans] == ["small:latest", "big:latest", "gone:latest", "same:latest"]
+        assert len(registry.urls) == 4
@@ -0,0 +1,157 @@
+"""
+Pruebas unitarias para RegistryCatalog
+Tests para revalidación condicional (ETag/304), persistencia en disco e índice por nombre base
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_transport import HTTPTransport
+from registry_catalog import RegistryCatalog, build_registry_index
+
+
+CATALOG = [
+    {"name": "qwen2.5-coder:latest"},
+    {"name": "qwen2.5-coder:7b"},
+    {"name": "llama3.2:3b"},
+]
+ETAG = '"v1"'
+
+
+class _FakeRegistryHandler(BaseHTTPRequestHandler):
+    """Registry mínimo que responde 304 cuando el ETag coincide"""
+    protocol_version = "HTTP/1.1"
+    hits = []
+    catalog = CATALOG
+
+    def do_GET(self):
+        self.hits.append(self.headers.get("If-None-Match"))
+        # El ETag solo coincide mientras el registry sirve CATALOG
+        if self.headers.get("If-None-Match") == ETAG and self.catalog is CATALOG:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = json.dumps(self.catalog).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_registry():
+    """Registry local en un puerto efímero"""
+    _FakeRegistryHandler.hits = []
+    _FakeRegistryHandler.catalog = CATALOG
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeRegistryHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/models"
+    server.shutdown()
+    server.server_close()
+
+
+def test_build_registry_index():
+    """El índice agrupa tags por nombre base en orden de publicación"""
+    index = build_registry_index(CATALOG + [{"name": "sin-tag"}])
+    assert index == {"qwen2.5-coder": ["qwen2.5-coder:latest", "qwen2.5-coder:7b"], "llama3.2": ["llama3.2:3b"]}
+
+
+class TestRegistryCatalog:
+    """Suite de pruebas para RegistryCatalog"""
+
+    def test_conditional_revalidation(self, fake_registry, tmp_path):
+        """La primera consulta descarga; tras expirar el TTL se revalida con 304"""
+        catalog = RegistryCatalog(cache_dir=str(tmp_path), registry_url=fake_registry, ttl_seconds=3600)
+
+        assert catalog.latest_by_base() == {"qwen2.5-coder": "qwen2.5-coder:7b", "llama3.2": "llama3.2:3b"}
+        # Consultas dentro del TTL no van a la red
+        catalog.tags_for("qwen2.5-coder")
+        assert _FakeRegistryHandler.hits == [None]
+
+        catalog.invalidate()
+        assert len(catalog.get_models()) == 3
+        assert _FakeRegistryHandler.hits == [None, ETAG]
+        assert catalog.downloads == 1
+        assert catalog.not_modified == 1
+
+    def test_persistence_across_instances(self, fake_registry, tmp_path):
+        """Una nueva instancia reutiliza la copia en disco sin descargar"""
+        RegistryCatalog(cache_dir=str(tmp_path), registry_url=fake_registry).get_models()
+
+        catalog = RegistryCatalog(cache_dir=str(tmp_path), registry_url=fake_registry)
+        assert catalog.model_names() == [model["name"] for model in CATALOG]
+        assert _FakeRegistryHandler.hits == [None]
+
+    def test_stale_copy_when_registry_down(self, fake_registry, tmp_path):
+        """Sin red se sirve la copia anterior; sin copia se propaga el error"""
+        RegistryCatalog(cache_dir=str(tmp_path), registry_url=fake_registry).get_models()
+
+        offline = HTTPTransport(retries=0)
+        offline.session.request = lambda *args, **kwargs: (_ for _ in ()).throw(requests.ConnectionError())
+
+        catalog = RegistryCatalog(cache_dir=str(tmp_path), registry_url=fake_registry, ttl_seconds=0, http=offline)
+        assert catalog.refresh() is False
+        assert len(catalog.get_models()) == 3
+
+        empty = RegistryCatalog(cache_dir=str(tmp_path / "vacio"), registry_url=fake_registry, http=offline)
+        with pytest.raises(requests.RequestException):
+            empty.get_models()
+
+    def test_failure_backoff_with_stale_copy(self, fake_registry, tmp_path):
+        """Tras un fallo con copia stale no se reintenta en cada consulta"""
+        RegistryCatalog(cache_dir=str(tmp_path), registry_url=fake_registry).get_models()
+
+        calls = []
+        offline = HTTPTransport(retries=0)
+
+        def unreachable(*args, **kwargs):
+            calls.append(1)
+            raise requests.ConnectionError()
+
+        offline.session.request = unreachable
+        catalog = RegistryCatalog(cache_dir=str(tmp_path), registry_url=fake_registry, ttl_seconds=3600,
+                                  http=offline, failure_backoff_seconds=60)
+        catalog.get_models()
+        catalog.invalidate()
+
+        assert catalog.refresh() is False
+        for _ in range(3):
+            assert len(catalog.get_models()) == 3
+        assert len(calls) == 1
+
+        # Pasado el backoff se vuelve a intentar; invalidate() también lo reinicia
+        catalog._failed_at -= 60
+        assert catalog.refresh() is False
+        assert len(calls) == 2
+        catalog.invalidate()
+        assert catalog.refresh() is False
+        assert len(calls) == 3
+
+    def test_unexpected_payload_keeps_previous_copy(self, fake_registry, tmp_path):
+        """Un JSON que no es una lista de objetos no reemplaza el catálogo"""
+        RegistryCatalog(cache_dir=str(tmp_path), registry_url=fake_registry).get_models()
+
+        _FakeRegistryHandler.catalog = {"error": "rate limited"}
+        catalog = RegistryCatalog(cache_dir=str(tmp_path), registry_url=fake_registry)
+        assert catalog.refresh(force=True) is False
+        assert catalog.model_names() == [model["name"] for model in CATALOG]
+
+        empty = RegistryCatalog(cache_dir=str(tmp_path / "vacio"), registry_url=fake_registry)
+        with pytest.raises(ValueError):
+            empty.get_models()
+
+        _FakeRegistryHandler.catalog = ["qwen2.5-coder:latest"]
+        with pytest.raises(ValueError):
+            empty.refresh(force=True)
@@ -0,0 +1,177 @@
+"""
+Pruebas unitarias para RequestCoalescer
+Tests para la agrupación de peticiones idénticas en vuelo, el reparto de bloques
+en streaming a los seguidores, los fallos compartidos y el tiempo de GPU ahorrado
+"""
+
+import threading
+import time
+import pytest
+
+from request_coalescer import RequestCoalescer, Flight, FlightError
+
+
+class FakeClock:
+    """Reloj controlable para medir duraciones de generación"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _collect(iterator, out):
+    """Consume un iterador en un hilo y guarda los bloques (o la excepción)"""
+    def run():
+        try:
+            out.extend(iterator)
+        except Exception as e:
+            out.append(e)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+class TestRequestCoalescer:
+    """Suite de pruebas para RequestCoalescer"""
+
+    def test_identical_keys_share_a_flight(self):
+        coalescer = RequestCoalescer()
+        leader_flight, leader = coalescer.join("k")
+        follower_flight, follower_leads = coalescer.join("k")
+        other, other_leads = coalescer.join("otra")
+
+        assert leader and not follower_leads and other_leads
+        assert follower_flight is leader_flight
+        assert other is not leader_flight
+        assert coalescer.snapshot()['coalesced'] == 1
+        assert coalescer.in_flight() == 2
+
+    def test_no_key_or_disabled_never_coalesces(self):
+        coalescer = RequestCoalescer()
+        assert coalescer.join(None)[1] and coalescer.join(None)[1]
+        disabled = RequestCoalescer(enabled=False)
+        assert disabled.join("k")[1] and disabled.join("k")[1]
+        assert disabled.in_flight() == 0
+
+    def test_finished_flight_is_not_joined(self):
+        coalescer = RequestCoalescer()
+        flight, _ = coalescer.join("k")
+        flight.finish()
+        coalescer.complete(flight)
+        assert coalescer.join("k")[1]
+
+    def test_follower_gets_buffered_and_live_chunks(self):
+        flight = Flight("k")
+        flight.publish(b"uno ")
+        assert flight.attach()
+        received = []
+        thread = _collect(flight.subscribe(timeout=2), received)
+        time.sleep(0.05)
+        flight.publish(b"dos")
+        flight.finish()
+        thread.join(2)
+        assert received == [b"uno ", b"dos"]
+
+    def test_failure_reaches_followers(self):
+        flight = Flight("k")
+        flight.attach()
+        received = []
+        thread = _collect(flight.subscribe(timeout=2), received)
+        flight.publish(b"parcial")
+        flight.fail("Ollama cortó el stream")
+        thread.join(2)
+        assert received[0] == b"parcial"
+        assert isinstance(received[-1], FlightError)
+
+    def test_subscribe_times_out_without_data(self):
+        flight = Flight("k")
+        with pytest.raises(FlightError):
+            list(flight.subscribe(timeout=0.05))
+
+    def test_abandon_only_without_followers(self):
+        flight = Flight("k")
+        flight.attach()
+        assert not flight.abandon()
+        flight.detach()
+        assert flight.abandon()
+        assert flight.done and flight.error
+
+    def test_saved_seconds_counts_each_follower(self):
+        clock = FakeClock()
+        coalescer = RequestCoalescer(clock=clock)
+        flight, _ = coalescer.join("k")
+        coalescer.join("k")
+        coalescer.join("k")
+        clock.now += 4
+        flight.finish()
+        coalescer.complete(flight)
+
+        snapshot = coalescer.snapshot()
+        assert snapshot['flights'] == 1
+        assert snapshot['coalesced'] == 2
+        assert snapshot['max_waiters'] == 2
+        assert snapshot['saved_seconds'] == 8.0
+
+    def test_stream_opens_upstream_once(self):
+        """Dos consumidores de la misma clave: una sola generación, mismos bloques"""
+        coalescer = RequestCoalescer()
+        release = threading.Event()
+        opened = []
+
+        def open_upstream():
+            opened.append(1)
+            yield b"a"
+            release.wait(2)
+            yield b"b"
+
+        first, second = [], []
+        leader = _collect(coalescer.stream("k", open_upstream), first)
+        while not coalescer.in_flight():
+            time.sleep(0.01)
+        follower = _collect(coalescer.stream("k", open_upstream), second)
+        time.sleep(0.05)
+        release.set()
+        leader.join(2)
+        follower.join(2)
+
+        assert len(opened) == 1
+        assert first == second == [b"a", b"b"]
+        assert coalescer.in_flight() == 0
+
+    def test_stream_keeps_generating_for_followers_when_leader_stops(self):
+        coalescer = RequestCoalescer()
+        release = threading.Event()
+
+        def open_upstream():
+            yield b"a"
+            release.wait(2)
+            yield b"b"
+            yield b"c"
+
+        leader = coalescer.stream("k", open_upstream)
+        assert next(leader) == b"a"
+        received = []
+        follower = _collect(coalescer.stream("k", open_upstream), received)
+        time.sleep(0.05)
+        release.set()
+        leader.close()
+        follower.join(2)
+        assert received == [b"a", b"b", b"c"]
+
+    def test_stream_error_propagates(self):
+        coalescer = RequestCoalescer()
+
+        def open_upstream():
+            raise ConnectionError("Ollama no responde")
+            yield b""  # pragma: no cover
+
+        with pytest.raises(ConnectionError):
+            list(coalescer.stream("k", open_upstream))
+        assert coalescer.in_flight() == 0
+
+    def test_from_config(self):
+        coalescer = RequestCoalescer.from_config({'enabled': False, 'follow_timeout_seconds': 10})
+        assert not coalescer.enabled
+        assert coalescer.follow_timeout_s == 10
@@ -0,0 +1,103 @@
+"""
+Pruebas unitarias para ResponseCache
+Tests para la clave determinista, los niveles en memoria y disco, el límite de tamaño y la invalidación
+"""
+
+import os
+from unittest.mock import patch
+
+from response_cache import ResponseCache, CachedResponse, cache_key, is_cacheable, effective_temperature
+
+
+def _entry(model="qwen:latest", text="hola", generation_s=2.0):
+    return CachedResponse(model=model, status=200, content_type="text/event-stream",
+                          chunks=[f"data: {text}\n\n", "data: [DONE]\n\n"], generation_s=generation_s)
+
+
+class TestCacheKey:
+    """Clave y criterio de cacheabilidad"""
+
+    def test_key_depends_on_digest_options_and_prompt(self):
+        body = {"model": "qwen", "temperature": 0, "messages": [{"role": "user", "content": "hola"}]}
+        key = cache_key("sha256:a", "/v1/chat/completions", body)
+        assert key == cache_key("sha256:a", "/v1/chat/completions", dict(body, user="otro"))
+        assert key != cache_key("sha256:b", "/v1/chat/completions", body)
+        assert key != cache_key("sha256:a", "/v1/chat/completions", dict(body, max_tokens=10))
+        assert key != cache_key("sha256:a", "/v1/chat/completions",
+                                dict(body, messages=[{"role": "user", "content": "adiós"}]))
+
+    def test_only_temperature_zero_is_cacheable(self):
+        assert is_cacheable({"temperature": 0})
+        assert is_cacheable({"options": {"temperature": 0}})
+        assert not is_cacheable({"temperature": 0.7})
+        assert not is_cacheable({})
+        assert is_cacheable({}, default_temperature=0)
+        assert not is_cacheable({"temperature": 0, "n": 2})
+        assert effective_temperature({"temperature": None}, 0.2) == 0.2
+
+
+class TestResponseCache:
+    """Niveles de la caché"""
+
+    def test_memory_lru(self):
+        cache = ResponseCache(memory_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, _entry())
+        assert cache.get("qwen:latest", "a") is None
+        assert cache.get("qwen:latest", "c") is not None
+        assert cache.stats.memory_hits == 1
+        assert cache.stats.saved_seconds == 2.0
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        ResponseCache(str(tmp_path)).put("k", _entry())
+        cache = ResponseCache(str(tmp_path))
+        entry = cache.get("qwen:latest", "k")
+        assert entry.chunks[-1] == "data: [DONE]\n\n"
+        assert entry.streamed
+        assert cache.stats.disk_hits == 1
+
+    def test_disk_size_bound_evicts_least_recently_used(self, tmp_path):
+        cache = ResponseCache(str(tmp_path), memory_entries=0, disk_max_bytes=400)
+        cache.put("old", _entry(text="x" * 100))
+        old_path = next(tmp_path.glob("*/old.json"))
+        os.utime(old_path, (1, 1))
+        cache.put("new", _entry(text="y" * 100))
+        cache.put("newer", _entry(text="z" * 100))
+
+        assert cache.get("qwen:latest", "old") is None
+        assert cache.get("qwen:latest", "newer") is not None
+        assert cache.stats.evictions >= 1
+
+    def test_disk_is_scanned_only_when_over_the_limit(self, tmp_path):
+        """El tamaño en disco se lleva como total acumulado: un put bajo el límite no recorre el directorio"""
+        ResponseCache(str(tmp_path)).put("previa", _entry())
+        cache = ResponseCache(str(tmp_path), memory_entries=0, disk_max_bytes=1000)
+
+        with patch.object(cache, '_scan_disk', wraps=cache._scan_disk) as scan:
+            for key in ("a", "b"):
+                cache.put(key, _entry())
+            cache.put("a", _entry())  # sobrescribir no suma dos veces
+            assert scan.call_count == 1  # medida inicial (incluye la entrada de otra instancia)
+            assert cache._disk_bytes == sum(p.stat().st_size for p in tmp_path.glob("*/*.json"))
+
+            cache.put("grande", _entry(text="x" * 600))
+            assert scan.call_count == 2
+        assert cache._disk_bytes <= 1000
+        assert cache._disk_bytes == sum(p.stat().st_size for p in tmp_path.glob("*/*.json"))
+
+    def test_invalidate_model(self, tmp_path):
+        cache = ResponseCache(str(tmp_path))
+        cache.put("q", _entry(model="qwen:latest"))
+        cache.put("d", _entry(model="deepseek:latest"))
+
+        assert cache.invalidate_model("qwen:latest") == 1
+        assert cache.get("qwen:latest", "q") is None
+        assert cache.get("deepseek:latest", "d") is not None
+
+    def test_errors_and_disabled_are_not_stored(self):
+        cache = ResponseCache()
+        cache.put("e", CachedResponse(model="m", status=500, content_type="application/json"))
+        assert cache.get("m", "e") is None
+        disabled = ResponseCache(enabled=False)
+        disabled.put("k", _entry())
+        assert disabled.get("qwen:latest", "k") is None
@@ -0,0 +1,65 @@
+"""
+Pruebas unitarias para StartupBench
+Tests para la medición de arranque en frío, el JSON de resultados y la comparación
+"""
+
+from unittest.mock import MagicMock
+
+from startup_bench import (
+    StartupBenchmark, StartupCase, StartupReport, StartupResult, compare_startup, default_cases
+)
+
+
+class FakeClock:
+    """Reloj que avanza `step` segundos por lectura"""
+
+    def __init__(self, step: float):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+class TestStartupBenchmark:
+    """Suite de pruebas para StartupBenchmark"""
+
+    def test_measures_each_case_in_new_processes(self):
+        runner = MagicMock(return_value=MagicMock(returncode=0))
+        bench = StartupBenchmark(cases=[StartupCase('help', ['main.py', '--help'])], repeats=3,
+                                 python="python3", runner=runner, clock=FakeClock(0.05))
+        report = bench.run()
+
+        assert runner.call_count == 3
+        assert runner.call_args.args[0] == ["python3", "main.py", "--help"]
+        assert "lib" in runner.call_args.kwargs['env']['PYTHONPATH']
+        result = report.get('help')
+        assert result.samples_s == [0.05, 0.05, 0.05]
+        assert result.median_s == 0.05 and result.errors == 0
+
+    def test_failures_are_counted(self):
+        runner = MagicMock(side_effect=[MagicMock(returncode=1), OSError("python")])
+        bench = StartupBenchmark(cases=[StartupCase('status', ['-c', 'pass'])], repeats=2, runner=runner)
+        result = bench.run().get('status')
+        assert result.errors == 2
+        assert len(result.samples_s) == 1
+
+    def test_default_cases(self):
+        assert [case.name for case in default_cases()] == ['help', 'status']
+
+
+class TestStartupReport:
+    """Resultados en JSON y comparación entre ejecuciones"""
+
+    def test_roundtrip_and_regression(self, tmp_path):
+        previous = StartupReport(created_at="antes", results=[StartupResult('help', 'main.py --help', [0.1, 0.1])])
+        path = previous.save(tmp_path / "startup.json")
+        loaded = StartupReport.load(path)
+        assert loaded.get('help').median_s == 0.1
+
+        current = StartupReport(created_at="ahora", results=[StartupResult('help', 'main.py --help', [0.4, 0.4]),
+                                                             StartupResult('status', '-c ...', [0.5])])
+        rows = compare_startup(current, loaded)
+        assert [row['name'] for row in rows] == ['help']
+        assert rows[0]['regression'] and abs(rows[0]['change'] - 3.0) < 1e-9
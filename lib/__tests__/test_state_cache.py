@@ -0,0 +1,134 @@
+"""
+Pruebas unitarias para StateCache
+Tests para TTL por pieza, invalidación explícita y configuración desde app.yml
+"""
+
+import pytest
+
+from state_cache import StateCache, build_state_ttls, RUNNING_MODELS, VERSION, INSTALLED_MODELS, SERVICE_HEALTH
+
+
+class FakeClock:
+    """Reloj controlable para simular el paso del tiempo"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBuildStateTtls:
+    """Pruebas para build_state_ttls"""
+
+    def test_defaults_from_cache_ttl_minutes(self):
+        """La versión usa cache_ttl_minutes; las piezas volátiles tienen TTL corto"""
+        ttls = build_state_ttls({'cache_ttl_minutes': 60})
+        assert ttls[VERSION] == 3600
+        assert ttls[RUNNING_MODELS] == 10
+
+    def test_overrides(self):
+        """state_ttl_seconds sobreescribe piezas individuales"""
+        ttls = build_state_ttls({'cache_ttl_minutes': 1, 'state_ttl_seconds': {'running_models': 2}})
+        assert ttls[RUNNING_MODELS] == 2
+        # Ninguna pieza por defecto supera el TTL base
+        assert ttls[INSTALLED_MODELS] == 60
+
+
+class TestStateCache:
+    """Suite de pruebas para StateCache"""
+
+    def test_ttl_per_key(self):
+        """Cada pieza expira según su propio TTL"""
+        clock = FakeClock()
+        cache = StateCache(ttls={RUNNING_MODELS: 5, VERSION: 100}, clock=clock)
+        loads = []
+
+        def loader(value):
+            def load():
+                loads.append(value)
+                return value
+            return load
+
+        cache.get_or_load(RUNNING_MODELS, loader('ps'))
+        cache.get_or_load(VERSION, loader('0.5.7'))
+        clock.now = 10
+        cache.get_or_load(RUNNING_MODELS, loader('ps'))
+        cache.get_or_load(VERSION, loader('0.5.7'))
+
+        assert loads == ['ps', '0.5.7', 'ps']
+        assert cache.hits == 1
+
+    def test_negative_health_expires_quickly(self):
+        """Un servicio caído se vuelve a sondear enseguida; uno activo dura todo el TTL"""
+        clock = FakeClock()
+        cache = StateCache(ttls={SERVICE_HEALTH: 10}, clock=clock)
+
+        assert cache.get_or_load(SERVICE_HEALTH, lambda: False) is False
+        clock.now = 1.5
+        assert not cache.is_fresh(SERVICE_HEALTH)
+        assert cache.get_or_load(SERVICE_HEALTH, lambda: True) is True
+        clock.now = 9
+        assert cache.get_or_load(SERVICE_HEALTH, lambda: False) is True
+
+    def test_invalidate(self):
+        """La invalidación explícita fuerza la recarga"""
+        cache = StateCache(ttls={RUNNING_MODELS: 100})
+        cache.get_or_load(RUNNING_MODELS, lambda: ['a'])
+        cache.invalidate(RUNNING_MODELS)
+
+        assert not cache.is_fresh(RUNNING_MODELS)
+        assert cache.get_or_load(RUNNING_MODELS, lambda: ['b']) == ['b']
+
+    def test_invalidate_during_load_discards_snapshot(self):
+        """Un snapshot leído antes de una invalidación no se guarda al terminar la carga"""
+        cache = StateCache(ttls={RUNNING_MODELS: 100})
+
+        def stale_loader():
+            cache.invalidate(RUNNING_MODELS)  # p. ej. un stop concurrente
+            return ['a']
+
+        assert cache.get_or_load(RUNNING_MODELS, stale_loader) == ['a']
+        assert not cache.is_fresh(RUNNING_MODELS)
+        assert cache.get_or_load(RUNNING_MODELS, lambda: []) == []
+
+    def test_invalidate_all_during_load_discards_snapshot(self):
+        """invalidate() sin claves también descarta las cargas en curso"""
+        cache = StateCache(ttls={VERSION: 100})
+
+        def stale_loader():
+            cache.invalidate()
+            return '0.1'
+
+        cache.get_or_load(VERSION, stale_loader)
+        assert cache.get_or_load(VERSION, lambda: '0.2') == '0.2'
+
+    def test_set_during_load_wins(self):
+        """Un set() durante la carga prevalece sobre el resultado del loader"""
+        cache = StateCache(ttls={RUNNING_MODELS: 100})
+
+        def stale_loader():
+            cache.set(RUNNING_MODELS, ['b'])
+            return ['a']
+
+        cache.get_or_load(RUNNING_MODELS, stale_loader)
+        assert cache.get_or_load(RUNNING_MODELS, lambda: []) == ['b']
+
+    def test_failures_are_not_cached(self):
+        """Si el loader falla no se guarda nada"""
+        cache = StateCache(ttls={RUNNING_MODELS: 100})
+
+        def failing():
+            raise ConnectionError()
+
+        with pytest.raises(ConnectionError):
+            cache.get_or_load(RUNNING_MODELS, failing)
+        assert cache.get_or_load(RUNNING_MODELS, lambda: []) == []
+
+    def test_disabled(self):
+        """cache_enabled: false recarga siempre"""
+        cache = StateCache.from_performance_config({'cache_enabled': False})
+        calls = []
+        cache.get_or_load(VERSION, lambda: calls.append(1))
+        cache.get_or_load(VERSION, lambda: calls.append(1))
+        assert len(calls) == 2
@@ -0,0 +1,137 @@
+"""
+Pruebas unitarias para Tracer
+Tests para spans anidados, agregados por operación, el formato Chrome trace y los
+spans de subprocess/HTTP que genera OllamaManager contra el servidor simulado
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+
+from tracing import Tracer, tracer, payload_size, ERROR, OK
+from ollama_manager import WarmLoadResult
+from ollama_simulator import SimulatedModel, GIB
+
+
+class FakeClock:
+    """Reloj controlable (segundos)"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def global_tracer():
+    """Tracer global activo y vacío durante el test"""
+    tracer.reset()
+    with patch.object(tracer, 'enabled', True):
+        yield tracer
+    tracer.reset()
+
+
+class TestTracer:
+    """Suite de pruebas para Tracer"""
+
+    def test_nested_spans_in_chrome_format(self):
+        clock = FakeClock()
+        trace = Tracer(enabled=True, clock=clock)
+        with trace.span("activar", model="qwen"):
+            clock.now += 0.5
+            with trace.span("GET tags", 'http') as span:
+                span.args['status'] = 200
+                clock.now += 0.25
+            clock.now += 0.25
+
+        events = trace.to_chrome_trace()['traceEvents']
+        inner, outer = events
+        assert outer['name'] == "activar" and outer['ph'] == 'X'
+        assert outer['ts'] == 0 and outer['dur'] == 1e6
+        assert inner['ts'] == 0.5e6 and inner['dur'] == 0.25e6
+        assert inner['cat'] == 'http' and inner['args'] == {'status': 200, 'outcome': 'ok'}
+        assert inner['tid'] == outer['tid']
+
+    def test_exceptions_and_false_results_are_errors(self):
+        trace = Tracer()
+
+        @trace.traced()
+        def fails():
+            return False
+
+        with pytest.raises(ValueError):
+            with trace.span("explota"):
+                raise ValueError("boom")
+        fails()
+        fails()
+
+        aggregate = trace.aggregate()
+        assert aggregate["explota"]['errors'] == 1
+        name = next(key for key in aggregate if key.endswith("fails"))
+        assert aggregate[name]['count'] == 2 and aggregate[name]['errors'] == 2
+
+    def test_unsuccessful_result_objects_are_errors(self):
+        trace = Tracer(enabled=True)
+
+        @trace.traced(name="carga")
+        def load(success):
+            return WarmLoadResult("qwen", success, error=None if success else "no cabe")
+
+        @trace.traced(name="vacío", failed=lambda result: not result)
+        def empty():
+            return []
+
+        load(True)
+        load(False)
+        empty()
+
+        assert [(span.outcome, span.args.get('error')) for span in trace.events()[:2]] == \
+            [(OK, None), (ERROR, "no cabe")]
+        assert trace.aggregate()["carga"]['errors'] == 1
+        assert trace.aggregate()["vacío"]['errors'] == 1
+
+    def test_disabled_keeps_aggregates_only(self, tmp_path):
+        trace = Tracer()
+        with trace.span("op"):
+            pass
+        assert trace.events() == []
+        assert trace.aggregate()["op"]['count'] == 1
+
+        path = tmp_path / "trace.json"
+        assert trace.export_chrome_trace(path) == 0
+        assert json.loads(path.read_text())['otherData']['aggregate']["op"]['count'] == 1
+
+    def test_payload_size(self):
+        assert payload_size({'json': {"model": "qwen"}}) == len(b'{"model": "qwen"}')
+        assert payload_size({'data': b"abc"}) == 3
+        assert payload_size({}) == 0
+
+
+class TestManagerSpans:
+    """Spans generados por OllamaManager"""
+
+    def test_http_subprocess_and_operation_spans(self, global_tracer, simulated_manager):
+        manager, _ = simulated_manager(models=[SimulatedModel("qwen2.5-coder:latest", size_bytes=5 * GIB)])
+        assert manager.get_backend() == 'none'
+        manager.list_installed_models()
+        manager.warm_load_model("qwen2.5-coder:latest")
+
+        events = {event['name']: event for event in global_tracer.to_chrome_trace()['traceEvents']}
+        assert events["ollama --version"]['cat'] == 'subprocess'
+        assert events["ollama --version"]['args']['outcome'] == ERROR
+        assert events["GET tags"]['args']['url'] == "/api/tags"
+        assert events["GET tags"]['args']['status'] == 200
+        assert events["POST load"]['args']['request_bytes'] > 0
+        assert "OllamaManager.list_installed_models" in events
+
+        aggregate = global_tracer.aggregate()
+        assert aggregate["OllamaManager.warm_load_model"]['count'] == 1
+
+    def test_streamed_requests_are_marked(self, global_tracer, simulated_manager):
+        manager, _ = simulated_manager(models=[], registry=[SimulatedModel("mistral:latest", size_bytes=GIB)])
+        assert manager.pull_model("mistral:latest", show_progress=False) is True
+
+        events = {event['name']: event for event in global_tracer.to_chrome_trace()['traceEvents']}
+        assert events["POST pull"]['args']['stream'] is True
+        assert 'response_bytes' not in events["POST pull"]['args']
@@ -0,0 +1,84 @@
+"""
+Pruebas unitarias para VRAMScheduler
+Tests para el conjunto mínimo de desalojo, offload parcial y rechazo por presupuesto
+"""
+
+from vram_scheduler import VRAMScheduler, LOAD, EVICT_AND_LOAD, PARTIAL_OFFLOAD, REFUSE, GIB
+from vram_telemetry import VRAMUsage, LoadedModel
+
+
+def _usage(models, total_gb=8.0, other_gb=0.0):
+    """VRAMUsage de una GPU de `total_gb` con los modelos cargados indicados (GB)"""
+    model_vram = {name: int(size * GIB) for name, size in models.items()}
+    used = sum(model_vram.values()) + int(other_gb * GIB)
+    return VRAMUsage(total_bytes=int(total_gb * GIB), used_bytes=used, free_bytes=int(total_gb * GIB) - used,
+                     models_loaded=list(models), model_vram=model_vram, source="nvidia-smi")
+
+
+class TestVRAMScheduler:
+    """Suite de pruebas para VRAMScheduler"""
+
+    def test_fits_without_eviction(self):
+        """Hay VRAM libre suficiente: se carga sin desalojar"""
+        scheduler = VRAMScheduler(headroom_bytes=0)
+        decision = scheduler.plan("mistral", int(2 * GIB), _usage({"qwen": 5.0}), max_loaded=2)
+        assert decision.action == LOAD
+        assert decision.evict == []
+
+    def test_count_limit_is_not_enough(self):
+        """qwen (5.0) + deepseek (6.5) no caben en 8GB aunque el límite sea 2"""
+        scheduler = VRAMScheduler(headroom_bytes=0)
+        decision = scheduler.plan("deepseek", int(6.5 * GIB), _usage({"qwen": 5.0}), max_loaded=2)
+        assert decision.action == EVICT_AND_LOAD
+        assert decision.evict == ["qwen"]
+
+    def test_minimal_eviction_set(self):
+        """Se desaloja el menor número de modelos y, a igualdad, el que menos libera"""
+        scheduler = VRAMScheduler(headroom_bytes=0)
+        usage = _usage({"a": 1.0, "b": 2.5, "c": 3.0}, total_gb=8.0)
+        # Libres: 1.5 GB; se necesitan 3.5 → basta con desalojar 'b' (2.5)
+        decision = scheduler.plan("new", int(3.5 * GIB), usage)
+        assert decision.evict == ["b"]
+
+    def test_max_loaded_forces_eviction(self):
+        """El límite de cantidad se sigue respetando aunque sobre VRAM"""
+        scheduler = VRAMScheduler(headroom_bytes=0)
+        decision = scheduler.plan("new", int(0.5 * GIB), _usage({"a": 1.0, "b": 2.0}, total_gb=24), max_loaded=2)
+        assert decision.evict == ["a"]
+
+    def test_other_processes_reduce_capacity(self):
+        """La VRAM usada por otros procesos no se puede liberar desalojando modelos"""
+        scheduler = VRAMScheduler(headroom_bytes=0, allow_partial_offload=False)
+        decision = scheduler.plan("deepseek", int(6.5 * GIB), _usage({}, other_gb=2.0))
+        assert decision.action == REFUSE
+
+    def test_partial_offload(self):
+        """Un modelo que nunca cabe se carga con offload tras liberar toda la VRAM"""
+        scheduler = VRAMScheduler(headroom_bytes=0)
+        decision = scheduler.plan("big", int(16 * GIB), _usage({"qwen": 5.0}))
+        assert decision.action == PARTIAL_OFFLOAD
+        assert decision.evict == ["qwen"]
+        assert decision.gpu_fraction == 0.5
+
+    def test_measured_size_wins(self):
+        """La memoria medida en /api/ps tiene prioridad sobre vram_gb declarado"""
+        scheduler = VRAMScheduler()
+        scheduler.observe([LoadedModel(name="qwen", size_bytes=int(5.4 * GIB), size_vram_bytes=int(5.4 * GIB))])
+        assert scheduler.required_bytes("qwen", declared_gb=5.0) == int(5.4 * GIB)
+        assert scheduler.required_bytes("mistral", declared_gb=4.5) == int(4.5 * GIB)
+
+    def test_without_telemetry_uses_count_only(self):
+        """Sin total de GPU ni presupuesto fijo se mantiene el límite por cantidad"""
+        scheduler = VRAMScheduler()
+        usage = VRAMUsage(total_bytes=0, used_bytes=0, models_loaded=["a", "b"])
+        decision = scheduler.plan("c", int(4 * GIB), usage, max_loaded=2)
+        assert decision.action == EVICT_AND_LOAD
+        assert len(decision.evict) == 1
+
+    def test_fixed_budget(self):
+        """global.vram_budget_gb actúa como total cuando no hay nvidia-smi"""
+        scheduler = VRAMScheduler(headroom_bytes=0, budget_bytes=int(8 * GIB), allow_partial_offload=False)
+        usage = VRAMUsage(total_bytes=0, used_bytes=int(5 * GIB), models_loaded=["qwen"],
+                          model_vram={"qwen": int(5 * GIB)})
+        assert scheduler.plan("deepseek", int(6.5 * GIB), usage).evict == ["qwen"]
+        assert scheduler.plan("huge", int(9 * GIB), usage).action == REFUSE
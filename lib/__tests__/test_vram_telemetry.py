@@ -0,0 +1,106 @@
+"""
+Pruebas unitarias para VRAMTelemetry
+Tests de los parsers contra salidas grabadas de nvidia-smi, /api/ps y sysctl
+"""
+
+from unittest.mock import MagicMock
+
+from vram_telemetry import (
+    VRAMTelemetry, parse_nvidia_smi, parse_ps_response, unified_gpu_budget, build_vram_usage, MIB
+)
+
+
+# Salida real de `nvidia-smi --query-gpu=index,name,memory.total,memory.used,memory.free --format=csv,noheader,nounits`
+NVIDIA_SMI_OUTPUT = "0, NVIDIA GeForce RTX 2070 SUPER, 8192, 5731, 2238\n"
+NVIDIA_SMI_MULTI = "0, NVIDIA RTX A4000, 16376, 1024, 15352\n1, NVIDIA RTX A4000, 16376, 0, 16376\n"
+
+# Respuesta grabada de /api/ps con un modelo en offload parcial
+PS_RESPONSE = {
+    "models": [
+        {"name": "qwen2.5-coder:7b", "size": 5405049856, "size_vram": 5405049856,
+         "expires_at": "2024-10-16T12:05:00Z"},
+        {"name": "deepseek-coder-v2:16b", "size": 10737418240, "size_vram": 2147483648},
+    ]
+}
+
+
+class TestParsers:
+    """Pruebas de parsers puros"""
+
+    def test_parse_nvidia_smi(self):
+        """Los valores en MiB se convierten a bytes"""
+        gpus = parse_nvidia_smi(NVIDIA_SMI_OUTPUT)
+        assert len(gpus) == 1
+        assert gpus[0].name == "NVIDIA GeForce RTX 2070 SUPER"
+        assert gpus[0].total_bytes == 8192 * MIB
+        assert gpus[0].free_bytes == 2238 * MIB
+
+    def test_parse_nvidia_smi_multi_gpu_and_garbage(self):
+        """Varias GPUs; líneas no válidas se ignoran"""
+        gpus = parse_nvidia_smi(NVIDIA_SMI_MULTI + "NVIDIA-SMI has failed\n")
+        assert [gpu.index for gpu in gpus] == [0, 1]
+
+    def test_parse_ps_response(self):
+        """size y size_vram por modelo; el offload es la diferencia"""
+        models = parse_ps_response(PS_RESPONSE)
+        assert models[0].size_vram_bytes == 5405049856
+        assert models[0].offloaded_bytes == 0
+        assert models[1].offloaded_bytes == 10737418240 - 2147483648
+
+    def test_unified_gpu_budget(self):
+        """wired_limit_mb tiene prioridad; si no, una fracción de hw.memsize"""
+        assert unified_gpu_budget("25769803776\n", "0\n") == int(25769803776 * 0.75)
+        assert unified_gpu_budget("25769803776\n", "20480\n") == 20480 * MIB
+        assert unified_gpu_budget("", "") == 0
+
+
+class TestBuildVRAMUsage:
+    """Pruebas de combinación de fuentes"""
+
+    def test_nvidia(self):
+        """Con nvidia-smi el total y el uso vienen de la GPU"""
+        usage = build_vram_usage(parse_ps_response(PS_RESPONSE), parse_nvidia_smi(NVIDIA_SMI_OUTPUT))
+        assert usage.source == "nvidia-smi"
+        assert usage.available_bytes == 2238 * MIB
+        assert usage.models_bytes == 5405049856 + 2147483648
+
+    def test_unified(self):
+        """En memoria unificada el uso es lo que ocupan los modelos"""
+        usage = build_vram_usage(parse_ps_response(PS_RESPONSE), [], unified_total=16 * 1024 ** 3)
+        assert usage.source == "unified"
+        assert usage.used_bytes == 5405049856 + 2147483648
+        assert usage.free_bytes == 16 * 1024 ** 3 - usage.used_bytes
+
+    def test_without_gpu_telemetry(self):
+        """Sin GPU detectada el total es desconocido"""
+        usage = build_vram_usage([], [])
+        assert usage.total_bytes == 0
+        assert usage.total_vram == "Desconocido"
+
+
+class TestVRAMTelemetry:
+    """Pruebas de VRAMTelemetry con comandos simulados"""
+
+    def test_snapshot_apple(self):
+        """El perfil apple_m3 consulta sysctl en lugar de nvidia-smi"""
+        commands = []
+
+        def run_command(command, timeout=30):
+            commands.append(command[0])
+            return True, "17179869184" if command[-1] == "hw.memsize" else "0"
+
+        telemetry = VRAMTelemetry(MagicMock(), "http://localhost:11434", run_command, unified_memory=True)
+        usage = telemetry.snapshot(loaded=[])
+
+        assert commands == ["sysctl", "sysctl"]
+        assert usage.total_bytes == int(17179869184 * 0.75)
+
+    def test_snapshot_api_down(self):
+        """Si /api/ps falla se informa solo la memoria de la GPU"""
+        http = MagicMock()
+        http.get.side_effect = ConnectionError()
+        telemetry = VRAMTelemetry(http, "http://localhost:11434", lambda command, timeout=30: (True, NVIDIA_SMI_OUTPUT))
+
+        usage = telemetry.snapshot()
+        assert usage.models_loaded == []
+        assert usage.total_bytes == 8192 * MIB
@@ -0,0 +1,199 @@
+"""
+AsyncOllamaManager - Fachada asyncio de OllamaManager para operaciones concurrentes
+No es un cliente HTTP asíncrono: cada operación ejecuta el método de OllamaManager en
+un hilo de trabajo (mismo transporte HTTP con pool keep-alive, mismos fallbacks al CLI,
+métricas y cachés). Los pulls y generaciones en streaming se exponen como iteradores
+asíncronos con un búfer acotado y la concurrencia de gather()/map() está limitada
+"""
+
+import asyncio
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import List, Dict, Optional, Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator
+
+from chat_session import iter_events
+from model_inventory import ModelStatus
+from state_cache import INSTALLED_MODELS
+
+# Marca de fin del stream producido en el hilo
+_END = object()
+# Elementos de un stream en espera de ser consumidos (el hilo productor se bloquea si se llena)
+STREAM_BUFFER = 64
+# Cada cuánto revisa el productor bloqueado si el consumidor abandonó el stream (s)
+_PUT_POLL_S = 0.1
+
+
+class AsyncOllamaManager:
+    """Contraparte asyncio de OllamaManager: list, ps, pull, stop, generate, show y updates.
+
+    Las operaciones y los streams ocupan un hilo de trabajo mientras están en curso; un
+    cliente asíncrono nativo exigiría una segunda pila HTTP paralela al transporte del manager.
+    """
+
+    def __init__(self, manager: Any = None, max_concurrency: Optional[int] = None):
+        if manager is None:
+            from ollama_manager import ollama_manager as manager
+        self.manager = manager
+        self.max_concurrency = max_concurrency or manager.max_concurrent_operations
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> 'AsyncOllamaManager':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    # -------------------- Concurrencia acotada --------------------
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def gather(self, *operations: Awaitable) -> List[Any]:
+        """Espera varias operaciones con como máximo `max_concurrency` en vuelo.
+
+        Las excepciones se devuelven en la lista en lugar de propagarse.
+        """
+        semaphore = self._get_semaphore()
+
+        async def bounded(operation: Awaitable) -> Any:
+            async with semaphore:
+                return await operation
+
+        return await asyncio.gather(*(bounded(op) for op in operations), return_exceptions=True)
+
+    async def map(self, operation: Callable[[str], Awaitable[Any]], items: Iterable[str]) -> Dict[str, Any]:
+        """Aplica una operación a cada elemento con concurrencia acotada"""
+        items = list(items)
+        results = await self.gather(*(operation(item) for item in items))
+        return dict(zip(items, results))
+
+    async def _iterate(self, open_stream: Callable[[], Iterator[Any]]) -> AsyncIterator[Any]:
+        """Consume un iterador bloqueante en un hilo y entrega sus elementos al event loop.
+
+        La cola tiene como máximo STREAM_BUFFER elementos: con un consumidor lento el hilo
+        espera en lugar de acumular memoria. Si el consumidor deja de iterar, el hilo cierra
+        el stream en cuanto vuelve a intentar entregar un elemento.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_BUFFER)
+        cancelled = threading.Event()
+
+        def put(item: Any, error: Optional[BaseException] = None) -> bool:
+            try:
+                future = asyncio.run_coroutine_threadsafe(queue.put((item, error)), loop)
+            except RuntimeError:
+                # El event loop ya se cerró
+                return False
+            while True:
+                try:
+                    future.result(timeout=_PUT_POLL_S)
+                    return True
+                except FutureTimeoutError:
+                    if cancelled.is_set() or loop.is_closed():
+                        future.cancel()
+                        return False
+
+        def produce() -> None:
+            try:
+                stream = open_stream()
+                try:
+                    for item in stream:
+                        if cancelled.is_set() or not put(item):
+                            return
+                finally:
+                    close = getattr(stream, 'close', None)
+                    if close:
+                        close()
+            except Exception as e:
+                put(_END, e)
+            else:
+                put(_END)
+
+        threading.Thread(target=produce, name="async-ollama-stream", daemon=True).start()
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is _END:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            cancelled.set()
+
+    # -------------------- Operaciones --------------------
+    async def check_ollama_running(self) -> bool:
+        """Verifica si el servicio Ollama responde"""
+        return await asyncio.to_thread(self.manager.check_ollama_running)
+
+    async def list_installed_models(self) -> List[ModelStatus]:
+        """Lista modelos instalados vía /api/tags (CLI solo si la API no responde)"""
+        return await asyncio.to_thread(self.manager.list_installed_models)
+
+    async def get_running_models(self) -> List[str]:
+        """Modelos cargados en memoria (/api/ps)"""
+        return await asyncio.to_thread(self.manager.get_running_models)
+
+    async def pull_stream(self, model_name: str) -> AsyncIterator[Dict[str, Any]]:
+        """Eventos de progreso de /api/pull a medida que llegan (lanza requests.RequestException)"""
+        manager = self.manager
+
+        def open_stream() -> Iterator[Dict[str, Any]]:
+            response = manager.http.post(f"{manager.ollama_host}/api/pull", endpoint='pull',
+                                         json={"model": model_name, "stream": True}, stream=True)
+            try:
+                response.raise_for_status()
+                yield from iter_events(response.iter_content(chunk_size=None))
+            finally:
+                response.close()
+                manager.invalidate_state(INSTALLED_MODELS)
+
+        async for event in self._iterate(open_stream):
+            yield event
+
+    async def pull_model(self, model_name: str) -> bool:
+        """Descarga un modelo con el scheduler de descargas del manager"""
+        results = await asyncio.to_thread(self.manager.pull_models, [model_name])
+        return results[model_name]
+
+    async def stop_model(self, model_name: str) -> bool:
+        """Descarga el modelo de memoria (`ollama stop`, o keep_alive=0 sin CLI)"""
+        return await asyncio.to_thread(self.manager.stop_model, model_name)
+
+    async def generate_stream(self, model_name: str, prompt: str,
+                              options: Optional[Dict[str, Any]] = None, **params: Any) -> AsyncIterator[Dict[str, Any]]:
+        """Fragmentos de /api/generate en streaming (el último incluye las métricas de tiempo).
+
+        Pasa por el coalescer y las métricas del manager; lanza requests.RequestException.
+        """
+        payload = {"model": model_name, "prompt": prompt, "stream": True, **params}
+        if options:
+            payload["options"] = options
+        manager = self.manager
+        async for chunk in self._iterate(lambda: iter_events(manager.stream_request('/api/generate', payload))):
+            yield chunk
+
+    async def generate(self, model_name: str, prompt: str,
+                       options: Optional[Dict[str, Any]] = None, **params: Any) -> Optional[Dict[str, Any]]:
+        """Generación completa: el último fragmento con la respuesta concatenada; None si falla"""
+        text, final = [], None
+        try:
+            async for chunk in self.generate_stream(model_name, prompt, options, **params):
+                if 'error' in chunk:
+                    return None
+                text.append(chunk.get('response', ''))
+                final = chunk
+        except Exception:
+            return None
+        if final is None or not final.get('done'):
+            return None
+        return {**final, 'response': "".join(text)}
+
+    async def get_model_info(self, model_name: str) -> Optional[Dict[str, Any]]:
+        """Información detallada de un modelo (/api/show)"""
+        return await asyncio.to_thread(self.manager.get_model_info, model_name)
+
+    async def check_model_updates(self) -> Dict[str, Dict[str, Any]]:
+        """Compara modelos instalados contra el catálogo del registry"""
+        return await asyncio.to_thread(self.manager.check_model_updates)
@@ -0,0 +1,357 @@
+"""
+Benchmark - Medición de inferencia contra los objetivos RNF-01
+Ejecuta conjuntos de prompts repetibles a varias longitudes de contexto contra cada
+modelo configurado; tasas de prompt-eval/eval, carga y TTFT salen de los campos de
+tiempo de /api/generate. Los resultados se guardan en JSON para comparar ejecuciones
+"""
+
+import json
+import statistics
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+RESULTS_VERSION = 1
+
+DEFAULT_CONTEXT_LENGTHS = (128, 512, 2048)
+DEFAULT_REPEATS = 3
+DEFAULT_NUM_PREDICT = 128
+
+# num_ctx fijo para toda la ejecución: cambiarlo entre peticiones obliga a Ollama a recargar el modelo
+BENCH_NUM_CTX = 4096
+
+# Aproximación de caracteres por token para construir prompts de la longitud pedida
+APPROX_CHARS_PER_TOKEN = 4
+
+# Caída relativa a partir de la cual una comparación se marca como regresión
+REGRESSION_TOLERANCE = 0.10
+
+BENCH_INSTRUCTION = "Resume en una frase qué hacen las funciones anteriores."
+
+
+@dataclass
+class BenchmarkTargets:
+    """Objetivos de RNF-01 (specs/requirements.md)"""
+    min_tokens_per_sec: float = 20.0
+    max_ttft_s: float = 2.0
+    ttft_context_tokens: int = 2048
+    max_latency_s: float = 0.5
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'BenchmarkTargets':
+        """Construye los objetivos desde la sección `benchmark.targets` de app.yml"""
+        config = config or {}
+        defaults = cls()
+        return cls(
+            min_tokens_per_sec=float(config.get('min_tokens_per_sec', defaults.min_tokens_per_sec)),
+            max_ttft_s=float(config.get('max_ttft_s', defaults.max_ttft_s)),
+            ttft_context_tokens=int(config.get('ttft_context_tokens', defaults.ttft_context_tokens)),
+            max_latency_s=float(config.get('max_latency_s', defaults.max_latency_s)),
+        )
+
+
+def build_prompt(context_tokens: int, sample: int = 0) -> str:
+    """Prompt determinista de ~`context_tokens` tokens.
+
+    La primera línea varía con `sample` para que Ollama no reutilice el prefijo
+    cacheado de la repetición anterior (el prompt-eval se mediría vacío).
+    """
+    lines = [f"# muestra {sample}"]
+    target_chars = context_tokens * APPROX_CHARS_PER_TOKEN
+    size = len(lines[0]) + len(BENCH_INSTRUCTION)
+    index = 0
+    while size < target_chars:
+        block = f"def funcion_{index}(x):\n    return x * {index % 13} + {index % 7}\n"
+        lines.append(block)
+        size += len(block)
+        index += 1
+    lines.append(BENCH_INSTRUCTION)
+    return "\n".join(lines)
+
+
+@dataclass
+class BenchSample:
+    """Tiempos de una petición /api/generate (segundos)"""
+    prompt_tokens: int = 0
+    prompt_eval_s: float = 0.0
+    eval_tokens: int = 0
+    eval_s: float = 0.0
+    load_s: float = 0.0
+    total_s: float = 0.0
+
+    @classmethod
+    def from_response(cls, data: Dict[str, Any]) -> 'BenchSample':
+        """Convierte los campos de tiempo (nanosegundos) de la respuesta de Ollama"""
+        return cls(
+            prompt_tokens=int(data.get('prompt_eval_count', 0)),
+            prompt_eval_s=data.get('prompt_eval_duration', 0) / 1e9,
+            eval_tokens=int(data.get('eval_count', 0)),
+            eval_s=data.get('eval_duration', 0) / 1e9,
+            load_s=data.get('load_duration', 0) / 1e9,
+            total_s=data.get('total_duration', 0) / 1e9,
+        )
+
+    @property
+    def prompt_tokens_per_sec(self) -> float:
+        return self.prompt_tokens / self.prompt_eval_s if self.prompt_eval_s else 0.0
+
+    @property
+    def tokens_per_sec(self) -> float:
+        return self.eval_tokens / self.eval_s if self.eval_s else 0.0
+
+    @property
+    def ttft_s(self) -> float:
+        """Tiempo hasta el primer token sin contar la carga: todo lo previo al decode más un token"""
+        per_token = self.eval_s / self.eval_tokens if self.eval_tokens else 0.0
+        return max(0.0, self.total_s - self.eval_s - self.load_s) + per_token
+
+
+@dataclass
+class CaseResult:
+    """Medianas de las repeticiones de una longitud de contexto"""
+    context_tokens: int
+    prompt_tokens: int = 0
+    prompt_tokens_per_sec: float = 0.0
+    tokens_per_sec: float = 0.0
+    ttft_s: float = 0.0
+    total_s: float = 0.0
+    samples: int = 0
+
+    @classmethod
+    def from_samples(cls, context_tokens: int, samples: List[BenchSample]) -> 'CaseResult':
+        if not samples:
+            return cls(context_tokens=context_tokens)
+        return cls(
+            context_tokens=context_tokens,
+            prompt_tokens=int(statistics.median(s.prompt_tokens for s in samples)),
+            prompt_tokens_per_sec=statistics.median(s.prompt_tokens_per_sec for s in samples),
+            tokens_per_sec=statistics.median(s.tokens_per_sec for s in samples),
+            ttft_s=statistics.median(s.ttft_s for s in samples),
+            total_s=statistics.median(s.total_s for s in samples),
+            samples=len(samples),
+        )
+
+
+@dataclass
+class ModelResult:
+    """Resultado del benchmark de un modelo"""
+    key: str
+    model: str
+    load_s: float = 0.0
+    cold_load: bool = False
+    declared_tokens_per_sec: Optional[float] = None
+    cases: List[CaseResult] = field(default_factory=list)
+    failures: List[str] = field(default_factory=list)
+    error: str = ""
+
+    @property
+    def tokens_per_sec(self) -> float:
+        """Velocidad de generación: mediana de todos los contextos"""
+        rates = [case.tokens_per_sec for case in self.cases if case.samples]
+        return statistics.median(rates) if rates else 0.0
+
+    def case_near(self, context_tokens: int) -> Optional[CaseResult]:
+        """Caso medido con la longitud de contexto más cercana a la pedida"""
+        measured = [case for case in self.cases if case.samples]
+        if not measured:
+            return None
+        return min(measured, key=lambda case: abs(case.context_tokens - context_tokens))
+
+    @property
+    def latency_s(self) -> float:
+        """Latencia de una petición simple: TTFT del contexto más corto"""
+        measured = [case for case in self.cases if case.samples]
+        return min(measured, key=lambda case: case.context_tokens).ttft_s if measured else 0.0
+
+    def evaluate(self, targets: BenchmarkTargets) -> List[str]:
+        """Calcula los objetivos RNF-01 incumplidos"""
+        self.failures = []
+        if self.error or not any(case.samples for case in self.cases):
+            return self.failures
+
+        if self.tokens_per_sec < targets.min_tokens_per_sec:
+            self.failures.append(f"tokens/s {self.tokens_per_sec:.1f} < {targets.min_tokens_per_sec:g}")
+
+        ttft_case = self.case_near(targets.ttft_context_tokens)
+        if ttft_case and ttft_case.ttft_s > targets.max_ttft_s:
+            self.failures.append(f"TTFT {ttft_case.ttft_s:.2f}s > {targets.max_ttft_s:g}s "
+                                 f"(contexto {ttft_case.context_tokens})")
+
+        if self.latency_s > targets.max_latency_s:
+            self.failures.append(f"latencia {self.latency_s * 1000:.0f}ms > {targets.max_latency_s * 1000:.0f}ms")
+        return self.failures
+
+    @property
+    def passed(self) -> bool:
+        return not self.error and not self.failures
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ModelResult':
+        cases = [CaseResult(**case) for case in data.get('cases', [])]
+        return cls(**{**data, 'cases': cases})
+
+
+@dataclass
+class BenchmarkReport:
+    """Resultados completos de una ejecución (serializable a JSON)"""
+    created_at: str
+    host: str = ""
+    targets: BenchmarkTargets = field(default_factory=BenchmarkTargets)
+    settings: Dict[str, Any] = field(default_factory=dict)
+    models: List[ModelResult] = field(default_factory=list)
+
+    @property
+    def failed(self) -> List[ModelResult]:
+        return [result for result in self.models if not result.passed]
+
+    def get(self, model: str) -> Optional[ModelResult]:
+        return next((result for result in self.models if result.model == model), None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'version': RESULTS_VERSION, **asdict(self)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BenchmarkReport':
+        return cls(
+            created_at=data.get('created_at', ''),
+            host=data.get('host', ''),
+            targets=BenchmarkTargets(**data.get('targets', {})),
+            settings=data.get('settings', {}),
+            models=[ModelResult.from_dict(item) for item in data.get('models', [])],
+        )
+
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> 'BenchmarkReport':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def _relative_change(current: float, previous: float) -> float:
+    return (current - previous) / previous if previous else 0.0
+
+
+def compare_reports(current: BenchmarkReport, previous: BenchmarkReport,
+                    tolerance: float = REGRESSION_TOLERANCE) -> List[Dict[str, Any]]:
+    """Compara dos ejecuciones caso a caso (mismo modelo y contexto).
+
+    Una regresión es una caída de tokens/s o una subida de TTFT mayor que `tolerance`.
+    """
+    rows = []
+    for result in current.models:
+        before = previous.get(result.model)
+        if before is None:
+            continue
+        previous_cases = {case.context_tokens: case for case in before.cases if case.samples}
+        for case in result.cases:
+            old = previous_cases.get(case.context_tokens)
+            if not case.samples or old is None:
+                continue
+            tps_change = _relative_change(case.tokens_per_sec, old.tokens_per_sec)
+            ttft_change = _relative_change(case.ttft_s, old.ttft_s)
+            rows.append({
+                'model': result.model,
+                'context_tokens': case.context_tokens,
+                'tokens_per_sec': case.tokens_per_sec,
+                'previous_tokens_per_sec': old.tokens_per_sec,
+                'tokens_per_sec_change': tps_change,
+                'ttft_s': case.ttft_s,
+                'previous_ttft_s': old.ttft_s,
+                'ttft_change': ttft_change,
+                'regression': tps_change < -tolerance or ttft_change > tolerance,
+            })
+    return rows
+
+
+class BenchmarkRunner:
+    """Ejecuta el benchmark sobre OllamaManager (admisión de VRAM y carga incluidas)"""
+
+    def __init__(self, manager: Any, targets: Optional[BenchmarkTargets] = None,
+                 context_lengths: Sequence[int] = DEFAULT_CONTEXT_LENGTHS, repeats: int = DEFAULT_REPEATS,
+                 num_predict: int = DEFAULT_NUM_PREDICT,
+                 on_progress: Optional[Callable[[str, int, int], None]] = None):
+        self.manager = manager
+        self.targets = targets or BenchmarkTargets()
+        self.context_lengths = sorted(set(int(length) for length in context_lengths))
+        self.repeats = max(1, int(repeats))
+        self.num_predict = num_predict
+        # on_progress(modelo, contexto, repetición)
+        self.on_progress = on_progress
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        """Opciones de generación fijas para que las ejecuciones sean comparables"""
+        num_ctx = max(BENCH_NUM_CTX, max(self.context_lengths) + self.num_predict)
+        return {"temperature": 0, "seed": 42, "num_predict": self.num_predict, "num_ctx": num_ctx}
+
+    def generate(self, model_name: str, prompt: str, keep_alive: Any = None) -> BenchSample:
+        """Una petición no-streaming a /api/generate (lanza excepción si falla)"""
+        payload: Dict[str, Any] = {"model": model_name, "prompt": prompt, "stream": False,
+                                   "options": self.options}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        response = self.manager.http.post(f"{self.manager.ollama_host}/api/generate", endpoint='bench', json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        self.manager.usage.record_request(model_name)
+        return BenchSample.from_response(response.json())
+
+    def run_model(self, key: str, model_config: Any, installed: Optional[List[str]] = None) -> ModelResult:
+        """Carga el modelo y mide cada longitud de contexto `repeats` veces"""
+        result = ModelResult(key=key, model=model_config.name,
+                             declared_tokens_per_sec=model_config.tokens_per_sec)
+        if installed is not None and model_config.name not in installed:
+            result.error = "no instalado"
+            return result
+
+        load = self.manager.load_model(model_config, options={"num_ctx": self.options["num_ctx"]})
+        if not load.success:
+            result.error = load.error or "error cargando el modelo"
+            return result
+        result.load_s = load.load_seconds
+        result.cold_load = load.cold
+
+        keep_alive = self.manager.keep_alive_for(model_config)
+        try:
+            for context_tokens in self.context_lengths:
+                samples = []
+                for repeat in range(self.repeats):
+                    if self.on_progress:
+                        self.on_progress(model_config.name, context_tokens, repeat + 1)
+                    samples.append(self.generate(model_config.name, build_prompt(context_tokens, repeat), keep_alive))
+                result.cases.append(CaseResult.from_samples(context_tokens, samples))
+        except Exception as e:
+            result.error = str(e)
+
+        result.evaluate(self.targets)
+        return result
+
+    def run(self, models: Dict[str, Any]) -> BenchmarkReport:
+        """Ejecuta el benchmark para `models` (clave → ModelConfig)"""
+        installed = [model.name for model in self.manager.list_installed_models()]
+        report = BenchmarkReport(
+            created_at=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            host=self.manager.ollama_host,
+            targets=self.targets,
+            settings={'context_lengths': self.context_lengths, 'repeats': self.repeats,
+                      'num_predict': self.num_predict, 'options': self.options},
+        )
+        started = time.monotonic()
+        for key, model_config in models.items():
+            report.models.append(self.run_model(key, model_config, installed))
+        report.settings['duration_s'] = round(time.monotonic() - started, 1)
+        return report
+
+
+def default_results_path(cache_dir: Path) -> Path:
+    """Ruta por defecto de resultados: config/cache/bench/bench-<fecha>.json"""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return Path(cache_dir) / 'bench' / f'bench-{stamp}.json'
@@ -0,0 +1,201 @@
+"""
+Bootstrap - Instalación de dependencias Python con huella de requirements.txt
+El lanzador `llm-stack` y la opción "Solo dependencias Python" del menú solo ejecutan
+pip cuando cambia requirements.txt o el intérprete del entorno virtual: la huella
+(sha256 de ambos) se guarda en `.venv/.llm-stack-deps.json` tras instalar con éxito.
+Con un wheelhouse (`LLM_WHEELHOUSE` o `wheelhouse/` en el proyecto) pip instala sin red.
+
+Solo usa la biblioteca estándar: el lanzador lo ejecuta antes de que existan las
+dependencias (`.venv/bin/python lib/bootstrap.py [--force]`).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+STAMP_NAME = '.llm-stack-deps.json'
+WHEELHOUSE_ENV = 'LLM_WHEELHOUSE'
+WHEELHOUSE_DIR = 'wheelhouse'
+# Instante de arranque del lanzador (`$EPOCHREALTIME` de bash, segundos desde epoch)
+LAUNCH_START_ENV = 'LLM_STACK_LAUNCH_START'
+
+# Estados de ensure()
+SKIPPED = 'skipped'
+INSTALLED = 'installed'
+FAILED = 'failed'
+
+
+def interpreter_version(python: str) -> str:
+    """Versión completa del intérprete `python` (sin arrancarlo si es el actual)"""
+    if Path(python).resolve() == Path(sys.executable).resolve():
+        return sys.version.split()[0]
+    try:
+        completed = subprocess.run([python, '-c', 'import sys; print(sys.version.split()[0])'],
+                                   capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    return completed.stdout.strip() if completed.returncode == 0 else ""
+
+
+def requirements_fingerprint(requirements: Path, version: str) -> str:
+    """sha256 del contenido de requirements.txt y la versión del intérprete"""
+    digest = hashlib.sha256(Path(requirements).read_bytes())
+    digest.update(b"\0python=" + version.encode())
+    return digest.hexdigest()
+
+
+def default_wheelhouse(project_dir: Path = PROJECT_DIR) -> Optional[Path]:
+    """Wheelhouse para instalar sin red: `LLM_WHEELHOUSE` o `wheelhouse/` si existe"""
+    if os.getenv(WHEELHOUSE_ENV):
+        return Path(os.environ[WHEELHOUSE_ENV])
+    candidate = Path(project_dir) / WHEELHOUSE_DIR
+    return candidate if candidate.is_dir() else None
+
+
+@dataclass
+class BootstrapResult:
+    """Resultado de ensure(): estado, huella y tiempo empleado"""
+    status: str
+    fingerprint: str = ""
+    duration_s: float = 0.0
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status != FAILED
+
+    @property
+    def skipped(self) -> bool:
+        return self.status == SKIPPED
+
+
+class DependencyBootstrap:
+    """Instala requirements.txt en el venv solo si su huella cambió"""
+
+    def __init__(self, project_dir: Path = PROJECT_DIR, python: Optional[str] = None,
+                 wheelhouse: Optional[Path] = None,
+                 runner: Callable[..., Any] = subprocess.run,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.project_dir = Path(project_dir)
+        self.venv_dir = self.project_dir / '.venv'
+        self.requirements = self.project_dir / 'requirements.txt'
+        venv_python = self.venv_dir / 'bin' / 'python'
+        self.python = python or (str(venv_python) if venv_python.exists() else sys.executable)
+        self.wheelhouse = Path(wheelhouse) if wheelhouse else default_wheelhouse(self.project_dir)
+        self._runner = runner
+        self._clock = clock
+
+    @property
+    def stamp_path(self) -> Path:
+        return self.venv_dir / STAMP_NAME
+
+    def fingerprint(self) -> str:
+        return requirements_fingerprint(self.requirements, interpreter_version(self.python))
+
+    def read_stamp(self) -> Dict[str, Any]:
+        try:
+            with open(self.stamp_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_stamp(self, fingerprint: str) -> None:
+        self.stamp_path.parent.mkdir(parents=True, exist_ok=True)
+        stamp = {
+            'fingerprint': fingerprint,
+            'python': interpreter_version(self.python),
+            'wheelhouse': str(self.wheelhouse) if self.wheelhouse else None,
+            'installed_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        with open(self.stamp_path, 'w', encoding='utf-8') as f:
+            json.dump(stamp, f, indent=2)
+
+    def is_current(self, fingerprint: Optional[str] = None) -> bool:
+        """True si el venv ya tiene instalado este requirements.txt con este intérprete"""
+        fingerprint = fingerprint or self.fingerprint()
+        return self.read_stamp().get('fingerprint') == fingerprint
+
+    def pip_command(self, *args: str) -> List[str]:
+        """`python -m pip install ...` (sin red si hay wheelhouse)"""
+        command = [self.python, '-m', 'pip', 'install', '--disable-pip-version-check']
+        if self.wheelhouse:
+            command += ['--no-index', '--find-links', str(self.wheelhouse)]
+        return command + list(args)
+
+    def ensure(self, force: bool = False, quiet: bool = True) -> BootstrapResult:
+        """Instala las dependencias si la huella cambió (o con `force`)"""
+        started = self._clock()
+        if not self.requirements.exists():
+            return BootstrapResult(FAILED, error=f"requirements.txt no encontrado en {self.project_dir}")
+        fingerprint = self.fingerprint()
+        if not force and self.is_current(fingerprint):
+            return BootstrapResult(SKIPPED, fingerprint, self._clock() - started)
+
+        output = {'capture_output': True, 'text': True} if quiet else {}
+        # Actualizar pip es opcional: sin red o sin pip en el wheelhouse se sigue adelante
+        try:
+            self._runner(self.pip_command('--upgrade', 'pip'), **output)
+        except OSError:
+            pass
+        try:
+            completed = self._runner(self.pip_command('-r', str(self.requirements)), **output)
+        except OSError as e:
+            return BootstrapResult(FAILED, fingerprint, self._clock() - started, str(e))
+        if completed.returncode != 0:
+            # Última línea de pip (la del error) si se capturó la salida
+            stderr = (completed.stderr or "").strip() if quiet else ""
+            error = stderr.splitlines()[-1] if stderr else f"pip terminó con código {completed.returncode}"
+            return BootstrapResult(FAILED, fingerprint, self._clock() - started, error)
+        self.write_stamp(fingerprint)
+        return BootstrapResult(INSTALLED, fingerprint, self._clock() - started)
+
+
+def launch_elapsed_ms(now: Optional[float] = None) -> Optional[float]:
+    """Milisegundos desde que arrancó el lanzador (None si no lo indicó)"""
+    raw = os.getenv(LAUNCH_START_ENV, '').strip()
+    if not raw:
+        return None
+    try:
+        # `$EPOCHREALTIME` usa el separador decimal del locale (p. ej. "1760000000,123456")
+        started = float(raw.replace(',', '.'))
+    except ValueError:
+        return None
+    return ((now if now is not None else time.time()) - started) * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='bootstrap', description="Instala requirements.txt si cambió")
+    parser.add_argument('--force', action='store_true', help="Instalar aunque la huella no haya cambiado")
+    parser.add_argument('--verbose', action='store_true', help="Mostrar la salida de pip")
+    args = parser.parse_args(argv)
+
+    bootstrap = DependencyBootstrap()
+    if args.force or not bootstrap.is_current():
+        source = f" desde {bootstrap.wheelhouse} (sin red)" if bootstrap.wheelhouse else ""
+        print(f"📦 Instalando dependencias{source}...", file=sys.stderr)
+    result = bootstrap.ensure(force=args.force, quiet=not args.verbose)
+
+    if result.status == FAILED:
+        print(f"⚠️  Algunas dependencias pueden no haberse instalado correctamente: {result.error}",
+              file=sys.stderr)
+    elif result.status == INSTALLED:
+        print(f"✅ Dependencias instaladas en {result.duration_s:.1f}s", file=sys.stderr)
+
+    elapsed = launch_elapsed_ms()
+    timing = f"{elapsed:.0f} ms" if elapsed is not None else f"{result.duration_s * 1000:.0f} ms (bootstrap)"
+    state = "dependencias sin cambios" if result.skipped else "tras instalar dependencias"
+    print(f"⏱  Lanzador listo en {timing} ({state})", file=sys.stderr)
+    return 0 if result.ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
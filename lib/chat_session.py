@@ -0,0 +1,170 @@
+"""
+ChatSession - Conversación en streaming con un modelo vía /api/chat
+Los bloques de Ollama (NDJSON) se procesan de forma incremental según llegan por la
+conexión del pool de OllamaManager; cada token actualiza las métricas en vivo (TTFT y
+tokens/s). Cancelar la iteración cierra la respuesta y aborta la generación en Ollama
+"""
+
+import codecs
+import json
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+CHAT_ROUTE = '/api/chat'
+
+
+class NDJSONParser:
+    """Parser incremental: acepta bloques de red arbitrarios y retorna los objetos completos"""
+
+    def __init__(self):
+        # Un carácter UTF-8 o una línea pueden quedar partidos entre dos bloques
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._buffer = ""
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        self._buffer += self._decoder.decode(data)
+        *lines, self._buffer = self._buffer.split('\n')
+        return [event for event in map(self._parse, lines) if event is not None]
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Objeto final sin salto de línea (si lo hay)"""
+        rest, self._buffer = self._buffer + self._decoder.decode(b'', final=True), ""
+        event = self._parse(rest)
+        return [event] if event is not None else []
+
+    @staticmethod
+    def _parse(line: str) -> Optional[Dict[str, Any]]:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return None
+        return event if isinstance(event, dict) else None
+
+
+def iter_events(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """Eventos NDJSON de un stream de bloques"""
+    parser = NDJSONParser()
+    for data in chunks:
+        yield from parser.feed(data)
+    yield from parser.flush()
+
+
+@dataclass
+class ChatStats:
+    """Métricas de una respuesta; se actualizan con cada token"""
+    started_at: float
+    first_token_at: Optional[float] = None
+    last_token_at: Optional[float] = None
+    tokens: int = 0
+    # Métricas finales informadas por Ollama (ns → s)
+    eval_count: int = 0
+    eval_duration_s: float = 0.0
+    load_s: float = 0.0
+    prompt_tokens: int = 0
+    done: bool = False
+    cancelled: bool = False
+    error: str = ""
+
+    @property
+    def ttft_s(self) -> Optional[float]:
+        return self.first_token_at - self.started_at if self.first_token_at is not None else None
+
+    @property
+    def tokens_per_sec(self) -> float:
+        """Velocidad de decodificación: la de Ollama al terminar, estimada mientras tanto"""
+        if self.eval_count and self.eval_duration_s:
+            return self.eval_count / self.eval_duration_s
+        if self.first_token_at is None or self.last_token_at is None or self.tokens < 2:
+            return 0.0
+        elapsed = self.last_token_at - self.first_token_at
+        return (self.tokens - 1) / elapsed if elapsed > 0 else 0.0
+
+
+@dataclass
+class ChatTurn:
+    """Un intercambio usuario → asistente"""
+    prompt: str
+    response: str
+    stats: ChatStats
+
+
+class ChatSession:
+    """Historial de mensajes de un modelo y envío en streaming a través de OllamaManager"""
+
+    def __init__(self, manager: Any, model: str, options: Optional[Dict[str, Any]] = None,
+                 keep_alive: Any = None, system: Optional[str] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.manager = manager
+        self.model = model
+        self.options = options or {}
+        self.keep_alive = keep_alive
+        self.system = system
+        self._clock = clock
+        self.messages: List[Dict[str, str]] = []
+
+    @classmethod
+    def for_model(cls, manager: Any, model_config: Any) -> 'ChatSession':
+        """Sesión con la temperatura de models.yml y el keep_alive con el que se activó el modelo"""
+        options = {"temperature": model_config.temperature} if model_config.temperature is not None else {}
+        return cls(manager, model_config.name, options=options, keep_alive=manager.keep_alive_for(model_config))
+
+    def reset(self) -> None:
+        self.messages = []
+
+    def payload(self, prompt: str) -> Dict[str, Any]:
+        messages = ([{"role": "system", "content": self.system}] if self.system else []) + self.messages
+        payload: Dict[str, Any] = {
+            "model": self.model,
+            "messages": messages + [{"role": "user", "content": prompt}],
+            "stream": True,
+        }
+        if self.options:
+            payload["options"] = self.options
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def send(self, prompt: str, on_update: Optional[Callable[[str, ChatStats], None]] = None) -> ChatTurn:
+        """Envía un mensaje y llama a `on_update(texto, stats)` con cada token.
+
+        Ctrl+C (KeyboardInterrupt) corta el stream: la respuesta parcial se retorna con
+        `stats.cancelled` y no se añade al historial. Los errores de red quedan en `stats.error`.
+        """
+        stats = ChatStats(started_at=self._clock())
+        parts: List[str] = []
+        try:
+            with closing(self.manager.stream_request(CHAT_ROUTE, self.payload(prompt))) as chunks:
+                for event in iter_events(chunks):
+                    if event.get("error"):
+                        stats.error = str(event["error"])
+                        break
+                    content = (event.get("message") or {}).get("content", "")
+                    if content:
+                        now = self._clock()
+                        if stats.first_token_at is None:
+                            stats.first_token_at = now
+                        stats.last_token_at = now
+                        stats.tokens += 1
+                        parts.append(content)
+                    if event.get("done"):
+                        stats.done = True
+                        stats.eval_count = int(event.get("eval_count") or 0)
+                        stats.eval_duration_s = (event.get("eval_duration") or 0) / 1e9
+                        stats.load_s = (event.get("load_duration") or 0) / 1e9
+                        stats.prompt_tokens = int(event.get("prompt_eval_count") or 0)
+                    if on_update is not None:
+                        on_update("".join(parts), stats)
+        except KeyboardInterrupt:
+            stats.cancelled = True
+        except Exception as e:
+            stats.error = str(e)
+
+        response = "".join(parts)
+        if stats.done and not stats.error:
+            self.messages += [{"role": "user", "content": prompt}, {"role": "assistant", "content": response}]
+        return ChatTurn(prompt=prompt, response=response, stats=stats)
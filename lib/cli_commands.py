@@ -0,0 +1,204 @@
+"""
+CLI Commands - Subcomandos no interactivos para scripts, hooks y cron
+`llm-stack status|activate|deactivate|pull|update|free-vram` hacen solo la E/S que
+necesitan (sin menú, sin redibujar ni validar dependencias) y retornan un
+CommandResult que main.py imprime como texto o como JSON con `--json`
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from lazy import lazy_import
+
+# requests solo se importa si hace falta formatear: el cliente del daemon no lo carga
+format_bytes = lazy_import('model_inventory', 'format_bytes')
+
+# Códigos de salida (como `bench`: 1 = la operación falló, 2 = argumentos inválidos)
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+@dataclass
+class CommandResult:
+    """Resultado de un subcomando: datos para `--json` y líneas para la salida de texto"""
+    command: str
+    exit_code: int = EXIT_OK
+    data: Dict[str, Any] = field(default_factory=dict)
+    lines: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == EXIT_OK
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'command': self.command, 'ok': self.ok, **self.data}
+
+
+def resolve_models(configs: Any, names: List[str],
+                   allow_unknown: bool = False) -> Tuple[List[Tuple[Optional[str], str]], List[str]]:
+    """Traduce claves de models.yml o nombres de Ollama a (clave, nombre).
+
+    Con `allow_unknown` los nombres que no están configurados se aceptan tal cual
+    (clave None); si no, se retornan aparte como desconocidos.
+    """
+    models = configs.get_models()
+    by_name = {model.name: key for key, model in models.items()}
+    resolved, unknown = [], []
+    for name in names:
+        if name in models:
+            resolved.append((name, models[name].name))
+        elif name in by_name:
+            resolved.append((by_name[name], name))
+        elif allow_unknown:
+            resolved.append((None, name))
+        else:
+            unknown.append(name)
+    return resolved, unknown
+
+
+def _unknown_models(command: str, unknown: List[str]) -> CommandResult:
+    return CommandResult(command, EXIT_USAGE, data={'error': 'unknown_models', 'unknown': unknown},
+                         lines=[f"❌ Modelos no configurados: {', '.join(unknown)}"])
+
+
+def _pull_errors(manager: Any, names: List[str]) -> Dict[str, str]:
+    errors = {}
+    for name in names:
+        progress = manager.downloads.get_progress(name)
+        errors[name] = (progress.error if progress else "") or "error desconocido"
+    return errors
+
+
+def status(manager: Any, include_updates: bool = False) -> CommandResult:
+    """Snapshot de estado; sale con 1 si el servicio de Ollama no responde"""
+    summary = manager.get_status_summary(include_updates=include_updates)
+    running = summary['ollama_running']
+    lines = [
+        {True: "✅ Ollama activo", False: "❌ Ollama inactivo"}.get(running, "❔ Ollama: estado desconocido"),
+        f"📦 Modelos instalados: {summary['models_installed'] if summary['models_installed'] is not None else '❔'}",
+        f"🧠 Modelos cargados: {', '.join(summary['running_models']) or 'ninguno'}",
+        f"💾 VRAM: {summary['vram_used'] or '❔'} / {summary['vram_total'] or '❔'}",
+    ]
+    for update in summary['available_updates'].values():
+        lines.append(f"🔄 {update['current']} → {update['latest']}")
+    if summary['stale_probes']:
+        lines.append(f"⚠️  Sin respuesta a tiempo: {', '.join(summary['stale_probes'])}")
+    return CommandResult('status', EXIT_OK if running else EXIT_FAILED, data=summary, lines=lines)
+
+
+def activate(manager: Any, configs: Any, model: str, health_check: bool = False) -> CommandResult:
+    """Carga un modelo configurado (descargándolo si falta) con la admisión de VRAM"""
+    resolved, unknown = resolve_models(configs, [model])
+    if unknown:
+        return _unknown_models('activate', unknown)
+    key, name = resolved[0]
+
+    activated = manager.smart_activate_model(key, health_check=health_check)
+    data = {'key': key, 'model': name, 'activated': activated, 'health_checked': health_check}
+    line = f"✅ {name} activado" if activated else f"❌ Error activando {name}"
+    return CommandResult('activate', EXIT_OK if activated else EXIT_FAILED, data=data, lines=[line])
+
+
+def _stop(manager: Any, names: List[str]) -> Tuple[List[str], List[str]]:
+    results = manager.stop_models(names) if names else {}
+    stopped = [name for name in names if results.get(name)]
+    failed = [name for name in names if not results.get(name)]
+    return stopped, failed
+
+
+def deactivate(manager: Any, configs: Any, models: Optional[List[str]] = None) -> CommandResult:
+    """Descarga de VRAM los modelos indicados (todos los cargados si no se indica ninguno)"""
+    if models:
+        resolved, _ = resolve_models(configs, models, allow_unknown=True)
+        names = [name for _, name in resolved]
+    else:
+        names = manager.get_running_models()
+
+    stopped, failed = _stop(manager, names)
+    lines = [f"🛑 {name} desactivado" for name in stopped] + [f"❌ Error desactivando {name}" for name in failed]
+    if not names:
+        lines = ["ℹ No hay modelos activos"]
+    return CommandResult('deactivate', EXIT_FAILED if failed else EXIT_OK,
+                         data={'stopped': stopped, 'failed': failed}, lines=lines)
+
+
+def free_vram(manager: Any, configs: Any, keep: Optional[List[str]] = None) -> CommandResult:
+    """Descarga todos los modelos cargados salvo `keep`; informa de la VRAM liberada"""
+    keep_names = {name for _, name in resolve_models(configs, keep, allow_unknown=True)[0]} if keep else set()
+    loaded = manager.get_loaded_models()
+    targets = [model for model in loaded if model.name not in keep_names]
+
+    stopped, failed = _stop(manager, [model.name for model in targets])
+    for name in stopped:
+        manager.metrics.record_eviction(name, reason='manual')
+    freed = sum(model.size_vram_bytes for model in targets if model.name in stopped)
+
+    lines = [f"🛑 {name} descargado" for name in stopped] + [f"❌ Error descargando {name}" for name in failed]
+    lines.append(f"💾 VRAM liberada: {format_bytes(freed)}")
+    return CommandResult('free-vram', EXIT_FAILED if failed else EXIT_OK,
+                         data={'stopped': stopped, 'failed': failed, 'kept': sorted(keep_names),
+                               'freed_bytes': freed},
+                         lines=lines)
+
+
+def pull(manager: Any, configs: Any, models: Optional[List[str]] = None) -> CommandResult:
+    """Descarga (en paralelo) los modelos indicados o todos los configurados"""
+    if models:
+        resolved, _ = resolve_models(configs, models, allow_unknown=True)
+        names = [name for _, name in resolved]
+    else:
+        names = [model.name for model in configs.get_models().values()]
+
+    results = manager.pull_models(names) if names else {}
+    pulled = [name for name in results if results[name]]
+    errors = _pull_errors(manager, [name for name in results if not results[name]])
+
+    lines = [f"✅ {name} descargado" for name in pulled]
+    lines += [f"❌ Error descargando {name}: {error}" for name, error in errors.items()]
+    return CommandResult('pull', EXIT_FAILED if errors else EXIT_OK,
+                         data={'pulled': pulled, 'failed': errors}, lines=lines)
+
+
+def update(manager: Any, configs: Any, models: Optional[List[str]] = None, dry_run: bool = False) -> CommandResult:
+    """Actualiza con OllamaManager.update_models (detiene antes los modelos cargados).
+
+    Con `dry_run` solo muestra el plan: versión destino y bytes por descargar.
+    """
+    if models:
+        resolved, unknown = resolve_models(configs, models)
+        if unknown:
+            return _unknown_models('update', unknown)
+        names = [name for _, name in resolved]
+    else:
+        names = [model.name for model in configs.get_models().values()]
+
+    plans = manager.plan_updates(names)
+    pending = [name for name, plan in plans.items() if plan.needs_pull]
+    data = {
+        'plans': [{'model': name, 'target': plan.model, 'needs_pull': plan.needs_pull,
+                   'download_bytes': plan.download_bytes, 'total_bytes': plan.total_bytes, 'error': plan.error}
+                  for name, plan in plans.items()],
+        'up_to_date': [name for name, plan in plans.items() if not plan.needs_pull],
+        'dry_run': dry_run,
+    }
+    lines = []
+    for name in pending:
+        plan = plans[name]
+        target = f"{name} → {plan.model}" if plan.model != name else name
+        lines.append(f"📥 {target}: {format_bytes(plan.download_bytes)} por descargar" if not plan.error
+                     else f"📥 {target}: sin plan ({plan.error}), se descargará completo")
+    if dry_run or not pending:
+        lines.append(f"📊 {len(pending)} por actualizar, {len(plans) - len(pending)} sin cambios")
+        return CommandResult('update', data=data, lines=lines)
+
+    results = manager.update_models(names, plans=plans)
+    data['results'] = results
+    data['updated'] = [name for name in pending if results.get(name)]
+    # El progreso de la descarga está bajo el tag destino
+    errors = _pull_errors(manager, [plans[name].model for name in pending if not results.get(name)])
+    data['failed'] = {name: errors[plans[name].model] for name in pending if not results.get(name)}
+    lines += [f"❌ Error actualizando {name}: {error}" for name, error in data['failed'].items()]
+    lines.append(f"📊 {len(data['updated'])}/{len(pending)} modelos actualizados, "
+                 f"{len(plans) - len(pending)} sin cambios")
+    return CommandResult('update', EXIT_FAILED if data['failed'] else EXIT_OK, data=data, lines=lines)
@@ -10,6 +10,25 @@ from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from pathlib import Path
 
+from registry_catalog import RegistryCatalog, DEFAULT_REGISTRY_URL
+from http_transport import HTTPTransport
+from eviction_policy import EVICTION_POLICIES
+from lazy import LazyObject
+
+DEFAULT_OLLAMA_HOST = "http://localhost:11434"
+
+
+def resolve_ollama_host(configured: Optional[str]) -> str:
+    """Host de Ollama: `OLLAMA_HOST` (como el CLI de Ollama) tiene prioridad sobre models.yml.
+
+    Acepta la forma abreviada del CLI (`127.0.0.1:11500`, `0.0.0.0`).
+    """
+    host = (os.getenv('OLLAMA_HOST') or configured or DEFAULT_OLLAMA_HOST).rstrip('/')
+    if '://' not in host:
+        # Forma abreviada: sin esquema ni puerto se asume el puerto por defecto de Ollama
+        host = f"http://{host}" if ':' in host else f"http://{host}:11434"
+    return host
+
 
 @dataclass
 class ModelConfig:
@@ -18,6 +37,12 @@ class ModelConfig:
     description: str
     max_context: Optional[int] = None
     temperature: Optional[float] = None
+    category: str = ""
+    size_gb: Optional[float] = None
+    vram_gb: Optional[float] = None
+    tokens_per_sec: Optional[float] = None
+    idle_timeout_minutes: Optional[float] = None  # Override de inactive_timeout_minutes (0 = nunca)
+    keep_alive: Optional[str] = None  # keep_alive de Ollama al activar (p.ej. "10m", "-1")
 
 
 @dataclass
@@ -28,6 +53,12 @@ class AppConfig:
     max_loaded_models: int = 2  # RTX 2070 SUPER 8GB limit
     auto_stop_inactive: bool = True
     inactive_timeout_minutes: int = 30
+    vram_budget_gb: Optional[float] = None  # Presupuesto fijo si no hay telemetría de GPU
+    vram_headroom_mb: int = 512  # Margen libre para KV cache y otros procesos
+    allow_partial_offload: bool = True  # Cargar con offload a CPU si el modelo no cabe nunca
+    eviction_policy: str = "greedy_dual"  # lru, lfu, greedy_dual
+    min_resident_models: int = 0  # Modelos que el auto-stop deja siempre cargados
+    keep_alive: Optional[str] = None  # keep_alive global; None = -1 con IdleReaper activo, inactive_timeout_minutes sin él, u omitido sin auto-stop
 
 
 class ConfigManager:
@@ -43,16 +74,34 @@ class ConfigManager:
         self._platform_profile = {}
         self._apply_platform_profile()
 
+        # Catálogo del registry (se crea en el primer uso)
+        self._registry_catalog = None
+
+    def get_registry_catalog(self) -> RegistryCatalog:
+        """Catálogo del registry cacheado en disco bajo `<config_dir>/cache/`.
+
+        La URL puede apuntar a un registry local con `LLM_REGISTRY_URL` o
+        `registry.catalog_url` en app.yml (tests y benchmarks).
+        """
+        if self._registry_catalog is None:
+            registry = self.app_config.get('registry', {}) or {}
+            performance = self.get_performance_config()
+            ttl_minutes = registry.get('catalog_ttl_minutes', performance.get('cache_ttl_minutes', 60))
+
+            self._registry_catalog = RegistryCatalog(
+                cache_dir=str(Path(self.config_dir) / 'cache'),
+                registry_url=os.getenv('LLM_REGISTRY_URL') or registry.get('catalog_url', DEFAULT_REGISTRY_URL),
+                ttl_seconds=float(ttl_minutes) * 60,
+                http=HTTPTransport.from_performance_config(performance),
+            )
+        return self._registry_catalog
+
     def get_available_models(self) -> List[str]:
-        """Obtiene lista de modelos disponibles en Ollama registry"""
+        """Obtiene lista de modelos disponibles en Ollama registry (catálogo cacheado)"""
         try:
-            response = requests.get("https://ollama.com/api/models", timeout=10)
-            if response.status_code == 200:
-                models_data = response.json()
-                return [model.get('name', '') for model in models_data if model.get('name')]
-        except Exception:
-            pass
-        return []
+            return self.get_registry_catalog().model_names()
+        except (requests.RequestException, ValueError):
+            return []
 
 
     def _get_default_config_dir(self) -> str:
@@ -133,15 +182,24 @@ class ConfigManager:
             'models': {
                 'qwen': {
                     'name': 'qwen2.5-coder:latest',
-                    'description': 'Code completion and programming'
+                    'description': 'Code completion and programming',
+                    'size_gb': 4.7,
+                    'vram_gb': 5.0,
+                    'tokens_per_sec': 25
                 },
                 'deepseek': {
                     'name': 'deepseek-coder:latest',
-                    'description': 'Technical reasoning and analysis'
+                    'description': 'Technical reasoning and analysis',
+                    'size_gb': 6.0,
+                    'vram_gb': 6.5,
+                    'tokens_per_sec': 20
                 },
                 'mistral': {
                     'name': 'mistral:latest',
-                    'description': 'Documentation and architecture'
+                    'description': 'Documentation and architecture',
+                    'size_gb': 4.1,
+                    'vram_gb': 4.5,
+                    'tokens_per_sec': 30
                 }
             }
         }
@@ -168,15 +226,27 @@ class ConfigManager:
                 name=model_data['name'],
                 description=model_data.get('description', ''),
                 max_context=model_data.get('max_context'),
-                temperature=model_data.get('temperature')
+                temperature=model_data.get('temperature'),
+                category=model_data.get('category', ''),
+                size_gb=model_data.get('size_gb'),
+                vram_gb=model_data.get('vram_gb'),
+                tokens_per_sec=model_data.get('tokens_per_sec'),
+                idle_timeout_minutes=model_data.get('idle_timeout_minutes'),
+                keep_alive=model_data.get('keep_alive')
             )
 
         return AppConfig(
             models=models,
-            ollama_host=global_config.get('ollama_host', 'http://localhost:11434'),
+            ollama_host=resolve_ollama_host(global_config.get('ollama_host')),
             max_loaded_models=global_config.get('max_loaded_models', 2),
             auto_stop_inactive=global_config.get('auto_stop_inactive', True),
-            inactive_timeout_minutes=global_config.get('inactive_timeout_minutes', 30)
+            inactive_timeout_minutes=global_config.get('inactive_timeout_minutes', 30),
+            vram_budget_gb=global_config.get('vram_budget_gb'),
+            vram_headroom_mb=global_config.get('vram_headroom_mb', 512),
+            allow_partial_offload=global_config.get('allow_partial_offload', True),
+            eviction_policy=global_config.get('eviction_policy', 'greedy_dual'),
+            min_resident_models=global_config.get('min_resident_models', 0),
+            keep_alive=global_config.get('keep_alive')
         )
 
     # -------------------- Platform detection and profiles --------------------
@@ -269,6 +339,10 @@ class ConfigManager:
         """Obtiene lista de modelos configurados"""
         return list(self.config.models.values())
 
+    def get_performance_config(self) -> Dict[str, Any]:
+        """Obtiene la sección `performance` de app.yml (vacía si no existe)"""
+        return self.app_config.get('performance', {}) or {}
+
     def _config_to_dict(self) -> Dict[str, Any]:
         """Convierte la configuración a diccionario para guardar"""
         data = {
@@ -303,6 +377,9 @@ class ConfigManager:
         if self.config.max_loaded_models < 1:
             errors.append("max_loaded_models debe ser al menos 1")
 
+        if self.config.eviction_policy not in EVICTION_POLICIES:
+            errors.append(f"eviction_policy debe ser uno de: {', '.join(EVICTION_POLICIES)}")
+
         return errors
 
     def create_example_config(self) -> None:
@@ -330,8 +407,8 @@ class ConfigManager:
         print(f"📝 Configuraciones de ejemplo creadas en: {example_dir}")
 
 
-# Instancia global para uso en la aplicación
-config_manager = ConfigManager()
+# Instancia global para uso en la aplicación (se construye en el primer uso)
+config_manager = LazyObject(ConfigManager, name='config_manager')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,343 @@
+"""
+Control API - Daemon residente con API JSON-RPC por socket Unix
+`llm-stack daemon` mantiene ConfigManager y OllamaManager calientes (configuración,
+backend, cachés de estado y del registry) y atiende peticiones JSON-RPC 2.0, una por
+línea, en un socket Unix local: status, activate, stop, free_vram, pull, update y
+metrics. El CLI y la interfaz interactiva usan ControlClient cuando hay un daemon
+escuchando y vuelven al modo en proceso si no lo hay.
+
+El estado se sirve desde un snapshot que un hilo refresca en segundo plano (y tras
+cada operación que lo cambia), así `status` responde en milisegundos.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import cli_commands
+from state_cache import RUNNING_MODELS, SERVICE_HEALTH, GPU_MEMORY
+
+SOCKET_ENV = 'LLM_STACK_SOCKET'
+SOCKET_NAME = 'llm-stack.sock'
+DEFAULT_STATUS_REFRESH = 2.0
+CONNECT_TIMEOUT = 0.5
+
+# Códigos de error de JSON-RPC 2.0
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+# Rango reservado para la implementación: el cliente perdió la conexión con el daemon
+CONNECTION_ERROR = -32000
+
+
+class ControlError(Exception):
+    """Error JSON-RPC (del servidor o de la conexión con el daemon)"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def private_socket_dir() -> Path:
+    """Directorio 0700 del usuario en el directorio temporal (lo crea si no existe).
+
+    Lanza ControlError si la ruta ya existe y no es un directorio propio y privado:
+    otro usuario podría haberla creado para suplantar al daemon.
+    """
+    directory = Path(tempfile.gettempdir()) / f"llm-stack-{os.getuid()}"
+    try:
+        directory.mkdir(mode=0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise ControlError(INTERNAL_ERROR, f"{directory} no es un directorio privado del usuario")
+    return directory
+
+
+def default_socket_path() -> Path:
+    """Socket del daemon: `LLM_STACK_SOCKET`, `$XDG_RUNTIME_DIR` o un directorio 0700 en el temporal"""
+    if os.getenv(SOCKET_ENV):
+        return Path(os.environ[SOCKET_ENV])
+    if os.getenv('XDG_RUNTIME_DIR'):
+        return Path(os.environ['XDG_RUNTIME_DIR']) / SOCKET_NAME
+    return private_socket_dir() / SOCKET_NAME
+
+
+def is_own_socket(path: Path) -> bool:
+    """True si la ruta es un socket Unix del usuario actual (sin seguir enlaces)"""
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid()
+
+
+@dataclass
+class ControlConfig:
+    """Sección `control` de app.yml"""
+    enabled: bool = True
+    status_refresh_s: float = DEFAULT_STATUS_REFRESH
+
+    @classmethod
+    def from_app_config(cls, app_config: Dict[str, Any]) -> 'ControlConfig':
+        control = app_config.get('control', {}) or {}
+        return cls(
+            enabled=bool(control.get('enabled', True)),
+            status_refresh_s=float(control.get('status_refresh_seconds', DEFAULT_STATUS_REFRESH)),
+        )
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """Una conexión: peticiones JSON-RPC separadas por saltos de línea"""
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.control.dispatch(line)
+            self.wfile.write(json.dumps(response, ensure_ascii=False, default=str).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ControlServer:
+    """API de control del daemon sobre un socket Unix"""
+
+    # Métodos que modifican el estado: se serializan y refrescan el snapshot al terminar
+    MUTATING = ('activate', 'stop', 'free_vram', 'pull', 'update')
+    REQUIRED_PARAMS = {'activate': ('model',)}
+
+    def __init__(self, manager: Any, configs: Any, path: Optional[Path] = None,
+                 status_refresh_s: float = DEFAULT_STATUS_REFRESH,
+                 clock: Callable[[], float] = time.monotonic):
+        self.manager = manager
+        self.configs = configs
+        self.path = Path(path) if path else default_socket_path()
+        self.status_refresh_s = status_refresh_s
+        self._clock = clock
+        self._started_at = clock()
+        self._server: Optional[_UnixServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._refresher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._mutation_lock = threading.Lock()
+        self._status_lock = threading.Lock()
+        self._status: Optional[cli_commands.CommandResult] = None
+        self._status_at = 0.0
+        self.methods: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            'ping': self._ping,
+            'status': self._status_method,
+            'activate': lambda params: cli_commands.activate(
+                manager, configs, params['model'], health_check=bool(params.get('health_check'))),
+            'stop': lambda params: cli_commands.deactivate(manager, configs, params.get('models')),
+            'free_vram': lambda params: cli_commands.free_vram(manager, configs, keep=params.get('keep')),
+            'pull': lambda params: cli_commands.pull(manager, configs, params.get('models')),
+            'update': lambda params: cli_commands.update(manager, configs, params.get('models'),
+                                                         dry_run=bool(params.get('dry_run'))),
+            'metrics': lambda params: manager.metrics.render(),
+        }
+
+    # -------------------- Métodos --------------------
+    def _ping(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {'pid': os.getpid(), 'uptime_s': round(self._clock() - self._started_at, 1),
+                'ollama_host': self.manager.ollama_host}
+
+    def refresh_status(self) -> cli_commands.CommandResult:
+        """Recalcula el snapshot con /api/ps, salud y VRAM al día (sin registry)"""
+        self.manager.invalidate_state(RUNNING_MODELS, SERVICE_HEALTH, GPU_MEMORY)
+        result = cli_commands.status(self.manager)
+        with self._status_lock:
+            self._status, self._status_at = result, self._clock()
+        return result
+
+    def _status_method(self, params: Dict[str, Any]) -> cli_commands.CommandResult:
+        """Snapshot caliente; `refresh` lo recalcula y `updates` consulta también el registry"""
+        if params.get('updates'):
+            return cli_commands.status(self.manager, include_updates=True)
+        with self._status_lock:
+            result, taken_at = self._status, self._status_at
+        if result is None or params.get('refresh'):
+            result, taken_at = self.refresh_status(), self._clock()
+        data = {**result.data, 'snapshot_age_ms': round((self._clock() - taken_at) * 1000, 1)}
+        return cli_commands.CommandResult(result.command, result.exit_code, data, list(result.lines))
+
+    def dispatch(self, line: bytes) -> Dict[str, Any]:
+        """Atiende una petición JSON-RPC y retorna la respuesta (nunca lanza)"""
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                raise ControlError(PARSE_ERROR, "JSON inválido")
+            if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+                raise ControlError(INVALID_REQUEST, "Petición JSON-RPC inválida")
+            request_id = request.get('id')
+            method = self.methods.get(request['method'])
+            if method is None:
+                raise ControlError(METHOD_NOT_FOUND, f"Método desconocido: {request['method']}")
+            params = request.get('params') or {}
+            if not isinstance(params, dict):
+                raise ControlError(INVALID_PARAMS, "params debe ser un objeto")
+            missing = [name for name in self.REQUIRED_PARAMS.get(request['method'], ()) if name not in params]
+            if missing:
+                raise ControlError(INVALID_PARAMS, f"Faltan parámetros: {', '.join(missing)}")
+
+            if request['method'] in self.MUTATING:
+                with self._mutation_lock:
+                    result = method(params)
+                    self.refresh_status()
+            else:
+                result = method(params)
+            if isinstance(result, cli_commands.CommandResult):
+                result = asdict(result)
+            return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        except ControlError as e:
+            return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': e.code, 'message': e.message}}
+        except Exception as e:
+            return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': INTERNAL_ERROR, 'message': str(e)}}
+
+    # -------------------- Servidor --------------------
+    def _refresh_loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.refresh_status()
+            except Exception as e:
+                print(f"⚠️  Error refrescando el estado: {e}")
+            self._stop_event.wait(self.status_refresh_s)
+
+    def start(self) -> str:
+        """Abre el socket (solo para el usuario) y atiende en hilos daemon; retorna su ruta"""
+        if self._server is None:
+            if os.path.lexists(self.path):
+                # Solo se reemplaza un socket propio: nunca un fichero o enlace de otro
+                if not is_own_socket(self.path):
+                    raise ControlError(INTERNAL_ERROR, f"{self.path} existe y no es un socket del usuario")
+                client = ControlClient.connect(self.path)
+                if client is not None:
+                    client.close()
+                    raise ControlError(INTERNAL_ERROR, f"Ya hay un daemon escuchando en {self.path}")
+                # Socket huérfano de un daemon que terminó sin limpiar
+                self.path.unlink()
+            self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # El socket nace con permisos 0600: sin ventana entre bind() y chmod()
+            previous_umask = os.umask(0o177)
+            try:
+                self._server = _UnixServer(str(self.path), _ControlHandler)
+            finally:
+                os.umask(previous_umask)
+            self._server.control = self
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05},
+                                            name="control-api", daemon=True)
+            self._thread.start()
+            self._refresher = threading.Thread(target=self._refresh_loop, name="control-status", daemon=True)
+            self._refresher.start()
+        return str(self.path)
+
+    def serve_forever(self) -> None:
+        """Arranca el servidor y bloquea hasta Ctrl+C"""
+        self.start()
+        try:
+            while self._thread is not None and self._thread.is_alive():
+                self._thread.join(0.5)
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+    def __enter__(self) -> 'ControlServer':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class ControlClient:
+    """Cliente JSON-RPC del daemon (una conexión reutilizable)"""
+
+    def __init__(self, sock: socket.socket, path: Path):
+        self.path = path
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def connect(cls, path: Optional[Path] = None, timeout: float = CONNECT_TIMEOUT) -> Optional['ControlClient']:
+        """Conecta con el daemon; None si no hay ninguno escuchando (modo en proceso)"""
+        try:
+            path = Path(path) if path else default_socket_path()
+        except ControlError:
+            return None
+        # Un socket de otro usuario (o un fichero cualquiera) no es nuestro daemon
+        if not is_own_socket(path):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(path))
+        except OSError:
+            sock.close()
+            return None
+        return cls(sock, path)
+
+    def call(self, method: str, timeout: Optional[float] = None, **params: Any) -> Any:
+        """Ejecuta `method` en el daemon; lanza ControlError si falla o se pierde la conexión"""
+        with self._lock:
+            self._next_id += 1
+            request = {'jsonrpc': '2.0', 'id': self._next_id, 'method': method, 'params': params}
+            try:
+                self._sock.settimeout(timeout)
+                self._sock.sendall(json.dumps(request).encode() + b"\n")
+                line = self._reader.readline()
+            except OSError as e:
+                raise ControlError(CONNECTION_ERROR, f"Conexión con el daemon perdida: {e}")
+        if not line:
+            raise ControlError(CONNECTION_ERROR, "El daemon cerró la conexión")
+        response = json.loads(line)
+        if 'error' in response:
+            raise ControlError(response['error'].get('code', INTERNAL_ERROR), response['error'].get('message', ''))
+        return response.get('result')
+
+    def command(self, method: str, **params: Any) -> cli_commands.CommandResult:
+        """Llama a un subcomando del daemon y reconstruye su CommandResult"""
+        return cli_commands.CommandResult(**self.call(method, **params))
+
+    def close(self) -> None:
+        try:
+            self._reader.close()
+            self._sock.close()
+        except OSError:
+            pass
+
+    def __enter__(self) -> 'ControlClient':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
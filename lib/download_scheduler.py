@@ -0,0 +1,258 @@
+"""
+DownloadScheduler - Descargas de modelos en paralelo con concurrencia acotada
+Pool de workers dimensionado por `performance.max_concurrent_downloads`, deduplicación
+por tag, progreso por modelo y agregado desde el stream de /api/pull y abortado por
+progreso estancado en lugar de timeout de reloj
+"""
+
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Callable, Set
+
+import requests
+from urllib3.exceptions import ReadTimeoutError
+
+from http_transport import HTTPTransport
+
+
+# Segundos sin avance de bytes antes de abortar una descarga
+DEFAULT_STALL_TIMEOUT = 120
+# Timeout de conexión al iniciar el stream de /api/pull
+CONNECT_TIMEOUT = 10
+
+# Estados de una descarga
+QUEUED = 'queued'
+DOWNLOADING = 'downloading'
+SUCCESS = 'success'
+FAILED = 'failed'
+STALLED = 'stalled'
+
+
+class PullStalledError(Exception):
+    """La descarga no avanzó durante el plazo de estancamiento"""
+
+
+def is_read_timeout(error: requests.RequestException) -> bool:
+    """True si el error es un timeout de lectura, directo o envuelto por iter_lines()"""
+    if isinstance(error, requests.ReadTimeout):
+        return True
+    return any(isinstance(arg, ReadTimeoutError) for arg in error.args)
+
+
+@dataclass
+class PullProgress:
+    """Progreso de la descarga de un modelo"""
+    model: str
+    state: str = QUEUED
+    status: str = ''
+    layers: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def completed(self) -> int:
+        return sum(layer.get('completed', 0) for layer in self.layers.values())
+
+    @property
+    def total(self) -> int:
+        return sum(layer.get('total', 0) for layer in self.layers.values())
+
+    @property
+    def fraction(self) -> float:
+        if self.state == SUCCESS:
+            return 1.0
+        return self.completed / self.total if self.total else 0.0
+
+    @property
+    def done(self) -> bool:
+        return self.state in (SUCCESS, FAILED, STALLED)
+
+
+class DownloadScheduler:
+    """Cola de descargas sobre /api/pull con un pool de workers acotado"""
+
+    def __init__(self, http: HTTPTransport, ollama_host: str, max_concurrent: int = 1,
+                 stall_timeout: float = DEFAULT_STALL_TIMEOUT,
+                 on_progress: Optional[Callable[[PullProgress], None]] = None):
+        self.http = http
+        self.ollama_host = ollama_host
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.stall_timeout = float(stall_timeout)
+        self.on_progress = on_progress
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix='pull')
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+        self._progress: Dict[str, PullProgress] = {}
+        self._cancelled: Set[str] = set()
+
+    @classmethod
+    def from_performance_config(cls, performance: Optional[Dict[str, Any]], http: HTTPTransport,
+                                ollama_host: str, **kwargs) -> 'DownloadScheduler':
+        """Construye el scheduler a partir de la sección `performance` de app.yml"""
+        performance = performance or {}
+        return cls(
+            http,
+            ollama_host,
+            max_concurrent=int(performance.get('max_concurrent_downloads', 1)),
+            stall_timeout=float(performance.get('download_stall_timeout_seconds', DEFAULT_STALL_TIMEOUT)),
+            **kwargs,
+        )
+
+    # -------------------- Cola --------------------
+    def submit(self, model_name: str) -> Future:
+        """Encola la descarga de un tag; si ya está en curso retorna el mismo Future"""
+        with self._lock:
+            future = self._futures.get(model_name)
+            if future is not None and not future.done():
+                return future
+
+            self._cancelled.discard(model_name)
+            self._progress[model_name] = PullProgress(model=model_name)
+            future = self._executor.submit(self._run, model_name)
+            self._futures[model_name] = future
+            return future
+
+    def cancel(self, model_name: str) -> None:
+        """Aborta una descarga en curso (se detiene en el siguiente evento del stream)"""
+        with self._lock:
+            self._cancelled.add(model_name)
+
+    def pull_all(self, model_names: List[str]) -> Dict[str, bool]:
+        """Descarga varios modelos (deduplicados) y espera a que terminen todos"""
+        futures = {name: self.submit(name) for name in dict.fromkeys(model_names)}
+        return {name: future.result() for name, future in futures.items()}
+
+    # -------------------- Progreso --------------------
+    def get_progress(self, model_name: str) -> Optional[PullProgress]:
+        """Progreso de un modelo (None si nunca se encoló)"""
+        with self._lock:
+            return self._progress.get(model_name)
+
+    def snapshot(self) -> Dict[str, PullProgress]:
+        """Progreso de todas las descargas conocidas"""
+        with self._lock:
+            return dict(self._progress)
+
+    def aggregate(self) -> Dict[str, Any]:
+        """Progreso agregado: bytes, fracción y conteo por estado"""
+        progress = self.snapshot().values()
+        completed = sum(p.completed for p in progress)
+        total = sum(p.total for p in progress)
+        states = [p.state for p in progress]
+        return {
+            'completed': completed,
+            'total': total,
+            'fraction': completed / total if total else 0.0,
+            'queued': states.count(QUEUED),
+            'active': states.count(DOWNLOADING),
+            'succeeded': states.count(SUCCESS),
+            'failed': states.count(FAILED) + states.count(STALLED),
+        }
+
+    def _notify(self, progress: PullProgress) -> None:
+        if self.on_progress:
+            try:
+                self.on_progress(progress)
+            except Exception:
+                pass
+
+    # -------------------- Worker --------------------
+    def _run(self, model_name: str) -> bool:
+        progress = self._progress[model_name]
+        progress.state = DOWNLOADING
+        progress.started_at = time.time()
+        self._notify(progress)
+
+        try:
+            self._stream_pull(progress)
+            progress.state = SUCCESS if progress.status == 'success' else FAILED
+            if progress.state == FAILED and not progress.error:
+                progress.error = "Stream de /api/pull terminó sin 'success'"
+        except PullStalledError as e:
+            progress.state = STALLED
+            progress.error = str(e)
+        except (requests.RequestException, ValueError) as e:
+            progress.state = FAILED
+            progress.error = str(e)
+        except Exception as e:
+            # Un fallo inesperado no puede dejar la descarga en DOWNLOADING para siempre
+            progress.state = FAILED
+            progress.error = f"{type(e).__name__}: {e}"
+
+        progress.finished_at = time.time()
+        self._notify(progress)
+        return progress.state == SUCCESS
+
+    def _stream_pull(self, progress: PullProgress) -> None:
+        """Consume el NDJSON de /api/pull actualizando el progreso por capa.
+
+        El timeout de lectura y el control de avance usan el mismo plazo: se aborta si
+        el servidor calla o si sigue emitiendo eventos sin que crezcan los bytes.
+        """
+        try:
+            response = self.http.post(
+                f"{self.ollama_host}/api/pull",
+                endpoint='pull',
+                json={"model": progress.model, "stream": True},
+                stream=True,
+                timeout=(CONNECT_TIMEOUT, self.stall_timeout),
+            )
+        except requests.ReadTimeout as e:
+            raise PullStalledError(f"Sin respuesta durante {self.stall_timeout:.0f}s") from e
+
+        try:
+            if response.status_code != 200:
+                raise requests.HTTPError(f"/api/pull respondió {response.status_code}")
+
+            last_completed = -1
+            last_advance = time.monotonic()
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                if progress.model in self._cancelled:
+                    progress.error = "Descarga cancelada"
+                    return
+                event = json.loads(line)
+
+                if 'error' in event:
+                    progress.error = event['error']
+                    return
+
+                status = event.get('status', progress.status)
+                digest = event.get('digest')
+                if digest:
+                    layer = progress.layers.setdefault(digest, {})
+                    if 'total' in event:
+                        layer['total'] = int(event['total'])
+                    if 'completed' in event:
+                        layer['completed'] = int(event['completed'])
+
+                now = time.monotonic()
+                if progress.completed > last_completed or status != progress.status:
+                    last_completed = progress.completed
+                    last_advance = now
+                elif now - last_advance > self.stall_timeout:
+                    raise PullStalledError(
+                        f"Sin progreso durante {self.stall_timeout:.0f}s ({progress.completed}/{progress.total} bytes)"
+                    )
+
+                progress.status = status
+                self._notify(progress)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            # Un timeout de lectura en mitad del stream significa que el servidor dejó de enviar
+            # (requests lo entrega como ConnectionError que envuelve el ReadTimeoutError de urllib3)
+            if is_read_timeout(e):
+                raise PullStalledError(f"Sin datos durante {self.stall_timeout:.0f}s") from e
+            raise
+        finally:
+            response.close()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Detiene el pool (las descargas en curso terminan si wait=True)"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,274 @@
+"""
+EvictionPolicy - Selección de modelos a descargar de VRAM según su uso
+Registro de último uso, número de peticiones y coste medido de recarga por modelo;
+políticas LRU, LFU y GreedyDual (consciente del coste) seleccionables en models.yml
+"""
+
+import atexit
+import json
+import time
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Callable, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+GIB = 1024 ** 3
+
+# Velocidad aproximada de carga disco → VRAM para estimar el coste sin medición (≈10s por 6.5GB)
+DEFAULT_LOAD_BYTES_PER_SEC = 0.65 * GIB
+
+USAGE_FILENAME = "model_usage.json"
+
+# Segundos mínimos entre escrituras de model_usage.json (el resto se acumula en memoria)
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+# Cargas más cortas indican que el modelo ya estaba en VRAM (no son coste de recarga)
+MIN_LOAD_SECONDS = 0.5
+
+
+@dataclass
+class ModelUsage:
+    """Estadísticas de uso de un modelo"""
+    name: str
+    last_used: float = 0.0
+    request_count: int = 0
+    load_cost_s: float = 0.0
+    size_bytes: int = 0
+    # Valor H de GreedyDual (se recalcula en cada acceso)
+    credit: float = 0.0
+
+    def reload_cost(self) -> float:
+        """Coste de recarga en segundos: medido si existe, si no estimado por tamaño"""
+        if self.load_cost_s > 0:
+            return self.load_cost_s
+        return self.size_bytes / DEFAULT_LOAD_BYTES_PER_SEC if self.size_bytes else 1.0
+
+
+class UsageTracker:
+    """Registro persistente de uso por modelo (thread-safe).
+
+    Las escrituras se agrupan (como mucho una cada `flush_interval` segundos, y al salir
+    del proceso) y se fusionan con el contenido del disco bajo un bloqueo de fichero:
+    varios procesos (menú, daemon, gateway) suman su historial en lugar de pisarlo.
+    """
+
+    def __init__(self, path: Optional[Path] = None, clock: Callable[[], float] = time.time,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.path = Path(path) if path else None
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._usage: Dict[str, ModelUsage] = {}
+        # Valor de inflación L de GreedyDual (crédito del último desalojado)
+        self.inflation = 0.0
+        # Cambios aún no escritos: modelos tocados y peticiones sumadas desde el último flush
+        self._dirty: Set[str] = set()
+        self._request_deltas: Dict[str, int] = {}
+        self._inflation_dirty = False
+        self._last_flush = time.monotonic()
+        self._load()
+        if self.path:
+            atexit.register(self.flush)
+
+    def _read(self) -> Tuple[float, Dict[str, ModelUsage]]:
+        """Inflación y uso guardados en disco (vacíos si no hay fichero válido)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return float(data.get('inflation', 0.0)), {item['name']: ModelUsage(**item) for item in data.get('models', [])}
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return 0.0, {}
+
+    def _load(self) -> None:
+        if not self.path:
+            return
+        self.inflation, self._usage = self._read()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Bloqueo exclusivo entre procesos durante leer-fusionar-escribir"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.path.with_suffix('.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _merge(self, inflation: float, stored: Dict[str, ModelUsage]) -> None:
+        """Combina los cambios locales pendientes con lo que otros procesos guardaron"""
+        for name in self._dirty:
+            ours, theirs = self._usage[name], stored.get(name)
+            if theirs is not None:
+                ours.request_count = theirs.request_count + self._request_deltas.get(name, 0)
+                ours.last_used = max(ours.last_used, theirs.last_used)
+                ours.load_cost_s = ours.load_cost_s or theirs.load_cost_s
+                ours.size_bytes = ours.size_bytes or theirs.size_bytes
+                ours.credit = max(ours.credit, theirs.credit)
+            stored[name] = ours
+        self.inflation = max(self.inflation, inflation)
+        self._usage = stored
+
+    def _save(self) -> None:
+        """Fusiona con el disco y escribe de forma atómica (llamar con self._lock tomado)"""
+        if not self.path or not (self._dirty or self._inflation_dirty):
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._file_lock():
+                self._merge(*self._read())
+                tmp_file = self.path.with_suffix('.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump({'inflation': self.inflation, 'models': [asdict(u) for u in self._usage.values()]}, f)
+                tmp_file.replace(self.path)
+        except OSError:
+            return
+        self._dirty.clear()
+        self._request_deltas.clear()
+        self._inflation_dirty = False
+        self._last_flush = time.monotonic()
+
+    def _changed(self, name: Optional[str] = None) -> None:
+        """Marca un cambio pendiente y escribe si pasó `flush_interval` desde la última escritura"""
+        if name is None:
+            self._inflation_dirty = True
+        else:
+            self._dirty.add(name)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self._save()
+
+    def flush(self) -> None:
+        """Escribe ya los cambios pendientes (se llama también al salir del proceso)"""
+        with self._lock:
+            self._save()
+
+    def get(self, name: str) -> ModelUsage:
+        """Estadísticas de un modelo (vacías si nunca se usó)"""
+        with self._lock:
+            return self._usage.get(name) or ModelUsage(name=name)
+
+    def _entry(self, name: str) -> ModelUsage:
+        return self._usage.setdefault(name, ModelUsage(name=name))
+
+    def _refresh_credit(self, usage: ModelUsage) -> None:
+        # GreedyDual-Size: H = L + coste / tamaño (GB); los modelos caros de recargar y pequeños se conservan
+        size_gb = max(usage.size_bytes / GIB, 0.1)
+        usage.credit = self.inflation + usage.reload_cost() / size_gb
+
+    def record_request(self, name: str) -> None:
+        """Registra una petición (uso) del modelo"""
+        with self._lock:
+            usage = self._entry(name)
+            usage.last_used = self._clock()
+            usage.request_count += 1
+            self._request_deltas[name] = self._request_deltas.get(name, 0) + 1
+            self._refresh_credit(usage)
+            self._changed(name)
+
+    def record_load(self, name: str, load_seconds: float, size_bytes: int = 0) -> None:
+        """Registra el coste medido de cargar el modelo en VRAM"""
+        with self._lock:
+            usage = self._entry(name)
+            if load_seconds >= MIN_LOAD_SECONDS:
+                usage.load_cost_s = load_seconds
+            if size_bytes:
+                usage.size_bytes = size_bytes
+            usage.last_used = self._clock()
+            self._refresh_credit(usage)
+            self._changed(name)
+
+    def record_sizes(self, sizes: Dict[str, int]) -> None:
+        """Actualiza la memoria medida de los modelos (solo persiste si cambió)"""
+        with self._lock:
+            for name, size in sizes.items():
+                usage = self._entry(name)
+                if size and usage.size_bytes != size:
+                    usage.size_bytes = size
+                    self._refresh_credit(usage)
+                    self._changed(name)
+
+    def record_eviction(self, name: str) -> None:
+        """Actualiza la inflación de GreedyDual con el crédito del modelo desalojado"""
+        with self._lock:
+            usage = self._usage.get(name)
+            if usage is not None:
+                self.inflation = max(self.inflation, usage.credit)
+                self._changed()
+
+
+class EvictionPolicy:
+    """Política base: ordena candidatos de primer a último desalojo"""
+    name = 'base'
+
+    def key(self, usage: ModelUsage):
+        raise NotImplementedError
+
+    def order(self, candidates: List[str], tracker: UsageTracker) -> List[str]:
+        return sorted(candidates, key=lambda name: (self.key(tracker.get(name)), name))
+
+
+class LRUPolicy(EvictionPolicy):
+    """Menos recientemente usado primero"""
+    name = 'lru'
+
+    def key(self, usage: ModelUsage):
+        return usage.last_used
+
+
+class LFUPolicy(EvictionPolicy):
+    """Menos peticiones primero (desempate por antigüedad)"""
+    name = 'lfu'
+
+    def key(self, usage: ModelUsage):
+        return (usage.request_count, usage.last_used)
+
+
+class GreedyDualPolicy(EvictionPolicy):
+    """GreedyDual-Size: menor crédito H = L + coste de recarga / tamaño primero"""
+    name = 'greedy_dual'
+
+    def key(self, usage: ModelUsage):
+        return (usage.credit, usage.last_used)
+
+
+EVICTION_POLICIES: Dict[str, type] = {
+    'lru': LRUPolicy,
+    'lfu': LFUPolicy,
+    'greedy_dual': GreedyDualPolicy,
+}
+
+DEFAULT_EVICTION_POLICY = 'greedy_dual'
+
+
+def get_policy(name: Optional[str]) -> EvictionPolicy:
+    """Instancia la política configurada (GreedyDual si el nombre no se reconoce)"""
+    policy_cls = EVICTION_POLICIES.get((name or DEFAULT_EVICTION_POLICY).lower(), GreedyDualPolicy)
+    return policy_cls()
+
+
+def select_victims(order: List[str], sizes: Dict[str, int], deficit_bytes: int, min_count: int = 0) -> List[str]:
+    """Toma modelos en el orden de la política hasta liberar `deficit_bytes` y `min_count`
+    modelos; después descarta los que resultaron innecesarios (empezando por los más valiosos)"""
+    if deficit_bytes <= 0 and min_count <= 0:
+        return []
+
+    chosen: List[str] = []
+    for name in order:
+        if sum(sizes.get(n, 0) for n in chosen) >= deficit_bytes and len(chosen) >= min_count:
+            break
+        chosen.append(name)
+
+    for name in reversed(list(chosen)):
+        remaining = [n for n in chosen if n != name]
+        if sum(sizes.get(n, 0) for n in remaining) >= deficit_bytes and len(remaining) >= min_count:
+            chosen = remaining
+
+    return chosen
@@ -0,0 +1,633 @@
+"""
+Gateway - Proxy local compatible con OpenAI delante de Ollama
+Los clientes (VSCode/Kilo Code) hablan con /v1/chat/completions, /v1/completions y
+/v1/embeddings del gateway; antes de reenviar cada petición se consulta la admisión
+de OllamaManager (VRAM, max_loaded_models, política de desalojo). Una cola acotada
+por modelo serializa los cambios de modelo y da prioridad a los modelos ya cargados;
+las peticiones idénticas en vuelo se agrupan en una sola generación (RequestCoalescer)
+"""
+
+import codecs
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import requests
+
+from config_manager import ModelConfig
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from request_coalescer import Flight, FlightError
+from response_cache import CachedResponse, cache_key, is_cacheable
+
+DEFAULT_GATEWAY_PORT = 11435
+DEFAULT_MAX_QUEUE_PER_MODEL = 8
+DEFAULT_MAX_PARALLEL_PER_MODEL = 1
+DEFAULT_MAX_SWITCH_WAIT_S = 30.0
+DEFAULT_QUEUE_TIMEOUT_S = 120.0
+
+# Rutas OpenAI que pasan por la cola de admisión
+PROXIED_ROUTES = ('/v1/chat/completions', '/v1/completions', '/v1/embeddings')
+
+# Los embeddings son deterministas sin importar la temperatura
+ALWAYS_CACHEABLE_ROUTES = ('/v1/embeddings',)
+
+# Estados de un ticket en la cola
+WAITING = 'waiting'
+LOADING = 'loading'
+ADMITTED = 'admitted'
+FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """La cola del modelo está llena (backpressure: el cliente debe reintentar)"""
+
+
+class QueueTimeoutError(Exception):
+    """La petición no fue admitida dentro del plazo"""
+
+
+class AdmissionError(Exception):
+    """El modelo no se pudo cargar (no cabe en VRAM, no instalado...)"""
+
+
+@dataclass
+class Ticket:
+    """Petición esperando turno para un modelo"""
+    model: str
+    enqueued_at: float
+    state: str = WAITING
+    error: str = ""
+    admitted_at: float = 0.0
+
+
+@dataclass
+class ModelQueueStats:
+    """Contadores de la cola de un modelo"""
+    served: int = 0
+    rejected: int = 0
+    failed: int = 0
+    timeouts: int = 0
+    switches: int = 0
+    total_wait_s: float = 0.0
+
+
+class RequestScheduler:
+    """Colas acotadas por modelo con prioridad para los modelos cargados.
+
+    - Las peticiones a modelos ya cargados se despachan primero (hasta
+      `max_parallel_per_model` en vuelo por modelo).
+    - Un cambio de modelo (cargar uno no residente) se hace de uno en uno y solo
+      con la GPU sin peticiones en vuelo, para no desalojar una generación activa.
+    - Si un cambio espera más de `max_switch_wait_s`, se dejan de admitir
+      peticiones nuevas a los modelos cargados hasta completarlo (sin inanición).
+    """
+
+    def __init__(self, load_model: Callable[[str], Tuple[bool, str]], loaded_models: Callable[[], List[str]],
+                 max_queue_per_model: int = DEFAULT_MAX_QUEUE_PER_MODEL,
+                 max_parallel_per_model: int = DEFAULT_MAX_PARALLEL_PER_MODEL,
+                 max_switch_wait_s: float = DEFAULT_MAX_SWITCH_WAIT_S,
+                 clock: Callable[[], float] = time.monotonic):
+        self._load_model = load_model
+        self._loaded_models = loaded_models
+        self.max_queue_per_model = max(1, max_queue_per_model)
+        self.max_parallel_per_model = max(1, max_parallel_per_model)
+        self.max_switch_wait_s = max_switch_wait_s
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        self._queues: Dict[str, Deque[Ticket]] = {}
+        self._active: Dict[str, int] = {}
+        self._resident: Set[str] = set()
+        self._switching: Optional[str] = None
+        self.stats: Dict[str, ModelQueueStats] = {}
+
+    def _stats(self, model: str) -> ModelQueueStats:
+        return self.stats.setdefault(model, ModelQueueStats())
+
+    def _oldest_switch(self) -> Optional[Ticket]:
+        """Primer ticket del cambio de modelo que más tiempo lleva esperando"""
+        heads = [queue[0] for name, queue in self._queues.items() if queue and name not in self._resident]
+        return min(heads, key=lambda ticket: ticket.enqueued_at) if heads else None
+
+    def _admit(self, ticket: Ticket) -> None:
+        ticket.state = ADMITTED
+        ticket.admitted_at = self._clock()
+        self._active[ticket.model] = self._active.get(ticket.model, 0) + 1
+        self._stats(ticket.model).total_wait_s += ticket.admitted_at - ticket.enqueued_at
+
+    def _dispatch(self) -> None:
+        """Decide qué tickets avanzan (llamar con el lock tomado); despierta a los que esperan si hubo cambios"""
+        if self._switching is not None:
+            return
+
+        changed = False
+        pending_switch = self._oldest_switch()
+        draining = (pending_switch is not None
+                    and self._clock() - pending_switch.enqueued_at >= self.max_switch_wait_s)
+
+        # 1. Modelos cargados primero
+        if not draining:
+            for name in self._resident:
+                queue = self._queues.get(name)
+                while queue and self._active.get(name, 0) < self.max_parallel_per_model:
+                    self._admit(queue.popleft())
+                    changed = True
+
+        # 2. Un cambio de modelo a la vez, con la GPU sin peticiones en vuelo
+        if pending_switch is not None and not any(self._active.values()):
+            self._queues[pending_switch.model].popleft()
+            pending_switch.state = LOADING
+            self._switching = pending_switch.model
+            changed = True
+
+        if changed:
+            self._cond.notify_all()
+
+    def acquire(self, model: str, timeout: Optional[float] = DEFAULT_QUEUE_TIMEOUT_S) -> Ticket:
+        """Encola la petición y bloquea hasta que puede reenviarse.
+
+        Lanza QueueFullError, QueueTimeoutError o AdmissionError.
+        """
+        resident = set(self._loaded_models())
+        with self._cond:
+            if self._switching is None:
+                self._resident = resident
+            queue = self._queues.setdefault(model, deque())
+            if len(queue) >= self.max_queue_per_model:
+                self._stats(model).rejected += 1
+                raise QueueFullError(f"Cola de {model} llena ({self.max_queue_per_model} peticiones)")
+
+            ticket = Ticket(model=model, enqueued_at=self._clock())
+            queue.append(ticket)
+            deadline = None if timeout is None else ticket.enqueued_at + timeout
+            self._dispatch()
+
+            while ticket.state == WAITING:
+                remaining = None if deadline is None else deadline - self._clock()
+                if remaining is not None and remaining <= 0:
+                    queue.remove(ticket)
+                    self._stats(model).timeouts += 1
+                    raise QueueTimeoutError(f"Sin turno para {model} tras {timeout:.0f}s")
+                # Despertar periódicamente: el envejecimiento de los cambios depende del tiempo
+                self._cond.wait(0.5 if remaining is None else min(remaining, 0.5))
+                self._dispatch()
+
+        if ticket.state == LOADING:
+            self._switch(ticket)
+        if ticket.state == FAILED:
+            raise AdmissionError(ticket.error)
+        return ticket
+
+    def _switch(self, ticket: Ticket) -> None:
+        """Carga el modelo del ticket (fuera del lock) y reanuda la cola"""
+        try:
+            success, error = self._load_model(ticket.model)
+        except Exception as e:
+            success, error = False, str(e)
+        resident = set(self._loaded_models()) | {ticket.model} if success else None
+
+        with self._cond:
+            self._switching = None
+            stats = self._stats(ticket.model)
+            stats.switches += 1
+            if success:
+                self._resident = resident
+                self._admit(ticket)
+            else:
+                # Las peticiones en espera para ese modelo fallarían igual
+                failed = [ticket] + list(self._queues.pop(ticket.model, []))
+                for waiting in failed:
+                    waiting.state = FAILED
+                    waiting.error = error or f"No se pudo cargar {ticket.model}"
+                stats.failed += len(failed)
+            self._dispatch()
+            self._cond.notify_all()
+
+    def release(self, ticket: Ticket) -> None:
+        """Marca la petición como terminada y despacha las siguientes"""
+        with self._cond:
+            self._active[ticket.model] = max(0, self._active.get(ticket.model, 0) - 1)
+            self._stats(ticket.model).served += 1
+            self._dispatch()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado de las colas para /gateway/stats"""
+        with self._cond:
+            models = set(self._queues) | set(self._active) | set(self.stats)
+            return {
+                'resident': sorted(self._resident),
+                'switching': self._switching,
+                'models': {
+                    name: {
+                        'queued': len(self._queues.get(name, ())),
+                        'active': self._active.get(name, 0),
+                        'served': self._stats(name).served,
+                        'rejected': self._stats(name).rejected,
+                        'failed': self._stats(name).failed,
+                        'timeouts': self._stats(name).timeouts,
+                        'switches': self._stats(name).switches,
+                        'avg_wait_ms': round(self._stats(name).total_wait_s * 1000 /
+                                             max(1, self._stats(name).served + self._active.get(name, 0)), 1),
+                    }
+                    for name in sorted(models)
+                },
+            }
+
+
+@dataclass
+class GatewayConfig:
+    """Sección `gateway` de app.yml"""
+    host: str = "127.0.0.1"
+    port: int = DEFAULT_GATEWAY_PORT
+    max_queue_per_model: int = DEFAULT_MAX_QUEUE_PER_MODEL
+    max_parallel_per_model: int = DEFAULT_MAX_PARALLEL_PER_MODEL
+    max_switch_wait_s: float = DEFAULT_MAX_SWITCH_WAIT_S
+    queue_timeout_s: float = DEFAULT_QUEUE_TIMEOUT_S
+
+    @classmethod
+    def from_app_config(cls, app_config: Dict[str, Any]) -> 'GatewayConfig':
+        """Lee `gateway` y respeta `security.allow_remote_access` (solo localhost si es false)"""
+        gateway = app_config.get('gateway', {}) or {}
+        security = app_config.get('security', {}) or {}
+        host = str(gateway.get('host', cls.host))
+        if not security.get('allow_remote_access', False):
+            host = "127.0.0.1"
+        return cls(
+            host=host,
+            port=int(gateway.get('port', DEFAULT_GATEWAY_PORT)),
+            max_queue_per_model=int(gateway.get('max_queue_per_model', DEFAULT_MAX_QUEUE_PER_MODEL)),
+            max_parallel_per_model=int(gateway.get('max_parallel_per_model', DEFAULT_MAX_PARALLEL_PER_MODEL)),
+            max_switch_wait_s=float(gateway.get('max_switch_wait_seconds', DEFAULT_MAX_SWITCH_WAIT_S)),
+            queue_timeout_s=float(gateway.get('queue_timeout_seconds', DEFAULT_QUEUE_TIMEOUT_S)),
+        )
+
+
+class Gateway:
+    """Servidor HTTP del gateway: admisión vía OllamaManager y reenvío a la API /v1 de Ollama"""
+
+    def __init__(self, manager: Any, models: Optional[Dict[str, ModelConfig]] = None,
+                 config: Optional[GatewayConfig] = None):
+        self.manager = manager
+        self.config = config or GatewayConfig()
+        # Claves de models.yml como alias (`qwen` → `qwen2.5-coder:latest`)
+        self.models = models or {}
+        self.scheduler = RequestScheduler(
+            self._load_model, manager.get_running_models,
+            max_queue_per_model=self.config.max_queue_per_model,
+            max_parallel_per_model=self.config.max_parallel_per_model,
+            max_switch_wait_s=self.config.max_switch_wait_s,
+        )
+        self.host = self.config.host
+        self.port = self.config.port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # -------------------- Modelos --------------------
+    def resolve_model(self, name: str) -> str:
+        """Nombre de Ollama para un nombre o alias de models.yml"""
+        config = self.models.get(name)
+        return config.name if config else name
+
+    def model_config_for(self, name: str) -> ModelConfig:
+        """ModelConfig del modelo (uno mínimo si no está en models.yml)"""
+        for config in self.models.values():
+            if config.name == name:
+                return config
+        return ModelConfig(name=name, description="")
+
+    def apply_model_defaults(self, body: Dict[str, Any]) -> None:
+        """Aplica la temperatura de models.yml si el cliente no envía una"""
+        temperature = self.model_config_for(body['model']).temperature
+        if temperature is not None and body.get('temperature') is None:
+            body['temperature'] = temperature
+
+    def cache_key_for(self, path: str, body: Dict[str, Any]) -> Optional[str]:
+        """Clave de caché si la petición es determinista y el modelo está instalado"""
+        cache = self.manager.response_cache
+        if not cache.enabled or not (path in ALWAYS_CACHEABLE_ROUTES or is_cacheable(body)):
+            return None
+        digest = self.manager.get_model_digest(body['model'])
+        return cache_key(digest, path, body) if digest else None
+
+    def coalesce_key_for(self, path: str, body: Dict[str, Any]) -> Optional[str]:
+        """Clave para agrupar peticiones idénticas en vuelo (cualquier temperatura)"""
+        if not self.manager.coalescer.enabled:
+            return None
+        digest = self.manager.get_model_digest(body['model'])
+        return cache_key(digest, path, body) if digest else None
+
+    def _load_model(self, name: str) -> Tuple[bool, str]:
+        result = self.manager.load_model(self.model_config_for(name))
+        return result.success, result.error
+
+    # -------------------- Reenvío --------------------
+    def forward(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """Reenvía a Ollama en streaming (el cuerpo se copia tal cual al cliente)"""
+        url = f"{self.manager.ollama_host}{path}"
+        return self.manager.http.request(method, url, endpoint='gateway', json=body, stream=True)
+
+    # -------------------- Ciclo de vida --------------------
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> str:
+        """Arranca el servidor en un hilo daemon y retorna su URL"""
+        if self._server is None:
+            self._server = ThreadingHTTPServer((self.host, self.port), _GatewayHandler)
+            self._server.daemon_threads = True
+            self._server.gateway = self
+            self.port = self._server.server_address[1]
+            self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05},
+                                            name="llm-gateway", daemon=True)
+            self._thread.start()
+        return self.url
+
+    def serve_forever(self) -> None:
+        """Arranca el servidor y bloquea hasta Ctrl+C"""
+        self.start()
+        try:
+            while self._thread is not None and self._thread.is_alive():
+                self._thread.join(0.5)
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self) -> 'Gateway':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class _GatewayHandler(BaseHTTPRequestHandler):
+    """Rutas HTTP del gateway (errores en el formato de OpenAI)"""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def gateway(self) -> Gateway:
+        return self.server.gateway
+
+    def log_message(self, format, *args):  # noqa: A002 - firma de BaseHTTPRequestHandler
+        pass
+
+    def send_response(self, code: int, message: Optional[str] = None) -> None:
+        # Estado enviado al cliente, para las métricas de la petición
+        self._status = code
+        super().send_response(code, message)
+
+    def _send_json(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, error_type: str,
+                    headers: Optional[Dict[str, str]] = None) -> None:
+        self._send_json(status, {"error": {"message": message, "type": error_type}}, headers)
+
+    def _send_head(self, status: int, content_type: str, length: Optional[int],
+                   headers: Optional[Dict[str, str]] = None) -> None:
+        """Cabeceras de una respuesta completa (`length`) o en bloques (None)"""
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if length is not None:
+            self.send_header('Content-Length', str(length))
+        else:
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _relay(self, upstream: requests.Response, flight: Optional[Flight] = None) -> None:
+        """Copia la respuesta de Ollama; SSE/NDJSON se pasan en bloques según llegan.
+
+        Cada bloque se publica en `flight` para las peticiones idénticas adjuntas (y la caché).
+        Si el cliente se va, la generación sigue mientras queden seguidores.
+        """
+        flight = flight or Flight()
+        content_type = upstream.headers.get('Content-Type', 'application/json')
+        streamed = 'Content-Length' not in upstream.headers
+        try:
+            flight.start(upstream.status_code, content_type, streamed)
+            if not streamed:
+                flight.publish(upstream.content)
+                flight.finish()
+                self._send_head(upstream.status_code, content_type, len(upstream.content), {'X-Cache': 'MISS'})
+                self.wfile.write(upstream.content)
+                return
+
+            client_gone = False
+            try:
+                self._send_head(upstream.status_code, content_type, None, {'X-Cache': 'MISS'})
+            except (BrokenPipeError, ConnectionResetError):
+                client_gone = True
+            for data in upstream.iter_content(chunk_size=None):
+                if not data:
+                    continue
+                if client_gone and flight.abandon():
+                    break
+                flight.publish(data)
+                if not client_gone:
+                    try:
+                        self._write_chunk(data)
+                    except (BrokenPipeError, ConnectionResetError):
+                        client_gone = True
+            flight.finish()
+            if client_gone:
+                raise BrokenPipeError("El cliente cerró la conexión")
+            self.wfile.write(b"0\r\n\r\n")
+        finally:
+            if not flight.done:
+                flight.fail("La generación se interrumpió")
+
+    def _follow(self, flight: Flight) -> None:
+        """Responde con la generación de una petición idéntica que ya está en vuelo"""
+        timeout = self.gateway.manager.coalescer.follow_timeout_s
+        try:
+            if not flight.wait_started(timeout):
+                self._send_error(504, "La petición idéntica en curso no respondió a tiempo", "server_error")
+                return
+            if flight.status is None:
+                error_type = "rate_limit_error" if flight.error_status == 429 else "server_error"
+                self._send_error(flight.error_status, flight.error, error_type)
+                return
+
+            headers = {'X-Cache': 'MISS', 'X-Coalesced': 'true'}
+            if not flight.streamed:
+                body = b"".join(flight.subscribe(timeout))
+                self._send_head(flight.status, flight.content_type, len(body), headers)
+                self.wfile.write(body)
+                return
+
+            self._send_head(flight.status, flight.content_type, None, headers)
+            for data in flight.subscribe(timeout):
+                self._write_chunk(data)
+            self.wfile.write(b"0\r\n\r\n")
+        except FlightError as e:
+            # A mitad de un stream no hay forma de informar el error: se corta la conexión
+            if flight.status is None or not flight.streamed:
+                self._send_error(flight.error_status, str(e), "server_error")
+            self.close_connection = True
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        finally:
+            flight.detach()
+
+    def _replay(self, entry: CachedResponse) -> None:
+        """Reproduce una respuesta cacheada (en bloques si era un stream)"""
+        if not entry.streamed:
+            body = "".join(entry.chunks).encode()
+            self._send_head(entry.status, entry.content_type, len(body), {'X-Cache': 'HIT'})
+            self.wfile.write(body)
+            return
+
+        self._send_head(entry.status, entry.content_type, None, {'X-Cache': 'HIT'})
+        for chunk in entry.chunks:
+            data = chunk.encode()
+            if data:
+                self._write_chunk(data)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _read_json(self) -> Optional[Dict[str, Any]]:
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            data = json.loads(self.rfile.read(length) or b'{}') if length else {}
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def do_GET(self):
+        if self.path == '/gateway/stats':
+            self._send_json(200, {**self.gateway.scheduler.snapshot(),
+                                  'response_cache': self.gateway.manager.response_cache.snapshot(),
+                                  'coalescing': self.gateway.manager.coalescer.snapshot()})
+        elif self.path == '/metrics':
+            body = self.gateway.manager.metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', METRICS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path.startswith('/v1/'):
+            self._proxy('GET', self.path, None)
+        else:
+            self._send_error(404, f"Ruta no soportada: {self.path}", "invalid_request_error")
+
+    def do_POST(self):
+        body = self._read_json()
+        if self.path not in PROXIED_ROUTES:
+            self._send_error(404, f"Ruta no soportada: {self.path}", "invalid_request_error")
+            return
+        if body is None or not body.get('model'):
+            self._send_error(400, "Se requiere un JSON con el campo 'model'", "invalid_request_error")
+            return
+
+        body['model'] = self.gateway.resolve_model(body['model'])
+        self.gateway.apply_model_defaults(body)
+
+        self._status = None
+        started = time.monotonic()
+        try:
+            self._serve(body)
+        finally:
+            self.gateway.manager.metrics.record_request(body['model'], self.path, time.monotonic() - started,
+                                                        self._status)
+
+    def _serve(self, body: Dict[str, Any]) -> None:
+        """Caché, agrupación de peticiones idénticas o generación en Ollama"""
+        # Un acierto de caché no necesita GPU: no pasa por la cola de admisión
+        cache = self.gateway.manager.response_cache
+        key = self.gateway.cache_key_for(self.path, body)
+        if key is not None:
+            cached = cache.get(body['model'], key)
+            if cached is not None:
+                self._replay(cached)
+                return
+
+        # Una petición idéntica en vuelo ya está generando: adjuntarse a su stream
+        coalescer = self.gateway.manager.coalescer
+        flight, leader = coalescer.join(self.gateway.coalesce_key_for(self.path, body))
+        if not leader:
+            self._follow(flight)
+            return
+        try:
+            self._lead(body, flight)
+        finally:
+            coalescer.complete(flight)
+
+        if key is not None and flight.succeeded:
+            cache.put(key, CachedResponse(
+                model=body['model'], status=flight.status, content_type=flight.content_type,
+                chunks=_decode_chunks(flight.chunks), generation_s=flight.elapsed,
+            ))
+
+    def _lead(self, body: Dict[str, Any], flight: Flight) -> None:
+        """Turno en la cola de admisión y generación real en Ollama"""
+        scheduler = self.gateway.scheduler
+        try:
+            ticket = scheduler.acquire(body['model'], timeout=self.gateway.config.queue_timeout_s)
+        except QueueFullError as e:
+            flight.fail(str(e), 429)
+            self._send_error(429, str(e), "rate_limit_error", {'Retry-After': '1'})
+            return
+        except QueueTimeoutError as e:
+            flight.fail(str(e), 503)
+            self._send_error(503, str(e), "server_error", {'Retry-After': '5'})
+            return
+        except AdmissionError as e:
+            message = f"No se pudo cargar {body['model']}: {e}"
+            flight.fail(message, 503)
+            self._send_error(503, message, "server_error")
+            return
+
+        try:
+            self.gateway.manager.usage.record_request(body['model'])
+            self._proxy('POST', self.path, body, flight)
+        finally:
+            scheduler.release(ticket)
+
+    def _proxy(self, method: str, path: str, body: Optional[Dict[str, Any]],
+               flight: Optional[Flight] = None) -> None:
+        """Reenvía a Ollama y copia la respuesta al cliente"""
+        try:
+            upstream = self.gateway.forward(method, path, body)
+        except requests.RequestException as e:
+            if flight is not None:
+                flight.fail(f"Ollama no responde: {e}")
+            self._send_error(502, f"Ollama no responde: {e}", "server_error")
+            return
+        try:
+            self._relay(upstream, flight)
+        except (BrokenPipeError, ConnectionResetError, requests.RequestException):
+            # El cliente cerró la conexión (o Ollama cortó el stream)
+            self.close_connection = True
+        finally:
+            upstream.close()
+
+
+def _decode_chunks(chunks: List[bytes]) -> List[str]:
+    """Bloques de red a texto para la caché (un carácter UTF-8 puede quedar partido entre dos)"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    return [decoder.decode(data) for data in chunks]
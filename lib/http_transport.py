@@ -0,0 +1,220 @@
+"""
+HTTPTransport - Capa HTTP compartida para las llamadas a la API de Ollama
+Sesión keep-alive con pool de conexiones, timeouts por endpoint, reintentos con backoff
+y métricas de reutilización de conexiones y latencia
+"""
+
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Deque, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tracing import tracer, payload_size
+
+
+# Timeouts por defecto (segundos) por endpoint lógico
+DEFAULT_ENDPOINT_TIMEOUTS: Dict[str, float] = {
+    'default': 30,
+    'tags': 5,
+    'ps': 5,
+    'show': 10,
+    'generate': 30,
+    'load': 300,
+    'bench': 300,
+    'gateway': 300,
+    'registry': 10,
+}
+
+# Máximo de muestras de latencia guardadas por endpoint
+LATENCY_WINDOW = 256
+
+
+@dataclass
+class RequestTiming:
+    """Medición de una petición HTTP individual"""
+    endpoint: str
+    method: str
+    status_code: Optional[int]
+    duration_ms: float
+    reused_connection: bool
+
+
+@dataclass
+class TransportStats:
+    """Contadores acumulados del transporte"""
+    requests_total: int = 0
+    errors_total: int = 0
+    connections_opened: int = 0
+    connections_reused: int = 0
+    latencies_ms: Dict[str, Deque[float]] = field(default_factory=dict)
+    recent: Deque[RequestTiming] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+
+def resolve_endpoint_timeouts(setting: Union[None, int, float, Dict[str, Any]]) -> Dict[str, float]:
+    """Resuelve `performance.request_timeout_seconds` a un mapa endpoint → segundos.
+
+    - Un número reemplaza el timeout por defecto (endpoints sin valor propio).
+    - Un dict sobreescribe endpoints individuales (clave `default` incluida).
+    """
+    timeouts = dict(DEFAULT_ENDPOINT_TIMEOUTS)
+
+    if isinstance(setting, (int, float)) and not isinstance(setting, bool):
+        timeouts['default'] = float(setting)
+    elif isinstance(setting, dict):
+        for endpoint, value in setting.items():
+            try:
+                timeouts[str(endpoint)] = float(value)
+            except (TypeError, ValueError):
+                continue
+
+    return timeouts
+
+
+class HTTPTransport:
+    """Sesión HTTP reutilizable con pool keep-alive y métricas por endpoint"""
+
+    def __init__(self, pool_size: int = 10, timeouts: Optional[Dict[str, float]] = None,
+                 retries: int = 2, backoff_factor: float = 0.1):
+        self.timeouts = resolve_endpoint_timeouts(timeouts)
+        self.stats = TransportStats()
+        self._lock = threading.Lock()
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+
+    @classmethod
+    def from_performance_config(cls, performance: Optional[Dict[str, Any]]) -> 'HTTPTransport':
+        """Construye el transporte a partir de la sección `performance` de app.yml"""
+        performance = performance or {}
+        return cls(
+            pool_size=int(performance.get('http_pool_size', 10)),
+            timeouts=performance.get('request_timeout_seconds'),
+            retries=int(performance.get('http_retries', 2)),
+            backoff_factor=float(performance.get('http_retry_backoff', 0.1)),
+        )
+
+    def timeout_for(self, endpoint: str) -> float:
+        """Timeout configurado para un endpoint lógico"""
+        return self.timeouts.get(endpoint, self.timeouts['default'])
+
+    def get(self, url: str, endpoint: str = 'default', **kwargs) -> requests.Response:
+        """GET a través del pool compartido"""
+        return self.request('GET', url, endpoint=endpoint, **kwargs)
+
+    def post(self, url: str, endpoint: str = 'default', **kwargs) -> requests.Response:
+        """POST a través del pool compartido"""
+        return self.request('POST', url, endpoint=endpoint, **kwargs)
+
+    def request(self, method: str, url: str, endpoint: str = 'default', **kwargs) -> requests.Response:
+        """Ejecuta una petición registrando latencia y reutilización de conexión"""
+        kwargs.setdefault('timeout', self.timeout_for(endpoint))
+        opened_before = self._opened_connections()
+        start = time.perf_counter()
+
+        with tracer.span(f"{method} {endpoint}", 'http', url=urlsplit(url).path) as span:
+            if tracer.enabled:
+                span.args['request_bytes'] = payload_size(kwargs)
+            if kwargs.get('stream'):
+                # El span termina con las cabeceras; el cuerpo se consume fuera (ver tracing)
+                span.args['stream'] = True
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                self._record(endpoint, method, None, start, opened_before)
+                span.fail(type(e).__name__)
+                raise
+
+            self._record(endpoint, method, response.status_code, start, opened_before)
+            span.args['status'] = response.status_code
+            if 'Content-Length' in response.headers:
+                span.args['response_bytes'] = int(response.headers['Content-Length'])
+            if response.status_code >= 400:
+                span.fail()
+            return response
+
+    def _opened_connections(self) -> int:
+        """Total de conexiones TCP abiertas por los pools desde su creación"""
+        pools = self._adapter.poolmanager.pools
+        total = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                total += getattr(pool, 'num_connections', 0)
+        return total
+
+    def _record(self, endpoint: str, method: str, status_code: Optional[int],
+                start: float, opened_before: int) -> None:
+        """Registra la medición de una petición (la reutilización es aproximada bajo concurrencia)"""
+        duration_ms = (time.perf_counter() - start) * 1000
+        opened = max(0, self._opened_connections() - opened_before)
+        reused = status_code is not None and opened == 0
+
+        with self._lock:
+            stats = self.stats
+            stats.requests_total += 1
+            if status_code is None:
+                stats.errors_total += 1
+            stats.connections_opened += opened
+            if reused:
+                stats.connections_reused += 1
+            stats.latencies_ms.setdefault(endpoint, deque(maxlen=LATENCY_WINDOW)).append(duration_ms)
+            stats.recent.append(RequestTiming(
+                endpoint=endpoint,
+                method=method,
+                status_code=status_code,
+                duration_ms=duration_ms,
+                reused_connection=reused,
+            ))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Resumen de métricas: reutilización de conexiones y latencia por endpoint"""
+        with self._lock:
+            stats = self.stats
+            endpoints = {}
+            for endpoint, samples in stats.latencies_ms.items():
+                ordered = sorted(samples)
+                endpoints[endpoint] = {
+                    'count': len(ordered),
+                    'avg_ms': sum(ordered) / len(ordered),
+                    'p50_ms': ordered[len(ordered) // 2],
+                    'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                    'last_ms': samples[-1],
+                }
+
+            return {
+                'requests_total': stats.requests_total,
+                'errors_total': stats.errors_total,
+                'connections_opened': stats.connections_opened,
+                'connections_reused': stats.connections_reused,
+                'reuse_ratio': (stats.connections_reused / stats.requests_total) if stats.requests_total else 0.0,
+                'endpoints': endpoints,
+            }
+
+    def recent_requests(self) -> List[RequestTiming]:
+        """Últimas peticiones medidas (más reciente al final)"""
+        with self._lock:
+            return list(self.stats.recent)
+
+    def close(self) -> None:
+        """Cierra la sesión y libera las conexiones del pool"""
+        self.session.close()
@@ -0,0 +1,149 @@
+"""
+IdleReaper - Auto-stop de modelos inactivos
+Implementa `auto_stop_inactive` / `inactive_timeout_minutes`: sigue la última actividad
+de cada modelo (cambios de `expires_at` en /api/ps y el registro de peticiones propio)
+y descarga los modelos inactivos respetando overrides por modelo y un mínimo residente
+"""
+
+import time
+import threading
+from typing import Dict, List, Optional, Callable, Any
+
+
+# Intervalo por defecto entre barridos (segundos)
+DEFAULT_SWEEP_INTERVAL = 30
+
+
+class IdleReaper:
+    """Barrido periódico que detiene modelos sin actividad"""
+
+    def __init__(self, manager: Any, default_timeout_s: float, model_timeouts: Optional[Dict[str, float]] = None,
+                 min_resident: int = 0, interval_s: float = DEFAULT_SWEEP_INTERVAL,
+                 clock: Callable[[], float] = time.time, notify: Optional[Callable[[str], None]] = None):
+        self.manager = manager
+        self.default_timeout_s = default_timeout_s
+        # Timeout por nombre de modelo; 0 = nunca detener automáticamente
+        self.model_timeouts = model_timeouts or {}
+        self.min_resident = max(0, min_resident)
+        self.interval_s = interval_s
+        self._clock = clock
+        # Destino de los avisos: con start() se llama desde el hilo del reaper, así que una
+        # interfaz Rich debe pasar algo que solo encole (p. ej. deque.append) y mostrarlo ella
+        self._notify = notify or print
+
+        self._last_seen_expiry: Dict[str, str] = {}
+        self._last_activity: Dict[str, float] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reaped_total = 0
+
+    @classmethod
+    def from_config(cls, manager: Any, app_config: Any, interval_s: float = DEFAULT_SWEEP_INTERVAL,
+                    notify: Optional[Callable[[str], None]] = None) -> 'IdleReaper':
+        """Construye el reaper desde AppConfig (global + `idle_timeout_minutes` por modelo)"""
+        model_timeouts = {
+            model.name: float(model.idle_timeout_minutes) * 60
+            for model in app_config.models.values()
+            if model.idle_timeout_minutes is not None
+        }
+        return cls(
+            manager,
+            default_timeout_s=float(app_config.inactive_timeout_minutes) * 60,
+            model_timeouts=model_timeouts,
+            min_resident=int(app_config.min_resident_models),
+            interval_s=interval_s,
+            notify=notify,
+        )
+
+    def timeout_for(self, model_name: str) -> float:
+        """Timeout de inactividad de un modelo en segundos (0 = nunca)"""
+        return self.model_timeouts.get(model_name, self.default_timeout_s)
+
+    def _update_activity(self, loaded: List[Any]) -> None:
+        """Un cambio de `expires_at` indica que el modelo atendió una petición desde el último barrido"""
+        now = self._clock()
+        names = set()
+        for model in loaded:
+            names.add(model.name)
+            if self._last_seen_expiry.get(model.name) != model.expires_at or model.name not in self._last_activity:
+                self._last_activity[model.name] = now
+            self._last_seen_expiry[model.name] = model.expires_at
+
+            # Peticiones registradas por esta aplicación (gateway, activaciones, tests)
+            last_used = self.manager.usage.get(model.name).last_used
+            if last_used > self._last_activity[model.name]:
+                self._last_activity[model.name] = last_used
+
+        for name in list(self._last_activity):
+            if name not in names:
+                self._last_activity.pop(name, None)
+                self._last_seen_expiry.pop(name, None)
+
+    def idle_seconds(self, model_name: str) -> float:
+        """Segundos desde la última actividad conocida del modelo"""
+        return self._clock() - self._last_activity.get(model_name, self._clock())
+
+    def find_idle(self, loaded: List[Any]) -> List[str]:
+        """Modelos que superaron su timeout, del más al menos inactivo, respetando el mínimo residente"""
+        self._update_activity(loaded)
+
+        idle = [
+            model.name for model in loaded
+            if self.timeout_for(model.name) > 0 and self.idle_seconds(model.name) >= self.timeout_for(model.name)
+        ]
+        idle.sort(key=self.idle_seconds, reverse=True)
+
+        max_to_stop = max(0, len(loaded) - self.min_resident)
+        return idle[:max_to_stop]
+
+    def sweep(self) -> List[str]:
+        """Un barrido: detiene los modelos inactivos y retorna los detenidos"""
+        stopped = []
+        for model_name in self.find_idle(self.manager.get_loaded_models()):
+            self._notify(f"💤 {model_name} inactivo {self.idle_seconds(model_name) / 60:.0f} min, liberando VRAM")
+            if self.manager.stop_model(model_name):
+                self.manager.metrics.record_eviction(model_name, reason='idle')
+                stopped.append(model_name)
+                self._last_activity.pop(model_name, None)
+                self._last_seen_expiry.pop(model_name, None)
+
+        self.reaped_total += len(stopped)
+        return stopped
+
+    # -------------------- Ejecución --------------------
+    def _set_active(self, active: bool) -> None:
+        """Indica al manager si hay un reaper gestionando la vida de los modelos (keep_alive=-1)"""
+        if active:
+            self.manager.idle_reaper = self
+        elif getattr(self.manager, 'idle_reaper', None) is self:
+            self.manager.idle_reaper = None
+
+    def run_forever(self) -> None:
+        """Bucle de barridos hasta que se llame a stop()"""
+        self._set_active(True)
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    self.sweep()
+                except Exception as e:
+                    self._notify(f"⚠️  Error en el barrido de modelos inactivos: {e}")
+                self._stop_event.wait(self.interval_s)
+        finally:
+            self._set_active(False)
+
+    def start(self) -> None:
+        """Arranca el reaper en un hilo daemon (no bloquea la salida del proceso)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._set_active(True)
+        self._thread = threading.Thread(target=self.run_forever, name="idle-reaper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Detiene el bucle de barridos"""
+        self._stop_event.set()
+        self._set_active(False)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
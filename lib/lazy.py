@@ -0,0 +1,84 @@
+"""
+Lazy - Construcción diferida de singletons e imports pesados
+`config_manager` y `ollama_manager` se crean en su primer uso (no al importar el
+módulo) y `main.py` importa Rich, requests y los módulos de servidor solo cuando un
+subcomando los necesita: `llm-stack --help` no lee YAML ni ejecuta `ollama --version`
+"""
+
+import threading
+from importlib import import_module
+from typing import Any, Callable, Optional
+
+_UNSET = object()
+
+
+class LazyObject:
+    """Proxy que construye el objeto real con `factory` en el primer acceso.
+
+    Atributos, asignaciones y llamadas se reenvían al objeto real, así que
+    `patch.object(config_manager.config, ...)` o `patch('main.Prompt')` siguen
+    funcionando igual que con el objeto construido al importar.
+    """
+
+    __slots__ = ('_factory', '_name', '_target', '_lock')
+
+    def __init__(self, factory: Callable[[], Any], name: Optional[str] = None):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_name', name or getattr(factory, '__qualname__', repr(factory)))
+        object.__setattr__(self, '_target', _UNSET)
+        object.__setattr__(self, '_lock', threading.RLock())
+
+    def _resolve(self) -> Any:
+        target = object.__getattribute__(self, '_target')
+        if target is _UNSET:
+            with object.__getattribute__(self, '_lock'):
+                target = object.__getattribute__(self, '_target')
+                if target is _UNSET:
+                    target = object.__getattribute__(self, '_factory')()
+                    object.__setattr__(self, '_target', target)
+        return target
+
+    @property
+    def resolved(self) -> bool:
+        """True si el objeto real ya se construyó"""
+        return object.__getattribute__(self, '_target') is not _UNSET
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._resolve(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._resolve(), name)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self._resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        if not self.resolved:
+            return f"<LazyObject {object.__getattribute__(self, '_name')} (sin construir)>"
+        return repr(self._resolve())
+
+    def __bool__(self) -> bool:
+        return bool(self._resolve())
+
+    def __iter__(self):
+        return iter(self._resolve())
+
+    def __len__(self) -> int:
+        return len(self._resolve())
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._resolve()[key]
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self._resolve()
+
+
+def lazy_import(module: str, attribute: Optional[str] = None) -> LazyObject:
+    """`from module import attribute` diferido hasta el primer uso del nombre"""
+    def load() -> Any:
+        loaded = import_module(module)
+        return getattr(loaded, attribute) if attribute else loaded
+    return LazyObject(load, name=f"{module}.{attribute}" if attribute else module)
@@ -5,39 +5,116 @@ Gestión simplificada de modelos Ollama para RTX 2070 SUPER
 
 Uso:
     python main.py              # Inicia interfaz interactiva
+    python main.py daemon       # Gestor residente: API de control (socket Unix) y auto-stop
+    python main.py daemon --metrics  # ... y /metrics para Prometheus
+    python main.py bench        # Benchmark de inferencia contra los objetivos RNF-01
+    python main.py bench --startup  # Arranque en frío de --help y de la consulta de estado
+    python main.py simulate     # Servidor Ollama simulado (tests y benchmarks sin GPU)
+    python main.py gateway      # Proxy compatible con OpenAI con cola de admisión por modelo
+    python main.py chat qwen    # Chat en streaming con TTFT y tokens/s en vivo
+    python main.py status --json     # Estado para scripts (también activate, deactivate,
+                                     # pull, update y free-vram; todos aceptan --json)
+    python main.py --trace t.json  # Guarda una traza Chrome (chrome://tracing) de la ejecución
     python main.py --help       # Muestra ayuda
 """
 
 import sys
+import json
+import signal
+import time
+import argparse
+from collections import deque
+from contextlib import redirect_stdout
 from pathlib import Path
 import subprocess
 
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.text import Text
-from rich.prompt import Prompt, Confirm
-from rich.progress import Progress, SpinnerColumn, TextColumn
-
-from config_manager import config_manager
-from ollama_manager import ollama_manager
+from lazy import lazy_import
+from idle_reaper import DEFAULT_SWEEP_INTERVAL
+
+# Imports diferidos: Rich, requests/YAML y los servidores se cargan cuando un subcomando
+# los usa, así `llm-stack --help` arranca sin leer la configuración ni detectar Ollama
+Console = lazy_import('rich.console', 'Console')
+Table = lazy_import('rich.table', 'Table')
+Panel = lazy_import('rich.panel', 'Panel')
+Text = lazy_import('rich.text', 'Text')
+Live = lazy_import('rich.live', 'Live')
+Prompt = lazy_import('rich.prompt', 'Prompt')
+Confirm = lazy_import('rich.prompt', 'Confirm')
+Progress = lazy_import('rich.progress', 'Progress')
+SpinnerColumn = lazy_import('rich.progress', 'SpinnerColumn')
+TextColumn = lazy_import('rich.progress', 'TextColumn')
+BarColumn = lazy_import('rich.progress', 'BarColumn')
+DownloadColumn = lazy_import('rich.progress', 'DownloadColumn')
+
+config_manager = lazy_import('config_manager', 'config_manager')
+ModelConfig = lazy_import('config_manager', 'ModelConfig')
+ollama_manager = lazy_import('ollama_manager', 'ollama_manager')
+format_bytes = lazy_import('model_inventory', 'format_bytes')
+IdleReaper = lazy_import('idle_reaper', 'IdleReaper')
+OllamaSimulator = lazy_import('ollama_simulator', 'OllamaSimulator')
+Gateway = lazy_import('gateway', 'Gateway')
+GatewayConfig = lazy_import('gateway', 'GatewayConfig')
+MetricsConfig = lazy_import('metrics', 'MetricsConfig')
+MetricsSampler = lazy_import('metrics', 'MetricsSampler')
+MetricsServer = lazy_import('metrics', 'MetricsServer')
+tracer = lazy_import('tracing', 'tracer')
+ChatSession = lazy_import('chat_session', 'ChatSession')
+ChatStats = lazy_import('chat_session', 'ChatStats')
+ChatTurn = lazy_import('chat_session', 'ChatTurn')
+BenchmarkRunner = lazy_import('benchmark', 'BenchmarkRunner')
+BenchmarkTargets = lazy_import('benchmark', 'BenchmarkTargets')
+BenchmarkReport = lazy_import('benchmark', 'BenchmarkReport')
+compare_reports = lazy_import('benchmark', 'compare_reports')
+default_results_path = lazy_import('benchmark', 'default_results_path')
+StartupBenchmark = lazy_import('startup_bench', 'StartupBenchmark')
+StartupReport = lazy_import('startup_bench', 'StartupReport')
+compare_startup = lazy_import('startup_bench', 'compare_startup')
+default_startup_path = lazy_import('startup_bench', 'default_startup_path')
+cli_commands = lazy_import('cli_commands')
+ControlServer = lazy_import('control_api', 'ControlServer')
+ControlClient = lazy_import('control_api', 'ControlClient')
+ControlConfig = lazy_import('control_api', 'ControlConfig')
+DependencyBootstrap = lazy_import('bootstrap', 'DependencyBootstrap')
 
 
 class LLMStackApp:
     """Aplicación principal para gestión del stack LLM local."""
 
-    def __init__(self):
+    def __init__(self, use_daemon: bool = True):
         self.console = Console()
+        # Resultado de la verificación de paquetes Python (no cambia durante la ejecución)
+        self._missing_packages = None
+        # Cliente del daemon residente (None: sin conectar; False: modo en proceso)
+        self._control = None if use_daemon else False
+        # Avisos del auto-stop pendientes de mostrar (los produce el hilo del reaper)
+        self._reaper_events = deque(maxlen=20)
 
     def run(self):
         """Ejecuta el bucle principal de la aplicación."""
+        # Auto-stop de modelos inactivos mientras la interfaz está abierta (si hay daemon, ya lo hace él)
+        reaper = None
+        config = config_manager.get_config()
+        if config.auto_stop_inactive and self._daemon() is None:
+            # El reaper corre en otro hilo: sus avisos se encolan y el menú los muestra al redibujar
+            reaper = IdleReaper.from_config(ollama_manager, config, notify=self._reaper_events.append)
+            reaper.start()
+
+        try:
+            self._run_menu()
+        finally:
+            if reaper is not None:
+                reaper.stop(timeout=1)
+
+    def _run_menu(self):
+        """Bucle del menú interactivo."""
         while True:
             self._clear_screen()
             self._show_header()
+            self._show_reaper_events()
             self._validate_dependencies()
             self._show_menu()
 
-            choice = Prompt.ask("Selecciona una opción", choices=["1", "2", "3", "4", "5", "6", "7", "8", "0"])
+            choice = Prompt.ask("Selecciona una opción", choices=["1", "2", "3", "4", "5", "6", "7", "8", "9", "0"])
 
             if choice == "0":
                 self._print_success("¡Hasta luego!")
@@ -58,10 +135,36 @@ class LLMStackApp:
                 self._show_status()
             elif choice == "8":
                 self._show_config()
+            elif choice == "9":
+                self._chat()
 
             if choice != "0":
                 self._wait_for_continue()
 
+    def _daemon(self):
+        """Cliente del daemon residente; None si no hay ninguno (modo en proceso)"""
+        if self._control is None:
+            self._control = ControlClient.connect() or False
+        return self._control or None
+
+    def _daemon_command(self, method: str, **params):
+        """Ejecuta `method` en el daemon; None si no hay daemon o falla (se usa el modo en proceso)"""
+        client = self._daemon()
+        if client is None:
+            return None
+        try:
+            return client.command(method, **params)
+        except Exception as e:
+            self._print_warning(f"Daemon no disponible ({e}); continuando en este proceso")
+            client.close()
+            self._control = False
+            return None
+
+    def _running_models(self):
+        """Modelos cargados (snapshot del daemon si lo hay)"""
+        result = self._daemon_command('status')
+        return result.data['running_models'] if result is not None else ollama_manager.get_running_models()
+
     def _clear_screen(self):
         """Limpia la pantalla."""
         self.console.clear()
@@ -76,6 +179,11 @@ class LLMStackApp:
         self.console.print(header)
         self.console.print()
 
+    def _show_reaper_events(self):
+        """Muestra los avisos del auto-stop encolados desde su hilo."""
+        while self._reaper_events:
+            self.console.print(self._reaper_events.popleft(), markup=False)
+
     def _validate_dependencies(self):
         """Valida las dependencias del sistema."""
         self.console.print("[bold]Validando Dependencias[/bold]")
@@ -84,14 +192,7 @@ class LLMStackApp:
         self._print_success(f"Python: {sys.version.split()[0]}")
 
         # Verificar dependencias Python esenciales (pyyaml se instala automáticamente)
-        required_packages = ['rich', 'requests']
-        missing_packages = []
-
-        for package in required_packages:
-            try:
-                __import__(package.replace('-', '_'))
-            except ImportError:
-                missing_packages.append(package)
+        missing_packages = self._get_missing_packages()
 
         if missing_packages:
             self._print_error(f"Dependencias faltantes: {', '.join(missing_packages)}")
@@ -99,7 +200,7 @@ class LLMStackApp:
         else:
             self._print_success("Dependencias Python: OK")
 
-        # Verificar Ollama
+        # Verificar Ollama (versión cacheada: redibujar el menú no vuelve a ejecutar `ollama --version`)
         if ollama_manager.check_ollama_installed():
             self._print_success("Ollama: OK")
         else:
@@ -117,6 +218,18 @@ class LLMStackApp:
 
         self.console.print()
 
+    def _get_missing_packages(self, refresh: bool = False):
+        """Paquetes Python requeridos que no se pueden importar (memoizado)"""
+        if self._missing_packages is None or refresh:
+            missing = []
+            for package in ['rich', 'requests']:
+                try:
+                    __import__(package.replace('-', '_'))
+                except ImportError:
+                    missing.append(package)
+            self._missing_packages = missing
+        return self._missing_packages
+
     def _show_menu(self):
         """Muestra el menú principal."""
         self.console.print("[bold]Menú Principal:[/bold]")
@@ -128,6 +241,7 @@ class LLMStackApp:
         self.console.print("  6. 🔄 Verificar Actualizaciones")
         self.console.print("  7. 🧾 Estado del Sistema")
         self.console.print("  8. ⚙️  Configuración")
+        self.console.print("  9. 💬 Chat con un Modelo")
         self.console.print("  0. 🚪 Salir")
         self.console.print()
 
@@ -135,6 +249,9 @@ class LLMStackApp:
         """Valida la instalación completa."""
         self.console.print("[bold]🔍 Validando Instalación Completa[/bold]")
 
+        # La validación completa siempre consulta el estado real
+        ollama_manager.invalidate_state()
+
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -146,13 +263,7 @@ class LLMStackApp:
             progress.update(task, advance=20, description="Python: OK")
 
             # Verificar dependencias (pyyaml se instala automáticamente)
-            required_packages = ['rich', 'requests']
-            missing = []
-            for package in required_packages:
-                try:
-                    __import__(package.replace('-', '_'))
-                except ImportError:
-                    missing.append(package)
+            missing = self._get_missing_packages(refresh=True)
 
             if missing:
                 progress.update(task, advance=20, description=f"Dependencias: FALTAN ({len(missing)})")
@@ -242,16 +353,21 @@ class LLMStackApp:
             return False
 
     def _install_python_deps(self):
-        """Instala dependencias Python."""
-        pip_cmd = '.venv/bin/pip' if Path('.venv/bin/pip').exists() else sys.executable
-
-        try:
-            result = subprocess.run([pip_cmd, 'install', '-r', 'requirements.txt'], check=True)
-            self._print_success("Dependencias Python instaladas")
+        """Instala dependencias Python (solo si cambió requirements.txt o faltan paquetes)."""
+        bootstrap = DependencyBootstrap()
+        # La huella puede estar al día y faltar paquetes (desinstalados a mano): se fuerza
+        result = bootstrap.ensure(force=bool(self._get_missing_packages(refresh=True)), quiet=False)
+        self._missing_packages = None
+
+        if result.skipped:
+            self._print_info("Dependencias Python al día (requirements.txt sin cambios)")
             return True
-        except subprocess.CalledProcessError as e:
-            self._print_error(f"Error instalando dependencias: {e}")
+        if not result.ok:
+            self._print_error(f"Error instalando dependencias: {result.error}")
             return False
+        source = f" desde {bootstrap.wheelhouse}" if bootstrap.wheelhouse else ""
+        self._print_success(f"Dependencias Python instaladas{source} en {result.duration_s:.1f}s")
+        return True
 
     def _install_ollama(self):
         """Instala Ollama.
@@ -294,6 +410,7 @@ class LLMStackApp:
                 result = subprocess.run(['curl', '-fsSL', 'https://ollama.com/install.sh'], capture_output=True, text=True, check=True)
                 subprocess.run(['sh', '-c', result.stdout], check=True)
 
+            ollama_manager.invalidate_state()
             self._print_success("Ollama instalado exitosamente")
             return True
         except subprocess.CalledProcessError as e:
@@ -316,7 +433,7 @@ class LLMStackApp:
         table.add_column("Modelo", style="green")
         table.add_column("Estado", style="magenta", justify="center")
 
-        running_models = ollama_manager.get_running_models()
+        running_models = self._running_models()
 
         for i, model in enumerate(models, 1):
             status = "🟢 Activo" if model.name in running_models else "⚪ Inactivo"
@@ -333,7 +450,9 @@ class LLMStackApp:
             selected_model = models[index]
 
             with self.console.status(f"Activando {selected_model.name}..."):
-                success = ollama_manager.smart_activate_model(list(config_manager.get_models().keys())[index])
+                key = list(config_manager.get_models().keys())[index]
+                result = self._daemon_command('activate', model=key)
+                success = result.ok if result is not None else ollama_manager.smart_activate_model(key)
 
             if success:
                 self._print_success(f"✅ {selected_model.name} activado exitosamente")
@@ -347,7 +466,7 @@ class LLMStackApp:
         """Desactiva un modelo."""
         self.console.print("[bold]🛑 Desactivando Modelo[/bold]")
 
-        running = ollama_manager.get_running_models()
+        running = self._running_models()
         if not running:
             self._print_warning("No hay modelos activos")
             return
@@ -371,7 +490,8 @@ class LLMStackApp:
             model_name = running[index]
 
             with self.console.status(f"Desactivando {model_name}..."):
-                success = ollama_manager.stop_model(model_name)
+                result = self._daemon_command('stop', models=[model_name])
+                success = result.ok if result is not None else ollama_manager.stop_model(model_name)
 
             if success:
                 self._print_success(f"✅ {model_name} desactivado - VRAM liberada")
@@ -381,6 +501,39 @@ class LLMStackApp:
         except (ValueError, IndexError):
             self._print_error("Selección inválida")
 
+    def _chat(self):
+        """Chat en streaming con un modelo configurado."""
+        self.console.print("[bold]💬 Chat con un Modelo[/bold]")
+
+        models = config_manager.get_models()
+        if not models:
+            self._print_error("No hay modelos configurados")
+            return
+
+        table = Table(title="Modelos disponibles")
+        table.add_column("N°", style="cyan", no_wrap=True)
+        table.add_column("Modelo", style="green")
+        table.add_column("Estado", style="magenta", justify="center")
+
+        running_models = ollama_manager.get_running_models()
+        keys = list(models.keys())
+        for i, key in enumerate(keys, 1):
+            status = "🟢 Activo" if models[key].name in running_models else "⚪ Inactivo"
+            table.add_row(str(i), models[key].name, status)
+
+        self.console.print(table)
+        self.console.print()
+
+        choices = [str(i) for i in range(1, len(keys) + 1)]
+        choice = Prompt.ask("Selecciona modelo para chatear", choices=choices)
+        try:
+            model_config = models[keys[int(choice) - 1]]
+        except (ValueError, IndexError):
+            self._print_error("Selección inválida")
+            return
+
+        run_chat(self.console, ChatSession.for_model(ollama_manager, model_config))
+
     def _check_updates(self):
         """Verifica y aplica actualizaciones de modelos."""
         self.console.print("[bold]🔄 Verificando Actualizaciones[/bold]")
@@ -396,15 +549,23 @@ class LLMStackApp:
         self.console.print(f"📦 {len(updates)} actualizaciones disponibles:")
         self.console.print()
 
+        # Tamaño real de cada actualización según los manifests del registry
+        with self.console.status("[bold green]Calculando tamaños de descarga..."):
+            plans = {plan.model: plan for plan in ollama_manager.plan_pulls(
+                [update_info["latest"] for update_info in updates.values()]
+            )}
+
         updates_table = Table(title="Actualizaciones Disponibles")
         updates_table.add_column("Modelo Actual", style="cyan")
         updates_table.add_column("Nueva Versión", style="green")
+        updates_table.add_column("Descarga", style="magenta")
         updates_table.add_column("Acción", style="yellow")
 
         for model_name, update_info in updates.items():
             updates_table.add_row(
                 update_info["current"],
                 update_info["latest"],
+                self._describe_pull(plans.get(update_info["latest"])),
                 "Pendiente"
             )
 
@@ -428,13 +589,17 @@ class LLMStackApp:
         elif choice == "1":
             # Actualizar todos
             if Confirm.ask(f"¿Actualizar {len(updates)} modelos?"):
+                current_models = [update_info["current"] for update_info in updates.values()]
+                results = self._track_downloads(
+                    lambda on_progress: ollama_manager.update_models(current_models, on_progress=on_progress)
+                )
+
                 updated = 0
-                for model_name, update_info in updates.items():
-                    self.console.print(f"📥 Actualizando {update_info['current']}...")
-                    if ollama_manager.update_model_if_available(update_info["current"]):
+                for model_name in current_models:
+                    if results.get(model_name):
                         updated += 1
                     else:
-                        self._print_error(f"❌ Error actualizando {update_info['current']}")
+                        self._print_error(f"❌ Error actualizando {model_name}")
 
                 self._print_success(f"✅ {updated}/{len(updates)} modelos actualizados")
 
@@ -471,6 +636,36 @@ class LLMStackApp:
             self.console.print()
             self._print_info("Las actualizaciones incluyen mejoras de rendimiento, corrección de bugs y nuevas características")
 
+    def _track_downloads(self, run):
+        """Ejecuta descargas mostrando una barra por modelo y una barra total.
+
+        `run` recibe el callback de progreso y retorna {modelo: éxito}.
+        """
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            console=self.console
+        ) as progress:
+            overall = progress.add_task("Total", total=None)
+            tasks = {}
+
+            def on_progress(snapshot):
+                completed = total = 0
+                for name, state in snapshot.items():
+                    if state is None:
+                        continue
+                    if name not in tasks:
+                        tasks[name] = progress.add_task(name, total=None)
+                    progress.update(tasks[name], completed=state.completed, total=state.total or None,
+                                    description=f"{name} [dim]({state.state})[/dim]")
+                    completed += state.completed
+                    total += state.total
+                progress.update(overall, completed=completed, total=total or None)
+
+            return run(on_progress)
+
     def _update_models(self):
         """Actualiza modelos."""
         self.console.print("[bold]📥 Actualizando Modelos[/bold]")
@@ -478,37 +673,83 @@ class LLMStackApp:
         models = config_manager.get_models()
 
         if Confirm.ask("¿Actualizar todos los modelos instalados?"):
+            # Comparar manifests locales con el registry antes de descargar nada
+            with self.console.status("[bold green]Comparando manifests con el registry..."):
+                plans = ollama_manager.plan_updates([model.name for model in models.values()])
+
+            self._show_pull_plans(plans.values())
+            pending = [name for name, plan in plans.items() if plan.needs_pull]
+
+            if not pending:
+                self._print_success("✅ Todos los modelos están al día (sin descargas)")
+                return
+
+            # Detiene los modelos cargados y descarga en paralelo de menor a mayor delta
+            results = self._track_downloads(
+                lambda on_progress: ollama_manager.update_models(list(plans), on_progress=on_progress, plans=plans)
+            )
+
             updated = 0
-            for key, model in models.items():
-                self.console.print(f"📥 Actualizando {model.name}...")
-                if ollama_manager.pull_model(model.name, show_progress=False):
-                    self._print_success(f"✅ {model.name} actualizado")
+            for model_name in pending:
+                if results.get(model_name):
+                    self._print_success(f"✅ {model_name} actualizado")
                     updated += 1
                 else:
-                    self._print_error(f"❌ Error actualizando {model.name}")
+                    self._print_error(f"❌ Error actualizando {model_name}")
 
-            self._print_success(f"📊 {updated}/{len(models)} modelos actualizados")
+            self._print_success(f"📊 {updated}/{len(pending)} modelos actualizados, {len(plans) - len(pending)} sin cambios")
         else:
             self._print_info("Operación cancelada")
 
+    def _describe_pull(self, plan) -> str:
+        """Tamaño real de la descarga de un plan de pull"""
+        if plan is None or plan.error:
+            return "❔ Desconocido"
+        if plan.up_to_date:
+            return "Sin cambios"
+        return f"{format_bytes(plan.download_bytes)} ({len(plan.missing_layers)} capas)"
+
+    def _show_pull_plans(self, plans):
+        """Tabla con las capas y bytes que descargaría cada pull"""
+        plans_table = Table(title="Plan de Descarga")
+        plans_table.add_column("Modelo", style="cyan")
+        plans_table.add_column("Descarga", style="green")
+        plans_table.add_column("Tamaño Total", style="yellow")
+
+        for plan in plans:
+            plans_table.add_row(plan.model, self._describe_pull(plan),
+                                format_bytes(plan.total_bytes) if plan.total_bytes else "-")
+
+        self.console.print(plans_table)
+
     def _show_status(self):
         """Muestra estado detallado del sistema."""
         self.console.print("[bold]📊 Estado del Sistema[/bold]")
 
-        status = ollama_manager.get_status_summary()
-        vram = ollama_manager.get_vram_usage()
+        # Un único snapshot concurrente: cada sonda se consulta una sola vez (en el daemon si lo hay)
+        result = self._daemon_command('status', updates=True)
+        status = result.data if result is not None else ollama_manager.get_status_summary()
+        unknown = "❔ Desconocido"
+
+        def show(value, template):
+            return template.format(value) if value is not None else unknown
 
         # Panel de estado
         status_table = Table(title="Estado General")
         status_table.add_column("Componente", style="cyan")
         status_table.add_column("Estado", style="green")
 
-        status_table.add_row("Servicio Ollama", "✅ Activo" if status["ollama_running"] else "❌ Inactivo")
-        status_table.add_row("Modelos Instalados", f"📦 {status['models_installed']}")
-        status_table.add_row("Modelos Cargados", f"🧠 {status['models_running']}")
-        status_table.add_row("VRAM Usada", f"💾 {vram.used_vram} / {vram.total_vram}")
-
-        if status["models_with_updates"] > 0:
+        if status["ollama_running"] is None:
+            status_table.add_row("Servicio Ollama", unknown)
+        else:
+            status_table.add_row("Servicio Ollama", "✅ Activo" if status["ollama_running"] else "❌ Inactivo")
+        status_table.add_row("Modelos Instalados", show(status['models_installed'], "📦 {}"))
+        status_table.add_row("Modelos Cargados", show(status['models_running'], "🧠 {}"))
+        status_table.add_row("VRAM Usada", f"💾 {show(status.get('vram_used'), '{}')} / {show(status.get('vram_total'), '{}')}")
+
+        if status["models_with_updates"] is None:
+            status_table.add_row("Actualizaciones", unknown)
+        elif status["models_with_updates"] > 0:
             status_table.add_row("Actualizaciones", f"🔄 {status['models_with_updates']} disponibles")
 
         self.console.print(status_table)
@@ -537,6 +778,9 @@ class LLMStackApp:
             )
             self.console.print(updates_panel)
 
+        if status.get("stale_probes"):
+            self._print_warning(f"Sin respuesta a tiempo: {', '.join(status['stale_probes'])}")
+
     def _show_config(self):
         """Muestra configuración actual."""
         self.console.print("[bold]⚙️ Configuración Actual[/bold]")
@@ -552,6 +796,7 @@ class LLMStackApp:
         config_table.add_row("Máx modelos simultáneos", str(config.max_loaded_models))
         config_table.add_row("Auto-stop inactivo", str(config.auto_stop_inactive))
         config_table.add_row("Timeout inactivo (min)", str(config.inactive_timeout_minutes))
+        config_table.add_row("Modelos residentes mínimos", str(config.min_resident_models))
 
         self.console.print(config_table)
         self.console.print()
@@ -601,11 +846,472 @@ def show_welcome():
     print()
 
 
-def main():
+def build_parser() -> argparse.ArgumentParser:
+    """Parser de línea de comandos (sin subcomando se abre la interfaz interactiva)"""
+    parser = argparse.ArgumentParser(prog="llm-stack", description="LLM Stack Manager - modelos Ollama locales")
+    parser.add_argument("--trace", metavar="OUT.json",
+                        help="Guarda los spans de subprocess/HTTP/operaciones en formato Chrome trace")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Ejecuta en este proceso aunque haya un daemon residente escuchando")
+    subparsers = parser.add_subparsers(dest="command")
+
+    # --json compartido por los subcomandos pensados para scripts
+    json_output = argparse.ArgumentParser(add_help=False)
+    json_output.add_argument("--json", action="store_true", help="Imprime el resultado como JSON en stdout")
+
+    status = subparsers.add_parser("status", parents=[json_output],
+                                   help="Estado del servicio, modelos cargados y VRAM (sale con 1 si Ollama no responde)")
+    status.add_argument("--updates", action="store_true", help="Consulta también el registry por actualizaciones")
+
+    activate = subparsers.add_parser("activate", parents=[json_output],
+                                     help="Carga un modelo de models.yml (lo descarga si falta)")
+    activate.add_argument("model", help="Clave de models.yml o nombre de Ollama")
+    activate.add_argument("--health-check", action="store_true", help="Verifica con una generación corta")
+
+    deactivate = subparsers.add_parser("deactivate", parents=[json_output],
+                                       help="Descarga modelos de la VRAM (todos los cargados si no se indica)")
+    deactivate.add_argument("models", nargs="*", help="Claves de models.yml o nombres de Ollama")
+
+    pull = subparsers.add_parser("pull", parents=[json_output],
+                                 help="Descarga modelos (por defecto todos los de models.yml)")
+    pull.add_argument("models", nargs="*", help="Claves de models.yml o nombres de Ollama")
+
+    update = subparsers.add_parser("update", parents=[json_output],
+                                   help="Descarga solo los modelos cuyo manifest cambió en el registry")
+    update.add_argument("models", nargs="*", help="Claves de models.yml (por defecto todas)")
+    update.add_argument("--dry-run", action="store_true", help="Solo muestra qué se descargaría")
+
+    free_vram = subparsers.add_parser("free-vram", parents=[json_output],
+                                      help="Descarga todos los modelos cargados para liberar VRAM")
+    free_vram.add_argument("--keep", action="append", metavar="MODEL", help="Modelo a mantener cargado (repetible)")
+
+    daemon = subparsers.add_parser("daemon", help="Gestor residente: API de control, auto-stop y /metrics")
+    daemon.add_argument("--interval", type=float, default=DEFAULT_SWEEP_INTERVAL,
+                        help="Segundos entre barridos (por defecto %(default)s)")
+    daemon.add_argument("--metrics", action="store_true",
+                        help="Sirve /metrics en formato Prometheus (metrics.enabled en app.yml)")
+    daemon.add_argument("--metrics-port", type=int, help="Puerto de /metrics (por defecto metrics.port de app.yml)")
+    daemon.add_argument("--socket", help="Socket Unix de la API de control (por defecto $LLM_STACK_SOCKET)")
+    daemon.add_argument("--no-control", action="store_true", help="No abre la API de control (control.enabled)")
+
+    bench = subparsers.add_parser("bench", parents=[json_output],
+                                  help="Mide tokens/s, TTFT y carga contra los objetivos RNF-01")
+    bench.add_argument("models", nargs="*", help="Claves de models.yml a medir (por defecto todas)")
+    bench.add_argument("--contexts", help="Longitudes de contexto en tokens separadas por comas (p.ej. 128,512,2048)")
+    bench.add_argument("--repeats", type=int, help="Repeticiones por longitud de contexto")
+    bench.add_argument("--num-predict", type=int, help="Tokens a generar por petición")
+    bench.add_argument("--output", help="Archivo JSON de resultados (por defecto config/cache/bench/)")
+    bench.add_argument("--compare", help="Resultados JSON de una ejecución anterior para comparar")
+    bench.add_argument("--startup", action="store_true",
+                       help="Mide el arranque en frío de `llm-stack --help` y de la consulta de estado")
+
+    gateway = subparsers.add_parser("gateway", help="Proxy /v1 compatible con OpenAI con cola por modelo")
+    gateway.add_argument("--port", type=int, help="Puerto (por defecto gateway.port de app.yml)")
+
+    chat = subparsers.add_parser("chat", help="Chat en streaming con un modelo (TTFT y tokens/s en vivo)")
+    chat.add_argument("model", help="Clave de models.yml o nombre de Ollama")
+    chat.add_argument("-p", "--prompt", help="Envía un único mensaje y termina")
+
+    simulate = subparsers.add_parser("simulate", help="Servidor Ollama simulado con los modelos de models.yml")
+    simulate.add_argument("--host", default="127.0.0.1", help="Dirección de escucha (por defecto %(default)s)")
+    simulate.add_argument("--port", type=int, default=11500, help="Puerto (por defecto %(default)s)")
+    simulate.add_argument("--vram-gb", type=float, default=8.0, help="VRAM simulada (por defecto %(default)s GB)")
+    simulate.add_argument("--max-loaded", type=int, default=3, help="Modelos cargados a la vez como máximo")
+    simulate.add_argument("--tokens-per-sec", type=float, default=30.0,
+                          help="Velocidad de generación para modelos sin tokens_per_sec")
+    simulate.add_argument("--load-gbps", type=float, default=0.65, help="Velocidad de carga disco → VRAM (GB/s)")
+    simulate.add_argument("--time-scale", type=float, default=1.0,
+                          help="Factor de las esperas reales (0 = respuestas inmediatas)")
+    return parser
+
+
+def run_daemon(args: argparse.Namespace) -> None:
+    """Modo daemon: API de control, barridos de auto-stop y, si se pide, /metrics hasta Ctrl+C"""
+    config = config_manager.get_config()
+    settings = MetricsConfig.from_app_config(config_manager.app_config)
+    if args.metrics or args.metrics_port:
+        settings.enabled = True
+    if args.metrics_port:
+        settings.port = args.metrics_port
+    control_settings = ControlConfig.from_app_config(config_manager.app_config)
+    if args.no_control:
+        control_settings.enabled = False
+
+    if not config.auto_stop_inactive and not settings.enabled and not control_settings.enabled:
+        print("ℹ auto_stop_inactive está desactivado en models.yml; el daemon no detendrá modelos")
+        return
+
+    sampler = server = control = None
+    if control_settings.enabled:
+        control = ControlServer(ollama_manager, config_manager, path=args.socket,
+                                status_refresh_s=control_settings.status_refresh_s)
+        print(f"🔌 API de control en {control.start()} (JSON-RPC: status, activate, stop, pull, metrics)")
+    if settings.enabled:
+        sampler = MetricsSampler(ollama_manager, interval_s=settings.sample_interval_s)
+        server = MetricsServer(ollama_manager.metrics, host=settings.host, port=settings.port)
+        print(f"📈 Métricas Prometheus en {server.start()}/metrics "
+              f"(muestreo de /api/ps cada {settings.sample_interval_s:.0f}s)")
+
+    # kill/systemd envían SIGTERM: salir por el `finally` para cerrar el socket y los servidores
+    previous_sigterm = signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        if not config.auto_stop_inactive:
+            # Sin auto-stop: el muestreo (o la API de control) ocupa el hilo principal
+            if sampler is not None:
+                sampler.run_forever()
+            else:
+                control.serve_forever()
+            return
+
+        if sampler is not None:
+            sampler.start()
+        reaper = IdleReaper.from_config(ollama_manager, config, interval_s=args.interval)
+        print(f"💤 Auto-stop activo: timeout {config.inactive_timeout_minutes} min, "
+              f"mínimo residente {config.min_resident_models}, barrido cada {args.interval:.0f}s")
+        reaper.run_forever()
+    finally:
+        if sampler is not None:
+            sampler.stop(timeout=1)
+        if server is not None:
+            server.stop()
+        if control is not None:
+            control.stop()
+        signal.signal(signal.SIGTERM, previous_sigterm)
+
+
+def run_gateway(args: argparse.Namespace) -> None:
+    """Modo gateway: proxy OpenAI con admisión de VRAM hasta Ctrl+C"""
+    settings = GatewayConfig.from_app_config(config_manager.app_config)
+    if args.port:
+        settings.port = args.port
+    gateway = Gateway(ollama_manager, models=config_manager.get_models(), config=settings)
+
+    # El gateway es un proceso de larga duración: también aplica el auto-stop
+    config = config_manager.get_config()
+    reaper = IdleReaper.from_config(ollama_manager, config) if config.auto_stop_inactive else None
+    if reaper:
+        reaper.start()
+
+    url = gateway.start()
+    print(f"🚪 Gateway OpenAI en {url}/v1 → {ollama_manager.ollama_host} "
+          f"(cola {settings.max_queue_per_model}/modelo)")
+    try:
+        gateway.serve_forever()
+    finally:
+        if reaper:
+            reaper.stop()
+
+
+def run_simulator(args: argparse.Namespace) -> None:
+    """Modo simulate: servidor Ollama falso hasta Ctrl+C"""
+    from ollama_simulator import GIB
+    simulator = OllamaSimulator.from_app_config(
+        config_manager.get_config(),
+        vram_bytes=int(args.vram_gb * GIB),
+        max_loaded=args.max_loaded,
+        tokens_per_sec=args.tokens_per_sec,
+        load_bytes_per_sec=args.load_gbps * GIB,
+        time_scale=args.time_scale,
+        host=args.host,
+        port=args.port,
+    )
+    url = simulator.start()
+    print(f"🧪 Ollama simulado en {url} ({len(simulator.installed)} modelos, {args.vram_gb:g} GB de VRAM)")
+    print(f"   Uso: OLLAMA_HOST={url} llm-stack")
+    simulator.serve_forever()
+
+
+def _chat_panel(model: str, text: str, stats: ChatStats) -> Panel:
+    """Respuesta en curso con TTFT y tokens/s en el pie"""
+    ttft = f"TTFT {stats.ttft_s:.2f}s" if stats.ttft_s is not None else "esperando el primer token..."
+    tokens = stats.eval_count or stats.tokens
+    subtitle = f"{ttft} · {stats.tokens_per_sec:.1f} tok/s · {tokens} tokens"
+    if stats.load_s >= 0.5:
+        subtitle += f" · carga {stats.load_s:.1f}s"
+    return Panel(Text(text or "…"), title=f"🤖 {model}", subtitle=subtitle,
+                 border_style="green" if stats.done else "cyan")
+
+
+def _stream_chat_turn(console: Console, session: ChatSession, prompt: str) -> ChatTurn:
+    """Un mensaje con la respuesta en vivo; Ctrl+C corta la generación en Ollama"""
+    waiting = ChatStats(started_at=time.monotonic())
+    with Live(_chat_panel(session.model, "", waiting), console=console, refresh_per_second=12) as live:
+        turn = session.send(prompt, on_update=lambda text, stats: live.update(_chat_panel(session.model, text, stats)))
+        live.update(_chat_panel(session.model, turn.response, turn.stats))
+
+    if turn.stats.cancelled:
+        console.print("[yellow]⏹  Generación cancelada[/yellow]")
+    elif turn.stats.error:
+        console.print(f"[red]❌ {turn.stats.error}[/red]")
+    return turn
+
+
+def run_chat(console: Console, session: ChatSession, prompt: str = None) -> int:
+    """Bucle de chat (o un único mensaje con `prompt`); retorna 1 si la respuesta falló"""
+    if prompt is not None:
+        turn = _stream_chat_turn(console, session, prompt)
+        return 0 if turn.stats.done and not turn.stats.error else 1
+
+    console.print(f"💬 Chat con {session.model} · /reset borra el historial · /salir (o Ctrl+C) para volver")
+    while True:
+        try:
+            message = Prompt.ask("[bold cyan]Tú[/bold cyan]").strip()
+        except (KeyboardInterrupt, EOFError):
+            console.print()
+            break
+        if message in ('/salir', '/exit'):
+            break
+        if message == '/reset':
+            session.reset()
+            console.print("[dim]Historial borrado[/dim]")
+            continue
+        if message:
+            _stream_chat_turn(console, session, message)
+    return 0
+
+
+def _render_bench_report(console: Console, report: BenchmarkReport, comparison=None) -> None:
+    """Tabla de resultados del benchmark y objetivos incumplidos"""
+    table = Table(title="Benchmark de inferencia (medianas)")
+    table.add_column("Modelo", style="green")
+    table.add_column("Contexto", justify="right")
+    table.add_column("Prompt tok/s", justify="right")
+    table.add_column("Tokens/s", justify="right")
+    table.add_column("TTFT", justify="right")
+    table.add_column("Carga", justify="right")
+
+    for result in report.models:
+        if result.error:
+            table.add_row(result.model, "-", "-", "-", "-", f"[red]{result.error}[/red]")
+            continue
+        for i, case in enumerate(result.cases):
+            load = f"{result.load_s:.1f}s" if i == 0 and result.cold_load else ""
+            table.add_row(result.model if i == 0 else "", str(case.prompt_tokens or case.context_tokens),
+                          f"{case.prompt_tokens_per_sec:.0f}", f"{case.tokens_per_sec:.1f}",
+                          f"{case.ttft_s:.2f}s", load)
+    console.print(table)
+
+    for result in report.models:
+        declared = f" (declarado {result.declared_tokens_per_sec:g} tok/s)" if result.declared_tokens_per_sec else ""
+        if result.error:
+            console.print(f"[red]❌ {result.model}: {result.error}[/red]")
+        elif result.failures:
+            console.print(f"[red]❌ {result.model} no cumple RNF-01: {'; '.join(result.failures)}[/red]")
+        else:
+            console.print(f"[green]✅ {result.model} cumple RNF-01: "
+                          f"{result.tokens_per_sec:.1f} tok/s{declared}[/green]")
+
+    for row in comparison or []:
+        if row['regression']:
+            console.print(f"[yellow]⚠️  Regresión {row['model']} @ {row['context_tokens']}: "
+                          f"{row['previous_tokens_per_sec']:.1f} → {row['tokens_per_sec']:.1f} tok/s, "
+                          f"TTFT {row['previous_ttft_s']:.2f}s → {row['ttft_s']:.2f}s[/yellow]")
+
+
+def run_startup_bench(args: argparse.Namespace) -> int:
+    """bench --startup: arranque en frío del CLI; retorna 1 si hay regresión o fallos"""
+    from startup_bench import DEFAULT_STARTUP_REPEATS
+    console = Console(stderr=args.json)
+    runner = StartupBenchmark(
+        repeats=args.repeats or DEFAULT_STARTUP_REPEATS,
+        on_progress=lambda name, repeat: console.print(f"[dim]⏱  {name} · muestra {repeat}/{runner.repeats}[/dim]"),
+    )
+    report = runner.run()
+    output = Path(args.output) if args.output else default_startup_path(Path(config_manager.config_dir) / 'cache')
+    report.save(output)
+    comparison = compare_startup(report, StartupReport.load(Path(args.compare))) if args.compare else []
+    failed = any(result.errors for result in report.results) or any(row['regression'] for row in comparison)
+
+    if args.json:
+        print(json.dumps({**report.to_dict(), 'output': str(output), 'comparison': comparison},
+                         indent=2, ensure_ascii=False))
+        return 1 if failed else 0
+
+    table = Table(title="Arranque en frío (proceso nuevo)")
+    table.add_column("Caso", style="green")
+    table.add_column("Comando")
+    table.add_column("Mediana", justify="right")
+    table.add_column("Mínimo", justify="right")
+    table.add_column("Errores", justify="right")
+    for result in report.results:
+        table.add_row(result.name, result.command, f"{result.median_s * 1000:.0f} ms",
+                      f"{result.min_s * 1000:.0f} ms", str(result.errors))
+    console.print(table)
+
+    for row in comparison:
+        if row['regression']:
+            console.print(f"[yellow]⚠️  Regresión de arranque en {row['name']}: "
+                          f"{row['previous_median_s'] * 1000:.0f} → {row['median_s'] * 1000:.0f} ms[/yellow]")
+    console.print(f"💾 Resultados guardados en {output}")
+    return 1 if failed else 0
+
+
+def run_bench(args: argparse.Namespace) -> int:
+    """Modo bench: mide los modelos configurados; retorna 1 si alguno incumple RNF-01"""
+    from benchmark import DEFAULT_CONTEXT_LENGTHS, DEFAULT_REPEATS, DEFAULT_NUM_PREDICT
+    if args.startup:
+        return run_startup_bench(args)
+    # Con --json el progreso va a stderr y stdout queda para el JSON
+    console = Console(stderr=args.json)
+    settings = config_manager.app_config.get('benchmark', {}) or {}
+    models = config_manager.get_models()
+    if args.models:
+        unknown = [key for key in args.models if key not in models]
+        if unknown:
+            console.print(f"[red]❌ Modelos no configurados: {', '.join(unknown)}[/red]")
+            return 2
+        models = {key: models[key] for key in args.models}
+
+    if args.contexts:
+        context_lengths = [int(value) for value in args.contexts.split(',') if value.strip()]
+    else:
+        context_lengths = settings.get('context_lengths') or DEFAULT_CONTEXT_LENGTHS
+
+    runner = BenchmarkRunner(
+        ollama_manager,
+        targets=BenchmarkTargets.from_config(settings.get('targets')),
+        context_lengths=context_lengths,
+        repeats=args.repeats or settings.get('repeats', DEFAULT_REPEATS),
+        num_predict=args.num_predict or settings.get('num_predict', DEFAULT_NUM_PREDICT),
+        on_progress=lambda model, context, repeat: console.print(
+            f"[dim]⏱  {model} · contexto {context} · muestra {repeat}/{runner.repeats}[/dim]"),
+    )
+    report = runner.run(models)
+
+    output = Path(args.output) if args.output else default_results_path(Path(config_manager.config_dir) / 'cache')
+    report.save(output)
+
+    comparison = None
+    if args.compare:
+        comparison = compare_reports(report, BenchmarkReport.load(Path(args.compare)))
+
+    if args.json:
+        print(json.dumps({**report.to_dict(), 'output': str(output), 'comparison': comparison or []},
+                         indent=2, ensure_ascii=False, default=str))
+    else:
+        _render_bench_report(console, report, comparison)
+        console.print(f"💾 Resultados guardados en {output}")
+    return 1 if report.failed else 0
+
+
+# Subcomandos no interactivos de cli_commands (texto o --json)
+CLI_COMMANDS = ("status", "activate", "deactivate", "pull", "update", "free-vram")
+
+
+def _execute_cli_command(args: argparse.Namespace):
+    if args.command == "status":
+        return cli_commands.status(ollama_manager, include_updates=args.updates)
+    if args.command == "activate":
+        return cli_commands.activate(ollama_manager, config_manager, args.model, health_check=args.health_check)
+    if args.command == "deactivate":
+        return cli_commands.deactivate(ollama_manager, config_manager, args.models)
+    if args.command == "pull":
+        return cli_commands.pull(ollama_manager, config_manager, args.models)
+    if args.command == "update":
+        return cli_commands.update(ollama_manager, config_manager, args.models, dry_run=args.dry_run)
+    return cli_commands.free_vram(ollama_manager, config_manager, keep=args.keep)
+
+
+def _daemon_request(args: argparse.Namespace):
+    """Método y parámetros JSON-RPC del subcomando"""
+    if args.command == "status":
+        return 'status', {'updates': args.updates}
+    if args.command == "activate":
+        return 'activate', {'model': args.model, 'health_check': args.health_check}
+    if args.command == "deactivate":
+        return 'stop', {'models': args.models}
+    if args.command == "pull":
+        return 'pull', {'models': args.models}
+    if args.command == "update":
+        return 'update', {'models': args.models, 'dry_run': args.dry_run}
+    return 'free_vram', {'keep': args.keep}
+
+
+def _run_in_daemon(args: argparse.Namespace):
+    """Ejecuta el subcomando en el daemon residente; None si no hay daemon (modo en proceso)"""
+    from control_api import ControlError, CONNECTION_ERROR
+    client = None if args.no_daemon else ControlClient.connect()
+    if client is None:
+        return None
+    method, params = _daemon_request(args)
+    with client:
+        try:
+            return client.command(method, **params)
+        except ControlError as e:
+            if e.code == CONNECTION_ERROR:
+                print(f"⚠️  {e.message}; ejecutando en este proceso", file=sys.stderr)
+                return None
+            return cli_commands.CommandResult(args.command, cli_commands.EXIT_FAILED,
+                                              data={'error': e.message}, lines=[f"❌ Daemon: {e.message}"])
+
+
+def run_cli_command(args: argparse.Namespace) -> int:
+    """Subcomando para scripts; con --json los mensajes del gestor van a stderr y stdout es solo JSON.
+
+    Si hay un daemon residente escuchando, el subcomando se ejecuta allí (estado caliente).
+    """
+    if args.json:
+        with redirect_stdout(sys.stderr):
+            result = _run_in_daemon(args) or _execute_cli_command(args)
+        print(json.dumps(result.to_dict(), indent=2, ensure_ascii=False, default=str))
+    else:
+        result = _run_in_daemon(args) or _execute_cli_command(args)
+        for line in result.lines:
+            print(line)
+    return result.exit_code
+
+
+def export_trace(path: Path, top: int = 8) -> None:
+    """Guarda la traza y muestra las operaciones que más tiempo consumieron"""
+    count = tracer.export_chrome_trace(path)
+    print(f"🧵 Traza guardada en {path} ({count} spans; ábrela en chrome://tracing o ui.perfetto.dev)")
+    for name, stats in list(tracer.aggregate().items())[:top]:
+        errors = f", {stats['errors']} con error" if stats['errors'] else ""
+        print(f"   {name}: {stats['count']}× · {stats['total_ms'] / 1000:.2f}s total · "
+              f"máx {stats['max_ms']:.0f} ms{errors}")
+
+
+def main(argv=None):
     """Función principal."""
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        tracer.enable()
+
     try:
-        app = LLMStackApp()
-        app.run()
+        _run_command_line(args)
+    finally:
+        if args.trace:
+            export_trace(Path(args.trace))
+
+
+def _run_command_line(args: argparse.Namespace) -> None:
+    """Ejecuta el subcomando (o la interfaz interactiva) con el manejo de errores común"""
+    try:
+        if args.command == "daemon":
+            run_daemon(args)
+        elif args.command == "gateway":
+            run_gateway(args)
+        elif args.command == "simulate":
+            run_simulator(args)
+        elif args.command == "chat":
+            models = config_manager.get_models()
+            model_config = models.get(args.model) or next(
+                (model for model in models.values() if model.name == args.model),
+                ModelConfig(name=args.model, description=""))
+            exit_code = run_chat(Console(), ChatSession.for_model(ollama_manager, model_config), args.prompt)
+            if exit_code:
+                sys.exit(exit_code)
+        elif args.command in CLI_COMMANDS:
+            exit_code = run_cli_command(args)
+            if exit_code:
+                sys.exit(exit_code)
+        elif args.command == "bench":
+            exit_code = run_bench(args)
+            if exit_code:
+                sys.exit(exit_code)
+        else:
+            app = LLMStackApp(use_daemon=not args.no_daemon)
+            app.run()
     except KeyboardInterrupt:
         print("\n👋 ¡Hasta luego!")
         sys.exit(0)
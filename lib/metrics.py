@@ -0,0 +1,335 @@
+"""
+Metrics - Exportador de métricas en formato de texto de Prometheus
+OllamaManager registra cargas, desalojos, descargas, latencia de peticiones y tokens/s
+en un registro en memoria; un muestreo periódico de /api/ps actualiza los modelos
+cargados y su VRAM. `llm-stack daemon --metrics` (o `metrics.enabled` en app.yml)
+sirve /metrics para Prometheus; el gateway expone la misma ruta
+"""
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from state_cache import RUNNING_MODELS, GPU_MEMORY
+
+DEFAULT_METRICS_PORT = 9464
+DEFAULT_SAMPLE_INTERVAL = 15
+NAMESPACE = "llm_stack"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Límites de los histogramas (segundos)
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+LOAD_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+PULL_BUCKETS = (5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+    return tuple(sorted((str(k), str(v)) for k, v in (labels or {}).items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+@dataclass
+class _Family:
+    """Una métrica con su ayuda, tipo y valores por conjunto de etiquetas"""
+    name: str
+    kind: str
+    help: str
+    buckets: Tuple[float, ...] = ()
+
+    def __post_init__(self):
+        self.values: Dict[LabelKey, Any] = {}
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Contadores, gauges e histogramas con etiquetas (thread-safe) y su exposición en texto"""
+
+    def __init__(self, namespace: str = NAMESPACE):
+        self.namespace = namespace
+        self._families: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, kind: str, help_text: str, buckets: Sequence[float] = ()) -> None:
+        full_name = f"{self.namespace}_{name}"
+        with self._lock:
+            self._families.setdefault(full_name, _Family(full_name, kind, help_text, tuple(sorted(buckets))))
+
+    def _family(self, name: str, kind: str) -> _Family:
+        family = self._families.get(f"{self.namespace}_{name}")
+        if family is None or family.kind != kind:
+            raise KeyError(f"Métrica no registrada como {kind}: {name}")
+        return family
+
+    def inc(self, name: str, value: float = 1.0, labels: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            family = self._family(name, COUNTER)
+            key = _label_key(labels)
+            family.values[key] = family.values.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            self._family(name, GAUGE).values[_label_key(labels)] = float(value)
+
+    def replace(self, name: str, values: Dict[LabelKey, float]) -> None:
+        """Sustituye todos los valores de un gauge (los modelos que ya no están desaparecen)"""
+        with self._lock:
+            self._family(name, GAUGE).values = dict(values)
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            family = self._family(name, HISTOGRAM)
+            key = _label_key(labels)
+            if key not in family.values:
+                family.values[key] = _HistogramValue(family.buckets)
+            family.values[key].observe(value)
+
+    def value(self, name: str, labels: Optional[Dict[str, Any]] = None) -> Optional[float]:
+        """Valor actual de un contador o gauge (el número de observaciones en un histograma)"""
+        with self._lock:
+            family = self._families.get(f"{self.namespace}_{name}")
+            if family is None:
+                return None
+            value = family.values.get(_label_key(labels))
+            return value.count if isinstance(value, _HistogramValue) else value
+
+    def render(self) -> str:
+        """Formato de exposición de texto de Prometheus (0.0.4)"""
+        lines: List[str] = []
+        with self._lock:
+            for family in sorted(self._families.values(), key=lambda f: f.name):
+                lines.append(f"# HELP {family.name} {family.help}")
+                lines.append(f"# TYPE {family.name} {family.kind}")
+                for key in sorted(family.values):
+                    value = family.values[key]
+                    if family.kind != HISTOGRAM:
+                        lines.append(f"{family.name}{_format_labels(key)} {_format_value(value)}")
+                        continue
+                    for bound, count in zip(value.buckets, value.counts):
+                        lines.append(f"{family.name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {count}")
+                    lines.append(f"{family.name}_bucket{_format_labels(key, [('le', '+Inf')])} {value.count}")
+                    lines.append(f"{family.name}_sum{_format_labels(key)} {_format_value(value.sum)}")
+                    lines.append(f"{family.name}_count{_format_labels(key)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+
+class StackMetrics(MetricsRegistry):
+    """Métricas del stack: las alimentan las operaciones de OllamaManager y el muestreo de /api/ps"""
+
+    def __init__(self, namespace: str = NAMESPACE):
+        super().__init__(namespace)
+        self.register('model_loaded', GAUGE, "1 si el modelo está cargado según /api/ps")
+        self.register('model_size_bytes', GAUGE, "Memoria total del modelo cargado (VRAM + RAM)")
+        self.register('model_vram_bytes', GAUGE, "VRAM ocupada por el modelo cargado")
+        self.register('gpu_memory_total_bytes', GAUGE, "VRAM total de la GPU")
+        self.register('gpu_memory_used_bytes', GAUGE, "VRAM en uso (todos los procesos)")
+        self.register('model_loads_total', COUNTER, "Cargas de modelos en VRAM por resultado")
+        self.register('model_load_seconds', HISTOGRAM, "Duración de la carga de pesos en VRAM", LOAD_BUCKETS)
+        self.register('model_evictions_total', COUNTER, "Modelos descargados de VRAM por motivo (vram, idle)")
+        self.register('pulls_total', COUNTER, "Descargas de modelos por resultado")
+        self.register('pull_bytes_total', COUNTER, "Bytes descargados del registry")
+        self.register('pull_duration_seconds', HISTOGRAM, "Duración de las descargas de modelos", PULL_BUCKETS)
+        self.register('requests_total', COUNTER, "Peticiones de inferencia por endpoint y estado HTTP")
+        self.register('request_duration_seconds', HISTOGRAM, "Latencia de las peticiones de inferencia",
+                      REQUEST_BUCKETS)
+        self.register('tokens_per_second', GAUGE, "Velocidad de generación de la última respuesta")
+        self.register('generated_tokens_total', COUNTER, "Tokens generados")
+        self.register('last_sample_timestamp_seconds', GAUGE, "Hora del último muestreo de /api/ps")
+
+    def record_load(self, model: str, seconds: float, success: bool) -> None:
+        self.inc('model_loads_total', labels={'model': model, 'result': 'success' if success else 'error'})
+        if success:
+            self.observe('model_load_seconds', seconds, {'model': model})
+
+    def record_eviction(self, model: str, reason: str = 'vram') -> None:
+        self.inc('model_evictions_total', labels={'model': model, 'reason': reason})
+
+    def record_pull(self, model: str, size_bytes: int, seconds: float, success: bool) -> None:
+        self.inc('pulls_total', labels={'model': model, 'result': 'success' if success else 'error'})
+        if size_bytes:
+            self.inc('pull_bytes_total', size_bytes, {'model': model})
+        if success and seconds > 0:
+            self.observe('pull_duration_seconds', seconds, {'model': model})
+
+    def record_request(self, model: str, endpoint: str, seconds: float, status: Optional[int]) -> None:
+        self.inc('requests_total', labels={'model': model, 'endpoint': endpoint, 'status': status or 'error'})
+        self.observe('request_duration_seconds', seconds, {'model': model, 'endpoint': endpoint})
+
+    def record_generation(self, model: str, data: Dict[str, Any]) -> None:
+        """Métricas finales de Ollama (`eval_count`, `eval_duration` en ns) de una respuesta"""
+        eval_count = int(data.get('eval_count') or 0)
+        eval_duration_s = (data.get('eval_duration') or 0) / 1e9
+        if not eval_count:
+            return
+        self.inc('generated_tokens_total', eval_count, {'model': model})
+        if eval_duration_s > 0:
+            self.set('tokens_per_second', eval_count / eval_duration_s, {'model': model})
+
+    def sample(self, loaded: List[Any], vram: Optional[Any] = None) -> None:
+        """Estado de /api/ps: modelos cargados y su memoria (los descargados dejan de exportarse)"""
+        self.replace('model_loaded', {_label_key({'model': m.name}): 1 for m in loaded})
+        self.replace('model_size_bytes', {_label_key({'model': m.name}): m.size_bytes for m in loaded})
+        self.replace('model_vram_bytes', {_label_key({'model': m.name}): m.size_vram_bytes for m in loaded})
+        if vram is not None:
+            if vram.total_bytes:
+                self.set('gpu_memory_total_bytes', vram.total_bytes)
+            self.set('gpu_memory_used_bytes', vram.used_bytes)
+        self.set('last_sample_timestamp_seconds', time.time())
+
+
+class MetricsSampler:
+    """Muestreo periódico de /api/ps (y nvidia-smi) hacia StackMetrics"""
+
+    def __init__(self, manager: Any, interval_s: float = DEFAULT_SAMPLE_INTERVAL):
+        self.manager = manager
+        self.interval_s = interval_s
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self) -> None:
+        # Saltar la caché de estado: cada muestra debe reflejar /api/ps en ese momento
+        self.manager.invalidate_state(RUNNING_MODELS, GPU_MEMORY)
+        loaded = self.manager.get_loaded_models()
+        self.manager.metrics.sample(loaded, self.manager.get_vram_usage(loaded))
+
+    def run_forever(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"⚠️  Error muestreando métricas: {e}")
+            self._stop_event.wait(self.interval_s)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="metrics-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+@dataclass
+class MetricsConfig:
+    """Sección `metrics` de app.yml"""
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = DEFAULT_METRICS_PORT
+    sample_interval_s: float = DEFAULT_SAMPLE_INTERVAL
+
+    @classmethod
+    def from_app_config(cls, app_config: Dict[str, Any]) -> 'MetricsConfig':
+        """Lee `metrics` y respeta `security.allow_remote_access` (solo localhost si es false)"""
+        metrics = app_config.get('metrics', {}) or {}
+        security = app_config.get('security', {}) or {}
+        host = str(metrics.get('host', cls.host))
+        if not security.get('allow_remote_access', False):
+            host = "127.0.0.1"
+        return cls(
+            enabled=bool(metrics.get('enabled', False)),
+            host=host,
+            port=int(metrics.get('port', DEFAULT_METRICS_PORT)),
+            sample_interval_s=float(metrics.get('sample_interval_seconds', DEFAULT_SAMPLE_INTERVAL)),
+        )
+
+
+class MetricsServer:
+    """Servidor HTTP mínimo que expone GET /metrics"""
+
+    def __init__(self, metrics: MetricsRegistry, host: str = "127.0.0.1", port: int = DEFAULT_METRICS_PORT):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> str:
+        """Arranca el servidor en un hilo daemon y retorna su URL"""
+        if self._server is None:
+            self._server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+            self._server.daemon_threads = True
+            self._server.metrics = self.metrics
+            self.port = self._server.server_address[1]
+            self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05},
+                                            name="metrics-server", daemon=True)
+            self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self) -> 'MetricsServer':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - firma de BaseHTTPRequestHandler
+        pass
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            body, status, content_type = b"Not Found\n", 404, "text/plain"
+        else:
+            body, status, content_type = self.server.metrics.render().encode(), 200, CONTENT_TYPE
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
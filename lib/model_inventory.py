@@ -0,0 +1,184 @@
+"""
+ModelInventory - Inventario de modelos instalados vía API nativa de Ollama (/api/tags)
+Registros tipados con digest, tamaños en bytes y metadatos; fallback a `ollama list` sin API
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Dict, Any, Callable, Tuple, Optional
+
+import requests
+
+from http_transport import HTTPTransport
+
+
+_SIZE_UNITS = {
+    'B': 1,
+    'KB': 1000,
+    'MB': 1000 ** 2,
+    'GB': 1000 ** 3,
+    'TB': 1000 ** 4,
+}
+
+
+@dataclass
+class ModelStatus:
+    """Estado de un modelo en Ollama"""
+    name: str
+    size: str
+    size_vram: str
+    digest: str
+    loaded: bool = False
+    size_bytes: int = 0
+    modified_at: str = ""
+    family: str = ""
+    parameter_size: str = ""
+    quantization_level: str = ""
+    format: str = ""
+
+
+def format_bytes(size_bytes: int) -> str:
+    """Formatea bytes con unidades decimales, igual que `ollama list` (e.g. '4.7 GB')"""
+    if size_bytes <= 0:
+        return "0 B"
+    for unit in ('TB', 'GB', 'MB', 'KB'):
+        if size_bytes >= _SIZE_UNITS[unit]:
+            return f"{size_bytes / _SIZE_UNITS[unit]:.1f} {unit}"
+    return f"{size_bytes} B"
+
+
+def parse_size(text: str) -> int:
+    """Convierte un tamaño legible ('4.7 GB', '512MB') a bytes; 0 si no se reconoce"""
+    match = re.match(r'^\s*([\d.]+)\s*([KMGT]?B)\s*$', text.strip().upper()) if text else None
+    if not match:
+        return 0
+    try:
+        return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+    except ValueError:
+        return 0
+
+
+def parse_tags_response(data: Any) -> List[ModelStatus]:
+    """Convierte la respuesta de /api/tags en registros ModelStatus.
+
+    Lanza ValueError si el cuerpo no tiene la forma esperada; las entradas que no son
+    objetos se ignoran.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('models') or [], list):
+        raise ValueError("/api/tags devolvió una respuesta con formato inesperado")
+
+    models = []
+    for entry in data.get('models') or []:
+        if not isinstance(entry, dict):
+            continue
+        name = entry.get('name') or entry.get('model')
+        if not name:
+            continue
+        details = entry.get('details')
+        if not isinstance(details, dict):
+            details = {}
+        size_bytes = int(entry.get('size') or 0)
+        models.append(ModelStatus(
+            name=name,
+            size=format_bytes(size_bytes),
+            size_vram="",  # Solo aplica a modelos cargados (/api/ps)
+            digest=entry.get('digest', ''),
+            size_bytes=size_bytes,
+            modified_at=entry.get('modified_at', ''),
+            family=details.get('family', ''),
+            parameter_size=details.get('parameter_size', ''),
+            quantization_level=details.get('quantization_level', ''),
+            format=details.get('format', ''),
+        ))
+    return models
+
+
+def parse_ollama_list(output: str) -> List[ModelStatus]:
+    """Parsea la salida tabular de `ollama list` (NAME, ID, SIZE, MODIFIED).
+
+    Las columnas se separan por 2+ espacios, por lo que '4.7 GB' se mantiene completo.
+    """
+    models = []
+    lines = output.strip().split('\n')
+
+    # Skip header line
+    for line in lines[1:]:
+        if not line.strip():
+            continue
+        columns = re.split(r'\s{2,}', line.strip())
+        if len(columns) < 3:
+            continue
+        name, digest, size = columns[0], columns[1], columns[2]
+        models.append(ModelStatus(
+            name=name,
+            size=size,
+            size_vram="",
+            digest=digest,
+            size_bytes=parse_size(size),
+            modified_at=columns[3] if len(columns) > 3 else "",
+        ))
+
+    return models
+
+
+def find_model_updates(installed: List[ModelStatus],
+                       registry_map: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """Compara modelos instalados contra el último tag del registry por nombre base"""
+    updates_available = {}
+
+    # Verificar cada modelo instalado
+    for installed_model in installed:
+        model_name = installed_model.name
+        if ':' in model_name:
+            base_name = model_name.split(':')[0]
+
+            # Verificar si hay versión más reciente en registry
+            if base_name in registry_map:
+                latest_version = registry_map[base_name]
+                if latest_version != model_name:
+                    updates_available[model_name] = {
+                        "current": model_name,
+                        "latest": latest_version,
+                        "base_name": base_name
+                    }
+
+    return updates_available
+
+
+class ModelInventory:
+    """Cliente de inventario: /api/tags primero, `ollama list` solo si la API no responde"""
+
+    def __init__(self, http: HTTPTransport, ollama_host: str,
+                 run_command: Callable[[List[str]], Tuple[bool, str]]):
+        self.http = http
+        self.ollama_host = ollama_host
+        self._run_command = run_command
+
+    def fetch_tags(self) -> Optional[List[ModelStatus]]:
+        """Lee /api/tags; None si la API HTTP no está disponible"""
+        try:
+            response = self.http.get(f"{self.ollama_host}/api/tags", endpoint='tags')
+        except requests.RequestException:
+            return None
+
+        if response.status_code != 200:
+            return None
+
+        try:
+            return parse_tags_response(response.json())
+        except ValueError:
+            return None
+
+    def list_from_cli(self) -> List[ModelStatus]:
+        """Fallback: fork de `ollama list` y parseo de la tabla"""
+        success, output = self._run_command(["ollama", "list"])
+        if not success:
+            return []
+        return parse_ollama_list(output)
+
+    def list_models(self) -> List[ModelStatus]:
+        """Lista modelos instalados, usando el CLI solo cuando la API está caída"""
+        models = self.fetch_tags()
+        if models is not None:
+            return models
+        return self.list_from_cli()
@@ -3,33 +3,76 @@ OllamaManager - Gestión directa de Ollama CLI para arquitectura local nativa
 Sin contenedores, sin base de datos, operaciones directas con RTX 2070 SUPER
 """
 
+import os
 import subprocess
 import json
+import threading
 import time
-from typing import List, Dict, Optional, Tuple, Any
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError, wait
+from typing import List, Dict, Optional, Tuple, Any, Callable, Iterable, Iterator
 from dataclasses import dataclass
 from pathlib import Path
-import requests
 
-from config_manager import config_manager, ModelConfig
+from config_manager import config_manager, ModelConfig, DEFAULT_OLLAMA_HOST
+from http_transport import HTTPTransport
+from model_inventory import ModelInventory, ModelStatus, find_model_updates
+from state_cache import StateCache, INSTALLED_MODELS, RUNNING_MODELS, SERVICE_HEALTH, VERSION, GPU_MEMORY
+from download_scheduler import DownloadScheduler, PullProgress
+from pull_planner import PullPlanner, PullPlan
+from vram_telemetry import VRAMTelemetry, VRAMUsage, LoadedModel
+from vram_scheduler import VRAMScheduler, AdmissionDecision, REFUSE, PARTIAL_OFFLOAD, MIB, GIB
+from eviction_policy import UsageTracker, get_policy, select_victims, USAGE_FILENAME, MIN_LOAD_SECONDS
+from response_cache import ResponseCache, cache_key
+from request_coalescer import RequestCoalescer
+from metrics import StackMetrics
+from tracing import tracer
+from lazy import LazyObject
 
 
 @dataclass
-class ModelStatus:
-    """Estado de un modelo en Ollama"""
+class ProbeResult:
+    """Resultado de una sonda del snapshot de estado"""
     name: str
-    size: str
-    size_vram: str
-    digest: str
-    loaded: bool = False
+    value: Any = None
+    stale: bool = False
+    error: str = ""
+    duration_ms: float = 0.0
 
 
 @dataclass
-class VRAMUsage:
-    """Uso de VRAM por modelo"""
-    total_vram: str
-    used_vram: str
-    models_loaded: List[str]
+class WarmLoadResult:
+    """Resultado de cargar un modelo en VRAM sin generar tokens"""
+    model: str
+    success: bool
+    load_seconds: float = 0.0
+    keep_alive: Any = None
+    error: str = ""
+
+    @property
+    def cold(self) -> bool:
+        """True si los pesos se cargaron desde disco (no estaban ya en VRAM)"""
+        return self.load_seconds >= MIN_LOAD_SECONDS
+
+
+# Plazo máximo (segundos) de cada sonda en get_status_summary
+STATUS_PROBE_DEADLINES: Dict[str, float] = {
+    'health': 5.0,
+    'installed': 5.0,
+    'running': 5.0,
+    'updates': 3.0,
+    'vram': 5.0,
+}
+
+
+def _last_json_line(data: bytes) -> Dict[str, Any]:
+    """Último objeto JSON de un bloque NDJSON ({} si no hay uno completo)"""
+    for line in reversed(data.splitlines()):
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        return event if isinstance(event, dict) else {}
+    return {}
 
 
 class OllamaManager:
@@ -40,152 +83,281 @@ class OllamaManager:
         self.ollama_host = self.config.ollama_host
         self.max_loaded = self.config.max_loaded_models
 
-        # Backend seleccionado: 'ollama' or 'none'
-        self.backend = 'none'
-        self._detect_backend()
+        # Transporte HTTP compartido (pool keep-alive, timeouts por endpoint, reintentos)
+        self.http = HTTPTransport.from_performance_config(config_manager.get_performance_config())
+        # Operaciones en lote (stop_models, get_models_info) en vuelo a la vez
+        self.max_concurrent_operations = max(
+            1, int(config_manager.get_performance_config().get('max_concurrent_operations', 8)))
+
+        # Inventario nativo vía /api/tags (fallback a `ollama list`)
+        self.inventory = ModelInventory(self.http, self.ollama_host, self._run_command)
+
+        # Catálogo del registry persistido en disco (compartido con ConfigManager)
+        self.catalog = config_manager.get_registry_catalog()
+
+        # Caché de estado con TTL por pieza (instalados, cargados, salud, versión)
+        self.state_cache = StateCache.from_performance_config(config_manager.get_performance_config())
+
+        # Descargas en paralelo vía /api/pull (max_concurrent_downloads, abortado por estancamiento)
+        self.downloads = DownloadScheduler.from_performance_config(
+            config_manager.get_performance_config(), self.http, self.ollama_host
+        )
+
+        # Comparación de manifests local/remoto antes de descargar
+        registry_config = config_manager.app_config.get('registry', {}) or {}
+        self.pull_planner = PullPlanner(self.http, registry_base=registry_config.get('manifest_base_url'))
+
+        # Telemetría de VRAM: /api/ps + nvidia-smi (memoria unificada en apple_m3)
+        self.telemetry = VRAMTelemetry(
+            self.http, self.ollama_host, self._run_command,
+            unified_memory=bool(config_manager.get_platform_profile().get('memory_unified'))
+        )
+
+        # Admisión por presupuesto de VRAM (vram_gb declarado o medido en /api/ps)
+        self.vram_scheduler = VRAMScheduler(
+            headroom_bytes=int(self.config.vram_headroom_mb) * MIB,
+            allow_partial_offload=self.config.allow_partial_offload,
+            budget_bytes=int((self.config.vram_budget_gb or 0) * GIB),
+        )
+
+        # Uso por modelo (último uso, peticiones, coste de recarga) y política de desalojo
+        self.usage = UsageTracker(Path(config_manager.config_dir) / 'cache' / USAGE_FILENAME)
+        self.eviction_policy = get_policy(self.config.eviction_policy)
+
+        # Respuestas deterministas (temperatura 0) reutilizables por el gateway
+        self.response_cache = ResponseCache.from_config(
+            config_manager.app_config.get('response_cache'), Path(config_manager.config_dir) / 'cache'
+        )
+
+        # Peticiones idénticas en vuelo comparten una sola generación (gateway y stream_request)
+        self.coalescer = RequestCoalescer.from_config(config_manager.app_config.get('request_coalescing'))
+
+        # Métricas para /metrics (cargas, desalojos, descargas, latencia, tokens/s)
+        self.metrics = StackMetrics()
+
+        # IdleReaper activo en este proceso (lo fijan start()/run_forever() y lo limpia stop())
+        self.idle_reaper: Optional[Any] = None
+
+        # Backend seleccionado: 'ollama' o 'none' (se detecta en el primer uso)
+        self._backend: Optional[str] = None
 
     def _run_command(self, command: List[str], timeout: int = 30) -> Tuple[bool, str]:
         """Ejecuta un comando de Ollama y retorna (éxito, output)"""
-        try:
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-            success = result.returncode == 0
-            output = result.stdout if success else result.stderr
-            return success, output.strip()
-        except subprocess.TimeoutExpired:
-            return False, "Timeout ejecutando comando"
-        except Exception as e:
-            return False, f"Error: {str(e)}"
+        # El CLI de Ollama habla con OLLAMA_HOST: mantenerlo en el mismo servidor que la API
+        extra = {}
+        if command and command[0] == "ollama" and self.ollama_host != DEFAULT_OLLAMA_HOST:
+            extra['env'] = {**os.environ, 'OLLAMA_HOST': self.ollama_host}
+        with tracer.span(" ".join(command[:2]), 'subprocess', command=" ".join(command)) as span:
+            try:
+                result = subprocess.run(
+                    command,
+                    capture_output=True,
+                    text=True,
+                    timeout=timeout,
+                    **extra
+                )
+                success = result.returncode == 0
+                output = result.stdout if success else result.stderr
+                span.args.update(returncode=result.returncode, output_bytes=len(output or ""))
+                if not success:
+                    span.fail()
+                return success, output.strip()
+            except subprocess.TimeoutExpired:
+                span.fail("timeout")
+                return False, "Timeout ejecutando comando"
+            except Exception as e:
+                span.fail(e)
+                return False, f"Error: {str(e)}"
+
+    def _probe_ollama_version(self) -> Optional[str]:
+        """Ejecuta `ollama --version` y retorna la versión (None si no está instalado)"""
+        success, output = self._run_command(["ollama", "--version"])
+        if success and "ollama version" in output.lower():
+            return output.strip().split()[-1]
+        return None
+
+    def get_ollama_version(self) -> Optional[str]:
+        """Versión de Ollama instalada (cacheada durante cache_ttl_minutes)"""
+        return self.state_cache.get_or_load(VERSION, self._probe_ollama_version)
 
     def check_ollama_installed(self) -> bool:
         """Verifica si Ollama está instalado y funcionando"""
-        success, output = self._run_command(["ollama", "--version"])
-        return success and "ollama version" in output.lower()
+        return self.get_ollama_version() is not None
+
+    def invalidate_state(self, *keys: str) -> None:
+        """Invalida piezas del estado cacheado (todas si no se indica ninguna)"""
+        self.state_cache.invalidate(*keys)
 
     def _detect_backend(self) -> None:
         """Detecta y selecciona backend disponible: solo Ollama o ninguno"""
         try:
-            if self.check_ollama_installed():
-                self.backend = 'ollama'
+            if self.get_ollama_version() is not None:
+                self._backend = 'ollama'
                 print("🔌 Backend seleccionado: Ollama CLI")
                 return
         except Exception:
             pass
-        self.backend = 'none'
+        self._backend = 'none'
         print("⚠️  No se detectó backend de inferencia (solo Ollama soportado)")
 
+    @property
+    def backend(self) -> str:
+        """Backend seleccionado; se detecta en el primer acceso y se mantiene durante el proceso"""
+        if self._backend is None:
+            self._detect_backend()
+        return self._backend
+
     def get_backend(self) -> str:
         """Retorna el backend seleccionado ('ollama', 'none')"""
         return self.backend
 
-    def check_ollama_running(self) -> bool:
+    def check_ollama_running(self, refresh: bool = False) -> bool:
         """Verifica si el servicio Ollama está corriendo"""
-        try:
-            response = requests.get(f"{self.ollama_host}/api/tags", timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+        def probe() -> bool:
+            try:
+                response = self.http.get(f"{self.ollama_host}/api/tags", endpoint='tags')
+                return response.status_code == 200
+            except:
+                return False
+
+        if refresh:
+            self.state_cache.invalidate(SERVICE_HEALTH)
+        return self.state_cache.get_or_load(SERVICE_HEALTH, probe)
 
     def start_ollama_service(self) -> bool:
         """Inicia el servicio Ollama (si no está corriendo)"""
-        if self.check_ollama_running():
+        if self.check_ollama_running(refresh=True):
             return True
 
         print("🚀 Iniciando servicio Ollama...")
         success, output = self._run_command(["ollama", "serve"], timeout=10)
 
         if success:
-            # Esperar a que el servicio esté listo
+            # Esperar a que el servicio esté listo (cada sondeo deja en caché el estado real)
             for _ in range(10):
                 time.sleep(1)
-                if self.check_ollama_running():
+                if self.check_ollama_running(refresh=True):
                     return True
 
+        # El "inactivo" cacheado antes de arrancar no vale: el servicio puede terminar de levantarse después
+        self.state_cache.invalidate(SERVICE_HEALTH)
         return False
 
-    def list_installed_models(self) -> List[ModelStatus]:
-        """Lista todos los modelos instalados localmente"""
-        success, output = self._run_command(["ollama", "list"])
-
-        if not success:
-            return []
-
-        models = []
-        lines = output.strip().split('\n')
-
-        # Skip header line
-        for line in lines[1:]:
-            if line.strip():
-                parts = line.split()
-                if len(parts) >= 4:
-                    name = parts[0]
-                    size = parts[2] if len(parts) > 2 else "unknown"
-                    size_vram = parts[3] if len(parts) > 3 else "unknown"
-                    digest = parts[-1] if len(parts) > 1 else ""
-
-                    models.append(ModelStatus(
-                        name=name,
-                        size=size,
-                        size_vram=size_vram,
-                        digest=digest,
-                        loaded=False  # Will be updated by get_running_models
-                    ))
-
+    def _load_installed_models(self) -> List[ModelStatus]:
+        """Lee /api/tags; lanza ConnectionError si la API no responde (no se cachea)"""
+        models = self.inventory.fetch_tags()
+        if models is None:
+            raise ConnectionError("API de Ollama no disponible")
         return models
 
-    def get_running_models(self) -> List[str]:
-        """Obtiene lista de modelos actualmente cargados en memoria"""
+    @tracer.traced()
+    def list_installed_models(self) -> List[ModelStatus]:
+        """Lista todos los modelos instalados localmente (/api/tags, CLI como fallback)"""
         try:
-            response = requests.get(f"{self.ollama_host}/api/ps", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                return [model['name'] for model in data.get('models', [])]
+            return self.state_cache.get_or_load(INSTALLED_MODELS, self._load_installed_models)
+        except ConnectionError:
+            return self.inventory.list_from_cli()
+
+    def get_model_digest(self, model_name: str) -> str:
+        """Digest del modelo instalado ('' si no está instalado)"""
+        for model in self.list_installed_models():
+            if model.name == model_name:
+                return model.digest
+        return ""
+
+    @tracer.traced()
+    def get_loaded_models(self) -> List[LoadedModel]:
+        """Modelos cargados con su memoria (size / size_vram de /api/ps)"""
+        try:
+            return list(self.state_cache.get_or_load(RUNNING_MODELS, self.telemetry.fetch_loaded_models))
         except:
             pass
         return []
 
-    def get_vram_usage(self) -> VRAMUsage:
-        """Obtiene información de uso de VRAM"""
-        running = self.get_running_models()
-
-        # Estimación simple de VRAM (podría mejorarse con nvidia-ml)
-        total_vram = "8GB"  # RTX 2070 SUPER
-        used_vram = f"~{len(running) * 5}GB"  # Estimación aproximada
-
-        return VRAMUsage(
-            total_vram=total_vram,
-            used_vram=used_vram,
-            models_loaded=running
-        )
-
+    def get_running_models(self) -> List[str]:
+        """Obtiene lista de modelos actualmente cargados en memoria"""
+        return [model.name for model in self.get_loaded_models()]
+
+    @tracer.traced()
+    def get_vram_usage(self, loaded: Optional[List[LoadedModel]] = None) -> VRAMUsage:
+        """Uso real de VRAM en bytes (reutiliza `loaded` si ya se consultó /api/ps)"""
+        if loaded is None:
+            loaded = self.get_loaded_models()
+        gpu_memory = self.state_cache.get_or_load(GPU_MEMORY, self.telemetry.read_gpu_memory)
+        # La memoria real de cada modelo alimenta las próximas decisiones de admisión y desalojo
+        self.vram_scheduler.observe(loaded)
+        self.usage.record_sizes({model.name: model.size_bytes for model in loaded})
+        return self.telemetry.snapshot(loaded=loaded, gpu_memory=gpu_memory)
+
+    @tracer.traced()
     def pull_model(self, model_name: str, show_progress: bool = True) -> bool:
-        """Descarga un modelo desde el registry de Ollama"""
+        """Descarga un modelo desde el registry de Ollama.
+
+        Siempre consume el stream de /api/pull (los bytes de las métricas salen de sus
+        eventos); `show_progress` muestra el avance en una línea mientras tanto.
+        """
         print(f"📥 Descargando modelo: {model_name}")
 
+        def show(snapshot: Dict[str, PullProgress]) -> None:
+            progress = snapshot.get(model_name)
+            if progress is not None and progress.total:
+                print(f"\r   {progress.status}: {progress.completed / GIB:.2f}/{progress.total / GIB:.2f} GB "
+                      f"({progress.fraction:.0%})", end="", flush=True)
+
+        try:
+            success = self.pull_models([model_name], on_progress=show if show_progress else None)[model_name]
+        except KeyboardInterrupt:
+            self.downloads.cancel(model_name)
+            print("\n⚠️  Descarga interrumpida por usuario")
+            return False
         if show_progress:
-            # Ejecutar sin capture_output para mostrar progreso
-            try:
-                result = subprocess.run(["ollama", "pull", model_name])
-                return result.returncode == 0
-            except KeyboardInterrupt:
-                print("\n⚠️  Descarga interrumpida por usuario")
-                return False
+            print()
+
+        progress = self.downloads.get_progress(model_name)
+        if success:
+            print(f"✅ Modelo {model_name} descargado exitosamente")
         else:
-            success, output = self._run_command(["ollama", "pull", model_name], timeout=300)  # 5min timeout
+            print(f"❌ Error descargando {model_name}: {progress.error if progress else ''}")
+        return success
+
+    @tracer.traced()
+    def pull_models(self, model_names: List[str],
+                    on_progress: Optional[Callable[[Dict[str, PullProgress]], None]] = None,
+                    poll_interval: float = 0.2) -> Dict[str, bool]:
+        """Descarga varios modelos en paralelo (hasta max_concurrent_downloads a la vez).
+
+        Los tags repetidos se descargan una sola vez. `on_progress` recibe periódicamente
+        el progreso de cada modelo mientras haya descargas pendientes.
+        """
+        futures = {name: self.downloads.submit(name) for name in dict.fromkeys(model_names)}
+
+        try:
+            pending = set(futures.values())
+            while pending:
+                _, pending = wait(pending, timeout=poll_interval)
+                if on_progress:
+                    on_progress({name: self.downloads.get_progress(name) for name in futures})
+        finally:
+            self.state_cache.invalidate(INSTALLED_MODELS)
+
+        results = {name: future.result() for name, future in futures.items()}
+        for name, success in results.items():
+            progress = self.downloads.get_progress(name)
+            if progress is not None:
+                duration = (progress.finished_at or 0) - (progress.started_at or 0)
+                self.metrics.record_pull(name, progress.completed, max(0.0, duration), success)
+        # Los pesos pueden haber cambiado: las respuestas cacheadas del modelo ya no valen
+        for name, success in results.items():
             if success:
-                print(f"✅ Modelo {model_name} descargado exitosamente")
-            else:
-                print(f"❌ Error descargando {model_name}: {output}")
-            return success
+                self.response_cache.invalidate_model(name)
+        return results
 
+    @tracer.traced()
     def remove_model(self, model_name: str) -> bool:
         """Elimina un modelo instalado"""
         print(f"🗑️  Eliminando modelo: {model_name}")
         success, output = self._run_command(["ollama", "rm", model_name])
+        self.state_cache.invalidate(INSTALLED_MODELS, RUNNING_MODELS, GPU_MEMORY)
 
         if success:
             print(f"✅ Modelo {model_name} eliminado")
@@ -194,10 +366,24 @@ class OllamaManager:
 
         return success
 
+    def _unload_via_api(self, model_name: str) -> bool:
+        """Descarga el modelo con keep_alive=0 en /api/generate"""
+        try:
+            response = self.http.post(f"{self.ollama_host}/api/generate", endpoint='generate',
+                                      json={"model": model_name, "keep_alive": 0})
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    @tracer.traced()
     def stop_model(self, model_name: str) -> bool:
         """Detiene un modelo cargado en memoria (libera VRAM)"""
         print(f"🛑 Deteniendo modelo: {model_name}")
         success, output = self._run_command(["ollama", "stop", model_name])
+        if not success:
+            # Sin CLI (o con un servidor remoto/simulado): keep_alive=0 es lo que hace `ollama stop`
+            success = self._unload_via_api(model_name) or success
+        self.state_cache.invalidate(RUNNING_MODELS, GPU_MEMORY)
 
         if success:
             print(f"✅ Modelo {model_name} detenido (VRAM liberada)")
@@ -206,22 +392,33 @@ class OllamaManager:
 
         return success
 
+    @tracer.traced()
     def test_model(self, model_name: str, prompt: str = "Hello, how are you?") -> bool:
-        """Test básico de funcionamiento de un modelo"""
+        """Sonda de salud opcional: genera una respuesta corta y verifica que no esté vacía"""
+        # Generar carga el modelo en memoria
+        self.state_cache.invalidate(RUNNING_MODELS, GPU_MEMORY)
+        started = time.monotonic()
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.ollama_host}/api/generate",
+                endpoint='generate',
                 json={
                     "model": model_name,
                     "prompt": prompt,
                     "stream": False,
                     "options": {"num_predict": 50}
-                },
-                timeout=30
+                }
             )
 
+            self.metrics.record_request(model_name, '/api/generate', time.monotonic() - started,
+                                        response.status_code)
             if response.status_code == 200:
                 data = response.json()
+                self.metrics.record_generation(model_name, data)
+                self.usage.record_request(model_name)
+                if data.get("load_duration"):
+                    # load_duration (ns) es el coste real de recarga cuando el modelo no estaba en VRAM
+                    self.usage.record_load(model_name, data["load_duration"] / 1e9)
                 if "response" in data and data["response"].strip():
                     print(f"✅ Modelo {model_name} responde correctamente")
                     return True
@@ -233,13 +430,100 @@ class OllamaManager:
             print(f"❌ Error testeando {model_name}: {str(e)}")
             return False
 
+    def stream_request(self, route: str, payload: Dict[str, Any]) -> Iterator[bytes]:
+        """POST en streaming a la API nativa (/api/generate, /api/chat) pasando por el coalescer.
+
+        Si ya hay una petición idéntica en vuelo (mismo digest, opciones y prompt) se reciben
+        sus bloques en lugar de generar otra vez. Lanza requests.RequestException o FlightError.
+        """
+        model_name = payload['model']
+        digest = self.get_model_digest(model_name) if self.coalescer.enabled else ""
+        key = cache_key(digest, route, payload) if digest else None
+
+        def open_upstream() -> Iterator[bytes]:
+            self.state_cache.invalidate(RUNNING_MODELS, GPU_MEMORY)
+            started = time.monotonic()
+            response = self.http.post(f"{self.ollama_host}{route}", endpoint='generate', json=payload, stream=True)
+            last = b""
+            try:
+                response.raise_for_status()
+                self.usage.record_request(model_name)
+                for data in response.iter_content(chunk_size=None):
+                    last = data or last
+                    yield data
+            finally:
+                response.close()
+                self.metrics.record_request(model_name, route, time.monotonic() - started, response.status_code)
+            # El último evento NDJSON trae eval_count/eval_duration
+            final = _last_json_line(last)
+            if final.get("done"):
+                self.metrics.record_generation(model_name, final)
+
+        return self.coalescer.stream(key, open_upstream)
+
+    def keep_alive_for(self, model_config: ModelConfig) -> Any:
+        """keep_alive de Ollama para un modelo: override del modelo, global, o según el auto-stop.
+
+        Con un IdleReaper activo en este proceso se usa -1: el reaper decide cuándo descargar
+        (timeouts por modelo y `min_resident_models`). Sin reaper, el auto-stop lo hace Ollama
+        con el timeout de inactividad; sin auto-stop se omite y aplica el valor por defecto de Ollama.
+        """
+        if model_config.keep_alive is not None:
+            return model_config.keep_alive
+        if self.config.keep_alive is not None:
+            return self.config.keep_alive
+        if not self.config.auto_stop_inactive:
+            return None
+        if self.idle_reaper is not None:
+            return -1
+        timeout = model_config.idle_timeout_minutes
+        if timeout is None:
+            timeout = self.config.inactive_timeout_minutes
+        return f"{int(timeout)}m" if timeout else -1
+
+    @tracer.traced()
+    def warm_load_model(self, model_name: str, keep_alive: Any = None,
+                        options: Optional[Dict[str, Any]] = None) -> WarmLoadResult:
+        """Carga los pesos en VRAM con una petición sin prompt (no decodifica ningún token).
+
+        La duración de la carga en frío se toma de `load_duration` de la respuesta.
+        `options` (p.ej. num_ctx) debe coincidir con el de las peticiones posteriores
+        o Ollama recargará el modelo.
+        """
+        self.state_cache.invalidate(RUNNING_MODELS, GPU_MEMORY)
+        payload: Dict[str, Any] = {"model": model_name, "prompt": "", "stream": False}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        if options:
+            payload["options"] = options
+
+        started = time.monotonic()
+        try:
+            response = self.http.post(f"{self.ollama_host}/api/generate", endpoint='load', json=payload)
+            if response.status_code != 200:
+                self.metrics.record_load(model_name, 0, success=False)
+                return WarmLoadResult(model_name, False, keep_alive=keep_alive,
+                                      error=f"HTTP {response.status_code}")
+            data = response.json()
+        except Exception as e:
+            self.metrics.record_load(model_name, 0, success=False)
+            return WarmLoadResult(model_name, False, keep_alive=keep_alive, error=str(e))
+
+        # load_duration (ns); si Ollama no lo informa se usa el tiempo de pared
+        load_seconds = data.get("load_duration", 0) / 1e9 or (time.monotonic() - started)
+        self.usage.record_request(model_name)
+        self.usage.record_load(model_name, load_seconds)
+        self.metrics.record_load(model_name, load_seconds, success=True)
+        return WarmLoadResult(model_name, True, load_seconds=load_seconds, keep_alive=keep_alive)
+
+    @tracer.traced()
     def get_model_info(self, model_name: str) -> Optional[Dict[str, Any]]:
         """Obtiene información detallada de un modelo"""
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.ollama_host}/api/show",
-                json={"name": model_name},
-                timeout=10
+                endpoint='show',
+                json={"name": model_name}
             )
 
             if response.status_code == 200:
@@ -250,30 +534,83 @@ class OllamaManager:
 
         return None
 
-    def ensure_max_loaded_respected(self) -> None:
-        """Asegura que no se exceda el límite de modelos cargados"""
-        running = self.get_running_models()
-
-        if len(running) > self.max_loaded:
-            print(f"⚠️  Demasiados modelos cargados ({len(running)} > {self.max_loaded})")
-            print("🧹 Liberando VRAM...")
+    @tracer.traced()
+    def ensure_max_loaded_respected(self, incoming: Optional[str] = None) -> List[str]:
+        """Libera modelos según la política de desalojo para respetar max_loaded_models.
 
-            # Obtener modelos por prioridad (menos prioritarios primero)
-            if hasattr(config_manager, 'get_models_by_priority'):
-                models_by_priority = config_manager.get_models_by_priority()
-            else:
-                models_by_priority = list(config_manager.get_models().values())
+        Con `incoming` se reserva hueco para ese modelo antes de cargarlo. Retorna los
+        modelos detenidos.
+        """
+        running = [name for name in self.get_running_models() if name != incoming]
+        limit = self.max_loaded - (1 if incoming else 0)
+        excess = len(running) - limit
 
-            low_priority_names = [m.name for m in models_by_priority[self.max_loaded:]]
-
-            # Detener modelos de baja prioridad que estén corriendo
-            for model_name in running:
-                if model_name in low_priority_names:
-                    self.stop_model(model_name)
-                    break  # Solo detener uno por vez
+        if excess <= 0:
+            return []
 
-    def smart_activate_model(self, model_key: str) -> bool:
-        """Activación inteligente de modelo con gestión de prioridades"""
+        print(f"⚠️  Demasiados modelos cargados ({len(running)} > {limit})")
+        print("🧹 Liberando VRAM...")
+
+        victims = select_victims(self.eviction_policy.order(running, self.usage), {}, 0, min_count=excess)
+        return self.evict_models(victims)
+
+    @tracer.traced()
+    def evict_models(self, model_names: List[str]) -> List[str]:
+        """Detiene modelos registrando el desalojo en la política; retorna los detenidos"""
+        stopped = []
+        for model_name in model_names:
+            if self.stop_model(model_name):
+                self.usage.record_eviction(model_name)
+                self.metrics.record_eviction(model_name)
+                stopped.append(model_name)
+        return stopped
+
+    @tracer.traced()
+    def plan_admission(self, model_config: ModelConfig) -> AdmissionDecision:
+        """Evalúa si el modelo cabe en VRAM y qué modelos habría que descargar"""
+        vram = self.get_vram_usage()
+        required = self.vram_scheduler.required_bytes(model_config.name, model_config.vram_gb)
+        victim_order = self.eviction_policy.order(vram.models_loaded, self.usage)
+        return self.vram_scheduler.plan(model_config.name, required, vram, max_loaded=self.max_loaded,
+                                        victim_order=victim_order)
+
+    @tracer.traced()
+    def load_model(self, model_config: ModelConfig, options: Optional[Dict[str, Any]] = None) -> WarmLoadResult:
+        """Admite el modelo en VRAM (desalojando lo necesario) y carga sus pesos"""
+        # Admisión por presupuesto de VRAM: liberar solo lo necesario o rechazar
+        decision = self.plan_admission(model_config)
+        if decision.action == REFUSE:
+            return WarmLoadResult(model_config.name, False, error=(
+                f"no cabe en VRAM ({decision.required_bytes / GIB:.1f} GB > "
+                f"{decision.capacity_bytes / GIB:.1f} GB disponibles)"))
+
+        # Desalojar antes de cargar, en el orden de la política configurada
+        stopped = self.evict_models(decision.evict)
+        failed = [name for name in decision.evict if name not in stopped]
+        if failed:
+            # Algún stop falló: replanificar con el estado real (stop_model invalida la caché)
+            # y no cargar si todavía haría falta desalojar o el modelo ya no cabe
+            decision = self.plan_admission(model_config)
+            if decision.action == REFUSE or decision.evict:
+                return WarmLoadResult(model_config.name, False, error=(
+                    f"no se pudo liberar VRAM: fallo al detener {', '.join(failed)}"))
+
+        if decision.action == PARTIAL_OFFLOAD:
+            print(f"⚠️  {model_config.name} no cabe completo en VRAM: "
+                  f"~{decision.gpu_fraction:.0%} en GPU, el resto en CPU (más lento)")
+
+        print(f"🔥 Cargando modelo: {model_config.name}")
+        result = self.warm_load_model(model_config.name, keep_alive=self.keep_alive_for(model_config), options=options)
+        self.state_cache.invalidate(RUNNING_MODELS, GPU_MEMORY)
+        return result
+
+    @tracer.traced()
+    def smart_activate_model(self, model_key: str, health_check: bool = False) -> bool:
+        """Activación inteligente de modelo con gestión de prioridades.
+
+        La activación solo carga los pesos (warm load); `health_check` añade una
+        generación corta para verificar que el modelo responde.
+        """
         model_config = config_manager.get_model(model_key)
         if not model_config:
             print(f"❌ Modelo '{model_key}' no encontrado en configuración")
@@ -288,54 +625,39 @@ class OllamaManager:
             if not self.pull_model(model_config.name):
                 return False
 
-        # Asegurar límites de VRAM
-        self.ensure_max_loaded_respected()
+        result = self.load_model(model_config)
+        if not result.success:
+            print(f"❌ Error cargando {model_config.name}: {result.error}")
+            return False
 
-        # Test del modelo (esto lo carga en memoria)
-        print(f"🧪 Activando modelo: {model_config.name}")
-        return self.test_model(model_config.name)
+        if result.cold:
+            print(f"✅ {model_config.name} cargado en VRAM en {result.load_seconds:.1f}s")
+        else:
+            print(f"✅ {model_config.name} ya estaba cargado en VRAM")
 
-    def check_model_updates(self) -> Dict[str, Dict[str, Any]]:
-        """Verifica si hay actualizaciones disponibles para modelos instalados"""
-        installed = self.list_installed_models()
+        if health_check:
+            return self.test_model(model_config.name)
+        return True
+
+    @tracer.traced()
+    def check_model_updates(self, installed: Optional[List[ModelStatus]] = None) -> Dict[str, Dict[str, Any]]:
+        """Verifica si hay actualizaciones disponibles para modelos instalados.
+
+        El catálogo del registry se lee de la caché en disco y solo se revalida
+        (de forma condicional) cuando supera su TTL.
+        """
+        if installed is None:
+            installed = self.list_installed_models()
         updates_available = {}
 
         try:
-            # Consultar registry de Ollama para versiones más recientes
-            response = requests.get("https://ollama.com/api/models", timeout=10)
-            if response.status_code == 200:
-                registry_models = response.json()
-
-                # Crear mapa de modelos del registry
-                registry_map = {}
-                for model in registry_models:
-                    name = model.get('name', '')
-                    if ':' in name:
-                        base_name = name.split(':')[0]
-                        registry_map[base_name] = name
-
-                # Verificar cada modelo instalado
-                for installed_model in installed:
-                    model_name = installed_model.name
-                    if ':' in model_name:
-                        base_name = model_name.split(':')[0]
-                        current_tag = model_name.split(':')[1]
-
-                        # Verificar si hay versión más reciente en registry
-                        if base_name in registry_map:
-                            latest_version = registry_map[base_name]
-                            if latest_version != model_name:
-                                updates_available[model_name] = {
-                                    "current": model_name,
-                                    "latest": latest_version,
-                                    "base_name": base_name
-                                }
-
+            updates_available = find_model_updates(installed, self.catalog.latest_by_base())
         except Exception as e:
             print(f"⚠️  Error verificando actualizaciones: {e}")
 
         return updates_available
 
+    @tracer.traced()
     def update_model_if_available(self, model_name: str) -> bool:
         """Actualiza un modelo si hay versión más reciente disponible"""
         updates = self.check_model_updates()
@@ -351,34 +673,185 @@ class OllamaManager:
             # Actualizar a la versión más reciente
             success = self.pull_model(latest_version, show_progress=True)
             if success:
+                self.response_cache.invalidate_model(model_name)
                 print(f"✅ {model_name} actualizado a {latest_version}")
             return success
 
         print(f"ℹ️  {model_name} ya está actualizado")
         return True
 
-    def get_status_summary(self) -> Dict[str, Any]:
-        """Obtiene resumen completo del estado del sistema"""
-        installed = self.list_installed_models()
-        running = self.get_running_models()
-        vram = self.get_vram_usage()
+    def plan_pulls(self, model_names: List[str]) -> List[PullPlan]:
+        """Capas y bytes que descargaría cada pull (de menor a mayor delta; al día al final)"""
+        installed = {model.name: model.digest for model in self.list_installed_models()}
+        return self.pull_planner.plan_many(model_names, installed)
+
+    def plan_updates(self, model_names: List[str]) -> Dict[str, PullPlan]:
+        """Plan de actualización de cada modelo (de menor a mayor delta).
+
+        El destino es la última versión publicada si el catálogo tiene una más nueva,
+        o el mismo tag si no (su manifest puede haber cambiado en el registry).
+        """
         updates = self.check_model_updates()
+        targets = {name: updates[name]["latest"] if name in updates else name for name in dict.fromkeys(model_names)}
+        plans = self.plan_pulls(list(dict.fromkeys(targets.values())))
+        return {name: plan for plan in plans for name, target in targets.items() if target == plan.model}
+
+    @tracer.traced()
+    def update_models(self, model_names: List[str],
+                      on_progress: Optional[Callable[[Dict[str, PullProgress]], None]] = None,
+                      plans: Optional[Dict[str, PullPlan]] = None) -> Dict[str, bool]:
+        """Actualiza varios modelos en paralelo con una sola consulta al catálogo.
+
+        `plans` reutiliza un plan_updates() ya calculado (p. ej. el que se mostró al
+        usuario). Retorna {modelo actual: éxito}; los que ya están al día cuentan como éxito.
+        """
+        if plans is None:
+            plans = self.plan_updates(model_names)
+        pending = {name: plan.model for name, plan in plans.items() if plan.needs_pull}
+        results = {name: True for name in model_names if name not in pending}
+
+        if not pending:
+            return results
+
+        # Liberar primero los modelos cargados que se van a reemplazar
+        running = set(self.get_running_models())
+        to_stop = [name for name in pending if name in running]
+        if to_stop:
+            self.stop_models(to_stop)
+
+        # Tags ya presentes sin cambios omitidos; primero los de menor delta
+        pulled = self.pull_models(list(dict.fromkeys(pending.values())), on_progress=on_progress)
+        for name, target in pending.items():
+            results[name] = pulled.get(target, False)
+            if results[name]:
+                self.response_cache.invalidate_model(name)
+        return results
+
+    def run_parallel(self, operation: Callable[[str], Any], items: Iterable[str]) -> Dict[str, Any]:
+        """Aplica una operación del manager a cada elemento en hilos (max_concurrent_operations).
+
+        Las excepciones se devuelven en el mapa en lugar de propagarse.
+        """
+        items = list(dict.fromkeys(items))
+        if not items:
+            return {}
+        workers = min(self.max_concurrent_operations, len(items))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ollama-op") as executor:
+            futures = {item: executor.submit(operation, item) for item in items}
+        return {item: future.exception() or future.result() for item, future in futures.items()}
+
+    def stop_models(self, model_names: List[str]) -> Dict[str, bool]:
+        """Detiene varios modelos en paralelo (cada uno con stop_model: CLI y keep_alive=0)"""
+        results = self.run_parallel(self.stop_model, model_names)
+        self.state_cache.invalidate(RUNNING_MODELS, GPU_MEMORY)
+        return {name: result is True for name, result in results.items()}
+
+    def get_models_info(self, model_names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Obtiene /api/show de varios modelos en paralelo"""
+        results = self.run_parallel(self.get_model_info, model_names)
+        return {name: result if isinstance(result, dict) else None for name, result in results.items()}
+
+    def get_transport_stats(self) -> Dict[str, Any]:
+        """Métricas del transporte HTTP: conexiones reutilizadas y latencia por endpoint"""
+        return self.http.get_stats()
+
+    def _probe_deadlines(self) -> Dict[str, float]:
+        """Plazos por sonda, sobreescribibles con `performance.status_probe_deadlines`"""
+        deadlines = dict(STATUS_PROBE_DEADLINES)
+        overrides = config_manager.get_performance_config().get('status_probe_deadlines') or {}
+        for name, value in overrides.items():
+            try:
+                deadlines[name] = float(value)
+            except (TypeError, ValueError):
+                continue
+        return deadlines
+
+    def collect_probes(self, probes: Dict[str, Callable[[Dict[str, Future]], Any]],
+                       deadlines: Dict[str, float]) -> Dict[str, ProbeResult]:
+        """Ejecuta sondas en paralelo; las que superan su plazo o fallan vuelven como `stale`.
+
+        Cada sonda recibe el mapa de futures para poder depender del resultado de otra
+        declarada antes que ella.
+        Las sondas lentas siguen en hilos daemon: no bloquean el snapshot ni la salida del proceso.
+        """
+        futures: Dict[str, Future] = {}
+        started: Dict[str, float] = {}
+        start = time.perf_counter()
+
+        def run(probe: Callable[[Dict[str, Future]], Any], future: Future) -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(probe(futures))
+            except BaseException as e:
+                future.set_exception(e)
+
+        for name, probe in probes.items():
+            started[name] = time.perf_counter()
+            futures[name] = Future()
+            threading.Thread(target=run, args=(probe, futures[name]), name=f"status-probe-{name}",
+                             daemon=True).start()
+
+        results = {}
+        for name, future in futures.items():
+            remaining = max(0.0, deadlines.get(name, 5.0) - (time.perf_counter() - start))
+            try:
+                value = future.result(timeout=remaining)
+                results[name] = ProbeResult(name=name, value=value,
+                                            duration_ms=(time.perf_counter() - started[name]) * 1000)
+            except FutureTimeoutError:
+                results[name] = ProbeResult(name=name, stale=True, error="timeout",
+                                            duration_ms=(time.perf_counter() - started[name]) * 1000)
+            except Exception as e:
+                results[name] = ProbeResult(name=name, stale=True, error=str(e),
+                                            duration_ms=(time.perf_counter() - started[name]) * 1000)
+        return results
+
+    def get_status_summary(self, include_updates: bool = True) -> Dict[str, Any]:
+        """Obtiene resumen completo del estado del sistema como un snapshot concurrente.
+
+        Cada sonda se ejecuta una sola vez; las que no responden a tiempo aparecen
+        en `stale_probes` con valor desconocido (None) en lugar de bloquear el resto.
+        Sin `include_updates` no se consulta el catálogo del registry.
+        """
+        probes = {
+            'health': lambda futures: self.check_ollama_running(),
+            'installed': lambda futures: self.list_installed_models(),
+            'running': lambda futures: self.get_loaded_models(),
+            'updates': lambda futures: self.check_model_updates(installed=futures['installed'].result()),
+            # Reutiliza los modelos de la sonda de /api/ps: una sola consulta por snapshot
+            'vram': lambda futures: self.get_vram_usage(loaded=futures['running'].result()),
+        }
+        if not include_updates:
+            del probes['updates']
+        results = self.collect_probes(probes, self._probe_deadlines())
+
+        installed = results['installed'].value if not results['installed'].stale else None
+        loaded = results['running'].value if not results['running'].stale else None
+        running = [model.name for model in loaded] if loaded is not None else None
+        updates = results['updates'].value if 'updates' in results and not results['updates'].stale else None
+        vram = results['vram'].value if not results['vram'].stale else None
 
         return {
-            "ollama_running": self.check_ollama_running(),
-            "models_installed": len(installed),
-            "models_running": len(running),
-            "models_with_updates": len(updates),
-            "vram_total": vram.total_vram,
-            "vram_used": vram.used_vram,
-            "running_models": running,
-            "installed_models": [m.name for m in installed],
-            "available_updates": updates
+            "ollama_running": results['health'].value if not results['health'].stale else None,
+            "models_installed": len(installed) if installed is not None else None,
+            "models_running": len(running) if running is not None else None,
+            "models_with_updates": len(updates) if updates is not None else None,
+            "vram_total": vram.total_vram if vram is not None else None,
+            "vram_used": vram.used_vram if vram is not None else None,
+            "vram_total_bytes": vram.total_bytes if vram is not None else None,
+            "vram_used_bytes": vram.used_bytes if vram is not None else None,
+            "vram_source": vram.source if vram is not None else None,
+            "running_models": running or [],
+            "installed_models": [m.name for m in installed or []],
+            "available_updates": updates or {},
+            "stale_probes": sorted(name for name, result in results.items() if result.stale),
+            "probe_timings_ms": {name: round(result.duration_ms, 1) for name, result in results.items()},
         }
 
 
-# Instancia global
-ollama_manager = OllamaManager()
+# Instancia global (se construye en el primer uso)
+ollama_manager = LazyObject(OllamaManager, name='ollama_manager')
 
 
 if __name__ == "__main__":
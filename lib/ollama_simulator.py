@@ -0,0 +1,601 @@
+"""
+OllamaSimulator - Servidor Ollama simulado para tests y benchmarks sin GPU
+Implementa /api/tags, /api/ps, /api/pull, /api/generate, /api/chat, /api/show, las rutas
+/v1 compatibles con OpenAI y la descarga con keep_alive=0 (lo que hace `ollama stop`) con latencia de carga, tokens/s,
+capacidad de VRAM y desalojo configurables. OllamaManager lo usa apuntando
+`ollama_host` (o la variable OLLAMA_HOST) a la URL del simulador
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+GIB = 1024 ** 3
+MIB = 1024 ** 2
+
+# Valores por defecto de Ollama
+DEFAULT_KEEP_ALIVE_S = 300
+DEFAULT_MAX_LOADED = 3
+DEFAULT_NUM_PREDICT = 32
+
+# Tokens generados por el simulador (texto determinista)
+VOCABULARY = ("def", "return", "valor", "lista", "modelo", "para", "cada", "elemento", "si", "entonces",
+              "resultado", "función", "clase", "datos", "índice", "total")
+
+_DURATION_RE = re.compile(r'^(-?\d+(?:\.\d+)?)(ms|s|m|h)?$')
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, None: 1}
+
+
+def parse_keep_alive(value: Any, default: float = DEFAULT_KEEP_ALIVE_S) -> Optional[float]:
+    """keep_alive de Ollama a segundos (None = no expira nunca)"""
+    if value is None or value == "":
+        return default
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        seconds = float(value)
+    else:
+        match = _DURATION_RE.match(str(value).strip())
+        if not match:
+            return default
+        seconds = float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+    return None if seconds < 0 else seconds
+
+
+def normalize_name(name: str) -> str:
+    """`qwen` → `qwen:latest`, como hace Ollama"""
+    return name if ':' in name.rsplit('/', 1)[-1] else f"{name}:latest"
+
+
+def count_tokens(text: str) -> int:
+    """Aproximación de tokens de un texto (~4 caracteres por token)"""
+    return max(1, len(text) // 4)
+
+
+def _timestamp(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+@dataclass
+class SimulatedModel:
+    """Modelo instalado o disponible en el registry simulado"""
+    name: str
+    size_bytes: int = 4 * GIB
+    vram_bytes: int = 0  # 0 = igual al tamaño en disco
+    digest: str = ""
+    tokens_per_sec: Optional[float] = None
+    load_seconds: Optional[float] = None
+    family: str = "llama"
+    parameter_size: str = "7B"
+    quantization_level: str = "Q4_K_M"
+    modified_at: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        self.name = normalize_name(self.name)
+        if not self.digest:
+            self.digest = hashlib.sha256(self.name.encode()).hexdigest()
+        if not self.vram_bytes:
+            self.vram_bytes = self.size_bytes
+
+    @property
+    def layers(self) -> List[Tuple[str, int]]:
+        """Capas (digest, bytes) que descarga /api/pull"""
+        weights = hashlib.sha256(f"{self.digest}:weights".encode()).hexdigest()
+        params = hashlib.sha256(f"{self.digest}:params".encode()).hexdigest()
+        return [(f"sha256:{weights}", self.size_bytes), (f"sha256:{params}", 512)]
+
+    @property
+    def details(self) -> Dict[str, Any]:
+        return {"format": "gguf", "family": self.family, "families": [self.family],
+                "parameter_size": self.parameter_size, "quantization_level": self.quantization_level}
+
+    def tag_entry(self) -> Dict[str, Any]:
+        return {"name": self.name, "model": self.name, "modified_at": _timestamp(self.modified_at),
+                "size": self.size_bytes, "digest": self.digest, "details": self.details}
+
+
+@dataclass
+class _Resident:
+    """Modelo cargado en la VRAM simulada"""
+    model: SimulatedModel
+    size_vram: int
+    expires_at: Optional[float]
+    last_used: float
+
+
+class OllamaSimulator:
+    """Servidor HTTP que imita la API de Ollama con tiempos y memoria configurables.
+
+    Las duraciones informadas (load_duration, eval_duration...) son siempre las
+    simuladas; `time_scale` solo escala las esperas reales (0 = respuestas inmediatas).
+    """
+
+    def __init__(self, models: Optional[Iterable[SimulatedModel]] = None,
+                 registry: Optional[Iterable[SimulatedModel]] = None,
+                 vram_bytes: int = 8 * GIB, max_loaded: int = DEFAULT_MAX_LOADED,
+                 load_bytes_per_sec: float = 0.65 * GIB, tokens_per_sec: float = 30.0,
+                 prompt_tokens_per_sec: float = 800.0, pull_bytes_per_sec: float = 500 * MIB,
+                 time_scale: float = 1.0, host: str = "127.0.0.1", port: int = 0,
+                 version: str = "0.5.0-sim"):
+        self.installed: Dict[str, SimulatedModel] = {m.name: m for m in (models or [])}
+        # Modelos que /api/pull puede descargar (por defecto, los instalados)
+        self.registry: Dict[str, SimulatedModel] = {m.name: m for m in (registry or [])}
+        for model in self.installed.values():
+            self.registry.setdefault(model.name, model)
+
+        self.vram_bytes = vram_bytes
+        self.max_loaded = max_loaded
+        self.load_bytes_per_sec = load_bytes_per_sec
+        self.tokens_per_sec = tokens_per_sec
+        self.prompt_tokens_per_sec = prompt_tokens_per_sec
+        self.pull_bytes_per_sec = pull_bytes_per_sec
+        self.time_scale = time_scale
+        self.host = host
+        self.port = port
+        self.version = version
+
+        self.loaded: "OrderedDict[str, _Resident]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Ollama carga un modelo a la vez
+        self._load_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+        # Contadores para las aserciones de los tests
+        self.request_counts: Dict[str, int] = {}
+        self.load_count = 0
+        self.evicted: List[str] = []
+
+    @classmethod
+    def from_app_config(cls, app_config: Any, **kwargs) -> 'OllamaSimulator':
+        """Simulador con los modelos de models.yml (size_gb, vram_gb, tokens_per_sec)"""
+        models = [
+            SimulatedModel(
+                name=model.name,
+                size_bytes=int((model.size_gb or 4.0) * GIB),
+                vram_bytes=int((model.vram_gb or model.size_gb or 4.0) * GIB),
+                tokens_per_sec=model.tokens_per_sec,
+            )
+            for model in app_config.models.values()
+        ]
+        if app_config.vram_budget_gb and 'vram_bytes' not in kwargs:
+            kwargs['vram_bytes'] = int(app_config.vram_budget_gb * GIB)
+        return cls(models=models, **kwargs)
+
+    # -------------------- Ciclo de vida del servidor --------------------
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> str:
+        """Arranca el servidor en un hilo daemon y retorna su URL"""
+        if self._server is None:
+            self._server = ThreadingHTTPServer((self.host, self.port), _SimulatorHandler)
+            self._server.daemon_threads = True
+            self._server.simulator = self
+            self.port = self._server.server_address[1]
+            self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05},
+                                            name="ollama-simulator", daemon=True)
+            self._thread.start()
+        return self.url
+
+    def serve_forever(self) -> None:
+        """Arranca el servidor y bloquea hasta Ctrl+C"""
+        self.start()
+        try:
+            while self._thread is not None and self._thread.is_alive():
+                self._thread.join(0.5)
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self) -> 'OllamaSimulator':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _sleep(self, seconds: float) -> None:
+        if seconds > 0 and self.time_scale > 0:
+            time.sleep(seconds * self.time_scale)
+
+    # -------------------- Memoria simulada --------------------
+    def _expire(self, now: float) -> None:
+        for name in [n for n, r in self.loaded.items() if r.expires_at is not None and r.expires_at <= now]:
+            del self.loaded[name]
+
+    def _evict_lru(self) -> None:
+        name = min(self.loaded, key=lambda n: self.loaded[n].last_used)
+        del self.loaded[name]
+        self.evicted.append(name)
+
+    def used_vram(self) -> int:
+        with self._lock:
+            self._expire(time.time())
+            return sum(r.size_vram for r in self.loaded.values())
+
+    def ensure_loaded(self, model: SimulatedModel, keep_alive: Any = None) -> float:
+        """Carga el modelo (desalojando LRU si no cabe) y retorna la duración simulada de la carga"""
+        keep_alive_s = parse_keep_alive(keep_alive)
+        with self._load_lock:
+            with self._lock:
+                now = time.time()
+                self._expire(now)
+                resident = self.loaded.get(model.name)
+                if resident is not None:
+                    resident.last_used = now
+                    resident.expires_at = None if keep_alive_s is None else now + keep_alive_s
+                    return 0.0
+
+                # Como Ollama: descargar el menos usado hasta que quepa (o todo si no cabe nunca)
+                required = min(model.vram_bytes, self.vram_bytes)
+                while self.loaded and (
+                        sum(r.size_vram for r in self.loaded.values()) + required > self.vram_bytes
+                        or len(self.loaded) >= self.max_loaded):
+                    self._evict_lru()
+
+            load_s = model.load_seconds if model.load_seconds is not None else required / self.load_bytes_per_sec
+            self._sleep(load_s)
+
+            with self._lock:
+                now = time.time()
+                self.loaded[model.name] = _Resident(model=model, size_vram=required, last_used=now,
+                                                    expires_at=None if keep_alive_s is None else now + keep_alive_s)
+                self.load_count += 1
+            return load_s
+
+    def unload(self, name: str) -> bool:
+        with self._lock:
+            return self.loaded.pop(normalize_name(name), None) is not None
+
+    def gpu_fraction(self, model: SimulatedModel) -> float:
+        """Fracción del modelo en GPU (menor que 1 con offload parcial)"""
+        return min(1.0, self.vram_bytes / model.vram_bytes) if model.vram_bytes else 1.0
+
+    # -------------------- Respuestas de la API --------------------
+    def tags(self) -> Dict[str, Any]:
+        return {"models": [m.tag_entry() for m in self.installed.values()]}
+
+    def ps(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.time())
+            models = []
+            for resident in self.loaded.values():
+                entry = resident.model.tag_entry()
+                entry.pop("modified_at")
+                # -1 en Ollama: fecha muy lejana
+                expires = resident.expires_at if resident.expires_at is not None else 10_000_000_000
+                entry.update({"size": resident.model.vram_bytes, "size_vram": resident.size_vram,
+                              "expires_at": _timestamp(expires)})
+                models.append(entry)
+            return {"models": models}
+
+    def show(self, name: str) -> Optional[Dict[str, Any]]:
+        model = self.installed.get(normalize_name(name))
+        if model is None:
+            return None
+        return {
+            "modelfile": f"FROM {model.name}\n",
+            "parameters": "temperature 0.7",
+            "template": "{{ .Prompt }}",
+            "details": model.details,
+            "model_info": {"general.architecture": model.family, "general.parameter_count": 7_000_000_000},
+            "modified_at": _timestamp(model.modified_at),
+        }
+
+    def generate_events(self, model: SimulatedModel, prompt: str, options: Dict[str, Any],
+                        keep_alive: Any, stream: bool, chat: bool) -> Iterator[Dict[str, Any]]:
+        """Fragmentos de una generación; el último incluye las métricas de tiempo (ns)"""
+        load_s = self.ensure_loaded(model, keep_alive)
+        tokens_per_sec = (model.tokens_per_sec or self.tokens_per_sec) * self.gpu_fraction(model)
+
+        prompt_tokens = count_tokens(prompt)
+        prompt_eval_s = prompt_tokens / self.prompt_tokens_per_sec
+        self._sleep(prompt_eval_s)
+
+        num_predict = int(options.get("num_predict") or DEFAULT_NUM_PREDICT)
+        if num_predict < 0:
+            num_predict = DEFAULT_NUM_PREDICT
+        seed = int(hashlib.sha256(prompt.encode()).hexdigest()[:8], 16)
+        words = [VOCABULARY[(seed + i) % len(VOCABULARY)] + " " for i in range(num_predict)]
+
+        def chunk(text: str, done: bool) -> Dict[str, Any]:
+            event: Dict[str, Any] = {"model": model.name, "created_at": _timestamp(time.time()), "done": done}
+            if chat:
+                event["message"] = {"role": "assistant", "content": text}
+            else:
+                event["response"] = text
+            return event
+
+        per_token_s = 1.0 / tokens_per_sec if tokens_per_sec else 0.0
+        if stream:
+            for word in words:
+                self._sleep(per_token_s)
+                yield chunk(word, False)
+            final = chunk("", True)
+        else:
+            self._sleep(per_token_s * len(words))
+            final = chunk("".join(words), True)
+
+        eval_s = per_token_s * len(words)
+        final.update({
+            "done_reason": "length" if len(words) >= num_predict else "stop",
+            "total_duration": int((load_s + prompt_eval_s + eval_s + 0.001) * 1e9),
+            "load_duration": int(load_s * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_eval_s * 1e9),
+            "eval_count": len(words),
+            "eval_duration": int(eval_s * 1e9),
+        })
+        self._touch(model.name, keep_alive)
+        yield final
+
+    def _touch(self, name: str, keep_alive: Any) -> None:
+        """Tras atender una petición el keep_alive empieza a contar de nuevo"""
+        keep_alive_s = parse_keep_alive(keep_alive)
+        with self._lock:
+            resident = self.loaded.get(name)
+            if resident is not None:
+                resident.last_used = time.time()
+                resident.expires_at = None if keep_alive_s is None else time.time() + keep_alive_s
+                if keep_alive_s == 0:
+                    del self.loaded[name]
+
+    def pull_events(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Progreso de /api/pull en el formato de Ollama"""
+        model = self.registry.get(normalize_name(name))
+        yield {"status": "pulling manifest"}
+        if model is None:
+            yield {"error": "pull model manifest: file does not exist"}
+            return
+
+        installed = self.installed.get(model.name)
+        for digest, total in model.layers:
+            already = installed is not None and installed.digest == model.digest
+            step = max(total // 10, 1)
+            completed = total if already else 0
+            yield {"status": f"pulling {digest[7:19]}", "digest": digest, "total": total, "completed": completed}
+            while completed < total:
+                self._sleep(step / self.pull_bytes_per_sec)
+                completed = min(total, completed + step)
+                yield {"status": f"pulling {digest[7:19]}", "digest": digest, "total": total, "completed": completed}
+
+        yield {"status": "verifying sha256 digest"}
+        yield {"status": "writing manifest"}
+        self.installed[model.name] = replace(model, modified_at=time.time())
+        yield {"status": "success"}
+
+
+class _SimulatorHandler(BaseHTTPRequestHandler):
+    """Rutas HTTP del simulador (HTTP/1.1 con keep-alive, NDJSON en bloques)"""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def sim(self) -> OllamaSimulator:
+        return self.server.simulator
+
+    def log_message(self, format, *args):  # noqa: A002 - firma de BaseHTTPRequestHandler
+        pass
+
+    def _count(self, path: str) -> None:
+        with self.sim._lock:
+            self.sim.request_counts[path] = self.sim.request_counts.get(path, 0) + 1
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return {}
+
+    def _send_json(self, status: int, data: Any) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status: int, text: str) -> None:
+        body = text.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunks(self, content_type: str, chunks: Iterable[bytes]) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for data in chunks:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente abortó (p.ej. Ctrl+C en el chat)
+            self.close_connection = True
+
+    def _send_stream(self, events: Iterable[Dict[str, Any]]) -> None:
+        """NDJSON de la API nativa"""
+        self._send_chunks('application/x-ndjson', (json.dumps(event).encode() + b'\n' for event in events))
+
+    def _send_sse(self, events: Iterable[Dict[str, Any]]) -> None:
+        """Server-sent events de la API compatible con OpenAI"""
+        def frames():
+            for event in events:
+                yield b"data: " + json.dumps(event).encode() + b"\n\n"
+            yield b"data: [DONE]\n\n"
+        self._send_chunks('text/event-stream', frames())
+
+    def _not_found_model(self, name: str) -> None:
+        self._send_json(404, {"error": f"model '{name}' not found, try pulling it first"})
+
+    def do_GET(self):
+        self._count(self.path)
+        if self.path == '/':
+            self._send_text(200, "Ollama is running")
+        elif self.path == '/api/version':
+            self._send_json(200, {"version": self.sim.version})
+        elif self.path == '/api/tags':
+            self._send_json(200, self.sim.tags())
+        elif self.path == '/api/ps':
+            self._send_json(200, self.sim.ps())
+        elif self.path == '/v1/models':
+            self._send_json(200, {"object": "list", "data": [
+                {"id": name, "object": "model", "created": int(m.modified_at), "owned_by": "library"}
+                for name, m in self.sim.installed.items()]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_DELETE(self):
+        self._count(self.path)
+        body = self._read_json()
+        name = normalize_name(body.get('model') or body.get('name') or '')
+        if self.path == '/api/delete' and self.sim.installed.pop(name, None) is not None:
+            self.sim.unload(name)
+            self._send_json(200, {})
+        else:
+            self._not_found_model(name)
+
+    def do_POST(self):
+        self._count(self.path)
+        body = self._read_json()
+        name = body.get('model') or body.get('name') or ''
+        stream = body.get('stream', True)
+
+        if self.path == '/api/show':
+            info = self.sim.show(name)
+            if info:
+                self._send_json(200, info)
+            else:
+                self._not_found_model(name)
+        elif self.path == '/api/pull':
+            events = self.sim.pull_events(name)
+            if stream:
+                self._send_stream(events)
+            else:
+                last = {}
+                for last in events:
+                    if 'error' in last:
+                        break
+                self._send_json(500 if 'error' in last else 200, last)
+        elif self.path in ('/api/generate', '/api/chat'):
+            self._handle_generate(name, body, stream, chat=self.path == '/api/chat')
+        elif self.path in ('/v1/chat/completions', '/v1/completions'):
+            self._handle_openai_completion(name, body, chat=self.path == '/v1/chat/completions')
+        elif self.path == '/v1/embeddings':
+            self._handle_openai_embeddings(name, body)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _handle_generate(self, name: str, body: Dict[str, Any], stream: bool, chat: bool) -> None:
+        model = self.sim.installed.get(normalize_name(name))
+        if model is None:
+            self._not_found_model(name)
+            return
+
+        keep_alive = body.get('keep_alive')
+        base = {"model": model.name, "created_at": _timestamp(time.time()), "done": True}
+        if chat:
+            messages = body.get('messages') or []
+            prompt = "\n".join(str(m.get('content', '')) for m in messages)
+            base["message"] = {"role": "assistant", "content": ""}
+        else:
+            messages = None
+            prompt = body.get('prompt') or ''
+            base["response"] = ""
+
+        # keep_alive=0 sin prompt: descargar (equivalente a `ollama stop`)
+        if not prompt and parse_keep_alive(keep_alive) == 0:
+            self.sim.unload(model.name)
+            self._send_json(200, {**base, "done_reason": "unload"})
+            return
+
+        # Sin prompt (o sin mensajes): solo cargar el modelo
+        if not prompt and not messages:
+            load_s = self.sim.ensure_loaded(model, keep_alive)
+            self._send_json(200, {**base, "done_reason": "load", "load_duration": int(load_s * 1e9),
+                                  "total_duration": int(load_s * 1e9)})
+            return
+
+        events = self.sim.generate_events(model, prompt, body.get('options') or {}, keep_alive, bool(stream), chat)
+        if stream:
+            self._send_stream(events)
+        else:
+            self._send_json(200, list(events)[-1])
+
+    # -------------------- API compatible con OpenAI (/v1) --------------------
+    def _openai_error(self, status: int, message: str) -> None:
+        self._send_json(status, {"error": {"message": message, "type": "invalid_request_error"}})
+
+    def _handle_openai_completion(self, name: str, body: Dict[str, Any], chat: bool) -> None:
+        model = self.sim.installed.get(normalize_name(name))
+        if model is None:
+            self._openai_error(404, f"model '{name}' not found")
+            return
+
+        if chat:
+            prompt = "\n".join(str(m.get('content', '')) for m in body.get('messages') or [])
+        else:
+            prompt = str(body.get('prompt') or '')
+        options = {"num_predict": body.get('max_tokens') or DEFAULT_NUM_PREDICT}
+        events = self.sim.generate_events(model, prompt, options, None, bool(body.get('stream')), chat=False)
+        completion_id = f"{'chatcmpl' if chat else 'cmpl'}-{hashlib.sha256(prompt.encode()).hexdigest()[:12]}"
+        created = int(time.time())
+
+        def choice(text: str, finish: Optional[str]) -> Dict[str, Any]:
+            if not chat:
+                return {"index": 0, "text": text, "finish_reason": finish}
+            key = "delta" if body.get('stream') else "message"
+            return {"index": 0, key: {"role": "assistant", "content": text}, "finish_reason": finish}
+
+        if body.get('stream'):
+            object_name = "chat.completion.chunk" if chat else "text_completion"
+            self._send_sse({"id": completion_id, "object": object_name, "created": created, "model": model.name,
+                            "choices": [choice(event["response"], "stop" if event["done"] else None)]}
+                           for event in events)
+            return
+
+        final = list(events)[-1]
+        self._send_json(200, {
+            "id": completion_id, "object": "chat.completion" if chat else "text_completion", "created": created,
+            "model": model.name, "choices": [choice(final["response"], "stop")],
+            "usage": {"prompt_tokens": final["prompt_eval_count"], "completion_tokens": final["eval_count"],
+                      "total_tokens": final["prompt_eval_count"] + final["eval_count"]},
+        })
+
+    def _handle_openai_embeddings(self, name: str, body: Dict[str, Any]) -> None:
+        model = self.sim.installed.get(normalize_name(name))
+        if model is None:
+            self._openai_error(404, f"model '{name}' not found")
+            return
+
+        self.sim.ensure_loaded(model)
+        inputs = body.get('input') or []
+        inputs = [inputs] if isinstance(inputs, str) else list(inputs)
+        data = []
+        for index, text in enumerate(inputs):
+            digest = hashlib.sha256(str(text).encode()).digest()
+            data.append({"object": "embedding", "index": index,
+                         "embedding": [round(b / 255 - 0.5, 4) for b in digest[:8]]})
+        tokens = sum(count_tokens(str(text)) for text in inputs)
+        self._send_json(200, {"object": "list", "data": data, "model": model.name,
+                              "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
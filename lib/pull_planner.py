@@ -0,0 +1,169 @@
+"""
+PullPlanner - Planificación de descargas a nivel de capas
+Compara los manifests locales (/api/tags y ~/.ollama/models) con el manifest remoto
+del registry para saber qué capas y cuántos bytes descargaría cada pull, omitir los
+pulls sin cambios y ordenar el resto de menor a mayor delta
+"""
+
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Any
+
+import requests
+
+from http_transport import HTTPTransport
+
+
+DEFAULT_REGISTRY_HOST = "registry.ollama.ai"
+DEFAULT_NAMESPACE = "library"
+DEFAULT_TAG = "latest"
+MANIFEST_ACCEPT = "application/vnd.docker.distribution.manifest.v2+json"
+
+
+def default_models_dir() -> Path:
+    """Directorio de modelos de Ollama (respeta OLLAMA_MODELS)"""
+    return Path(os.getenv('OLLAMA_MODELS') or Path.home() / '.ollama' / 'models')
+
+
+def parse_model_ref(model_name: str) -> Tuple[str, str, str, str]:
+    """Descompone `[host/][namespace/]modelo[:tag]` en (host, namespace, modelo, tag)"""
+    name, _, tag = model_name.partition(':')
+    parts = name.split('/')
+
+    host, namespace = DEFAULT_REGISTRY_HOST, DEFAULT_NAMESPACE
+    if len(parts) >= 3:
+        host, namespace, model = parts[0], '/'.join(parts[1:-1]), parts[-1]
+    elif len(parts) == 2:
+        namespace, model = parts
+    else:
+        model = parts[0]
+
+    return host, namespace, model, tag or DEFAULT_TAG
+
+
+def manifest_layers(manifest: Dict[str, Any]) -> Dict[str, int]:
+    """Capas de un manifest (incluida la de config) como digest → bytes"""
+    layers = {}
+    for layer in list(manifest.get('layers') or []) + [manifest.get('config') or {}]:
+        digest = layer.get('digest')
+        if digest:
+            layers[digest] = int(layer.get('size', 0))
+    return layers
+
+
+def normalize_digest(digest: Optional[str]) -> Optional[str]:
+    """Digest en hex sin prefijo (`/api/tags` lo omite, los manifests usan `sha256:`)"""
+    if not digest:
+        return None
+    return digest.split(':', 1)[-1].lower()
+
+
+@dataclass
+class PullPlan:
+    """Resultado de planificar el pull de un modelo"""
+    model: str
+    local_digest: Optional[str] = None
+    remote_digest: Optional[str] = None
+    missing_layers: Dict[str, int] = field(default_factory=dict)
+    total_bytes: int = 0
+    error: str = ""
+
+    @property
+    def download_bytes(self) -> int:
+        return sum(self.missing_layers.values())
+
+    @property
+    def up_to_date(self) -> bool:
+        # `ollama list` (fallback) solo muestra los primeros 12 caracteres del digest
+        if self.error or not self.local_digest or not self.remote_digest or len(self.local_digest) < 12:
+            return False
+        return self.remote_digest.startswith(self.local_digest)
+
+    @property
+    def needs_pull(self) -> bool:
+        """Si no se pudo consultar el registry se descarga igualmente (comportamiento previo)"""
+        return not self.up_to_date
+
+
+class PullPlanner:
+    """Planificador de pulls a partir de manifests locales y remotos"""
+
+    def __init__(self, http: HTTPTransport, models_dir: Optional[Path] = None,
+                 registry_base: Optional[str] = None, max_workers: int = 4):
+        self.http = http
+        self.models_dir = Path(models_dir) if models_dir else default_models_dir()
+        # Permite apuntar a un registry local (tests y benchmarks)
+        self.registry_base = registry_base.rstrip('/') if registry_base else None
+        self.max_workers = max(1, max_workers)
+
+    # -------------------- Estado local --------------------
+    def local_manifest_path(self, model_name: str) -> Path:
+        host, namespace, model, tag = parse_model_ref(model_name)
+        return self.models_dir / 'manifests' / host / namespace / model / tag
+
+    def read_local_manifest(self, model_name: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Manifest en disco y su digest (sha256 del fichero); (None, None) si no existe"""
+        try:
+            raw = self.local_manifest_path(model_name).read_bytes()
+            return json.loads(raw), hashlib.sha256(raw).hexdigest()
+        except (OSError, ValueError):
+            return None, None
+
+    def has_blob(self, digest: str) -> bool:
+        """Indica si el blob de la capa ya está en disco"""
+        return (self.models_dir / 'blobs' / digest.replace(':', '-')).exists()
+
+    # -------------------- Estado remoto --------------------
+    def manifest_url(self, model_name: str) -> str:
+        host, namespace, model, tag = parse_model_ref(model_name)
+        base = self.registry_base or f"https://{host}"
+        return f"{base}/v2/{namespace}/{model}/manifests/{tag}"
+
+    def fetch_remote_manifest(self, model_name: str) -> Tuple[Dict[str, Any], str]:
+        """Manifest remoto y su digest; lanza requests.RequestException si falla"""
+        response = self.http.get(self.manifest_url(model_name), endpoint='registry',
+                                 headers={'Accept': MANIFEST_ACCEPT})
+        if response.status_code != 200:
+            raise requests.HTTPError(f"Manifest de {model_name}: HTTP {response.status_code}")
+        return response.json(), hashlib.sha256(response.content).hexdigest()
+
+    # -------------------- Planificación --------------------
+    def plan(self, model_name: str, installed_digest: Optional[str] = None) -> PullPlan:
+        """Planifica el pull de un modelo.
+
+        `installed_digest` es el digest reportado por /api/tags; si no se indica se usa
+        el del manifest en disco.
+        """
+        _, disk_digest = self.read_local_manifest(model_name)
+        plan = PullPlan(model=model_name, local_digest=normalize_digest(installed_digest) or disk_digest)
+
+        try:
+            remote, remote_digest = self.fetch_remote_manifest(model_name)
+        except (requests.RequestException, ValueError) as e:
+            plan.error = str(e)
+            return plan
+
+        plan.remote_digest = remote_digest
+        layers = manifest_layers(remote)
+        plan.total_bytes = sum(layers.values())
+        if not plan.up_to_date:
+            plan.missing_layers = {digest: size for digest, size in layers.items() if not self.has_blob(digest)}
+        return plan
+
+    def plan_many(self, model_names: List[str],
+                  installed_digests: Optional[Dict[str, str]] = None) -> List[PullPlan]:
+        """Planifica varios modelos en paralelo; orden: pendientes de menor a mayor delta,
+        luego los que no se pudieron consultar y al final los que están al día"""
+        installed_digests = installed_digests or {}
+        names = list(dict.fromkeys(model_names))
+        if not names:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names))) as executor:
+            plans = list(executor.map(lambda name: self.plan(name, installed_digests.get(name)), names))
+
+        return sorted(plans, key=lambda p: (p.up_to_date, bool(p.error), p.download_bytes))
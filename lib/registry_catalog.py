@@ -0,0 +1,197 @@
+"""
+RegistryCatalog - Caché en disco del catálogo del registry de Ollama
+Revalidación condicional (ETag / If-Modified-Since), staleness por TTL e índice
+en memoria por nombre base para consultas de actualizaciones y selección de modelos
+"""
+
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import requests
+
+from http_transport import HTTPTransport
+
+
+DEFAULT_REGISTRY_URL = "https://ollama.com/api/models"
+CATALOG_FILENAME = "registry_catalog.json"
+# Tras un fallo del registry con copia stale, no reintentar durante min(TTL, esto)
+DEFAULT_FAILURE_BACKOFF_S = 60.0
+
+
+def build_registry_index(models: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Índice nombre base → tags publicados (en el orden del listado)"""
+    index: Dict[str, List[str]] = {}
+    for model in models:
+        name = model.get('name', '')
+        if ':' in name:
+            index.setdefault(name.split(':')[0], []).append(name)
+    return index
+
+
+def validate_registry_models(payload: Any) -> List[Dict[str, Any]]:
+    """Verifica que el listado del registry sea una lista de objetos (ValueError si no)"""
+    if not isinstance(payload, list) or not all(isinstance(model, dict) for model in payload):
+        raise ValueError("El registry devolvió un listado de modelos con formato inesperado")
+    return payload
+
+
+class RegistryCatalog:
+    """Catálogo del registry persistido en disco y revalidado de forma condicional"""
+
+    def __init__(self, cache_dir: str, registry_url: str = DEFAULT_REGISTRY_URL,
+                 ttl_seconds: float = 3600, http: Optional[HTTPTransport] = None,
+                 failure_backoff_seconds: float = DEFAULT_FAILURE_BACKOFF_S):
+        self.cache_file = Path(cache_dir) / CATALOG_FILENAME
+        self.registry_url = registry_url
+        self.ttl_seconds = ttl_seconds
+        self.failure_backoff_seconds = failure_backoff_seconds
+        self.http = http or HTTPTransport()
+
+        self._lock = threading.Lock()
+        self._models: Optional[List[Dict[str, Any]]] = None
+        self._index: Dict[str, List[str]] = {}
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._fetched_at: float = 0.0
+        self._failed_at: Optional[float] = None
+        self._disk_loaded = False
+
+        # Métricas de revalidación
+        self.downloads = 0
+        self.not_modified = 0
+
+    # -------------------- Persistencia --------------------
+    def _load_from_disk(self) -> None:
+        """Carga la copia en disco (una vez por proceso) si corresponde a la misma URL"""
+        if self._disk_loaded:
+            return
+        self._disk_loaded = True
+
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if not isinstance(data, dict) or data.get('url') != self.registry_url:
+            return
+        try:
+            models = validate_registry_models(data.get('models'))
+        except ValueError:
+            return
+
+        self._set_models(models)
+        self._etag = data.get('etag')
+        self._last_modified = data.get('last_modified')
+        self._fetched_at = float(data.get('fetched_at', 0))
+
+    def _save_to_disk(self) -> None:
+        """Escribe el catálogo de forma atómica"""
+        data = {
+            'url': self.registry_url,
+            'etag': self._etag,
+            'last_modified': self._last_modified,
+            'fetched_at': self._fetched_at,
+            'models': self._models or [],
+        }
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            tmp_file.replace(self.cache_file)
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar el catálogo del registry: {e}")
+
+    def _set_models(self, models: List[Dict[str, Any]]) -> None:
+        self._models = models
+        self._index = build_registry_index(models)
+
+    # -------------------- Revalidación --------------------
+    def is_stale(self) -> bool:
+        """Indica si la copia actual superó su TTL (o no existe)"""
+        return self._models is None or time.time() - self._fetched_at >= self.ttl_seconds
+
+    def _in_failure_backoff(self) -> bool:
+        """Indica si el último fallo del registry es demasiado reciente para reintentar"""
+        if self._failed_at is None:
+            return False
+        return time.time() - self._failed_at < min(self.ttl_seconds, self.failure_backoff_seconds)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Revalida el catálogo contra el registry.
+
+        Envía If-None-Match / If-Modified-Since si hay copia previa; un 304 solo
+        renueva la marca de tiempo. Retorna True si el catálogo quedó fresco.
+        Lanza requests.RequestException si falla y no hay ninguna copia disponible.
+        Tras un fallo con copia stale no se vuelve a consultar el registry hasta pasado
+        min(TTL, failure_backoff_seconds), salvo con `force`.
+        """
+        with self._lock:
+            self._load_from_disk()
+            if not force and not self.is_stale():
+                return True
+            if not force and self._models is not None and self._in_failure_backoff():
+                return False
+
+            headers = {}
+            if self._models is not None:
+                if self._etag:
+                    headers['If-None-Match'] = self._etag
+                if self._last_modified:
+                    headers['If-Modified-Since'] = self._last_modified
+
+            try:
+                response = self.http.get(self.registry_url, endpoint='registry', headers=headers)
+                if response.status_code == 304 and self._models is not None:
+                    self.not_modified += 1
+                elif response.status_code == 200:
+                    self._set_models(validate_registry_models(response.json()))
+                    self._etag = response.headers.get('ETag')
+                    self._last_modified = response.headers.get('Last-Modified')
+                    self.downloads += 1
+                else:
+                    raise requests.HTTPError(f"Registry respondió {response.status_code}")
+            except (requests.RequestException, ValueError):
+                if self._models is None:
+                    raise
+                # Mantener la copia anterior (stale) si el registry no responde
+                self._failed_at = time.time()
+                return False
+
+            self._fetched_at = time.time()
+            self._failed_at = None
+            self._save_to_disk()
+            return True
+
+    # -------------------- Consultas en memoria --------------------
+    def get_models(self) -> List[Dict[str, Any]]:
+        """Listado completo del registry (revalida solo si está stale)"""
+        self.refresh()
+        return list(self._models or [])
+
+    def model_names(self) -> List[str]:
+        """Nombres de todos los modelos publicados"""
+        return [model.get('name', '') for model in self.get_models() if model.get('name')]
+
+    def get_index(self) -> Dict[str, List[str]]:
+        """Índice nombre base → tags publicados"""
+        self.refresh()
+        return self._index
+
+    def tags_for(self, base_name: str) -> List[str]:
+        """Tags publicados para un nombre base"""
+        return list(self.get_index().get(base_name, []))
+
+    def latest_by_base(self) -> Dict[str, str]:
+        """Último tag publicado por nombre base (criterio usado para detectar updates)"""
+        return {base: names[-1] for base, names in self.get_index().items()}
+
+    def invalidate(self) -> None:
+        """Fuerza la revalidación en la próxima consulta"""
+        with self._lock:
+            self._fetched_at = 0.0
+            self._failed_at = None
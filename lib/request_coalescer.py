@@ -0,0 +1,239 @@
+"""
+RequestCoalescer - Agrupación de peticiones idénticas en vuelo (singleflight)
+El autocompletado del editor reintenta y varios paneles piden el mismo resumen con
+milisegundos de diferencia. La primera petición (líder) genera en la GPU; las idénticas
+que llegan mientras sigue en vuelo se adjuntan a esa generación y reciben los mismos
+bloques según llegan. La clave es la de ResponseCache (digest del modelo + ruta +
+parámetros + prompt), así que solo se agrupan peticiones equivalentes
+"""
+
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_FOLLOW_TIMEOUT_S = 300.0
+
+
+class FlightError(Exception):
+    """La generación compartida falló o se interrumpió antes de terminar"""
+
+
+@dataclass
+class CoalescerStats:
+    # Generaciones reales enviadas a Ollama
+    flights: int = 0
+    # Peticiones servidas por la generación de otra
+    coalesced: int = 0
+    max_waiters: int = 0
+    # Tiempo de GPU que habrían costado las peticiones agrupadas
+    saved_seconds: float = 0.0
+
+
+class Flight:
+    """Una generación en vuelo: estado, tipo y bloques publicados por el líder"""
+
+    def __init__(self, key: Optional[str] = None, clock: Callable[[], float] = time.monotonic):
+        self.key = key
+        self._clock = clock
+        self._cond = threading.Condition()
+        self.started_at = clock()
+        self.finished_at: Optional[float] = None
+        self.chunks: List[bytes] = []
+        self.status: Optional[int] = None
+        self.content_type = ""
+        self.streamed = True
+        self.done = False
+        self.error = ""
+        self.error_status = 502
+        self.followers = 0
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or self._clock()) - self.started_at
+
+    @property
+    def succeeded(self) -> bool:
+        return self.done and not self.error
+
+    # -------------------- Líder --------------------
+    def start(self, status: int, content_type: str = "", streamed: bool = True) -> None:
+        """Cabecera de la respuesta de Ollama (los seguidores la esperan antes de responder)"""
+        with self._cond:
+            self.status = status
+            self.content_type = content_type
+            self.streamed = streamed
+            self._cond.notify_all()
+
+    def publish(self, data: bytes) -> None:
+        if not data:
+            return
+        with self._cond:
+            self.chunks.append(data)
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        with self._cond:
+            if not self.done:
+                self.done = True
+                self.finished_at = self._clock()
+            self._cond.notify_all()
+
+    def fail(self, error: str, status: int = 502) -> None:
+        with self._cond:
+            if not self.done:
+                self.done = True
+                self.finished_at = self._clock()
+                self.error = error
+                self.error_status = status
+            self._cond.notify_all()
+
+    def abandon(self) -> bool:
+        """El cliente del líder se fue: cortar solo si nadie más espera esta generación"""
+        with self._cond:
+            if self.followers:
+                return False
+            if not self.done:
+                self.done = True
+                self.finished_at = self._clock()
+                self.error = "Generación cancelada por el cliente"
+            self._cond.notify_all()
+            return True
+
+    # -------------------- Seguidores --------------------
+    def attach(self) -> bool:
+        """Se adjunta un seguidor; falla si la generación ya terminó"""
+        with self._cond:
+            if self.done:
+                return False
+            self.followers += 1
+            return True
+
+    def detach(self) -> None:
+        """Un seguidor se fue antes del final (ya no cuenta como ahorro ni retiene la generación)"""
+        with self._cond:
+            if not self.done:
+                self.followers = max(0, self.followers - 1)
+
+    def wait_started(self, timeout: Optional[float] = None) -> bool:
+        """Espera la cabecera del líder (o su fallo); False si vence el plazo"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.status is not None or self.done, timeout)
+
+    def subscribe(self, timeout: Optional[float] = None) -> Iterator[bytes]:
+        """Bloques ya publicados y después los nuevos según llegan.
+
+        Lanza FlightError si la generación falla o no llega nada en `timeout` segundos.
+        """
+        index = 0
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(lambda: index < len(self.chunks) or self.done, timeout):
+                    raise FlightError(f"Sin datos de la generación en {timeout:.0f}s")
+                pending = self.chunks[index:]
+                finished, error = self.done, self.error
+            for data in pending:
+                yield data
+            index += len(pending)
+            if finished and index >= len(self.chunks):
+                if error:
+                    raise FlightError(error)
+                return
+
+
+class RequestCoalescer:
+    """Registro de generaciones en vuelo por clave; la primera petición de cada clave es la líder"""
+
+    def __init__(self, enabled: bool = True, follow_timeout_s: float = DEFAULT_FOLLOW_TIMEOUT_S,
+                 clock: Callable[[], float] = time.monotonic):
+        self.enabled = enabled
+        self.follow_timeout_s = follow_timeout_s
+        self._clock = clock
+        self._inflight: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = CoalescerStats()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'RequestCoalescer':
+        """Construye el coalescer desde la sección `request_coalescing` de app.yml"""
+        config = config or {}
+        return cls(
+            enabled=bool(config.get('enabled', True)),
+            follow_timeout_s=float(config.get('follow_timeout_seconds', DEFAULT_FOLLOW_TIMEOUT_S)),
+        )
+
+    def join(self, key: Optional[str]) -> Tuple[Flight, bool]:
+        """Retorna (flight, es_líder). Sin clave (o desactivado) siempre se genera aparte"""
+        with self._lock:
+            if key is not None and self.enabled:
+                flight = self._inflight.get(key)
+                if flight is not None and flight.attach():
+                    self.stats.coalesced += 1
+                    self.stats.max_waiters = max(self.stats.max_waiters, flight.followers)
+                    return flight, False
+            flight = Flight(key, self._clock)
+            if key is not None and self.enabled:
+                self._inflight[key] = flight
+            self.stats.flights += 1
+            return flight, True
+
+    def complete(self, flight: Flight) -> None:
+        """El líder terminó: la clave queda libre y se contabiliza el tiempo ahorrado"""
+        if not flight.done:
+            flight.fail("La generación terminó sin completarse")
+        with self._lock:
+            if flight.key is not None and self._inflight.get(flight.key) is flight:
+                del self._inflight[flight.key]
+            if flight.succeeded:
+                self.stats.saved_seconds += flight.elapsed * flight.followers
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+    def stream(self, key: Optional[str], open_upstream: Callable[[], Iterable[bytes]]) -> Iterator[bytes]:
+        """Bloques de la generación de `key`: la abre `open_upstream` solo si no hay otra igual en vuelo"""
+        flight, leader = self.join(key)
+        if not leader:
+            try:
+                yield from flight.subscribe(self.follow_timeout_s)
+            finally:
+                flight.detach()
+            return
+
+        upstream: Optional[Iterator[bytes]] = None
+        try:
+            upstream = iter(open_upstream())
+            flight.start(200)
+            for data in upstream:
+                flight.publish(data)
+                try:
+                    yield data
+                except GeneratorExit:
+                    # El consumidor dejó de leer: seguir generando solo para los seguidores
+                    while not flight.abandon():
+                        data = next(upstream, None)
+                        if data is None:
+                            break
+                        flight.publish(data)
+                    raise
+            flight.finish()
+        except GeneratorExit:
+            flight.finish()
+            raise
+        except Exception as e:
+            flight.fail(str(e))
+            raise
+        finally:
+            if hasattr(upstream, 'close'):
+                upstream.close()
+            self.complete(flight)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Métricas para /gateway/stats"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'in_flight': len(self._inflight),
+                **{**asdict(self.stats), 'saved_seconds': round(self.stats.saved_seconds, 3)},
+            }
@@ -0,0 +1,241 @@
+"""
+ResponseCache - Caché de respuestas deterministas (temperatura 0)
+Clave = digest del modelo + ruta + parámetros + hash del prompt. Nivel en memoria (LRU)
+y nivel en disco acotado por tamaño; los aciertos se reproducen bloque a bloque para
+que los clientes en streaming reciban la misma respuesta. Se invalida por modelo
+cuando OllamaManager descarga o actualiza ese modelo
+"""
+
+import hashlib
+import json
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_MAX_BYTES = 256 * 1024 ** 2
+RESPONSES_DIRNAME = "responses"
+
+# Campos que no cambian el contenido de la respuesta
+_NON_SEMANTIC_FIELDS = {'user', 'keep_alive'}
+
+
+def effective_temperature(payload: Dict[str, Any], default: Optional[float] = None) -> Optional[float]:
+    """Temperatura de una petición OpenAI (`temperature`) u Ollama (`options.temperature`)"""
+    if payload.get('temperature') is not None:
+        return float(payload['temperature'])
+    options = payload.get('options') or {}
+    if options.get('temperature') is not None:
+        return float(options['temperature'])
+    return default
+
+
+def is_cacheable(payload: Dict[str, Any], default_temperature: Optional[float] = None) -> bool:
+    """Solo las peticiones con temperatura 0 (y una única respuesta) son deterministas"""
+    if int(payload.get('n') or 1) != 1:
+        return False
+    return effective_temperature(payload, default_temperature) == 0
+
+
+def cache_key(model_digest: str, route: str, payload: Dict[str, Any]) -> str:
+    """Clave estable: digest del modelo, ruta, parámetros y hash del prompt/mensajes"""
+    params = {k: v for k, v in payload.items()
+              if k not in _NON_SEMANTIC_FIELDS and k not in ('messages', 'prompt', 'input')}
+    prompt = json.dumps([payload.get('messages'), payload.get('prompt'), payload.get('input')],
+                        sort_keys=True, ensure_ascii=False)
+    material = json.dumps({
+        'digest': model_digest,
+        'route': route,
+        'params': params,
+        'prompt': hashlib.sha256(prompt.encode()).hexdigest(),
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def _model_dir_name(model: str) -> str:
+    return hashlib.sha256(model.encode()).hexdigest()[:16]
+
+
+@dataclass
+class CachedResponse:
+    """Respuesta guardada: estado, tipo y bloques tal como llegaron de Ollama"""
+    model: str
+    status: int
+    content_type: str
+    chunks: List[str] = field(default_factory=list)
+    # Tiempo que tardó la generación original (lo que ahorra cada acierto)
+    generation_s: float = 0.0
+    created_at: float = 0.0
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(chunk.encode()) for chunk in self.chunks)
+
+    @property
+    def streamed(self) -> bool:
+        return len(self.chunks) > 1 or self.content_type.startswith('text/event-stream')
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    saved_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """Caché de dos niveles (LRU en memoria + disco acotado) para respuestas deterministas"""
+
+    def __init__(self, cache_dir: Optional[str] = None, memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 disk_max_bytes: int = DEFAULT_DISK_MAX_BYTES, enabled: bool = True):
+        self.enabled = enabled
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.memory_entries = max(0, memory_entries)
+        self.disk_max_bytes = max(0, disk_max_bytes)
+        self._memory: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bytes en disco de la caché (None = sin medir; se escanea el directorio al primer put)
+        self._disk_bytes: Optional[int] = None
+        self.stats = CacheStats()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], cache_root: Path) -> 'ResponseCache':
+        """Construye la caché desde la sección `response_cache` de app.yml"""
+        config = config or {}
+        return cls(
+            cache_dir=str(Path(cache_root) / RESPONSES_DIRNAME),
+            memory_entries=int(config.get('memory_entries', DEFAULT_MEMORY_ENTRIES)),
+            disk_max_bytes=int(float(config.get('disk_max_mb', DEFAULT_DISK_MAX_BYTES / 1024 ** 2)) * 1024 ** 2),
+            enabled=bool(config.get('enabled', True)),
+        )
+
+    def _path(self, model: str, key: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / _model_dir_name(model) / f"{key}.json"
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        if not self.memory_entries:
+            return
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, model: str, key: str) -> Optional[CachedResponse]:
+        """Busca en memoria y luego en disco (promoviendo el acierto a memoria)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                self.stats.saved_seconds += entry.generation_s
+                return entry
+
+            path = self._path(model, key)
+            if path is not None and path.exists():
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entry = CachedResponse(**json.load(f))
+                    path.touch()  # mtime = último uso para el desalojo LRU en disco
+                except (OSError, ValueError, TypeError):
+                    entry = None
+                if entry is not None:
+                    self._remember(key, entry)
+                    self.stats.disk_hits += 1
+                    self.stats.saved_seconds += entry.generation_s
+                    return entry
+
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        """Guarda una respuesta completa en ambos niveles"""
+        if not self.enabled or entry.status != 200:
+            return
+        entry.created_at = entry.created_at or time.time()
+        with self._lock:
+            self._remember(key, entry)
+            self.stats.stores += 1
+            path = self._path(entry.model, key)
+            if path is None or entry.size_bytes > self.disk_max_bytes:
+                return
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                replaced = path.stat().st_size if path.exists() else 0
+                tmp_file = path.with_suffix('.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(asdict(entry), f, ensure_ascii=False)
+                written = tmp_file.stat().st_size
+                tmp_file.replace(path)
+            except OSError:
+                return
+            # Total acumulado: el directorio solo se recorre cuando se supera el límite
+            self._disk_bytes += written - replaced
+            if self._disk_bytes > self.disk_max_bytes:
+                self._enforce_disk_limit()
+
+    def _scan_disk(self) -> List[Tuple[float, int, Path]]:
+        """(mtime, tamaño, ruta) de cada respuesta guardada en disco"""
+        files = []
+        for path in self.cache_dir.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _enforce_disk_limit(self) -> None:
+        """Borra las entradas en disco menos usadas hasta quedar bajo `disk_max_bytes`"""
+        files = self._scan_disk()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files, key=lambda item: item[0]):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+                self.stats.evictions += 1
+            except OSError:
+                continue
+        self._disk_bytes = total
+
+    def invalidate_model(self, model: str) -> int:
+        """Descarta las respuestas de un modelo (tras pull/actualización); retorna las de memoria"""
+        with self._lock:
+            keys = [key for key, entry in self._memory.items() if entry.model == model]
+            for key in keys:
+                del self._memory[key]
+            if self.cache_dir is not None:
+                shutil.rmtree(self.cache_dir / _model_dir_name(model), ignore_errors=True)
+                self._disk_bytes = None
+            self.stats.invalidations += 1
+            return len(keys)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Métricas para /gateway/stats"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'memory_entries': len(self._memory),
+                'hit_rate': round(self.stats.hit_rate, 3),
+                **asdict(self.stats),
+            }
@@ -0,0 +1,180 @@
+"""
+StartupBench - Tiempo de arranque en frío del CLI
+Lanza `llm-stack --help` y una consulta de estado en procesos nuevos y guarda las
+medianas en JSON, para comparar ejecuciones y detectar regresiones de arranque
+(imports pesados o trabajo al importar que vuelven a colarse)
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+STARTUP_RESULTS_VERSION = 1
+DEFAULT_STARTUP_REPEATS = 5
+
+# Subida máxima de la mediana antes de considerarla una regresión
+STARTUP_REGRESSION_TOLERANCE = 0.20
+
+LIB_DIR = Path(__file__).resolve().parent
+MAIN_SCRIPT = LIB_DIR / 'main.py'
+
+
+@dataclass
+class StartupCase:
+    """Comando a medir: argumentos del intérprete de Python (relativos a lib/)"""
+    name: str
+    argv: List[str]
+    # `status` sale con 1 si Ollama no responde: sigue siendo una medición válida
+    exit_codes: Tuple[int, ...] = (0,)
+
+    @property
+    def command(self) -> str:
+        return " ".join(self.argv)
+
+
+def default_cases() -> List[StartupCase]:
+    """`llm-stack --help` y `llm-stack status --json` (salud, instalados, cargados y VRAM)"""
+    return [
+        StartupCase('help', [MAIN_SCRIPT.name, '--help']),
+        StartupCase('status', [MAIN_SCRIPT.name, 'status', '--json'], exit_codes=(0, 1)),
+    ]
+
+
+@dataclass
+class StartupResult:
+    """Tiempos de pared de un caso (segundos, proceso completo)"""
+    name: str
+    command: str
+    samples_s: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def median_s(self) -> float:
+        return statistics.median(self.samples_s) if self.samples_s else 0.0
+
+    @property
+    def min_s(self) -> float:
+        return min(self.samples_s) if self.samples_s else 0.0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StartupResult':
+        return cls(name=data.get('name', ''), command=data.get('command', ''),
+                   samples_s=list(data.get('samples_s', [])), errors=data.get('errors', 0))
+
+
+@dataclass
+class StartupReport:
+    """Resultados de una ejecución (serializable a JSON)"""
+    created_at: str
+    python: str = ""
+    repeats: int = DEFAULT_STARTUP_REPEATS
+    results: List[StartupResult] = field(default_factory=list)
+
+    def get(self, name: str) -> Optional[StartupResult]:
+        return next((result for result in self.results if result.name == name), None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {'version': STARTUP_RESULTS_VERSION, **asdict(self)}
+        for item, result in zip(data['results'], self.results):
+            item['median_s'] = round(result.median_s, 4)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StartupReport':
+        return cls(
+            created_at=data.get('created_at', ''),
+            python=data.get('python', ''),
+            repeats=data.get('repeats', DEFAULT_STARTUP_REPEATS),
+            results=[StartupResult.from_dict(item) for item in data.get('results', [])],
+        )
+
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> 'StartupReport':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+class StartupBenchmark:
+    """Mide cada caso en `repeats` procesos nuevos del intérprete"""
+
+    def __init__(self, cases: Optional[List[StartupCase]] = None, repeats: int = DEFAULT_STARTUP_REPEATS,
+                 python: str = sys.executable, timeout_s: float = 60.0,
+                 runner: Callable[..., Any] = subprocess.run,
+                 clock: Callable[[], float] = time.perf_counter,
+                 on_progress: Optional[Callable[[str, int], None]] = None):
+        self.cases = cases if cases is not None else default_cases()
+        self.repeats = max(1, repeats)
+        self.python = python
+        self.timeout_s = timeout_s
+        self._runner = runner
+        self._clock = clock
+        self._on_progress = on_progress
+
+    def environment(self) -> Dict[str, str]:
+        """Entorno de los procesos: lib/ en PYTHONPATH como en el lanzador"""
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(LIB_DIR), env.get('PYTHONPATH')]))
+        return env
+
+    def measure(self, case: StartupCase) -> StartupResult:
+        result = StartupResult(name=case.name, command=case.command)
+        env = self.environment()
+        for repeat in range(1, self.repeats + 1):
+            if self._on_progress:
+                self._on_progress(case.name, repeat)
+            started = self._clock()
+            try:
+                completed = self._runner([self.python, *case.argv], capture_output=True,
+                                         timeout=self.timeout_s, env=env, cwd=str(LIB_DIR))
+            except (OSError, subprocess.TimeoutExpired):
+                result.errors += 1
+                continue
+            result.samples_s.append(round(self._clock() - started, 4))
+            if completed.returncode not in case.exit_codes:
+                result.errors += 1
+        return result
+
+    def run(self) -> StartupReport:
+        report = StartupReport(created_at=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                               python=self.python, repeats=self.repeats)
+        report.results = [self.measure(case) for case in self.cases]
+        return report
+
+
+def compare_startup(current: StartupReport, previous: StartupReport,
+                    tolerance: float = STARTUP_REGRESSION_TOLERANCE) -> List[Dict[str, Any]]:
+    """Compara las medianas caso a caso; regresión si suben más que `tolerance`"""
+    rows = []
+    for result in current.results:
+        before = previous.get(result.name)
+        if before is None or not before.samples_s or not result.samples_s:
+            continue
+        change = (result.median_s - before.median_s) / before.median_s if before.median_s else 0.0
+        rows.append({
+            'name': result.name,
+            'median_s': result.median_s,
+            'previous_median_s': before.median_s,
+            'change': change,
+            'regression': change > tolerance,
+        })
+    return rows
+
+
+def default_startup_path(cache_dir: Path) -> Path:
+    """Ruta por defecto de resultados: config/cache/bench/startup-<fecha>.json"""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return Path(cache_dir) / 'bench' / f'startup-{stamp}.json'
@@ -0,0 +1,150 @@
+"""
+StateCache - Caché en memoria del estado del sistema con TTL por pieza
+Modelos instalados, modelos cargados, salud del servicio, memoria de GPU y versión de Ollama;
+invalidación explícita tras operaciones que cambian el estado
+"""
+
+import time
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, Optional, Tuple
+
+
+# Piezas de estado conocidas
+INSTALLED_MODELS = 'installed_models'
+RUNNING_MODELS = 'running_models'
+SERVICE_HEALTH = 'service_health'
+VERSION = 'version'
+GPU_MEMORY = 'gpu_memory'
+
+# TTL por defecto (segundos) de piezas volátiles; el resto usa cache_ttl_minutes
+DEFAULT_STATE_TTLS: Dict[str, float] = {
+    RUNNING_MODELS: 10,
+    SERVICE_HEALTH: 10,
+    GPU_MEMORY: 10,
+    INSTALLED_MODELS: 300,
+}
+
+# TTL (segundos) de los resultados negativos (`False`): un servicio caído se vuelve a
+# comprobar enseguida, así el estado refleja pronto que acaba de arrancar
+DEFAULT_NEGATIVE_TTLS: Dict[str, float] = {
+    SERVICE_HEALTH: 1,
+}
+
+
+@dataclass
+class CacheEntry:
+    """Valor cacheado con su instante de carga"""
+    value: Any
+    loaded_at: float
+    ttl: float
+
+
+def build_state_ttls(performance: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    """Resuelve los TTL por pieza desde la sección `performance` de app.yml.
+
+    - `cache_ttl_minutes` es el TTL base (p. ej. versión de Ollama).
+    - `state_ttl_seconds` sobreescribe piezas individuales.
+    """
+    performance = performance or {}
+    base = float(performance.get('cache_ttl_minutes', 60)) * 60
+
+    ttls = {VERSION: base}
+    ttls.update({key: min(value, base) for key, value in DEFAULT_STATE_TTLS.items()})
+    for key, value in (performance.get('state_ttl_seconds') or {}).items():
+        try:
+            ttls[str(key)] = float(value)
+        except (TypeError, ValueError):
+            continue
+    ttls['default'] = base
+    return ttls
+
+
+class StateCache:
+    """Caché con TTL independiente por clave; thread-safe"""
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, enabled: bool = True,
+                 clock: Callable[[], float] = time.monotonic,
+                 negative_ttls: Optional[Dict[str, float]] = None):
+        self.ttls = ttls or build_state_ttls(None)
+        self.negative_ttls = dict(DEFAULT_NEGATIVE_TTLS) if negative_ttls is None else negative_ttls
+        self.enabled = enabled
+        self._clock = clock
+        self._entries: Dict[str, CacheEntry] = {}
+        # Generación por clave (y global para invalidate() sin claves): un loader que empezó
+        # antes de una invalidación o un set() no puede reescribir su resultado ya obsoleto
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_performance_config(cls, performance: Optional[Dict[str, Any]]) -> 'StateCache':
+        """Construye la caché a partir de la sección `performance` de app.yml"""
+        performance = performance or {}
+        return cls(ttls=build_state_ttls(performance), enabled=bool(performance.get('cache_enabled', True)))
+
+    def ttl_for(self, key: str, value: Any = None) -> float:
+        """TTL configurado para una pieza de estado (más corto si `value` es un resultado negativo)"""
+        ttl = self.ttls.get(key, self.ttls.get('default', 0))
+        if value is False and key in self.negative_ttls:
+            return min(ttl, self.negative_ttls[key])
+        return ttl
+
+    def _generation(self, key: str) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(key, 0)
+
+    def _bump(self, key: str) -> None:
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def _entry(self, key: str, value: Any) -> CacheEntry:
+        return CacheEntry(value=value, loaded_at=self._clock(), ttl=self.ttl_for(key, value))
+
+    def is_fresh(self, key: str) -> bool:
+        """Indica si la pieza está cacheada y no ha expirado"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and self._clock() - entry.loaded_at < entry.ttl
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Devuelve el valor cacheado o lo recarga si expiró.
+
+        Si el loader lanza una excepción no se cachea nada y la excepción se propaga.
+        Si la clave se invalida (o se fija) mientras el loader está en curso, su resultado
+        se devuelve al llamador pero no se guarda.
+        """
+        generation = None
+        if self.enabled:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and self._clock() - entry.loaded_at < entry.ttl:
+                    self.hits += 1
+                    return entry.value
+                self.misses += 1
+                generation = self._generation(key)
+
+        value = loader()
+
+        if self.enabled:
+            with self._lock:
+                if self._generation(key) == generation:
+                    self._entries[key] = self._entry(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Guarda un valor conocido (p. ej. obtenido como efecto de otra operación)"""
+        if self.enabled:
+            with self._lock:
+                self._bump(key)
+                self._entries[key] = self._entry(key, value)
+
+    def invalidate(self, *keys: str) -> None:
+        """Invalida las piezas indicadas (todas si no se indica ninguna)"""
+        with self._lock:
+            if not keys:
+                self._entries.clear()
+                self._epoch += 1
+            for key in keys:
+                self._bump(key)
+                self._entries.pop(key, None)
@@ -0,0 +1,188 @@
+"""
+Tracing - Spans de las operaciones calientes de OllamaManager
+Cada llamada a subprocess (`_run_command`), cada petición HTTP del transporte y las
+operaciones principales del gestor se miden en un span con nombre (duración, tamaño
+del payload y resultado). Los agregados por operación están siempre disponibles; con
+`--trace out.json` se guardan además los eventos en formato Chrome trace
+(chrome://tracing, Perfetto)
+
+Las peticiones HTTP con `stream=True` (/api/pull, /api/generate en streaming, el
+proxy del gateway) cierran su span al recibir las cabeceras: miden el tiempo hasta
+la respuesta, no la descarga del cuerpo, y no llevan `response_bytes`. Se marcan
+con `stream: true` en la traza; la duración completa queda en el span de la
+operación del gestor que consume el stream (p. ej. OllamaManager.pull_model)
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+# Eventos guardados como máximo mientras la traza está activa
+DEFAULT_MAX_EVENTS = 50000
+
+OK = 'ok'
+ERROR = 'error'
+
+
+def result_failed(result: Any) -> bool:
+    """Resultado fallido según las convenciones del gestor: False o un objeto con success=False"""
+    return result is False or getattr(result, 'success', True) is False
+
+
+@dataclass
+class Span:
+    """Operación medida; `args` acaba en el evento de la traza"""
+    name: str
+    category: str
+    start: float
+    args: Dict[str, Any] = field(default_factory=dict)
+    outcome: str = OK
+    duration: float = 0.0
+    thread_id: int = 0
+
+    def fail(self, error: Any = None) -> None:
+        self.outcome = ERROR
+        if error is not None:
+            self.args['error'] = str(error)
+
+
+@dataclass
+class OperationStats:
+    """Tiempos acumulados de una operación"""
+    count: int = 0
+    errors: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': round(self.total_s * 1000, 3),
+            'avg_ms': round(self.total_s * 1000 / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max_s * 1000, 3),
+        }
+
+
+class Tracer:
+    """Registro de spans: agregados por operación y, si está activo, eventos para exportar"""
+
+    def __init__(self, enabled: bool = False, max_events: int = DEFAULT_MAX_EVENTS,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.enabled = enabled
+        self._clock = clock
+        self._origin = clock()
+        self._events: Deque[Span] = deque(maxlen=max_events)
+        self._stats: Dict[str, OperationStats] = {}
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        """Empieza a guardar eventos (los agregados se calculan siempre)"""
+        self.enabled = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._events.clear()
+            self._stats.clear()
+            self._origin = self._clock()
+
+    @contextmanager
+    def span(self, name: str, category: str = 'manager', **args: Any) -> Iterator[Span]:
+        """Mide el bloque; una excepción marca el span como error y se propaga"""
+        span = Span(name=name, category=category, start=self._clock(), args=args,
+                    thread_id=threading.get_ident())
+        try:
+            yield span
+        except BaseException as e:
+            span.fail(type(e).__name__)
+            raise
+        finally:
+            span.duration = self._clock() - span.start
+            self._record(span)
+
+    def traced(self, name: Optional[str] = None, category: str = 'manager',
+               failed: Callable[[Any], bool] = result_failed) -> Callable:
+        """Decorador: un span por llamada; `failed(result)` decide si el resultado cuenta como error"""
+        def decorator(func: Callable) -> Callable:
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, category) as span:
+                    result = func(*args, **kwargs)
+                    if failed(result):
+                        span.fail(getattr(result, 'error', None))
+                    return result
+            return wrapper
+        return decorator
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(span.name, OperationStats())
+            stats.count += 1
+            stats.total_s += span.duration
+            stats.max_s = max(stats.max_s, span.duration)
+            if span.outcome == ERROR:
+                stats.errors += 1
+            if self.enabled:
+                self._events.append(span)
+
+    # -------------------- Consulta y exportación --------------------
+    def aggregate(self) -> Dict[str, Dict[str, Any]]:
+        """Tiempos por operación, de mayor a menor tiempo total"""
+        with self._lock:
+            ordered = sorted(self._stats.items(), key=lambda item: item[1].total_s, reverse=True)
+            return {name: stats.to_dict() for name, stats in ordered}
+
+    def events(self) -> List[Span]:
+        with self._lock:
+            return list(self._events)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Eventos completos ("ph": "X") en microsegundos; los spans anidados se ven por hilo"""
+        pid = os.getpid()
+        events = [
+            {
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': round((span.start - self._origin) * 1e6, 3),
+                'dur': round(span.duration * 1e6, 3),
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': {**span.args, 'outcome': span.outcome},
+            }
+            for span in self.events()
+        ]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'aggregate': self.aggregate()}}
+
+    def export_chrome_trace(self, path: Path) -> int:
+        """Escribe la traza en `path`; retorna el número de eventos"""
+        trace = self.to_chrome_trace()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, default=str)
+        return len(trace['traceEvents'])
+
+
+def payload_size(kwargs: Dict[str, Any]) -> int:
+    """Bytes del cuerpo de una petición de requests (`json` o `data`)"""
+    if kwargs.get('json') is not None:
+        return len(json.dumps(kwargs['json']).encode())
+    data = kwargs.get('data')
+    if isinstance(data, (bytes, str)):
+        return len(data)
+    return 0
+
+
+# Instancia global (como config_manager / ollama_manager)
+tracer = Tracer()
@@ -0,0 +1,157 @@
+"""
+VRAMScheduler - Admisión de modelos por presupuesto de VRAM
+Trata la VRAM declarada (models.yml) o medida (/api/ps) de cada modelo como tamaño
+de ítem, elige el conjunto mínimo de modelos a descargar para que quepa el nuevo y
+rechaza (o recurre a offload parcial) cuando el modelo no cabe nunca
+"""
+
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Dict, List, Optional, Iterable
+
+from vram_telemetry import VRAMUsage, LoadedModel
+from eviction_policy import select_victims
+
+
+GIB = 1024 ** 3
+MIB = 1024 ** 2
+
+# Margen reservado para el contexto/KV cache y otros procesos
+DEFAULT_HEADROOM_BYTES = 512 * MIB
+
+# Acciones de admisión
+LOAD = 'load'
+EVICT_AND_LOAD = 'evict_and_load'
+PARTIAL_OFFLOAD = 'partial_offload'
+REFUSE = 'refuse'
+
+
+@dataclass
+class AdmissionDecision:
+    """Resultado de evaluar la carga de un modelo"""
+    model: str
+    action: str
+    required_bytes: int
+    capacity_bytes: int = 0
+    free_before_bytes: int = 0
+    evict: List[str] = field(default_factory=list)
+    reason: str = ""
+
+    @property
+    def admitted(self) -> bool:
+        return self.action != REFUSE
+
+    @property
+    def gpu_fraction(self) -> float:
+        """Fracción estimada del modelo que queda en GPU (1.0 salvo offload parcial)"""
+        if self.action != PARTIAL_OFFLOAD or not self.required_bytes:
+            return 1.0
+        return max(0.0, min(1.0, self.capacity_bytes / self.required_bytes))
+
+
+class VRAMScheduler:
+    """Planificador de admisión por presupuesto de memoria de GPU"""
+
+    def __init__(self, headroom_bytes: int = DEFAULT_HEADROOM_BYTES, allow_partial_offload: bool = True,
+                 budget_bytes: int = 0):
+        self.headroom_bytes = headroom_bytes
+        self.allow_partial_offload = allow_partial_offload
+        # Presupuesto fijo (global.vram_budget_gb) para cuando no hay telemetría de GPU
+        self.budget_bytes = budget_bytes
+        # Memoria medida por modelo en cargas anteriores (size de /api/ps)
+        self.measured: Dict[str, int] = {}
+
+    def observe(self, loaded: Iterable[LoadedModel]) -> None:
+        """Registra la memoria real de los modelos cargados"""
+        for model in loaded:
+            if model.size_bytes:
+                self.measured[model.name] = model.size_bytes
+
+    def required_bytes(self, model_name: str, declared_gb: Optional[float] = None) -> int:
+        """Memoria que ocupará el modelo: medida si se conoce, si no la declarada"""
+        if model_name in self.measured:
+            return self.measured[model_name]
+        return int((declared_gb or 0) * GIB)
+
+    def capacity(self, vram: VRAMUsage) -> int:
+        """VRAM utilizable por modelos de Ollama (descontando otros procesos y el margen)"""
+        total = vram.total_bytes or self.budget_bytes
+        if not total:
+            return 0
+        other_usage = max(0, vram.used_bytes - vram.models_bytes) if vram.total_bytes else 0
+        return max(0, total - other_usage - self.headroom_bytes)
+
+    def plan(self, model_name: str, required_bytes: int, vram: VRAMUsage,
+             max_loaded: Optional[int] = None, victim_order: Optional[List[str]] = None) -> AdmissionDecision:
+        """Decide cómo cargar `model_name` dado el uso actual de VRAM.
+
+        `victim_order` (de la política de desalojo) fija el orden de preferencia de las
+        víctimas; sin él se elige el conjunto mínimo por tamaño.
+        """
+        loaded = {name: size for name, size in vram.model_vram.items() if name != model_name}
+        # Modelos sin size_vram conocido cuentan con su medida previa
+        for name in vram.models_loaded:
+            if name != model_name and not loaded.get(name):
+                loaded[name] = self.measured.get(name, 0)
+
+        capacity = self.capacity(vram)
+        in_use = sum(loaded.values())
+        free = max(0, capacity - in_use)
+        decision = AdmissionDecision(model=model_name, action=LOAD, required_bytes=required_bytes,
+                                     capacity_bytes=capacity, free_before_bytes=free)
+
+        if model_name in vram.models_loaded:
+            decision.reason = "Ya cargado"
+            return decision
+
+        # Límite de cantidad (max_loaded_models) como restricción adicional
+        min_evictions = max(0, len(loaded) + 1 - max_loaded) if max_loaded else 0
+
+        if not capacity or not required_bytes:
+            # Sin presupuesto o sin tamaño conocido solo se aplica el límite de cantidad
+            decision.evict = self._choose_victims(loaded, 0, min_evictions, victim_order)
+            decision.action = EVICT_AND_LOAD if decision.evict else LOAD
+            decision.reason = "Sin datos de VRAM: solo límite de modelos cargados"
+            return decision
+
+        if required_bytes > capacity:
+            if not self.allow_partial_offload:
+                decision.action = REFUSE
+                decision.reason = "El modelo no cabe en VRAM aunque se descarguen todos los demás"
+                return decision
+            decision.action = PARTIAL_OFFLOAD
+            decision.evict = sorted(loaded)
+            decision.reason = "No cabe completo: se libera toda la VRAM y parte del modelo irá a CPU"
+            return decision
+
+        deficit = max(0, required_bytes - free)
+        decision.evict = self._choose_victims(loaded, deficit, min_evictions, victim_order)
+        decision.action = EVICT_AND_LOAD if decision.evict else LOAD
+        return decision
+
+    def _choose_victims(self, loaded: Dict[str, int], deficit: int, min_count: int,
+                        victim_order: Optional[List[str]]) -> List[str]:
+        if victim_order is None:
+            return self._smallest_set(loaded, deficit, min_count)
+        order = [name for name in victim_order if name in loaded]
+        order += sorted(name for name in loaded if name not in order)
+        return select_victims(order, loaded, deficit, min_count)
+
+    @staticmethod
+    def _smallest_set(loaded: Dict[str, int], deficit: int, min_count: int = 0) -> List[str]:
+        """Conjunto mínimo de modelos a descargar para liberar `deficit` bytes.
+
+        Minimiza primero la cantidad de modelos y después los bytes liberados (menos
+        desperdicio); con pocos modelos cargados la búsqueda exhaustiva es trivial.
+        """
+        if deficit <= 0 and min_count <= 0:
+            return []
+
+        names = sorted(loaded)
+        for count in range(max(1, min_count), len(names) + 1):
+            candidates = [combo for combo in combinations(names, count)
+                          if sum(loaded[name] for name in combo) >= deficit]
+            if candidates:
+                best = min(candidates, key=lambda combo: (sum(loaded[name] for name in combo), combo))
+                return list(best)
+        return names
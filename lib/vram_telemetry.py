@@ -0,0 +1,204 @@
+"""
+VRAMTelemetry - Contabilidad real de VRAM
+Memoria por modelo desde /api/ps (size, size_vram) y memoria total/libre de la GPU
+desde `nvidia-smi --query-gpu`; en Apple Silicon (perfil apple_m3) la memoria es
+unificada y el total sale de `sysctl`
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+import requests
+
+from http_transport import HTTPTransport
+from model_inventory import format_bytes
+
+
+MIB = 1024 ** 2
+
+NVIDIA_SMI_QUERY = [
+    "nvidia-smi",
+    "--query-gpu=index,name,memory.total,memory.used,memory.free",
+    "--format=csv,noheader,nounits",
+]
+MACOS_MEMSIZE_QUERY = ["sysctl", "-n", "hw.memsize"]
+MACOS_WIRED_LIMIT_QUERY = ["sysctl", "-n", "iogpu.wired_limit_mb"]
+
+# Fracción de la RAM unificada que macOS deja usar a la GPU si no hay wired_limit explícito
+UNIFIED_GPU_FRACTION = 0.75
+
+
+@dataclass
+class GPUMemory:
+    """Memoria de una GPU (bytes)"""
+    index: int
+    name: str
+    total_bytes: int
+    used_bytes: int
+    free_bytes: int
+
+
+@dataclass
+class LoadedModel:
+    """Modelo cargado según /api/ps (bytes)"""
+    name: str
+    size_bytes: int = 0
+    size_vram_bytes: int = 0
+    expires_at: str = ""
+
+    @property
+    def offloaded_bytes(self) -> int:
+        """Parte del modelo que quedó en RAM del sistema (offload parcial)"""
+        return max(0, self.size_bytes - self.size_vram_bytes)
+
+
+@dataclass
+class VRAMUsage:
+    """Uso de VRAM en bytes; `source` indica de dónde sale el total"""
+    total_bytes: int
+    used_bytes: int
+    models_loaded: List[str]
+    free_bytes: Optional[int] = None
+    model_vram: Dict[str, int] = field(default_factory=dict)
+    source: str = "api/ps"
+
+    @property
+    def available_bytes(self) -> int:
+        """Memoria libre para cargar modelos (0 si el total es desconocido)"""
+        if self.free_bytes is not None:
+            return max(0, self.free_bytes)
+        return max(0, self.total_bytes - self.used_bytes)
+
+    @property
+    def models_bytes(self) -> int:
+        """VRAM ocupada por los modelos de Ollama"""
+        return sum(self.model_vram.values())
+
+    @property
+    def total_vram(self) -> str:
+        return format_bytes(self.total_bytes) if self.total_bytes else "Desconocido"
+
+    @property
+    def used_vram(self) -> str:
+        return format_bytes(self.used_bytes)
+
+
+def parse_nvidia_smi(output: str) -> List[GPUMemory]:
+    """Parsea la salida CSV (noheader, nounits → MiB) de `nvidia-smi --query-gpu`"""
+    gpus = []
+    for line in output.strip().splitlines():
+        parts = [part.strip() for part in line.split(',')]
+        if len(parts) < 5:
+            continue
+        try:
+            gpus.append(GPUMemory(
+                index=int(parts[0]),
+                name=','.join(parts[1:-3]),
+                total_bytes=int(float(parts[-3]) * MIB),
+                used_bytes=int(float(parts[-2]) * MIB),
+                free_bytes=int(float(parts[-1]) * MIB),
+            ))
+        except ValueError:
+            continue
+    return gpus
+
+
+def parse_ps_response(data: Dict[str, Any]) -> List[LoadedModel]:
+    """Convierte la respuesta JSON de /api/ps en LoadedModel"""
+    models = []
+    for item in data.get('models', []) or []:
+        if not item.get('name'):
+            continue
+        models.append(LoadedModel(
+            name=item['name'],
+            size_bytes=int(item.get('size', 0) or 0),
+            size_vram_bytes=int(item.get('size_vram', 0) or 0),
+            expires_at=item.get('expires_at', '') or '',
+        ))
+    return models
+
+
+def unified_gpu_budget(memsize_output: str, wired_limit_output: str = "") -> int:
+    """Memoria usable por la GPU en memoria unificada (bytes)"""
+    try:
+        wired_limit_mb = int(wired_limit_output.strip() or 0)
+    except ValueError:
+        wired_limit_mb = 0
+    if wired_limit_mb > 0:
+        return wired_limit_mb * MIB
+
+    try:
+        return int(int(memsize_output.strip()) * UNIFIED_GPU_FRACTION)
+    except ValueError:
+        return 0
+
+
+def build_vram_usage(loaded: List[LoadedModel], gpus: Optional[List[GPUMemory]] = None,
+                     unified_total: int = 0) -> VRAMUsage:
+    """Combina /api/ps con la memoria de la GPU en un VRAMUsage numérico"""
+    model_vram = {model.name: model.size_vram_bytes for model in loaded}
+    names = [model.name for model in loaded]
+    models_bytes = sum(model_vram.values())
+
+    if gpus:
+        return VRAMUsage(
+            total_bytes=sum(gpu.total_bytes for gpu in gpus),
+            used_bytes=sum(gpu.used_bytes for gpu in gpus),
+            free_bytes=sum(gpu.free_bytes for gpu in gpus),
+            models_loaded=names,
+            model_vram=model_vram,
+            source="nvidia-smi",
+        )
+
+    if unified_total:
+        return VRAMUsage(
+            total_bytes=unified_total,
+            used_bytes=models_bytes,
+            free_bytes=max(0, unified_total - models_bytes),
+            models_loaded=names,
+            model_vram=model_vram,
+            source="unified",
+        )
+
+    # Sin telemetría de GPU solo se conoce lo que ocupan los modelos
+    return VRAMUsage(total_bytes=0, used_bytes=models_bytes, models_loaded=names, model_vram=model_vram)
+
+
+class VRAMTelemetry:
+    """Lectura de memoria de GPU y de modelos cargados"""
+
+    def __init__(self, http: HTTPTransport, ollama_host: str,
+                 run_command: Callable[..., Tuple[bool, str]], unified_memory: bool = False):
+        self.http = http
+        self.ollama_host = ollama_host
+        self._run_command = run_command
+        self.unified_memory = unified_memory
+
+    def fetch_loaded_models(self) -> List[LoadedModel]:
+        """Lee /api/ps; lanza excepción si falla (el llamador decide si cachear)"""
+        response = self.http.get(f"{self.ollama_host}/api/ps", endpoint='ps')
+        if response.status_code != 200:
+            raise ConnectionError(f"/api/ps respondió {response.status_code}")
+        return parse_ps_response(response.json())
+
+    def read_gpu_memory(self) -> Dict[str, Any]:
+        """Memoria de la GPU: {'gpus': [...]} en NVIDIA o {'unified_total': bytes} en Apple"""
+        if self.unified_memory:
+            ok, memsize = self._run_command(MACOS_MEMSIZE_QUERY, timeout=5)
+            _, wired_limit = self._run_command(MACOS_WIRED_LIMIT_QUERY, timeout=5)
+            return {'gpus': [], 'unified_total': unified_gpu_budget(memsize, wired_limit) if ok else 0}
+
+        ok, output = self._run_command(NVIDIA_SMI_QUERY, timeout=5)
+        return {'gpus': parse_nvidia_smi(output) if ok else [], 'unified_total': 0}
+
+    def snapshot(self, loaded: Optional[List[LoadedModel]] = None,
+                 gpu_memory: Optional[Dict[str, Any]] = None) -> VRAMUsage:
+        """VRAMUsage actual (reutiliza /api/ps y lecturas de GPU si ya se hicieron)"""
+        if loaded is None:
+            try:
+                loaded = self.fetch_loaded_models()
+            except (requests.RequestException, ConnectionError, ValueError):
+                loaded = []
+        if gpu_memory is None:
+            gpu_memory = self.read_gpu_memory()
+        return build_vram_usage(loaded, gpu_memory.get('gpus'), gpu_memory.get('unified_total', 0))